@@ -1,4 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_submodules
 
 
 a = Analysis(
@@ -6,7 +7,9 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('assets', 'assets')],
-    hiddenimports=['PIL', 'PIL._tkinter_finder', 'tkinter', 'tkinter.ttk'],
+    # core/, utils/ y ui/ se importan de forma diferida: declararlos para el análisis estático
+    hiddenimports=['PIL', 'PIL._tkinter_finder', 'tkinter', 'tkinter.ttk']
+                  + collect_submodules('core') + collect_submodules('utils') + collect_submodules('ui'),
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
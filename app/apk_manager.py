@@ -2,9 +2,11 @@ import tkinter as tk
 from tkinter import messagebox, scrolledtext
 from pathlib import Path
 import threading
-import subprocess
 import os
 from ui.components import BotonRedondeado
+from core.install_engine import InstallEngine
+from core.adb_client import ejecutar_adb
+from core.device_inventory import verificar_compatibilidad
 from tkinter import ttk
 
 class APKManager:
@@ -38,7 +40,13 @@ class APKManager:
         # Agregar opción de diagnóstico
         menu.add_command(
             label="Instalar APK en dispositivo",
-            command=lambda: self._ejecutar_instalacion(parent, platform_tools, apk_path, apk_name)
+            command=lambda: self._ejecutar_instalacion(
+                parent, platform_tools, apk_path, apk_name,
+                current_analysis.get('parsed_info') if current_analysis else None)
+        )
+        menu.add_command(
+            label="Instalar APK en todos los dispositivos",
+            command=lambda: self._ejecutar_operacion_flota(parent, platform_tools, "instalacion", apk_name)
         )
 
         # VERIFICAR SI EL PACKAGE ESTÁ INSTALADO ANTES DE MOSTRAR LA OPCIÓN
@@ -58,6 +66,13 @@ class APKManager:
                     state="disabled"
                 )
 
+        if package_name:
+            menu.add_command(
+                label=f"Desinstalar {app_name} de todos los dispositivos",
+                command=lambda: self._ejecutar_operacion_flota(parent, platform_tools, "desinstalacion",
+                                                               app_name, package_name)
+            )
+
         menu.add_command(
             label="Desinstalar paquete personalizado...",
             command=lambda: self._solicitar_paquete_desinstalar(parent, platform_tools, current_analysis)
@@ -70,6 +85,11 @@ class APKManager:
             command=lambda: self._ver_dispositivos_conectados(parent, platform_tools)
         )
 
+        menu.add_command(
+            label="Auditar apps instaladas del dispositivo",
+            command=lambda: self._ejecutar_auditoria(parent, platform_tools)
+        )
+
         menu.add_separator()
         menu.add_command(
             label="🔧 Diagnóstico ADB",
@@ -109,22 +129,16 @@ class APKManager:
             dispositivo = devices[0] if devices else None
 
             # Comando para verificar si el paquete está instalado
-            comando = [str(adb_path)]
+            comando = []
             if dispositivo and dispositivo != "unknown":
                 comando.extend(["-s", dispositivo])
             
             comando.extend(["shell", "pm", "list", "packages", package_name])
             
-            result = subprocess.run(
-                comando,
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=str(platform_path)
-            )
+            codigo, salida = ejecutar_adb(adb_path, comando, timeout=10)
             
             # Si encuentra el paquete en la lista, está instalado
-            if result.returncode == 0 and package_name in result.stdout:
+            if codigo == 0 and package_name in salida:
                 return True
             else:
                 return False
@@ -133,7 +147,8 @@ class APKManager:
             self.logger.log_error(f"Error verificando aplicación instalada: {e}")
             return False
 
-    def _ejecutar_instalacion(self, parent, platform_tools: str, apk_path: Path, apk_name: str):
+    def _ejecutar_instalacion(self, parent, platform_tools: str, apk_path: Path, apk_name: str,
+                              parsed_info: dict = None):
         """Ejecutar instalación de APK"""
         if not platform_tools:
             messagebox.showerror("Error", "Platform-tools no configurado. Ve a Configurar Herramientas.")
@@ -166,18 +181,32 @@ class APKManager:
         dispositivo = devices[0] if devices else None
         dispositivo_info = f"Dispositivo: {dispositivo}"
 
+        # Inventario en caché (un getprop por conexión): modelo y compatibilidad sin más comandos
+        inventario = self.adb_manager.obtener_inventario_dispositivo(platform_tools, dispositivo)
+        if inventario.get("modelo"):
+            dispositivo_info += f" ({inventario['modelo']}, Android {inventario.get('android_version') or '?'})"
+        problemas = verificar_compatibilidad(inventario, parsed_info)
+        advertencia = ""
+        if problemas:
+            advertencia = "\n\n⚠️ Posibles incompatibilidades:\n" + "\n".join(f"• {p}" for p in problemas)
+
         resultado = messagebox.askyesno(
             "Instalar APK",
-            f"¿Instalar {apk_name}?\n\n{dispositivo_info}"
+            f"¿Instalar {apk_name}?\n\n{dispositivo_info}{advertencia}",
+            icon="warning" if problemas else "question"
         )
 
         if resultado:
-            progress_dialog = self._mostrar_dialogo_progreso(parent, "Instalando APK...")
+            progress_dialog, progress, etiqueta = self._mostrar_dialogo_transferencia(parent, "Instalando APK...")
+
+            def callback_progreso(enviados, total, bytes_por_s, eta_s):
+                parent.after(0, lambda: self._actualizar_transferencia(
+                    progress, etiqueta, enviados, total, bytes_por_s, eta_s))
 
             def instalar_thread():
                 try:
-                    # EJECUTAR DIRECTAMENTE PARA DEBUG
-                    success, output = self._ejecutar_instalacion_directa(platform_tools, apk_path, dispositivo)
+                    success, output = self._ejecutar_instalacion_directa(
+                        platform_tools, apk_path, dispositivo, callback_progreso)
                     parent.after(0, lambda: self._procesar_resultado_instalacion(
                         progress_dialog, success, output, dispositivo_info, apk_name))
                 except Exception as e:
@@ -186,48 +215,25 @@ class APKManager:
 
             threading.Thread(target=instalar_thread, daemon=True).start()
 
-    def _ejecutar_instalacion_directa(self, platform_tools: str, apk_path: Path, dispositivo: str = None):
-        """Ejecutar instalación directamente para evitar problemas del servicio"""
+    def _ejecutar_instalacion_directa(self, platform_tools: str, apk_path: Path, dispositivo: str = None,
+                                      callback_progreso=None):
+        """Instalar con el motor de streaming (sesión/incremental) y timeout según el tamaño"""
         try:
-            platform_path = Path(platform_tools)
-            adb_path = platform_path / "adb.exe"
-            if not adb_path.exists():
-                adb_path = platform_path / "adb"
+            engine = InstallEngine(self.logger)
+            success, resultado = engine.instalar(apk_path, platform_tools, dispositivo,
+                                                 callback_progreso=callback_progreso)
+
+            self.logger.log_info(f"Resultado ADB instalación [{resultado['modo']}] - salida: {resultado['salida']}")
+
+            if success:
+                detalle = f"Modo: {resultado['modo']} · {resultado['duracion_s']:.1f}s"
+                if resultado['bytes_por_s']:
+                    detalle += f" · {resultado['bytes_por_s'] / (1024 * 1024):.1f} MB/s"
+                return True, f"✅ Instalación exitosa:\n{resultado['salida']}\n{detalle}"
+            if resultado['salida'].startswith("Tiempo de espera agotado"):
+                return False, f"⏰ Timeout: La instalación superó {resultado['timeout_s']}s"
+            return False, f"❌ Error ADB ({resultado['motivo']}):\n{resultado['salida'] or resultado['motivo']}"
 
-            # Construir comando ADB install -r
-            comando = [str(adb_path)]
-            
-            # Especificar dispositivo si hay uno
-            if dispositivo and dispositivo != "unknown":
-                comando.extend(["-s", dispositivo])
-            
-            # Comando de instalación con -r (reemplazar)
-            comando.extend(["install", "-r", str(apk_path)])
-            
-            self.logger.log_info(f"Ejecutando comando ADB: {' '.join(comando)}")
-            
-            # Ejecutar desde el directorio de platform-tools
-            result = subprocess.run(
-                comando,
-                capture_output=True,
-                text=True,
-                timeout=60,  # Timeout más largo para instalación
-                cwd=str(platform_path)
-            )
-            
-            self.logger.log_info(f"Resultado ADB instalación - stdout: {result.stdout}, stderr: {result.stderr}, returncode: {result.returncode}")
-            
-            if result.returncode == 0:
-                if "Success" in result.stdout or "success" in result.stdout.lower():
-                    return True, f"✅ Instalación exitosa:\n{result.stdout}"
-                else:
-                    return True, f"ℹ️ Comando completado:\n{result.stdout}"
-            else:
-                error_msg = result.stderr if result.stderr else result.stdout
-                return False, f"❌ Error ADB (código {result.returncode}):\n{error_msg}"
-                
-        except subprocess.TimeoutExpired:
-            return False, "⏰ Timeout: La instalación tardó demasiado"
         except Exception as e:
             return False, f"💥 Error ejecutando ADB: {str(e)}"
 
@@ -265,30 +271,20 @@ class APKManager:
         
         # 4. Verificar que ADB funciona
         try:
-            result = subprocess.run(
-                [str(adb_path), "version"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                version_info = result.stdout.split('\n')[0] if result.stdout else "Versión no disponible"
+            codigo, salida = ejecutar_adb(adb_path, ["version"], timeout=10)
+            if codigo == 0:
+                version_info = salida.split('\n')[0] if salida else "Versión no disponible"
                 diagnostico.append(f"✅ ADB funciona: {version_info}")
             else:
-                diagnostico.append(f"❌ ADB no funciona: {result.stderr}")
+                diagnostico.append(f"❌ ADB no funciona: {salida}")
         except Exception as e:
             diagnostico.append(f"❌ Error ejecutando ADB: {str(e)}")
         
         # 5. Verificar dispositivos
         try:
-            result = subprocess.run(
-                [str(adb_path), "devices"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
+            codigo, salida = ejecutar_adb(adb_path, ["devices"], timeout=10)
+            if codigo == 0:
+                lines = salida.strip().split('\n')
                 if len(lines) > 1:
                     devices = [line for line in lines[1:] if line.strip() and 'device' in line]
                     if devices:
@@ -300,7 +296,7 @@ class APKManager:
                 else:
                     diagnostico.append("❌ No hay dispositivos conectados")
             else:
-                diagnostico.append(f"❌ Error verificando dispositivos: {result.stderr}")
+                diagnostico.append(f"❌ Error verificando dispositivos: {salida}")
         except Exception as e:
             diagnostico.append(f"❌ Error verificando dispositivos: {str(e)}")
         
@@ -412,7 +408,7 @@ class APKManager:
                 adb_path = platform_path / "adb"
 
             # Construir comando
-            comando = [str(adb_path)]
+            comando = []
             
             # Especificar dispositivo si hay uno
             if dispositivo and dispositivo != "unknown":
@@ -421,30 +417,22 @@ class APKManager:
             # Comando de desinstalación
             comando.extend(["uninstall", package_name])
             
-            self.logger.log_info(f"Ejecutando comando ADB: {' '.join(comando)}")
+            self.logger.log_info(f"Ejecutando comando ADB: {adb_path} {' '.join(comando)}")
             
-            # Ejecutar desde el directorio de platform-tools
-            result = subprocess.run(
-                comando,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=str(platform_path)
-            )
+            codigo, salida = ejecutar_adb(adb_path, comando, timeout=30)
             
-            self.logger.log_info(f"Resultado ADB - stdout: {result.stdout}, stderr: {result.stderr}, returncode: {result.returncode}")
+            self.logger.log_info(f"Resultado ADB - salida: {salida}, returncode: {codigo}")
             
-            if result.returncode == 0:
-                if "Success" in result.stdout or "success" in result.stdout.lower():
-                    return True, f"✅ Desinstalación exitosa:\n{result.stdout}"
+            if codigo == 0:
+                if "Success" in salida or "success" in salida.lower():
+                    return True, f"✅ Desinstalación exitosa:\n{salida}"
                 else:
-                    return True, f"ℹ️ Comando completado:\n{result.stdout}"
+                    return True, f"ℹ️ Comando completado:\n{salida}"
+            elif salida.startswith("Tiempo de espera agotado"):
+                return False, "⏰ Timeout: El comando ADB tardó demasiado"
             else:
-                error_msg = result.stderr if result.stderr else result.stdout
-                return False, f"❌ Error ADB (código {result.returncode}):\n{error_msg}"
+                return False, f"❌ Error ADB (código {codigo}):\n{salida}"
                 
-        except subprocess.TimeoutExpired:
-            return False, "⏰ Timeout: El comando ADB tardó demasiado"
         except Exception as e:
             return False, f"💥 Error ejecutando ADB: {str(e)}"
 
@@ -789,6 +777,228 @@ class APKManager:
 
         return dialog
 
+    def _ejecutar_operacion_flota(self, parent, platform_tools: str, operacion: str, nombre: str, package_name: str = ""):
+        """Instalar o desinstalar en todos los dispositivos conectados a la vez"""
+        if not platform_tools:
+            messagebox.showerror("Error", "Platform-tools no configurado. Ve a Configurar Herramientas.")
+            return
+
+        success, devices = self.services.get_connected_devices(platform_tools)
+        if not success:
+            messagebox.showerror("Error", f"No se pudo conectar con ADB: {devices}")
+            return
+        if not devices:
+            messagebox.showerror("Error", "No hay dispositivos Android conectados")
+            return
+
+        es_instalacion = operacion == "instalacion"
+        lista = "\n".join(f"• {d}" for d in devices)
+        if es_instalacion:
+            pregunta = f"¿Instalar {nombre} en {len(devices)} dispositivos?\n\n{lista}"
+        else:
+            pregunta = (f"¿Desinstalar {nombre} ({package_name}) de {len(devices)} dispositivos?\n\n{lista}\n\n"
+                        f"Esta acción no se puede deshacer.")
+        if not messagebox.askyesno("Instalar en todos" if es_instalacion else "Desinstalar de todos", pregunta):
+            return
+
+        titulo = "Instalando APK..." if es_instalacion else "Desinstalando aplicación..."
+        progress_dialog, filas = self._mostrar_dialogo_progreso_flota(parent, titulo, devices, es_instalacion)
+
+        def callback_progreso(dispositivo, estado, enviados, total):
+            parent.after(0, lambda: self._actualizar_progreso_flota(filas, dispositivo, estado, enviados, total))
+
+        def operacion_thread():
+            try:
+                if es_instalacion:
+                    ok, reporte = self.services.install_apk_all(platform_tools, devices, callback_progreso)
+                else:
+                    ok, reporte = self.services.uninstall_apk_all(platform_tools, package_name, devices,
+                                                                  callback_progreso)
+                parent.after(0, lambda: self._procesar_resultado_flota(progress_dialog, ok, reporte, nombre))
+            except Exception as e:
+                # 'e' deja de existir al salir del except: fijar el mensaje en el lambda
+                mensaje = str(e)
+                parent.after(0, lambda m=mensaje: self._procesar_error_instalacion(
+                    progress_dialog, m, f"Dispositivos: {len(devices)}"))
+
+        threading.Thread(target=operacion_thread, daemon=True).start()
+
+    def _ejecutar_auditoria(self, parent, platform_tools: str):
+        """Descargar y analizar las apps de terceros del dispositivo (las que no cambiaron salen de la cache)"""
+        if not platform_tools:
+            messagebox.showerror("Error", "Platform-tools no configurado. Ve a Configurar Herramientas.")
+            return
+
+        success, devices = self.services.get_connected_devices(platform_tools)
+        if not success:
+            messagebox.showerror("Error", f"No se pudo conectar con ADB: {devices}")
+            return
+        if not devices:
+            messagebox.showerror("Error", "No hay dispositivos Android conectados")
+            return
+
+        dispositivo = devices[0]
+        if not messagebox.askyesno(
+            "Auditar dispositivo",
+            f"¿Descargar y analizar las apps instaladas en {dispositivo}?\n\n"
+            f"Solo se analizan las apps nuevas o actualizadas desde la última auditoría."
+        ):
+            return
+
+        progress_dialog, progress, etiqueta = self._mostrar_dialogo_transferencia(parent, "Auditando dispositivo...")
+
+        def callback_progreso(paquete, estado, completados, total):
+            parent.after(0, lambda: self._actualizar_progreso_auditoria(
+                progress, etiqueta, paquete, estado, completados, total))
+
+        def auditoria_thread():
+            try:
+                ok, reporte = self.services.audit_device(platform_tools, dispositivo,
+                                                         callback_progreso=callback_progreso)
+                parent.after(0, lambda: self._procesar_resultado_auditoria(progress_dialog, ok, reporte))
+            except Exception as e:
+                mensaje = str(e)
+                parent.after(0, lambda m=mensaje: self._procesar_error_instalacion(
+                    progress_dialog, m, f"Dispositivo: {dispositivo}"))
+
+        threading.Thread(target=auditoria_thread, daemon=True).start()
+
+    def _actualizar_progreso_auditoria(self, progress, etiqueta, paquete: str, estado: str, completados: int, total: int):
+        """Paquete en curso y paquetes terminados (hilo de Tk)"""
+        try:
+            if total and estado in ("completado", "error", "cache"):
+                if str(progress['mode']) != 'determinate':
+                    progress.stop()
+                    progress['mode'] = 'determinate'
+                progress['value'] = completados * 100 / total
+            etiqueta.config(text=f"{paquete}: {estado} ({completados}/{total})")
+        except tk.TclError:
+            # El diálogo ya se cerró
+            pass
+
+    def _procesar_resultado_auditoria(self, progress_dialog, success: bool, reporte: dict):
+        """Mostrar el resumen por paquete de la auditoría"""
+        progress_dialog.destroy()
+        from core.device_audit import DeviceAudit
+        resumen = DeviceAudit.formatear_reporte(reporte)
+        dispositivo_info = f"Dispositivo: {reporte.get('dispositivo', '')}"
+
+        if success:
+            self._mostrar_resultado_exitoso(progress_dialog.master, resumen, dispositivo_info)
+            self.logger.log_info(f"Auditoría completada: {reporte.get('dispositivo')}")
+        else:
+            self._mostrar_resultado_error(progress_dialog.master, resumen, dispositivo_info)
+            self.logger.log_warning(f"Auditoría con errores: {reporte.get('dispositivo', '')}")
+
+    def _mostrar_dialogo_transferencia(self, parent, mensaje: str):
+        """Diálogo de progreso con bytes enviados, velocidad y ETA"""
+        dialog = tk.Toplevel(parent)
+        dialog.title("Procesando")
+        dialog.geometry("340x130")
+        dialog.transient(parent)
+        dialog.grab_set()
+        dialog.configure(bg=self.styles.COLORS['primary_bg'])
+
+        self._centrar_dialogo(dialog, parent)
+
+        tk.Label(dialog, text=mensaje, font=("Segoe UI", 9), bg=self.styles.COLORS['primary_bg'],
+                fg=self.styles.COLORS['text_primary'], pady=12).pack()
+
+        # Indeterminado hasta recibir el primer bloque (create de sesión, modo clásico)
+        progress = ttk.Progressbar(dialog, mode='indeterminate', length=260)
+        progress.pack(pady=4)
+        progress.start(10)
+
+        etiqueta = tk.Label(dialog, text="Preparando...", font=("Segoe UI", 8),
+                           bg=self.styles.COLORS['primary_bg'], fg=self.styles.COLORS['text_primary'])
+        etiqueta.pack(pady=4)
+
+        return dialog, progress, etiqueta
+
+    def _actualizar_transferencia(self, progress, etiqueta, enviados: int, total: int, bytes_por_s: float, eta_s):
+        """Actualizar barra y texto de throughput/ETA (hilo de Tk)"""
+        try:
+            if str(progress['mode']) != 'determinate':
+                progress.stop()
+                progress['mode'] = 'determinate'
+            progress['value'] = enviados * 100 / total if total else 0
+            texto = InstallEngine.formatear_progreso(enviados, total, bytes_por_s, eta_s)
+            if total and enviados >= total:
+                texto += " · instalando..."
+            etiqueta.config(text=texto)
+        except tk.TclError:
+            # El diálogo ya se cerró
+            pass
+
+    def _mostrar_dialogo_progreso_flota(self, parent, mensaje: str, dispositivos: list, determinado: bool):
+        """Diálogo con una barra de progreso por dispositivo"""
+        dialog = tk.Toplevel(parent)
+        dialog.title("Procesando")
+        dialog.transient(parent)
+        dialog.grab_set()
+        dialog.configure(bg=self.styles.COLORS['primary_bg'])
+
+        tk.Label(dialog, text=mensaje, font=("Segoe UI", 9), bg=self.styles.COLORS['primary_bg'],
+                fg=self.styles.COLORS['text_primary'], pady=10).pack()
+
+        filas = {}
+        for dispositivo in dispositivos:
+            fila = tk.Frame(dialog, bg=self.styles.COLORS['primary_bg'])
+            fila.pack(fill="x", padx=15, pady=2)
+
+            tk.Label(fila, text=dispositivo, font=("Consolas", 8), width=22, anchor="w",
+                    bg=self.styles.COLORS['primary_bg'], fg=self.styles.COLORS['text_primary']).pack(side="left")
+
+            progress = ttk.Progressbar(fila, mode='determinate' if determinado else 'indeterminate', length=160)
+            progress.pack(side="left", padx=5)
+            if not determinado:
+                progress.start(10)
+
+            estado = tk.Label(fila, text="En cola", font=("Segoe UI", 8), width=14, anchor="w",
+                             bg=self.styles.COLORS['primary_bg'], fg=self.styles.COLORS['text_primary'])
+            estado.pack(side="left")
+            filas[dispositivo] = (progress, estado)
+
+        tk.Frame(dialog, height=10, bg=self.styles.COLORS['primary_bg']).pack()
+        self._centrar_dialogo(dialog, parent)
+        return dialog, filas
+
+    def _actualizar_progreso_flota(self, filas: dict, dispositivo: str, estado: str, enviados: int, total: int):
+        """Actualizar la fila de un dispositivo (se ejecuta en el hilo de Tk)"""
+        if dispositivo not in filas:
+            return
+        progress, etiqueta = filas[dispositivo]
+        try:
+            if total:
+                progress['value'] = enviados * 100 / total
+            if estado in ("completado", "error"):
+                progress.stop()
+                progress['mode'] = 'determinate'
+                progress['value'] = 100
+                etiqueta.config(text="✅ Completado" if estado == "completado" else "❌ Error",
+                                fg=self.styles.COLORS['success' if estado == "completado" else 'error'])
+            elif estado == "enviando" and total:
+                etiqueta.config(text=f"{enviados * 100 // total}%")
+            else:
+                etiqueta.config(text=estado.capitalize())
+        except tk.TclError:
+            # El diálogo ya se cerró
+            pass
+
+    def _procesar_resultado_flota(self, progress_dialog, success: bool, reporte: dict, nombre: str):
+        """Mostrar el resumen por dispositivo de una operación en flota"""
+        progress_dialog.destroy()
+        from core.device_fleet import DeviceFleet
+        resumen = DeviceFleet.formatear_reporte(reporte)
+        dispositivo_info = f"Dispositivos: {reporte.get('total', 0)}"
+
+        if success:
+            self._mostrar_resultado_exitoso(progress_dialog.master, resumen, dispositivo_info)
+            self.logger.log_info(f"Operación en flota completada: {nombre}")
+        else:
+            self._mostrar_resultado_error(progress_dialog.master, resumen, dispositivo_info)
+            self.logger.log_warning(f"Operación en flota con errores: {nombre}")
+
     def _procesar_error_instalacion(self, progress_dialog, error: str, dispositivo_info: str):
         """Procesar error durante la instalación"""
         progress_dialog.destroy()
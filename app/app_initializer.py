@@ -8,13 +8,15 @@ from pathlib import Path
 import threading
 from tkinter import messagebox
 
+from app.component_registry import ComponentRegistry
+
 class AppInitializer:
     """Clase para manejar la inicialización de la aplicación"""
     
     def __init__(self, root, loading_screen=None):
         self.root = root
         self.loading_screen = loading_screen
-        self.components = {}
+        self.components = ComponentRegistry()
         self.loading_complete = False
     
     def initialize_with_loading(self):
@@ -45,54 +47,81 @@ class AppInitializer:
         self.components['version'] = __version__
     
     def _load_phase_2_core_components(self):
-        """Fase 2: Componentes core"""
-        self.loading_screen.actualizar_progreso(30, "Inicializando componentes core...")
-        from core.tool_detector import ToolDetector
-        from core.apk_analyzer import APKAnalyzer
-        from core.signature_verifier import SignatureVerifier
-        from core.adb_manager import ADBManager
-        
-        self.components['tool_detector'] = ToolDetector()
-        
-        # ✅ CORREGIDO: Pasar el logger a APKAnalyzer si ya está disponible
-        logger = self.components.get('logger')
-        self.components['apk_analyzer'] = APKAnalyzer(
-            self.components['tool_detector'], 
-            logger=logger  # ✅ Pasar el logger si existe
-        )
-        
-        self.components['signature_verifier'] = SignatureVerifier()
-        self.components['adb_manager'] = ADBManager()
-    
+        """Fase 2: Componentes core (registrados, se construyen al primer uso)"""
+        self.loading_screen.actualizar_progreso(30, "Registrando componentes core...")
+        self.components.registrar('tool_detector', self._crear_tool_detector)
+        self.components.registrar('apk_analyzer', self._crear_apk_analyzer)
+        self.components.registrar('signature_verifier', self._crear_signature_verifier)
+        self.components.registrar('adb_manager', self._crear_adb_manager)
+
     def _load_phase_3_utils_components(self):
         """Fase 3: Componentes utils"""
         self.loading_screen.actualizar_progreso(50, "Inicializando componentes utils...")
         from utils.config_manager import ConfigManager
-        from utils.file_utils import FileUtils
         from utils.logger import APKLogger
-        from utils.format_utils import FormatUtils
-        
+        from utils.debug_trace import aplicar_config_trazas
+
+        # Configuración y logger se usan al construir la ventana principal
         self.components['config_manager'] = ConfigManager()
-        self.components['file_utils'] = FileUtils()
-        self.components['logger'] = APKLogger()  # ✅ Logger se crea aquí
-        self.components['format_utils'] = FormatUtils()
-        
-        # ✅ ACTUALIZAR APKAnalyzer con el logger ahora que está disponible
-        if 'apk_analyzer' in self.components:
-            self.components['apk_analyzer'].logger = self.components['logger']
-        
-        # Inicializar PCIDSSAnalyzer si está disponible
-        self._initialize_pci_analyzer()
-    
-    def _initialize_pci_analyzer(self):
+        self.components['logger'] = APKLogger(
+            formato=self.components['config_manager'].obtener_valor("log_formato", "texto")
+        )
+        aplicar_config_trazas(self.components['config_manager'].obtener_valor("trazas", ""))
+        from core.jvm_host import configurar_host_jvm
+        configurar_host_jvm(self.components['config_manager'].obtener_valor("jvm_persistente", True))
+
+        self.components.registrar('file_utils', self._crear_file_utils)
+        self.components.registrar('format_utils', self._crear_format_utils)
+        self.components.registrar('pci_analyzer', self._crear_pci_analyzer)
+
+        # Detección de SDK/JDK en segundo plano: no retrasa la pantalla de carga
+        # (usa el resultado persistido si sigue vigente); un análisis que llega
+        # durante el escaneo espera ese mismo resultado en lugar de repetirlo
+        self.loading_screen.actualizar_progreso(55, "Detectando herramientas en segundo plano...")
+        self.components['tool_detector'].precalentar()
+
+    # ========== FÁBRICAS DE COMPONENTES ==========
+
+    @staticmethod
+    def _crear_tool_detector(components):
+        from core.tool_detector import ToolDetector
+        return ToolDetector(components.get('config_manager'))
+
+    @staticmethod
+    def _crear_apk_analyzer(components):
+        from core.apk_analyzer import APKAnalyzer
+        return APKAnalyzer(components['tool_detector'], logger=components.get('logger'))
+
+    @staticmethod
+    def _crear_signature_verifier(components):
+        from core.signature_verifier import SignatureVerifier
+        return SignatureVerifier()
+
+    @staticmethod
+    def _crear_adb_manager(components):
+        from core.adb_manager import ADBManager
+        return ADBManager()
+
+    @staticmethod
+    def _crear_file_utils(components):
+        from utils.file_utils import FileUtils
+        return FileUtils()
+
+    @staticmethod
+    def _crear_format_utils(components):
+        from utils.format_utils import FormatUtils
+        return FormatUtils()
+
+    @staticmethod
+    def _crear_pci_analyzer(components):
         """Inicializar el analizador PCI DSS dinámicamente"""
         try:
             from core.pci_dss_analyzer import PCIDSSAnalyzer
-            self.components['pci_analyzer'] = PCIDSSAnalyzer()
+            return PCIDSSAnalyzer()
         except ImportError:
             # Si no está disponible, establecer como None
-            self.components['pci_analyzer'] = None
-    
+            return None
+
     def _load_phase_4_setup_components(self):
         """Fase 4: Configuración final"""
         self.loading_screen.actualizar_progreso(60, "Configurando estado de la aplicación...")
@@ -108,10 +137,6 @@ class AppInitializer:
         try:
             self.loading_screen.actualizar_progreso(90, "Finalizando configuración...")
             
-            # ✅ VERIFICACIÓN FINAL: Asegurar que todos los componentes tengan el logger
-            if 'apk_analyzer' in self.components and 'logger' in self.components:
-                self.components['apk_analyzer'].logger = self.components['logger']
-            
             self.loading_complete = True
             self.loading_screen.actualizar_progreso(100, "¡Listo!")
             
@@ -11,34 +11,92 @@ from typing import Dict, Tuple
 import subprocess
 import re
 
+from utils.badging import parsear_badging
+from utils.report_model import ReporteAnalisis
+from utils.json_export import AnalysisExporter, NDJSONWriter
+from utils.debug_trace import obtener_traza
+from utils.timing import MedicionTiempos, EstadisticasEtapas, perfilar
+
+_traza = obtener_traza("analisis")
+
 
 class AppServices:
     """Clase que contiene los servicios de la aplicación"""
 
+    # Secciones de salida cruda de herramientas, en el orden del log
+    SECCIONES_HERRAMIENTAS = (
+        ("aapt", "=== AAPT DUMP BADGING ==="),
+        ("apksigner", "=== APKSIGNER VERIFY ==="),
+        ("jarsigner", "=== JARSIGNER VERIFY ==="),
+    )
+
+    FORMATOS_EXPORTACION = {
+        ".html": "html",
+        ".htm": "html",
+        ".md": "markdown",
+        ".json": "json",
+        ".ndjson": "ndjson",
+    }
+
     def __init__(self, components):
         self.components = components
-        # ✅ CORREGIDO: Asegurar que tenemos referencia a todos los componentes
-        self.apk_analyzer = components.get('apk_analyzer')
-        self.logger = components.get('logger')
-        self.file_utils = components.get('file_utils')
-        self.format_utils = components.get('format_utils')
-        self.config_manager = components.get('config_manager')
-        self.tool_detector = components.get('tool_detector')
-        self.adb_manager = components.get('adb_manager')
-        self.pci_analyzer = components.get('pci_analyzer')
-        
+
         # Estado de la aplicación
         self.apk_path = None
         self.apk_name = None
         self.current_log = ""
         self.current_analysis = {}
+        self.current_report = None
+
+        # Histograma de tiempos por etapa de todos los análisis de la sesión
+        self.estadisticas_tiempos = EstadisticasEtapas()
+
+    # Referencias a componentes: se resuelven en el registro al usarse, de modo
+    # que crear AppServices no fuerza la construcción de los servicios pesados
+    @property
+    def apk_analyzer(self):
+        return self.components.get('apk_analyzer')
+
+    @property
+    def logger(self):
+        return self.components.get('logger')
+
+    @property
+    def file_utils(self):
+        return self.components.get('file_utils')
+
+    @property
+    def format_utils(self):
+        return self.components.get('format_utils')
+
+    @property
+    def config_manager(self):
+        return self.components.get('config_manager')
+
+    @property
+    def tool_detector(self):
+        return self.components.get('tool_detector')
+
+    @property
+    def adb_manager(self):
+        return self.components.get('adb_manager')
+
+    @property
+    def pci_analyzer(self):
+        return self.components.get('pci_analyzer')
 
     def analyze_apk(self, apk_path):
+        """Ejecutar análisis completo del APK (perfilado con cProfile si se lanzó con --profile)"""
+        with perfilar(f"analisis_{Path(apk_path).name}"):
+            return self._ejecutar_analisis(apk_path)
+
+    def _ejecutar_analisis(self, apk_path):
         """Ejecutar análisis completo del APK - CORREGIDO para jarsigner"""
         try:
             if not self.apk_analyzer:
                 return False, "APK Analyzer no disponible"
                 
+            tiempos = MedicionTiempos()
             apk_path_obj = Path(apk_path)
             self.apk_path = apk_path_obj
             self.apk_name = apk_path_obj.name
@@ -47,43 +105,56 @@ class AppServices:
             self.components['apk_path'] = self.apk_path
             self.components['apk_name'] = self.apk_name
             
-            config = self._get_tools_config()
+            with tiempos.etapa("configuracion"):
+                config = self._get_tools_config()
             
             # ✅ CORREGIDO: No requerir herramientas para análisis básico
             if not config.get("build_tools"):
                 self.logger.log_warning("Build-tools no configurado, usando análisis básico")
             
             # Ejecutar análisis
-            print("🛠️  EJECUTANDO HERRAMIENTAS...")
-            results = self.apk_analyzer.analizar_apk_completo(apk_path_obj, config)
+            if _traza.activa:
+                _traza("🛠️  EJECUTANDO HERRAMIENTAS...")
+            results = self.apk_analyzer.analizar_apk_completo(apk_path_obj, config, tiempos)
             
             # ✅ CORREGIDO: VERIFICAR Y EJECUTAR JARSIGNER MANUALMENTE SI FALTA
             if 'jarsigner' not in results or not results['jarsigner'] or "no disponible" in str(results.get('jarsigner', '')).lower():
-                print("🛠️  Ejecutando jarsigner manualmente...")
-                results['jarsigner'] = self._ejecutar_jarsigner_manual(apk_path_obj, config)
+                if _traza.activa:
+                    _traza("🛠️  Ejecutando jarsigner manualmente...")
+                with tiempos.etapa("jarsigner_manual"):
+                    results['jarsigner'] = self._ejecutar_jarsigner_manual(apk_path_obj, config)
             
             # ✅ DEBUG: Mostrar output de herramientas para diagnóstico
-            print("🔍 DEBUG - HERRAMIENTAS EJECUTADAS:")
-            for herramienta, output in results.items():
-                status = "✅" if output and "error" not in str(output).lower() and "no encontrado" not in str(output).lower() else "❌"
-                print(f"   {status} {herramienta}: {str(output)[:100]}...")
+            if _traza.detalle:
+                _traza("HERRAMIENTAS EJECUTADAS:")
+                for herramienta, output in results.items():
+                    status = "✅" if output and "error" not in str(output).lower() and "no encontrado" not in str(output).lower() else "❌"
+                    _traza(f"   {status} {herramienta}: {str(output)[:100]}...")
             
             # ✅ CORREGIDO: Usar el método correcto para parsear información
-            if hasattr(self.apk_analyzer, 'parsear_informacion_apk'):
-                parsed_info = self.apk_analyzer.parsear_informacion_apk(results)
-            else:
-                # Fallback: usar aapt directamente
-                parsed_info = self._parsear_aapt_directo(results.get("aapt", ""))
+            with tiempos.etapa("parseo"):
+                if hasattr(self.apk_analyzer, 'parsear_informacion_apk'):
+                    parsed_info = self.apk_analyzer.parsear_informacion_apk(results)
+                else:
+                    # Fallback: usar aapt directamente
+                    parsed_info = self._parsear_aapt_directo(results.get("aapt", ""))
             
-            print(f"📦 PARSED INFO: {parsed_info}")
+            if _traza.detalle:
+                _traza(f"📦 PARSED INFO: {parsed_info}")
             
             # Parsear información de firma
-            signature_info = self._parse_signature_info(results.get("apksigner", ""), results.get("jarsigner", ""))
-            print(f"🔐 SIGNATURE INFO: {signature_info}")
+            with tiempos.etapa("parseo_firma"):
+                signature_info = self._parse_signature_info(
+                    results.get("apksigner", ""), results.get("jarsigner", ""), results.get("firma_v1")
+                )
+            if _traza.detalle:
+                _traza(f"🔐 SIGNATURE INFO: {signature_info}")
             
             # ✅ CORREGIDO: EJECUTAR PCI DSS USANDO EL MÉTODO CORRECTO
-            pci_analysis = self._ejecutar_pci_dss_directo(parsed_info, signature_info, apk_path_obj)
-            print(f"🛡️  PCI ANALYSIS RESULT: {pci_analysis}")
+            with tiempos.etapa("pci_dss"):
+                pci_analysis = self._ejecutar_pci_dss_directo(parsed_info, signature_info, apk_path_obj)
+            if _traza.detalle:
+                _traza(f"🛡️  PCI ANALYSIS RESULT: {pci_analysis}")
 
             # Guardar análisis actual
             self.current_analysis = {
@@ -97,20 +168,45 @@ class AppServices:
             self.components['current_analysis'] = self.current_analysis
             
             # ✅ GENERAR LOG COMPLETO
-            self.current_log = self._generar_log_completo(results, parsed_info, signature_info, pci_analysis)
+            with tiempos.etapa("generacion_log"):
+                self.current_log = self._generar_log_completo(results, parsed_info, signature_info, pci_analysis)
             self.components['current_log'] = self.current_log
             
             # Log de resultados
             self._log_detection_results(parsed_info, signature_info)
+
+            self._registrar_tiempos(tiempos)
             
             return True, "Análisis completado"
             
         except Exception as e:
             error_msg = f"Error durante el análisis: {str(e)}"
-            print(f"❌ ERROR: {error_msg}")
+            _traza.error(f"❌ ERROR: {error_msg}")
             self.logger.log_error("Error en analyze_apk", e)
             return False, error_msg
 
+    def _registrar_tiempos(self, tiempos: MedicionTiempos):
+        """Guardar los tiempos por etapa en el análisis, el reporte y las estadísticas de la sesión"""
+        tiempos.finalizar()
+        self.estadisticas_tiempos.registrar(tiempos)
+        self.current_analysis['tiempos'] = tiempos.a_dict()
+
+        if self.current_report is not None:
+            seccion = self.current_report.nueva_seccion("tiempos", "⏱️ TIEMPOS POR ETAPA", "bloque", en_log=False)
+            seccion.datos.update(self.current_analysis['tiempos'])
+            for linea in tiempos.lineas():
+                seccion.linea(linea)
+            if self.estadisticas_tiempos.analisis_registrados() > 1:
+                seccion.linea()
+                seccion.linea(f"Sesión ({self.estadisticas_tiempos.analisis_registrados()} análisis):")
+                for linea in self.estadisticas_tiempos.lineas():
+                    seccion.linea(linea)
+
+        self.logger.log_info(
+            f"⏱️ Análisis de {self.apk_name} en {tiempos.total_s() * 1000:.0f} ms: "
+            + ", ".join(f"{nombre}={seg * 1000:.0f}ms" for nombre, seg in tiempos.etapas)
+        )
+
     def _ejecutar_jarsigner_manual(self, apk_path: Path, config: dict) -> str:
         """Ejecutar jarsigner manualmente si no está en los resultados"""
         try:
@@ -149,23 +245,29 @@ class AppServices:
             # ✅ VERIFICAR SI EXISTE EL ANALIZADOR PCI DSS EN COMPONENTES
             pci_analyzer = self.components.get('pci_analyzer')
             if not pci_analyzer:
-                print("❌ PCI Analyzer no encontrado en componentes")
+                if _traza.activa:
+                    _traza("❌ PCI Analyzer no encontrado en componentes")
                 return self._generate_basic_pci_analysis(parsed_info, signature_info)
             
-            print(f"🛡️  PCI Analyzer encontrado: {type(pci_analyzer)}")
+            if _traza.activa:
+                _traza(f"🛡️  PCI Analyzer encontrado: {type(pci_analyzer)}")
             
             # ✅ VERIFICAR MÉTODOS DISPONIBLES - PRIMERO EL QUE FUNCIONABA
             if hasattr(pci_analyzer, 'analizar_cumplimiento_pci'):
-                print("✅ Usando analizar_cumplimiento_pci")
+                if _traza.activa:
+                    _traza("✅ Usando analizar_cumplimiento_pci")
                 resultado = pci_analyzer.analizar_cumplimiento_pci(parsed_info, signature_info, apk_path)
             elif hasattr(pci_analyzer, 'analizar_apk'):
-                print("✅ Usando analizar_apk")
+                if _traza.activa:
+                    _traza("✅ Usando analizar_apk")
                 resultado = pci_analyzer.analizar_apk(parsed_info, signature_info)
             else:
-                print("❌ No se encontraron métodos PCI DSS válidos")
+                if _traza.activa:
+                    _traza("❌ No se encontraron métodos PCI DSS válidos")
                 return self._generate_basic_pci_analysis(parsed_info, signature_info)
             
-            print(f"🛡️  PCI DSS ejecutado correctamente")
+            if _traza.activa:
+                _traza(f"🛡️  PCI DSS ejecutado correctamente")
             
             # ✅ AGREGAR REPORTE COMPLETO AL RESULTADO
             if isinstance(resultado, dict):
@@ -185,45 +287,46 @@ class AppServices:
                     resumen_compacto = pci_analyzer.generar_resumen_compacto(resultado)
                     resultado['resumen_compacto'] = resumen_compacto
                 
-                print(f"🛡️  Hallazgos encontrados: {len(resultado.get('hallazgos', []))}")
-                print(f"🛡️  Permisos sensibles: {len(resultado.get('permisos_sensibles', []))}")
+                if _traza.activa:
+                    _traza(f"🛡️  Hallazgos encontrados: {len(resultado.get('hallazgos', []))}")
+                    _traza(f"🛡️  Permisos sensibles: {len(resultado.get('permisos_sensibles', []))}")
             
             return resultado
             
         except Exception as e:
-            print(f"❌ ERROR ejecutando PCI DSS: {e}")
+            _traza.error(f"❌ ERROR ejecutando PCI DSS: {e}")
             return self._generate_basic_pci_analysis(parsed_info, signature_info)
 
     def _generar_reporte_pci_basico(self, pci_analysis: Dict) -> str:
         """Generar reporte PCI DSS básico si no hay método específico"""
-        reporte = "🛡️  ANÁLISIS PCI DSS BÁSICO\n"
-        reporte += "═" * 45 + "\n"
+        reporte = ["🛡️  ANÁLISIS PCI DSS BÁSICO\n"]
+        reporte.append("═" * 45 + "\n")
         
         # Información general
-        reporte += "📊 INFORMACIÓN GENERAL\n"
-        reporte += "─────────────────────────────────────────────\n"
-        reporte += f"💻 Soporte nativo: No detectado\n"
-        reporte += f"📱 Min SDK: {pci_analysis.get('min_sdk', 'No disponible')}\n\n"
+        reporte.append("📊 INFORMACIÓN GENERAL\n")
+        reporte.append("─────────────────────────────────────────────\n")
+        reporte.append("💻 Soporte nativo: No detectado\n")
+        reporte.append(f"📱 Min SDK: {pci_analysis.get('min_sdk', 'No disponible')}\n\n")
         
         # Permisos sensibles
         permisos_sensibles = pci_analysis.get('permisos_sensibles', [])
-        reporte += "🚨 PERMISOS SENSIBLES\n"
-        reporte += "─────────────────────────────────────────────\n"
+        reporte.append("🚨 PERMISOS SENSIBLES\n")
+        reporte.append("─────────────────────────────────────────────\n")
         if permisos_sensibles:
             for perm in permisos_sensibles:
-                reporte += f"• {perm}\n"
+                reporte.append(f"• {perm}\n")
         else:
-            reporte += "No se detectaron permisos sensibles\n"
+            reporte.append("No se detectaron permisos sensibles\n")
         
         # Hallazgos
         hallazgos = pci_analysis.get('hallazgos', [])
-        reporte += f"\n📊 ESTADÍSTICAS\n"
-        reporte += "─────────────────────────────────────────────\n"
-        reporte += f"Total de permisos: {pci_analysis.get('total_permisos', 0)}\n"
-        reporte += f"Permisos sensibles: {len(permisos_sensibles)}\n"
-        reporte += f"Hallazgos de seguridad: {len(hallazgos)}\n"
+        reporte.append("\n📊 ESTADÍSTICAS\n")
+        reporte.append("─────────────────────────────────────────────\n")
+        reporte.append(f"Total de permisos: {pci_analysis.get('total_permisos', 0)}\n")
+        reporte.append(f"Permisos sensibles: {len(permisos_sensibles)}\n")
+        reporte.append(f"Hallazgos de seguridad: {len(hallazgos)}\n")
         
-        return reporte
+        return "".join(reporte)
 
     def _generate_basic_pci_analysis(self, parsed_info, signature_info):
         """Generar análisis PCI DSS básico si el analyzer no funciona"""
@@ -272,36 +375,36 @@ class AppServices:
             hallazgos.append("Múltiples permisos sensibles detectados")
         
         # Análisis básico
-        reporte = "🛡️  ANÁLISIS PCI DSS BÁSICO\n"
-        reporte += "═" * 45 + "\n"
-        reporte += "📊 ESTADÍSTICAS DE SEGURIDAD\n"
-        reporte += "─────────────────────────────────────────────\n"
-        reporte += f"💻 Soporte nativo: No detectado\n"
-        reporte += f"📱 Min SDK: {parsed_info.get('min_sdk', 'No disponible')}\n\n"
+        reporte = ["🛡️  ANÁLISIS PCI DSS BÁSICO\n"]
+        reporte.append("═" * 45 + "\n")
+        reporte.append("📊 ESTADÍSTICAS DE SEGURIDAD\n")
+        reporte.append("─────────────────────────────────────────────\n")
+        reporte.append("💻 Soporte nativo: No detectado\n")
+        reporte.append(f"📱 Min SDK: {parsed_info.get('min_sdk', 'No disponible')}\n\n")
         
-        reporte += "🚨 PERMISOS SENSIBLES\n"
-        reporte += "─────────────────────────────────────────────\n"
+        reporte.append("🚨 PERMISOS SENSIBLES\n")
+        reporte.append("─────────────────────────────────────────────\n")
         if sensitive_perms:
             for perm in sensitive_perms:
-                reporte += f"• {perm}\n"
+                reporte.append(f"• {perm}\n")
         else:
-            reporte += "No se detectaron permisos sensibles\n"
+            reporte.append("No se detectaron permisos sensibles\n")
         
-        reporte += "\n📊 ESTADÍSTICAS\n"
-        reporte += "─────────────────────────────────────────────\n"
-        reporte += f"Total de permisos: {len(permissions)}\n"
-        reporte += f"Permisos sensibles: {len(sensitive_perms)}\n"
-        reporte += f"Modo debug: {'SÍ' if parsed_info.get('debuggable') else 'NO'}\n"
-        reporte += f"Firma válida: {'SÍ' if signature_info.get('is_valid') else 'NO'}\n"
-        reporte += f"Hallazgos: {len(hallazgos)}\n"
+        reporte.append("\n📊 ESTADÍSTICAS\n")
+        reporte.append("─────────────────────────────────────────────\n")
+        reporte.append(f"Total de permisos: {len(permissions)}\n")
+        reporte.append(f"Permisos sensibles: {len(sensitive_perms)}\n")
+        reporte.append(f"Modo debug: {'SÍ' if parsed_info.get('debuggable') else 'NO'}\n")
+        reporte.append(f"Firma válida: {'SÍ' if signature_info.get('is_valid') else 'NO'}\n")
+        reporte.append(f"Hallazgos: {len(hallazgos)}\n")
         
         if hallazgos:
-            reporte += "\n⚠️  HALLAZGOS DE SEGURIDAD:\n"
+            reporte.append("\n⚠️  HALLAZGOS DE SEGURIDAD:\n")
             for hallazgo in hallazgos:
-                reporte += f"• {hallazgo}\n"
+                reporte.append(f"• {hallazgo}\n")
         
         return {
-            'reporte_completo': reporte,
+            'reporte_completo': "".join(reporte),
             'permisos_totales': len(permissions),
             'permisos_sensibles': sensitive_perms,
             'modo_debug': parsed_info.get('debuggable', False),
@@ -322,88 +425,27 @@ class AppServices:
         if not aapt_output or "error" in aapt_output.lower():
             return parsed_info
             
-        lines = aapt_output.splitlines()
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line.startswith("package:"):
-                self._parse_package_line_directo(line, parsed_info)
-            elif line.startswith("targetSdkVersion:"):
-                parsed_info["target_sdk"] = self._extract_value_directo(line, "targetSdkVersion:")
-            elif line.startswith("sdkVersion:"):
-                parsed_info["min_sdk"] = self._extract_value_directo(line, "sdkVersion:")
-            elif line.startswith("uses-permission:"):
-                self._parse_permission_line_directo(line, parsed_info)
-            elif line.startswith("application-label:") and not parsed_info["app_label"]:
-                parsed_info["app_label"] = self._extract_value_directo(line, "application-label:")
-                parsed_info["app_name"] = self._extract_value_directo(line, "application-label:")
-            
-            if 'application-debuggable' in line.lower():
-                parsed_info["debug_mode"] = True
-                parsed_info["debuggable"] = True
-        
-        parsed_info["package_name"] = parsed_info["package"]
+        datos = parsear_badging(aapt_output)
+        parsed_info["package"] = parsed_info["package_name"] = datos["package"]
+        for campo in ("version_name", "version_code", "target_sdk", "min_sdk", "permissions"):
+            parsed_info[campo] = datos[campo]
+        parsed_info["app_label"] = parsed_info["app_name"] = datos["app_label"]
+        parsed_info["debug_mode"] = parsed_info["debuggable"] = datos["debuggable"]
+        if datos["debuggable"]:
+            parsed_info["build_type"] = "Debug"
         return parsed_info
 
-    def _parse_package_line_directo(self, line: str, parsed: Dict):
-        """Parsear línea de package directamente"""
-        try:
-            name_start = line.find("name='")
-            if name_start != -1:
-                name_end = line.find("'", name_start + 6)
-                if name_end != -1:
-                    parsed["package"] = line[name_start + 6 : name_end]
-                    parsed["package_name"] = line[name_start + 6 : name_end]
-
-            vc_start = line.find("versionCode='")
-            if vc_start != -1:
-                vc_end = line.find("'", vc_start + 13)
-                if vc_end != -1:
-                    parsed["version_code"] = line[vc_start + 13 : vc_end]
-
-            vn_start = line.find("versionName='")
-            if vn_start != -1:
-                vn_end = line.find("'", vn_start + 13)
-                if vn_end != -1:
-                    parsed["version_name"] = line[vn_start + 13 : vn_end]
-        except Exception:
-            pass
-
-    def _parse_permission_line_directo(self, line: str, parsed: Dict):
-        """Parsear línea de permisos directamente"""
-        try:
-            perm_start = line.find("name='")
-            if perm_start != -1:
-                perm_end = line.find("'", perm_start + 6)
-                if perm_end != -1:
-                    permission = line[perm_start + 6 : perm_end]
-                    parsed["permissions"].append(permission)
-        except Exception:
-            pass
-
-    def _extract_value_directo(self, line: str, prefix: str = "") -> str:
-        """Extraer valor directamente"""
-        try:
-            if prefix:
-                line = line.split(prefix, 1)[1].strip()
-            return line.strip().strip("'\"")
-        except Exception:
-            return ""
-
-    def _parse_signature_info(self, apksigner_output: str, jarsigner_output: str) -> Dict:
+    def _parse_signature_info(self, apksigner_output: str, jarsigner_output: str, firma_v1: Dict = None) -> Dict:
         """Parsear información de firma - MEJORADO para extraer empresa"""
         try:
             # Usar signature_verifier si está disponible
             if "signature_verifier" in self.components:
                 return self.components["signature_verifier"].parsear_info_firma(
-                    apksigner_output, jarsigner_output
+                    apksigner_output, jarsigner_output, firma_v1
                 )
             elif hasattr(self.apk_analyzer, 'parsear_informacion_firma'):
                 # Usar el método del analyzer si está disponible
-                return self.apk_analyzer.parsear_informacion_firma(apksigner_output, jarsigner_output)
+                return self.apk_analyzer.parsear_informacion_firma(apksigner_output, jarsigner_output, firma_v1)
             else:
                 # ✅ FALLBACK: Parseo básico si no hay signature_verifier
                 return self._parse_signature_basic(apksigner_output, jarsigner_output)
@@ -444,7 +486,8 @@ class AppServices:
                     parts = line.split("SHA-256 digest:")
                     if len(parts) > 1:
                         cert_hash = parts[1].strip()
-                        print(f"🔍 Hash encontrado: {cert_hash}")
+                        if _traza.activa:
+                            _traza(f"🔍 Hash encontrado: {cert_hash}")
 
                 # ✅ CORREGIDO: Buscar DN del certificado para empresa
                 if "certificate DN:" in line:
@@ -453,7 +496,8 @@ class AppServices:
                         dn_info = parts[1].strip()
                         cert_info = dn_info
                         company_name = self._extract_company_from_dn(dn_info)
-                        print(f"🔍 Empresa encontrada: {company_name}")
+                        if _traza.activa:
+                            _traza(f"🔍 Empresa encontrada: {company_name}")
 
         # ✅ CORREGIDO: Convertir set a lista ordenada
         signature_versions = sorted(list(version_set))
@@ -525,69 +569,47 @@ class AppServices:
         }
 
     def _generar_log_completo(self, results, parsed_info, signature_info, pci_analysis):
-        """Generar log completo incluyendo PCI DSS - CORREGIDO para incluir comandos"""
-        print(f"🪵 GENERANDO LOG COMPLETO...")
-        
-        log_content = ""
+        """Generar log completo incluyendo PCI DSS a partir del reporte estructurado"""
+        self.current_report = self._construir_reporte(results, parsed_info, signature_info, pci_analysis)
+        self.components['current_report'] = self.current_report
+        return self.current_report.renderizar_texto()
+
+    def _construir_reporte(self, results, parsed_info, signature_info, pci_analysis) -> ReporteAnalisis:
+        """Construir una sola vez el árbol del reporte del análisis"""
+        reporte = ReporteAnalisis(self.apk_name or "")
         
         # Información básica del APK usando format_utils
         apk_size_mb = self.format_utils.get_apk_size_mb(self.apk_path) if hasattr(self.format_utils, 'get_apk_size_mb') else None
         
-        log_content += self.format_utils.formatear_resumen_apk(
-            parsed_info, signature_info, 
+        self.format_utils.construir_resumen_apk(
+            reporte, parsed_info, signature_info,
             self.apk_name,
             apk_size_mb,
             pci_analysis
         )
         
-        # ✅ CORREGIDO: AGREGAR SECCIÓN DE COMANDOS COMPLETOS
-        log_content += "\n" + "═" * 80 + "\n"
-        log_content += "🔧 COMANDOS EJECUTADOS - LOGS COMPLETOS\n"
-        log_content += "═" * 80 + "\n\n"
+        # ✅ SECCIÓN DE COMANDOS COMPLETOS
+        reporte.nueva_seccion("comandos", "🔧 COMANDOS EJECUTADOS - LOGS COMPLETOS", "bloque")
         
-        # ✅ AÑADIR COMANDOS AAPT COMPLETOS
-        if results.get('aapt'):
-            log_content += "=== AAPT DUMP BADGING ===\n"
-            log_content += "═" * 50 + "\n"
-            log_content += results['aapt'] + "\n\n"
-        else:
-            log_content += "=== AAPT DUMP BADGING ===\n"
-            log_content += "═" * 50 + "\n"
-            log_content += "No disponible\n\n"
+        for clave, titulo in self.SECCIONES_HERRAMIENTAS:
+            seccion = reporte.nueva_seccion(clave, titulo, "comando")
+            seccion.bloque(results.get(clave) or "No disponible")
         
-        # ✅ AÑADIR COMANDOS APKSIGNER COMPLETOS
-        if results.get('apksigner'):
-            log_content += "=== APKSIGNER VERIFY ===\n"
-            log_content += "═" * 50 + "\n"
-            log_content += results['apksigner'] + "\n\n"
-        else:
-            log_content += "=== APKSIGNER VERIFY ===\n"
-            log_content += "═" * 50 + "\n"
-            log_content += "No disponible\n\n"
-        
-        # ✅ AÑADIR COMANDOS JARSIGNER COMPLETOS
-        if results.get('jarsigner'):
-            log_content += "=== JARSIGNER VERIFY ===\n"
-            log_content += "═" * 50 + "\n"
-            log_content += results['jarsigner'] + "\n\n"
-        else:
-            log_content += "=== JARSIGNER VERIFY ===\n"
-            log_content += "═" * 50 + "\n"
-            log_content += "No disponible\n\n"
-        
-        if pci_analysis and isinstance(pci_analysis, dict) and 'reporte_completo' in pci_analysis:
-            # Verificar si el PCI DSS ya está incluido en el resumen formateado
-            pci_en_resumen = "🛡️  RESUMEN PCI DSS" in log_content
-            
-            if not pci_en_resumen:
-                log_content += "═" * 80 + "\n"
-                log_content += "🛡️ ANÁLISIS PCI DSS DETALLADO\n"
-                log_content += "═" * 80 + "\n\n"
-                log_content += pci_analysis['reporte_completo'] + "\n"
-        
-        print(f"🪵 LOG CONTENT GENERADO (primeros 1000 chars): {log_content[:1000]}...")
+        if pci_analysis and isinstance(pci_analysis, dict):
+            # El detalle PCI DSS solo va al log si el resumen no está incluido
+            pci_en_resumen = "resumen_pci" in reporte
+            seccion = reporte.nueva_seccion(
+                "pci_dss", "🛡️ ANÁLISIS PCI DSS DETALLADO", "detalle",
+                en_log=not pci_en_resumen and 'reporte_completo' in pci_analysis
+            )
+            seccion.datos.update({
+                clave: pci_analysis.get(clave)
+                for clave in ("cumplimiento_general", "puntuacion_total", "nivel_riesgo")
+            })
+            if 'reporte_completo' in pci_analysis:
+                seccion.bloque(pci_analysis['reporte_completo'])
         
-        return log_content
+        return reporte
 
     def _log_detection_results(self, parsed_info: Dict, signature_info: Dict):
         """Log de resultados de detección - DEBUG"""
@@ -624,6 +646,11 @@ class AppServices:
     def _get_tools_config(self):
         """Obtener configuración de herramientas"""
         config = self.config_manager.cargar_config()
+        claves = ("build_tools", "platform_tools", "jdk_bin")
+        if all(config.get(clave) for clave in claves):
+            # Rutas configuradas manualmente: no hace falta esperar a la detección
+            return {clave: config[clave] for clave in claves}
+
         detectado = self.tool_detector.detectar_herramientas()
 
         return {
@@ -658,7 +685,35 @@ class AppServices:
     def uninstall_apk(self, platform_tools, package_name, device=None):
         """Desinstalar aplicación"""
         return self.adb_manager.desinstalar_apk(
-            package_name, platform_tools, device
+            platform_tools, package_name, device
+        )
+
+    def install_apk_all(self, platform_tools, devices=None, callback_progreso=None):
+        """Instalar el APK en todos los dispositivos conectados en paralelo"""
+        if not self.apk_path:
+            return False, {"error": "No hay APK seleccionado"}
+
+        from core.device_fleet import DeviceFleet
+        fleet = DeviceFleet(self.adb_manager, self.logger)
+        return fleet.instalar_en_dispositivos(
+            self.apk_path, platform_tools, devices, callback_progreso=callback_progreso
+        )
+
+    def uninstall_apk_all(self, platform_tools, package_name, devices=None, callback_progreso=None):
+        """Desinstalar un paquete de todos los dispositivos conectados en paralelo"""
+        from core.device_fleet import DeviceFleet
+        fleet = DeviceFleet(self.adb_manager, self.logger)
+        return fleet.desinstalar_en_dispositivos(
+            package_name, platform_tools, devices, callback_progreso=callback_progreso
+        )
+
+    def audit_device(self, platform_tools, device, packages=None, forzar=False, callback_progreso=None):
+        """Descargar y analizar las apps instaladas en un dispositivo (solo las que cambiaron)"""
+        from core.device_audit import DeviceAudit
+        auditoria = DeviceAudit(self.adb_manager, self.apk_analyzer, self.logger)
+        return auditoria.auditar_dispositivo(
+            platform_tools, device, packages, config=self._get_tools_config(),
+            forzar=forzar, callback_progreso=callback_progreso
         )
 
     def get_connected_devices(self, platform_tools):
@@ -681,22 +736,95 @@ class AppServices:
         self.apk_name = None
         self.current_log = ""
         self.current_analysis = {}
+        self.current_report = None
 
         # Actualizar componentes
         self.components["apk_path"] = None
         self.components["apk_name"] = None
         self.components["current_log"] = ""
         self.components["current_analysis"] = {}
+        self.components["current_report"] = None
 
     def export_log(self, file_path):
-        """Exportar log a archivo"""
+        """Exportar log a archivo (texto, HTML, Markdown, JSON o NDJSON según la extensión)"""
         try:
+            formato = self.FORMATOS_EXPORTACION.get(Path(file_path).suffix.lower(), "texto")
+            if formato == "json":
+                return AnalysisExporter.exportar_json(self.current_analysis, Path(file_path), self.apk_path)
+            if formato == "ndjson":
+                # NDJSON acumula: cada exportación agrega una línea
+                with NDJSONWriter(Path(file_path)) as writer:
+                    writer.escribir(self.current_analysis, self.apk_path)
+                return True, "Análisis agregado al archivo NDJSON"
             with open(file_path, "w", encoding="utf-8") as f:
-                f.write(self.current_log)
+                if self.current_report and formato != "texto":
+                    self.current_report.escribir(f, formato)
+                else:
+                    f.write(self.current_log)
             return True, "Log exportado correctamente"
         except Exception as e:
             return False, f"Error exportando log: {str(e)}"
 
+    def compare_with(self, analisis_anterior):
+        """Comparar el análisis actual con una versión anterior.
+        
+        ``analisis_anterior`` puede ser un dict de análisis o la ruta a un JSON exportado.
+        El diff se guarda en el análisis actual y sus regresiones ajustan el PCI DSS.
+        """
+        try:
+            if not self.current_analysis:
+                return False, "No hay análisis actual para comparar"
+            
+            if isinstance(analisis_anterior, (str, Path)):
+                exito, analisis_anterior = AnalysisExporter.cargar_json(Path(analisis_anterior))
+                if not exito:
+                    return False, analisis_anterior
+            
+            from core.apk_diff import APKDiff
+            diff = APKDiff(self.logger).comparar(analisis_anterior, self.current_analysis)
+            self.current_analysis['diff'] = diff
+            
+            pci_analysis = self.current_analysis.get('pci_analysis')
+            pci_analyzer = self.components.get('pci_analyzer')
+            if isinstance(pci_analysis, dict) and hasattr(pci_analyzer, 'aplicar_regresiones_diff'):
+                pci_analyzer.aplicar_regresiones_diff(pci_analysis, diff)
+                if hasattr(pci_analyzer, 'generar_reporte_pci'):
+                    pci_analysis['reporte_completo'] = pci_analyzer.generar_reporte_pci(pci_analysis)
+                if hasattr(pci_analyzer, 'generar_resumen_compacto'):
+                    pci_analysis['resumen_compacto'] = pci_analyzer.generar_resumen_compacto(pci_analysis)
+                self._actualizar_secciones_pci(pci_analysis)
+            
+            if self.current_report is not None:
+                seccion = self.current_report.nueva_seccion("diff", "🔀 COMPARACIÓN ENTRE VERSIONES", "bloque")
+                seccion.datos["regresiones"] = len(diff['regresiones'])
+                seccion.bloque(APKDiff.generar_reporte_diff(diff))
+                self.current_log = self.current_report.renderizar_texto()
+                self.components['current_log'] = self.current_log
+            
+            return True, diff
+            
+        except Exception as e:
+            self.logger.log_error("Error comparando versiones", e)
+            return False, f"Error comparando versiones: {str(e)}"
+
+    def _actualizar_secciones_pci(self, pci_analysis: Dict):
+        """Rehacer las secciones PCI DSS del reporte tras recalcular la puntuación"""
+        reporte = self.current_report
+        if reporte is None:
+            return
+        if "resumen_pci" in reporte and hasattr(self.format_utils, '_generar_resumen_pci_completo'):
+            resumen = reporte.nueva_seccion("resumen_pci", "🛡️  RESUMEN PCI DSS", "principal")
+            resumen.bloque(self.format_utils._generar_resumen_pci_completo(pci_analysis))
+        anterior = reporte.obtener("pci_dss")
+        if anterior is not None:
+            seccion = reporte.nueva_seccion("pci_dss", anterior.titulo, anterior.estilo, en_log=anterior.en_log)
+            seccion.datos.update({
+                clave: pci_analysis.get(clave)
+                for clave in ("cumplimiento_general", "puntuacion_total", "nivel_riesgo")
+            })
+            if 'reporte_completo' in pci_analysis:
+                seccion.bloque(pci_analysis['reporte_completo'])
+
     def is_pci_analysis_available(self):
         """Verificar si el análisis PCI DSS está disponible"""
         return "pci_analyzer" in self.components and self.components["pci_analyzer"] is not None
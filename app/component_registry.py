@@ -0,0 +1,89 @@
+"""
+APK Inspector & Verifier - Registro de componentes perezoso
+Cada servicio se importa y construye la primera vez que se accede a él
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+
+class ComponentRegistry(dict):
+    """Diccionario de componentes con construcción diferida.
+
+    Se comporta como el ``dict`` de componentes que usaba la aplicación:
+    ``components['logger']``, ``components.get('adb_manager')`` y
+    ``'pci_analyzer' in components`` funcionan igual, pero los componentes
+    registrados con ``registrar`` solo se construyen al primer acceso.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fabricas: Dict[str, Callable[["ComponentRegistry"], Any]] = {}
+        self._tiempos: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Un lock por componente: construir uno lento no bloquea el acceso a los demás.
+        # Reentrante porque una fábrica puede pedir otros componentes al registro.
+        self._locks_construccion: Dict[str, threading.RLock] = {}
+
+    def registrar(self, nombre: str, fabrica: Callable[["ComponentRegistry"], Any]):
+        """Registrar una fábrica ``fabrica(registro) -> componente``"""
+        with self._lock:
+            self._fabricas[nombre] = fabrica
+            if dict.__contains__(self, nombre):
+                dict.__delitem__(self, nombre)
+
+    def construido(self, nombre: str) -> bool:
+        return dict.__contains__(self, nombre)
+
+    def _lock_de(self, nombre: str) -> threading.RLock:
+        with self._lock:
+            lock = self._locks_construccion.get(nombre)
+            if lock is None:
+                lock = self._locks_construccion[nombre] = threading.RLock()
+            return lock
+
+    def _construir(self, nombre: str) -> Any:
+        with self._lock_de(nombre):
+            # Otro hilo pudo construirlo mientras se esperaba el lock
+            if dict.__contains__(self, nombre):
+                return dict.__getitem__(self, nombre)
+            with self._lock:
+                fabrica = self._fabricas[nombre]
+            inicio = time.perf_counter()
+            componente = fabrica(self)
+            with self._lock:
+                self._tiempos[nombre] = time.perf_counter() - inicio
+                dict.__setitem__(self, nombre, componente)
+            return componente
+
+    def __getitem__(self, nombre: str) -> Any:
+        if dict.__contains__(self, nombre):
+            return dict.__getitem__(self, nombre)
+        if nombre in self._fabricas:
+            return self._construir(nombre)
+        raise KeyError(nombre)
+
+    def get(self, nombre: str, default: Any = None) -> Any:
+        try:
+            return self[nombre]
+        except KeyError:
+            return default
+
+    def __contains__(self, nombre: object) -> bool:
+        return dict.__contains__(self, nombre) or nombre in self._fabricas
+
+    def precargar(self, nombres: Iterable[str]):
+        """Construir componentes por adelantado (p. ej. desde un hilo en segundo plano)"""
+        for nombre in nombres:
+            if nombre in self._fabricas and not self.construido(nombre):
+                try:
+                    self._construir(nombre)
+                except Exception:
+                    # El error se repetirá (y se informará) en el primer acceso real
+                    pass
+
+    def tiempos_construccion(self) -> Dict[str, float]:
+        """Segundos empleados en construir cada componente ya creado"""
+        with self._lock:
+            return dict(self._tiempos)
@@ -12,17 +12,19 @@ try:
     from app_services import AppServices
     from app_initializer import AppInitializer
     from apk_manager import APKManager
-    from utils.APKParser import APKParser  
 except ImportError as e:
     try:
         from app.app_services import AppServices
         from app.app_initializer import AppInitializer
         from app.apk_manager import APKManager
-        from utils.APKParser import APKParser  
     except ImportError:
         print("No se pudieron cargar los módulos necesarios")
         sys.exit(1)
 
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("ui")
+
 
 class APKInspectorApp:
     def __init__(self, root, loading_screen=None):
@@ -41,31 +43,12 @@ class APKInspectorApp:
     def _setup_application(self):
         try:
             self.components = self.initializer.get_all_components()
-            
-            # ✅ VERIFICAR QUE EL ANALYZER ESTÉ CORRECTO
-            if 'apk_analyzer' not in self.components or self.components['apk_analyzer'] is None:
-                print("❌ APK Analyzer no encontrado en componentes, creando uno...")
-                from core.apk_analyzer import APKAnalyzer
-                self.components['apk_analyzer'] = APKAnalyzer(
-                    self.components['tool_detector'], 
-                    self.components['logger']
-                )
-            
-            # ✅ VERIFICAR MÉTODOS DISPONIBLES
-            analyzer = self.components['apk_analyzer']
-            print(f"🔍 APK Analyzer tipo: {type(analyzer)}")
-            print(f"🔍 Tiene analizar_apk_completo: {hasattr(analyzer, 'analizar_apk_completo')}")
-            print(f"🔍 Tiene parsear_informacion_apk: {hasattr(analyzer, 'parsear_informacion_apk')}")
-            
+
             self.services = AppServices(self.components)
             self.styles = self.components['styles']
             self.logger = self.components['logger']
-            self.format_utils = self.components['format_utils']
             self.config_manager = self.components['config_manager']
-            self.tool_detector = self.components['tool_detector']
-            self.file_utils = self.components['file_utils']
             self.adb_manager = self.components['adb_manager']
-            self.apk_analyzer = self.components['apk_analyzer']
             self.apk_path = self.components['apk_path']
             self.apk_name = self.components['apk_name']
             self.current_log = self.components['current_log']
@@ -78,29 +61,8 @@ class APKInspectorApp:
                 self.adb_manager
             )
 
-            # Verificar que el analyzer tenga los métodos necesarios
-            if not hasattr(self.apk_analyzer, 'analizar_apk_completo'):
-                self.logger.log_error("APKAnalyzer no tiene método analizar_apk_completo")
-                # Crear un analyzer de respaldo
-                from core.apk_analyzer import APKAnalyzer
-                self.apk_analyzer = APKAnalyzer(self.tool_detector, self.logger)
-                self.components['apk_analyzer'] = self.apk_analyzer
-
-            # NUEVO: Inicializar LogcatManager con config_manager
-            try:
-                from core.logcat import LogcatManager
-                self.logcat_manager = LogcatManager(
-                    self.root,
-                    self.adb_manager,
-                    self.styles,
-                    self.logger,
-                    self.apk_analyzer,
-                    self.config_manager  
-                )
-                self.logcat_manager.set_components(self.components)
-            except ImportError as e:
-                self.logger.log_warning("No se pudo cargar LogcatManager", e)
-                self.logcat_manager = None
+            # LogcatManager se construye solo cuando se usa
+            self.components.registrar('logcat_manager', self._crear_logcat_manager)
 
             self.setup_ui()
             self.mostrar_estado_inicial()
@@ -114,6 +76,45 @@ class APKInspectorApp:
         except Exception as e:
             self._manejar_error_inicializacion(e)
             
+    # Componentes pesados: se construyen en el primer acceso a través del registro
+    @property
+    def apk_analyzer(self):
+        return self.components['apk_analyzer']
+
+    @property
+    def format_utils(self):
+        return self.components['format_utils']
+
+    @property
+    def tool_detector(self):
+        return self.components['tool_detector']
+
+    @property
+    def file_utils(self):
+        return self.components['file_utils']
+
+    @property
+    def logcat_manager(self):
+        return self.components.get('logcat_manager')
+
+    def _crear_logcat_manager(self, components):
+        """Inicializar LogcatManager con config_manager"""
+        try:
+            from core.logcat import LogcatManager
+            logcat_manager = LogcatManager(
+                self.root,
+                components['adb_manager'],
+                self.styles,
+                self.logger,
+                components['apk_analyzer'],
+                components['config_manager']
+            )
+            logcat_manager.set_components(components)
+            return logcat_manager
+        except ImportError as e:
+            self.logger.log_warning(f"No se pudo cargar LogcatManager: {e}")
+            return None
+
     def _manejar_error_inicializacion(self, error):
         if self.loading_screen:
             self.loading_screen.cerrar()
@@ -297,6 +298,18 @@ class APKInspectorApp:
         self.btn_ver_log.pack(side="left", padx=3)
         self.botones_apk.append(self.btn_ver_log)
 
+        self.btn_comparar = BotonRedondeado(
+            left_btn_frame,
+            "🔀 Comparar",
+            self.comparar_con_version_anterior,
+            tooltip_text="Comparar con el análisis JSON exportado de una versión anterior",
+            width=120,
+            height=40,
+            style='primary'
+        )
+        self.btn_comparar.pack(side="left", padx=3)
+        self.botones_apk.append(self.btn_comparar)
+
         self.btn_gestionar = BotonRedondeado(
             left_btn_frame,
             "📱 Gestionar APK",
@@ -484,14 +497,14 @@ class APKInspectorApp:
 
         apk_path = filedialog.askopenfilename(
             title="Seleccionar archivo APK",
-            filetypes=[("APK files", "*.apk")]
+            filetypes=[("Android (APK, APKS, XAPK, AAB)", "*.apk *.apks *.xapk *.aab"), ("APK files", "*.apk")]
         )
 
         if not apk_path:
             return
 
         if not self.file_utils.es_archivo_apk_valido(apk_path):
-            messagebox.showerror("Error", "El archivo seleccionado no es un APK válido")
+            messagebox.showerror("Error", "El archivo seleccionado no es un APK, APKS, XAPK o AAB válido")
             return
 
         self.actualizar_texto_resumen(f"Analizando: {Path(apk_path).name}\n\nPor favor espera...")
@@ -501,11 +514,12 @@ class APKInspectorApp:
         self.root.after(100, lambda: self._ejecutar_analisis(apk_path))
 
     def _ejecutar_analisis(self, apk_path):
-        print(f"🔍 INICIANDO ANÁLISIS: {apk_path}")
+        if _traza.activa:
+            _traza(f"🔍 INICIANDO ANÁLISIS: {apk_path}")
         
         # ✅ VERIFICAR QUE EL APK ANALYZER ESTÉ CONFIGURADO CORRECTAMENTE
         if not hasattr(self.apk_analyzer, 'analizar_apk_completo'):
-            print("❌ ERROR: APK Analyzer no tiene el método analizar_apk_completo")
+            _traza.error("❌ ERROR: APK Analyzer no tiene el método analizar_apk_completo")
             messagebox.showerror("Error", "El analizador de APK no está configurado correctamente")
             return
             
@@ -515,12 +529,13 @@ class APKInspectorApp:
             # ✅ DEBUG: Mostrar información parseada
             current_analysis = self.components['current_analysis']
             parsed_info = current_analysis['parsed_info']
-            print(f"✅ ANÁLISIS COMPLETADO:")
-            print(f"   Package: {parsed_info.get('package')}")
-            print(f"   App: {parsed_info.get('app_name')}")
-            print(f"   Versión: {parsed_info.get('version_name')}")
-            print(f"   Target SDK: {parsed_info.get('target_sdk')}")
-            print(f"   Método: {parsed_info.get('metodo_analisis')}")
+            if _traza.activa:
+                _traza(f"✅ ANÁLISIS COMPLETADO:")
+                _traza(f"   Package: {parsed_info.get('package')}")
+                _traza(f"   App: {parsed_info.get('app_name')}")
+                _traza(f"   Versión: {parsed_info.get('version_name')}")
+                _traza(f"   Target SDK: {parsed_info.get('target_sdk')}")
+                _traza(f"   Método: {parsed_info.get('metodo_analisis')}")
 
         if success:
             self.apk_path = self.components['apk_path']
@@ -530,14 +545,19 @@ class APKInspectorApp:
 
             self.actualizar_estado_botones()
 
-            parsed_info = self.current_analysis['parsed_info']
-            signature_info = self.current_analysis['signature_info']
-            apk_size_mb = self.format_utils.get_apk_size_mb(Path(apk_path))
-            pci_analysis = self.current_analysis.get('pci_analysis')
+            # El resumen ya está en el reporte construido por el análisis
+            reporte = self.components.get('current_report')
+            if reporte:
+                resumen = reporte.renderizar_texto(list(self.format_utils.SECCIONES_RESUMEN))
+            else:
+                parsed_info = self.current_analysis['parsed_info']
+                signature_info = self.current_analysis['signature_info']
+                apk_size_mb = self.format_utils.get_apk_size_mb(Path(apk_path))
+                pci_analysis = self.current_analysis.get('pci_analysis')
 
-            resumen = self.format_utils.formatear_resumen_apk(
-                parsed_info, signature_info, self.apk_name, apk_size_mb, pci_analysis
-            )
+                resumen = self.format_utils.formatear_resumen_apk(
+                    parsed_info, signature_info, self.apk_name, apk_size_mb, pci_analysis
+                )
 
             self.actualizar_texto_resumen(resumen)
             self.logger.log_info(f"Análisis completado: {self.apk_name}")
@@ -553,9 +573,47 @@ class APKInspectorApp:
             return
 
         from ui.dialogs import LogDialog
-        log_dialog = LogDialog(self.root, self.current_log, self.current_analysis)
+        log_dialog = LogDialog(
+            self.root, self.current_log, self.current_analysis,
+            apk_name=self.apk_name or "", reporte=self.components.get('current_report')
+        )
         log_dialog.mostrar()
 
+    def comparar_con_version_anterior(self):
+        """Diff contra el JSON exportado de otra versión; las regresiones ajustan el PCI DSS"""
+        from tkinter import filedialog
+
+        if not self.current_analysis:
+            messagebox.showinfo("Información", "Analiza un APK antes de compararlo con otra versión.")
+            return
+
+        ruta = filedialog.askopenfilename(
+            title="Seleccionar análisis de la versión anterior",
+            filetypes=[("Análisis exportado (JSON)", "*.json")]
+        )
+        if not ruta:
+            return
+
+        success, resultado = self.services.compare_with(ruta)
+        if not success:
+            messagebox.showerror("Error", resultado)
+            return
+
+        self.current_analysis = self.components['current_analysis']
+        self.current_log = self.components['current_log']
+        reporte = self.components.get('current_report')
+        if reporte:
+            secciones = list(self.format_utils.SECCIONES_RESUMEN) + ["diff"]
+            self.actualizar_texto_resumen(reporte.renderizar_texto(secciones))
+
+        regresiones = len(resultado.get('regresiones', []))
+        self.logger.log_info(f"Comparación con {Path(ruta).name}: {regresiones} regresiones")
+        if regresiones:
+            messagebox.showwarning("Comparación entre versiones",
+                                   f"⚠️ {regresiones} regresiones de seguridad respecto a la versión anterior")
+        else:
+            messagebox.showinfo("Comparación entre versiones", "✅ Sin regresiones respecto a la versión anterior")
+
     def mostrar_opciones_gestion(self):
         if not self.apk_path:
             messagebox.showerror("Error", "No hay APK seleccionado para gestionar")
@@ -804,7 +862,25 @@ de aplicaciones Android APK.
         return dialog
 
 
+def _parsear_argumentos():
+    """Opciones de línea de comandos (se ignoran las desconocidas)"""
+    import argparse
+    from utils.timing import DIRECTORIO_PERFILES
+    parser = argparse.ArgumentParser(description="APK Inspector & Verifier")
+    parser.add_argument(
+        "--profile", nargs="?", const=str(DIRECTORIO_PERFILES), default=None, metavar="DIR",
+        help="volcar estadísticas de cProfile de cada análisis en DIR"
+    )
+    args, _ = parser.parse_known_args()
+    return args
+
+
 def main():
+    args = _parsear_argumentos()
+    if args.profile:
+        from utils.timing import configurar_perfilado
+        configurar_perfilado(Path(args.profile))
+
     from utils.format_utils import check_single_instance
     if not check_single_instance():
         sys.exit(1)
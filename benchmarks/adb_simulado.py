@@ -0,0 +1,871 @@
+"""
+adb simulado: ejecutable y servidor que reproducen salidas de dispositivos sin hardware
+
+Sirve para medir offline el pipeline de logcat y el refresco de estadísticas de
+``LogcatManager``/``ADBManager``. Responde a los comandos que usa la aplicación
+(``devices``, ``shell getprop``, ``pm list packages``, ``pm path``, ``stat``,
+``pidof``, ``dumpsys meminfo/cpuinfo/netstats/batterystats/package``,
+``logcat``, ``install``, ``exec-in``, ``pull``...) con varias seriales
+simuladas y emite logcat a una tasa fija. Los comandos de shell encadenados
+con ``;`` y filtrados con ``| grep`` se responden como en el dispositivo. El
+servidor atiende además ``sync:`` (STAT/RECV/SEND) y la instalación en
+streaming por ``exec:cmd package install -S``.
+
+Modos:
+
+  Ejecutable (mismos argumentos que adb)::
+
+      python benchmarks/adb_simulado.py -s SIMU0001 shell dumpsys meminfo com.app
+
+  Instalar un ``adb`` envoltorio en un directorio (para usarlo como
+  platform-tools o como ``adb_path``)::
+
+      python benchmarks/adb_simulado.py --instalar /tmp/platform-tools
+
+  Servidor con el protocolo de host de adb (smart sockets) en un puerto::
+
+      python benchmarks/adb_simulado.py --servidor --puerto 5038
+
+Configuración por variables de entorno (el ejecutable recibe solo argumentos
+de adb):
+
+  ADB_SIMULADO_ESCENARIO  JSON con dispositivos, props, paquetes y salidas grabadas
+  ADB_SIMULADO_SERIALES   seriales del escenario por defecto (coma)
+  ADB_SIMULADO_TASA       líneas de logcat por segundo (0 = sin límite)
+  ADB_SIMULADO_LINEAS     líneas de logcat a emitir antes de terminar (0 = infinito)
+  ANDROID_SERIAL          serial por defecto, como en adb
+
+Formato del escenario::
+
+    {"dispositivos": {
+        "SERIAL": {
+            "estado": "device",
+            "props": {"ro.product.model": "Pixel 8", ...},
+            "paquetes": ["com.android.chrome", ...],
+            "pids": {"com.android.chrome": 4242},
+            "versiones": {"com.android.chrome": 2},
+            "salidas": {"dumpsys meminfo": "ruta/o/texto con {package}"},
+            "logcat": "ruta/a/logcat_grabado.txt"
+        }}}
+
+Las claves de ``salidas`` se comparan por prefijo con el comando de shell
+(gana el más largo); un valor que es una ruta existente se lee del archivo.
+``versiones`` simula actualizaciones: cambiar la versión de un paquete cambia
+sus rutas, tamaños y ``lastUpdateTime`` (``pm path``, ``stat``, ``pull``).
+"""
+
+import argparse
+import json
+import os
+import io
+import random
+import re
+import shlex
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+SERIALES_POR_DEFECTO = ("emulator-5554", "SIMU0001")
+VERSION_PROTOCOLO = 41
+PUERTO_POR_DEFECTO = 5037
+
+NIVELES_LOGCAT = "VDIWEF"
+TAGS_LOGCAT = ("ActivityManager", "PackageManager", "chromium", "OkHttp", "System.err", "AndroidRuntime")
+
+PAQUETES_BASE = [
+    "android", "com.android.chrome", "com.android.settings", "com.android.systemui",
+    "com.google.android.gms", "com.google.android.youtube", "com.whatsapp",
+]
+
+
+# ========== ESCENARIO ==========
+
+def _dispositivo_por_defecto(serial: str, indice: int, cantidad_paquetes: int = 300) -> Dict:
+    rnd = random.Random(f"dispositivo-{serial}")
+    paquetes = PAQUETES_BASE + [f"com.simulado.app{i:04d}" for i in range(cantidad_paquetes)]
+    return {
+        "estado": "device",
+        "props": {
+            "ro.product.model": f"Simulado {indice + 1}",
+            "ro.product.manufacturer": "APKInspector",
+            "ro.product.name": f"simulado_{indice + 1}",
+            "ro.product.device": f"sim{indice + 1}",
+            "ro.build.version.release": str(12 + indice % 3),
+            "ro.build.version.sdk": str(31 + indice % 3),
+            "ro.product.cpu.abi": "arm64-v8a",
+            "ro.product.cpu.abilist": "arm64-v8a,armeabi-v7a,armeabi",
+            "ro.build.version.security_patch": f"2024-0{1 + indice % 9}-05",
+            "ro.hardware.egl": "mali",
+            "ro.board.platform": "simulado",
+            "ro.serialno": serial,
+        },
+        "paquetes": paquetes,
+        "pids": {p: 1000 + rnd.randrange(30000) for p in paquetes[:50]},
+        "salidas": {},
+        "logcat": None,
+    }
+
+
+class Escenario:
+    """Dispositivos simulados y sus respuestas a comandos de shell"""
+
+    def __init__(self, datos: Dict, base_dir: Optional[Path] = None):
+        self.base_dir = base_dir or Path.cwd()
+        self.dispositivos: Dict[str, Dict] = datos.get("dispositivos", {})
+        for dispositivo in self.dispositivos.values():
+            dispositivo.setdefault("estado", "device")
+            dispositivo.setdefault("props", {})
+            dispositivo.setdefault("paquetes", [])
+            dispositivo.setdefault("pids", {})
+            dispositivo.setdefault("versiones", {})
+            # Archivos recibidos por push/SEND (solo en memoria)
+            dispositivo.setdefault("archivos", {})
+            dispositivo.setdefault("salidas", {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def por_defecto(cls, seriales=SERIALES_POR_DEFECTO) -> "Escenario":
+        return cls({"dispositivos": {s: _dispositivo_por_defecto(s, i) for i, s in enumerate(seriales)}})
+
+    @classmethod
+    def cargar(cls, ruta: Path) -> "Escenario":
+        ruta = Path(ruta)
+        with open(ruta, "r", encoding="utf-8") as f:
+            return cls(json.load(f), ruta.parent)
+
+    @classmethod
+    def desde_entorno(cls) -> "Escenario":
+        ruta = os.environ.get("ADB_SIMULADO_ESCENARIO")
+        if ruta:
+            return cls.cargar(Path(ruta))
+        seriales = [s for s in os.environ.get("ADB_SIMULADO_SERIALES", "").split(",") if s.strip()]
+        return cls.por_defecto(seriales or SERIALES_POR_DEFECTO)
+
+    # ----- dispositivos -----
+
+    def seriales(self, solo_conectados: bool = False) -> List[str]:
+        with self._lock:
+            return [s for s, d in self.dispositivos.items() if not solo_conectados or d["estado"] == "device"]
+
+    def listado(self, largo: bool = False) -> str:
+        """Cuerpo de 'adb devices' (sin el encabezado)"""
+        lineas = []
+        with self._lock:
+            for indice, (serial, disp) in enumerate(self.dispositivos.items(), start=1):
+                linea = f"{serial}\t{disp['estado']}"
+                if largo and disp["estado"] == "device":
+                    props = disp["props"]
+                    linea = (f"{serial:<22} device product:{props.get('ro.product.name', '')} "
+                             f"model:{props.get('ro.product.model', '').replace(' ', '_')} "
+                             f"device:{props.get('ro.product.device', '')} transport_id:{indice}")
+                lineas.append(linea)
+        return "".join(linea + "\n" for linea in lineas)
+
+    def establecer_estado(self, serial: str, estado: Optional[str]):
+        """Cambiar el estado de un dispositivo; ``None`` lo desconecta"""
+        with self._lock:
+            if estado is None:
+                self.dispositivos.pop(serial, None)
+            else:
+                self.dispositivos.setdefault(serial, _dispositivo_por_defecto(serial, len(self.dispositivos)))
+                self.dispositivos[serial]["estado"] = estado
+
+    def resolver_serial(self, serial: Optional[str]) -> Tuple[Optional[str], str]:
+        """(serial, error) con las mismas reglas que adb"""
+        conectados = self.seriales(solo_conectados=True)
+        if serial:
+            if serial in self.dispositivos:
+                if self.dispositivos[serial]["estado"] != "device":
+                    return None, f"device '{serial}' is {self.dispositivos[serial]['estado']}"
+                return serial, ""
+            return None, f"device '{serial}' not found"
+        if not conectados:
+            return None, "no devices/emulators found"
+        if len(conectados) > 1:
+            return None, "more than one device/emulator"
+        return conectados[0], ""
+
+    # ----- shell -----
+
+    def _salida_grabada(self, disp: Dict, comando: str, package: str) -> Optional[str]:
+        candidatas = [clave for clave in disp["salidas"] if comando.startswith(clave)]
+        if not candidatas:
+            return None
+        valor = disp["salidas"][max(candidatas, key=len)]
+        ruta = self.base_dir / valor if len(valor) < 260 and "\n" not in valor else None
+        if ruta is not None and ruta.is_file():
+            valor = ruta.read_text(encoding="utf-8", errors="ignore")
+        return valor.replace("{package}", package)
+
+    def archivos_paquete(self, disp: Dict, package: str) -> List[Tuple[str, int]]:
+        """[(ruta, tamaño)] del base.apk y los splits instalados del paquete"""
+        version = disp["versiones"].get(package, 1)
+        rnd = random.Random(f"apk-{package}-{version}")
+        directorio = f"/data/app/~~{rnd.getrandbits(64):016x}/{package}-{rnd.getrandbits(64):016x}"
+        archivos = [(f"{directorio}/base.apk", rnd.randrange(200_000, 8_000_000))]
+        # Un tercio de los paquetes se instala con splits de configuración
+        if sum(package.encode()) % 3 == 0:
+            archivos.append((f"{directorio}/split_config.arm64_v8a.apk", rnd.randrange(50_000, 2_000_000)))
+            archivos.append((f"{directorio}/split_config.xxhdpi.apk", rnd.randrange(20_000, 500_000)))
+        return archivos
+
+    @staticmethod
+    def ultima_actualizacion(disp: Dict, package: str) -> str:
+        version = disp["versiones"].get(package, 1)
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(1700000000 + version * 86400 + sum(package.encode())))
+
+    def buscar_archivo(self, serial: str, ruta: str) -> Optional[Tuple[str, int]]:
+        """(paquete, tamaño) del APK instalado en ``ruta``"""
+        disp = self.dispositivos[serial]
+        for package in disp["paquetes"]:
+            for archivo, tamano in self.archivos_paquete(disp, package):
+                if archivo == ruta:
+                    return package, tamano
+        return None
+
+    def contenido_archivo(self, serial: str, ruta: str) -> Optional[bytes]:
+        """Bytes de un archivo enviado con push o un APK sintético en lugar del instalado"""
+        disp = self.dispositivos[serial]
+        if ruta in disp["archivos"]:
+            return disp["archivos"][ruta]
+        encontrado = self.buscar_archivo(serial, ruta)
+        if encontrado is None:
+            return None
+        package, tamano = encontrado
+        rnd = random.Random(ruta)
+        destino = io.BytesIO()
+        with zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("AndroidManifest.xml", f"package={package}\n")
+            if ruta.endswith("/base.apk"):
+                zf.writestr("classes.dex", b"dex\n035\0" + rnd.randbytes(min(tamano, 64 * 1024)))
+            elif "arm64_v8a" in ruta:
+                zf.writestr("lib/arm64-v8a/libnativo.so", b"\x7fELF" + rnd.randbytes(min(tamano, 64 * 1024)))
+            else:
+                zf.writestr("res/drawable-xxhdpi-v4/icono.png", b"\x89PNG" + rnd.randbytes(min(tamano, 16 * 1024)))
+        return destino.getvalue()
+
+    def responder_script(self, serial: str, comando: str) -> Tuple[int, str]:
+        """``adb shell "<script>"``: comandos separados por ``;`` y filtros ``| grep``"""
+        if not any(c in comando for c in ";|'\""):
+            return self.responder_shell(serial, comando.split())
+        lexer = shlex.shlex(comando, posix=True, punctuation_chars=";|")
+        lexer.whitespace_split = True
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            return 2, "/system/bin/sh: syntax error: unterminated quoted string\n"
+
+        # [[etapa, etapa...], ...]: comandos separados por ';', etapas por '|'
+        comandos, etapas, argv = [], [], []
+        for token in tokens + [";"]:
+            if token in (";", "|"):
+                etapas.append(argv)
+                argv = []
+                if token == ";":
+                    comandos.append(etapas)
+                    etapas = []
+            else:
+                argv.append(token)
+
+        rc, salidas = 0, []
+        for etapas in comandos:
+            if not etapas[0]:
+                continue
+            rc, salida = self.responder_shell(serial, [a.replace("$?", str(rc)) for a in etapas[0]])
+            for filtro in etapas[1:]:
+                if filtro[:1] != ["grep"] or len(filtro) < 2:
+                    return 127, f"/system/bin/sh: {filtro[0] if filtro else '|'}: inaccessible or not found\n"
+                patron = re.compile(filtro[-1])
+                salida = "".join(linea for linea in salida.splitlines(keepends=True) if patron.search(linea))
+                rc = 0 if salida else 1
+            salidas.append(salida)
+        return rc, "".join(salidas)
+
+    def responder_shell(self, serial: str, argv: List[str]) -> Tuple[int, str]:
+        """(código de salida, salida) de ``adb shell <argv>`` (salvo logcat, que es streaming)"""
+        disp = self.dispositivos[serial]
+        comando = " ".join(argv).strip()
+        package = argv[-1] if len(argv) > 1 else ""
+
+        grabada = self._salida_grabada(disp, comando, package)
+        if grabada is not None:
+            return 0, grabada
+
+        if not argv:
+            return 0, ""
+        programa = argv[0]
+        props = disp["props"]
+
+        if programa == "getprop":
+            if len(argv) > 1:
+                return 0, props.get(argv[1], "") + "\n"
+            return 0, "".join(f"[{k}]: [{v}]\n" for k, v in sorted(props.items()))
+
+        if programa == "pm" and argv[1:3] == ["list", "packages"]:
+            return 0, "".join(f"package:{p}\n" for p in disp["paquetes"])
+
+        if programa == "pm" and argv[1:2] == ["path"] and len(argv) > 2:
+            if package not in disp["paquetes"]:
+                return 1, ""
+            return 0, "".join(f"package:{ruta}\n" for ruta, _ in self.archivos_paquete(disp, package))
+
+        if programa == "pm" and argv[1:2] == ["install"]:
+            return 0, "Success\n"
+
+        if programa == "pm" and argv[1:2] == ["uninstall"]:
+            if package in disp["paquetes"]:
+                return 0, "Success\n"
+            return 1, "Failure [DELETE_FAILED_INTERNAL_ERROR]\n"
+
+        if programa == "rm":
+            for ruta in argv[1:]:
+                disp["archivos"].pop(ruta, None)
+            return 0, ""
+
+        if programa == "echo":
+            return 0, " ".join(argv[1:]) + "\n"
+
+        if programa == "stat" and argv[1:2] == ["-c"] and len(argv) > 3:
+            rc, lineas = 0, []
+            for ruta in argv[3:]:
+                encontrado = self.buscar_archivo(serial, ruta)
+                if encontrado is None:
+                    rc = 1
+                    lineas.append(f"stat: '{ruta}': No such file or directory")
+                else:
+                    lineas.append(argv[2].replace("%s", str(encontrado[1])).replace("%n", ruta))
+            return rc, "\n".join(lineas) + "\n"
+
+        if programa == "pidof":
+            pid = disp["pids"].get(package)
+            return (0, f"{pid}\n") if pid else (1, "")
+
+        if programa == "dumpsys" and len(argv) > 1:
+            return self._dumpsys(disp, argv[1], package if len(argv) > 2 else "")
+
+        if programa == "monkey":
+            return 0, "Events injected: 1\n## Network stats: elapsed time=12ms\n"
+
+        if programa == "top":
+            lineas = ["  PID USER         PR  NI VIRT  RES  SHR S[%CPU] %MEM     TIME+ ARGS"]
+            for p, pid in list(disp["pids"].items())[:20]:
+                lineas.append(f"{pid:5d} u0_a{pid % 300:<8d}20   0  14G 180M  90M S  {pid % 17:.1f}   2.1   0:12.34 {p}")
+            return 0, "\n".join(lineas) + "\n"
+
+        if programa == "ps":
+            return 0, "%CPU\n 3.4\n"
+
+        if programa == "cat" and argv[1:] == ["/proc/meminfo"]:
+            total = disp.get("ram_kb", 7_864_320)
+            return 0, (f"MemTotal:       {total} kB\nMemFree:         {total // 8} kB\n"
+                       f"MemAvailable:    {total // 3} kB\nBuffers:           12340 kB\n")
+
+        if programa in ("cat", "ls") and len(argv) > 1 and argv[1].startswith("/proc/net/xt_qtaguid"):
+            return 1, f"{programa}: {argv[1]}: No such file or directory\n"
+
+        if programa in ("am", "input", "settings", "svc", "wm"):
+            return 0, ""
+
+        return 127, f"/system/bin/sh: {programa}: inaccessible or not found\n"
+
+    def _dumpsys(self, disp: Dict, servicio: str, package: str) -> Tuple[int, str]:
+        rnd = random.Random(f"{servicio}-{package}-{time.time() // 1}")
+        uid = 10000 + sum(package.encode()) % 9000 if package else 1000
+
+        if servicio == "SurfaceFlinger":
+            return 0, ("Build configuration: [sf PRESENT_TIME_OFFSET=0]\n"
+                       "GLES: ARM, Mali-G710 MC10, OpenGL ES 3.2 v1.r38p1\n"
+                       "Display 0 (HWC display 0): port=0\n")
+        if servicio == "meminfo":
+            pss = rnd.randrange(40000, 400000)
+            return 0, (
+                f"Applications Memory Usage (in Kilobytes):\nUptime: 123456 Realtime: 123456\n\n"
+                f"** MEMINFO in pid {disp['pids'].get(package, 4242)} [{package}] **\n"
+                "                   Pss  Private  Private  SwapPss      Rss     Heap     Heap     Heap\n"
+                "                 Total    Dirty    Clean    Dirty    Total     Size    Alloc     Free\n"
+                f"  Native Heap    {pss // 4:6d}   {pss // 4:6d}        0        0   {pss // 4:6d}    65536    40000    25536\n"
+                f"  Dalvik Heap    {pss // 5:6d}   {pss // 5:6d}        0        0   {pss // 5:6d}    32768    20000    12768\n\n"
+                " App Summary\n                       Pss(KB)                        Rss(KB)\n"
+                f"           Java Heap:    {pss // 5:6d}                          {pss // 5:6d}\n"
+                f"         Native Heap:    {pss // 4:6d}                          {pss // 4:6d}\n"
+                f"           TOTAL PSS:    {pss:6d}            TOTAL RSS:   {pss * 2:6d}       TOTAL SWAP PSS:        0\n"
+            )
+        if servicio == "cpuinfo":
+            lineas = ["Load: 4.12 / 3.98 / 3.75", "CPU usage from 52341ms to 22341ms ago:"]
+            for p, pid in list(disp["pids"].items())[:30]:
+                lineas.append(f"  {rnd.random() * 12:.1f}% {pid}/{p}: {rnd.random() * 8:.1f}% user + {rnd.random() * 4:.1f}% kernel")
+            lineas.append("23% TOTAL: 14% user + 8.1% kernel + 0.3% iowait")
+            return 0, "\n".join(lineas) + "\n"
+        if servicio == "netstats":
+            lineas = ["Active interfaces:", "  iface=wlan0 ident=[{type=WIFI, metered=false}]", "Dev stats:"]
+            for i, p in enumerate(disp["paquetes"][:60]):
+                u = 10000 + sum(p.encode()) % 9000
+                lineas.append(f"  ident=[{{type=WIFI}}] uid={u} set=DEFAULT tag=0x0")
+                lineas.append("    NetworkStatsHistory: bucketDuration=3600")
+                lineas.append(f"      st=1700000000 rb={rnd.randrange(1 << 24)} rp=100 tb={rnd.randrange(1 << 22)} tp=80 op=0")
+            return 0, "\n".join(lineas) + "\n"
+        if servicio == "batterystats":
+            return 0, (
+                f"Statistics since last charge:\n  System starts: 0, currently on battery: false\n"
+                f"  Uid u0a{uid - 10000}:\n    Wake lock *alarm* realtime\n"
+                f"    Wake lock {package}: 1m 2s 345ms partial (12 times) realtime\n"
+                f"    Partial wakelock: {rnd.randrange(1, 40)} times\n"
+            )
+        if servicio == "battery":
+            return 0, ("Current Battery Service state:\n  AC powered: false\n  USB powered: true\n"
+                       f"  status: 2\n  health: 2\n  present: true\n  level: {rnd.randrange(20, 100)}\n"
+                       "  scale: 100\n  voltage: 4200\n  temperature: 310\n  technology: Li-ion\n")
+        if servicio == "package" and package == "packages":
+            lineas = ["Packages:"]
+            for p in disp["paquetes"]:
+                base = self.archivos_paquete(disp, p)[0][0]
+                lineas += [f"  Package [{p}] ({sum(p.encode()):07x}):", f"    userId={10000 + sum(p.encode()) % 9000}",
+                           f"    codePath={base.rpartition('/')[0]}", "    versionCode=42 minSdk=24 targetSdk=34",
+                           "    firstInstallTime=2023-11-14 22:13:20", f"    lastUpdateTime={self.ultima_actualizacion(disp, p)}"]
+            return 0, "\n".join(lineas) + "\n"
+        if servicio == "package":
+            if package and package not in disp["paquetes"]:
+                return 0, "Unable to find package: " + package + "\n"
+            return 0, (
+                f"Packages:\n  Package [{package}] (1a2b3c4):\n    userId={uid}\n"
+                f"    pkg=Package{{1a2b3c4 {package}}}\n    versionCode=42 minSdk=24 targetSdk=34\n"
+                "    versionName=4.2.0\n    flags=[ HAS_CODE ALLOW_CLEAR_USER_DATA ALLOW_BACKUP ]\n"
+            )
+        return 0, f"Can't find service: {servicio}\n"
+
+    # ----- logcat -----
+
+    def lineas_logcat(self, serial: str) -> Iterator[str]:
+        """Líneas de logcat: la grabación del dispositivo en bucle o líneas sintéticas"""
+        grabacion = self.dispositivos[serial].get("logcat")
+        if grabacion:
+            ruta = self.base_dir / grabacion
+            lineas = ruta.read_text(encoding="utf-8", errors="ignore").splitlines(keepends=True)
+            if lineas:
+                while True:
+                    yield from lineas
+
+        rnd = random.Random(f"logcat-{serial}")
+        pids = list(self.dispositivos[serial]["pids"].values()) or [4242]
+        i = 0
+        while True:
+            ms = i * 3
+            nivel = NIVELES_LOGCAT[rnd.randrange(len(NIVELES_LOGCAT))]
+            tag = TAGS_LOGCAT[rnd.randrange(len(TAGS_LOGCAT))]
+            pid = pids[i % len(pids)]
+            yield (f"01-01 00:{(ms // 60000) % 60:02d}:{(ms // 1000) % 60:02d}.{ms % 1000:03d} "
+                   f"{pid:5d} {pid + i % 7:5d} {nivel} {tag}: línea simulada {i} {'x' * (i % 60)}\n")
+            i += 1
+
+
+def emitir_lineas(lineas: Iterator[str], escribir: Callable[[str], None], tasa: float = 0,
+                  total: int = 0, detener: Optional[threading.Event] = None) -> int:
+    """Escribir líneas a ``tasa`` líneas/s (0 = sin límite) en lotes de ~10 ms"""
+    lote = max(1, int(tasa // 100)) if tasa else 1000
+    emitidas = 0
+    inicio = time.perf_counter()
+    while not total or emitidas < total:
+        if detener is not None and detener.is_set():
+            break
+        cantidad = min(lote, total - emitidas) if total else lote
+        bloque = [next(lineas) for _ in range(cantidad)]
+        escribir("".join(bloque))
+        emitidas += cantidad
+        if tasa:
+            adelanto = emitidas / tasa - (time.perf_counter() - inicio)
+            if adelanto > 0:
+                time.sleep(adelanto)
+    return emitidas
+
+
+def _config_logcat() -> Tuple[float, int]:
+    return float(os.environ.get("ADB_SIMULADO_TASA", "0") or 0), int(os.environ.get("ADB_SIMULADO_LINEAS", "0") or 0)
+
+
+# ========== EJECUTABLE (CLI compatible con adb) ==========
+
+def _parsear_globales(argv: List[str]) -> Tuple[Optional[str], List[str]]:
+    serial = os.environ.get("ANDROID_SERIAL") or None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "-s" and i + 1 < len(argv):
+            serial = argv[i + 1]
+            i += 2
+        elif arg in ("-H", "-P", "-L") and i + 1 < len(argv):
+            i += 2
+        elif arg in ("-d", "-e", "-a"):
+            i += 1
+        else:
+            break
+    return serial, argv[i:]
+
+
+def _escribir_stdout(texto: str):
+    sys.stdout.write(texto)
+    sys.stdout.flush()
+
+
+def ejecutar_cli(argv: List[str], escenario: Escenario) -> int:
+    serial_pedido, resto = _parsear_globales(argv)
+    if not resto:
+        sys.stderr.write("adb: no command specified\n")
+        return 1
+    comando, args = resto[0], resto[1:]
+
+    if comando == "version":
+        _escribir_stdout("Android Debug Bridge version 1.0.41\nVersion 35.0.0-simulado\n")
+        return 0
+    if comando == "devices":
+        _escribir_stdout("List of devices attached\n" + escenario.listado(largo="-l" in args) + "\n")
+        return 0
+    if comando in ("start-server", "kill-server", "reconnect"):
+        return 0
+
+    serial, error = escenario.resolver_serial(serial_pedido)
+    if serial is None:
+        sys.stderr.write(f"adb: {error}\n")
+        return 1
+
+    if comando == "get-state":
+        _escribir_stdout("device\n")
+        return 0
+    if comando == "get-serialno":
+        _escribir_stdout(serial + "\n")
+        return 0
+    if comando == "wait-for-device":
+        return 0
+
+    if comando == "logcat" or (comando in ("shell", "exec-out") and args[:1] == ["logcat"]):
+        opciones = args if comando == "logcat" else args[1:]
+        return _cli_logcat(escenario, serial, opciones)
+
+    if comando in ("shell", "exec-out"):
+        rc, salida = escenario.responder_script(serial, " ".join(args))
+        _escribir_stdout(salida)
+        return rc
+
+    if comando == "exec-in":
+        # Instalación en streaming: consumir stdin (cmd package install -S / pm install-write)
+        while sys.stdin.buffer.read(1 << 16):
+            pass
+        _escribir_stdout("Success\n")
+        return 0
+
+    if comando in ("install", "install-multiple", "install-multi-package"):
+        _escribir_stdout("Performing Streamed Install\nSuccess\n")
+        return 0
+    if comando == "uninstall":
+        package = args[-1] if args else ""
+        ok = package in escenario.dispositivos[serial]["paquetes"]
+        _escribir_stdout("Success\n" if ok else "Failure [DELETE_FAILED_INTERNAL_ERROR]\n")
+        return 0 if ok else 1
+    if comando == "pull" and len(args) >= 2:
+        return _cli_pull(escenario, serial, args[0], Path(args[1]))
+    if comando in ("push", "pull"):
+        _escribir_stdout("1 file pushed, 0 skipped.\n" if comando == "push" else "1 file pulled, 0 skipped.\n")
+        return 0
+
+    sys.stderr.write(f"adb: unknown command {comando}\n")
+    return 1
+
+
+def _cli_pull(escenario: Escenario, serial: str, remota: str, local: Path) -> int:
+    contenido = escenario.contenido_archivo(serial, remota)
+    if contenido is None:
+        sys.stderr.write(f"adb: error: failed to stat remote object '{remota}': No such file or directory\n")
+        return 1
+    if local.is_dir():
+        local = local / remota.rpartition("/")[2]
+    local.write_bytes(contenido)
+    _escribir_stdout(f"{remota}: 1 file pulled, 0 skipped. ({len(contenido)} bytes in 0.010s)\n")
+    return 0
+
+
+def _cli_logcat(escenario: Escenario, serial: str, opciones: List[str]) -> int:
+    if "-c" in opciones:
+        return 0
+    tasa, total = _config_logcat()
+    if "-d" in opciones and not total:
+        total = 1000
+    if "-t" in opciones:
+        try:
+            total = int(opciones[opciones.index("-t") + 1])
+        except (IndexError, ValueError):
+            pass
+    try:
+        emitir_lineas(escenario.lineas_logcat(serial), _escribir_stdout, tasa, total)
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    return 0
+
+
+# ========== SERVIDOR (protocolo de host de adb) ==========
+
+class _ManejadorADB(socketserver.BaseRequestHandler):
+    """Una conexión de cliente: peticiones ``<4 hex><servicio>`` y respuestas OKAY/FAIL"""
+
+    def _leer_exacto(self, n: int) -> bytes:
+        datos = b""
+        while len(datos) < n:
+            bloque = self.request.recv(n - len(datos))
+            if not bloque:
+                raise ConnectionError("cliente desconectado")
+            datos += bloque
+        return datos
+
+    def _leer_peticion(self) -> str:
+        longitud = int(self._leer_exacto(4), 16)
+        return self._leer_exacto(longitud).decode("utf-8", errors="replace")
+
+    def _okay(self, cuerpo: Optional[str] = None):
+        datos = b"OKAY"
+        if cuerpo is not None:
+            codificado = cuerpo.encode("utf-8")
+            datos += f"{len(codificado):04x}".encode() + codificado
+        self.request.sendall(datos)
+
+    def _fail(self, mensaje: str):
+        codificado = mensaje.encode("utf-8")
+        self.request.sendall(b"FAIL" + f"{len(codificado):04x}".encode() + codificado)
+
+    def handle(self):
+        servidor: "ServidorADBSimulado" = self.server.simulado
+        escenario = servidor.escenario
+        serial = None
+        try:
+            while True:
+                peticion = self._leer_peticion()
+
+                if peticion == "host:version":
+                    self._okay(f"{VERSION_PROTOCOLO:04x}")
+                    return
+                if peticion in ("host:devices", "host:devices-l"):
+                    self._okay(escenario.listado(largo=peticion.endswith("-l")))
+                    return
+                if peticion in ("host:track-devices", "host:track-devices-l"):
+                    self._seguir_dispositivos(servidor, largo=peticion.endswith("-l"))
+                    return
+                if peticion == "host:kill":
+                    self._okay()
+                    threading.Thread(target=servidor.detener, daemon=True).start()
+                    return
+
+                if peticion.startswith("host-serial:") and peticion.endswith(":get-state"):
+                    serial_pedido = peticion[len("host-serial:"):-len(":get-state")]
+                    encontrado, error = escenario.resolver_serial(serial_pedido)
+                    self._okay("device") if encontrado else self._fail(error)
+                    return
+                if peticion == "host:get-state":
+                    encontrado, error = escenario.resolver_serial(None)
+                    self._okay("device") if encontrado else self._fail(error)
+                    return
+
+                if peticion.startswith("host:transport"):
+                    pedido = None
+                    if peticion.startswith("host:transport:"):
+                        pedido = peticion[len("host:transport:"):]
+                    serial, error = escenario.resolver_serial(pedido)
+                    if serial is None:
+                        self._fail(error)
+                        return
+                    self._okay()
+                    continue
+
+                if serial is None:
+                    self._fail("no device selected")
+                    return
+
+                if peticion == "sync:":
+                    self._okay()
+                    self._servicio_sync(escenario, serial)
+                    return
+                if peticion.startswith("exec:cmd package install") and " -S " in peticion:
+                    self._okay()
+                    # adb envía el APK por la misma conexión: consumir -S bytes
+                    restante = int(peticion.rsplit(" -S ", 1)[1].split()[0])
+                    while restante > 0:
+                        restante -= len(self._leer_exacto(min(restante, 65536)))
+                    self.request.sendall(b"Success\n")
+                    return
+                if peticion.startswith(("shell:", "exec:")):
+                    self._servicio_shell(escenario, serial, peticion.split(":", 1)[1], servidor)
+                    return
+
+                self._fail(f"unknown service: {peticion}")
+                return
+        except (ConnectionError, OSError, ValueError):
+            return
+
+    def _servicio_shell(self, escenario: Escenario, serial: str, comando: str, servidor: "ServidorADBSimulado"):
+        argv = comando.split()
+        self._okay()
+        if argv[:1] == ["logcat"]:
+            if "-c" in argv:
+                return
+            total = servidor.lineas_logcat or (1000 if "-d" in argv else 0)
+            try:
+                emitir_lineas(escenario.lineas_logcat(serial),
+                              lambda texto: self.request.sendall(texto.encode("utf-8")),
+                              servidor.tasa_logcat, total, servidor.detenido)
+            except OSError:
+                pass
+            return
+        rc, salida = escenario.responder_script(serial, comando)
+        self.request.sendall(salida.encode("utf-8"))
+
+    def _servicio_sync(self, escenario: Escenario, serial: str):
+        """Sesión sync: STAT, RECV y SEND hasta QUIT o cierre de la conexión"""
+        disp = escenario.dispositivos[serial]
+        while True:
+            orden, longitud = struct.unpack("<4sI", self._leer_exacto(8))
+            if orden == b"QUIT":
+                return
+            ruta = self._leer_exacto(longitud).decode("utf-8", errors="replace")
+            if orden == b"STAT":
+                contenido = escenario.contenido_archivo(serial, ruta)
+                if contenido is None:
+                    self.request.sendall(b"STAT" + struct.pack("<III", 0, 0, 0))
+                else:
+                    self.request.sendall(b"STAT" + struct.pack("<III", stat.S_IFREG | 0o644, len(contenido), 1700000000))
+            elif orden == b"RECV":
+                contenido = escenario.contenido_archivo(serial, ruta)
+                if contenido is None:
+                    mensaje = b"No such file or directory"
+                    self.request.sendall(b"FAIL" + struct.pack("<I", len(mensaje)) + mensaje)
+                    continue
+                for inicio in range(0, len(contenido), 65536):
+                    bloque = contenido[inicio:inicio + 65536]
+                    self.request.sendall(b"DATA" + struct.pack("<I", len(bloque)) + bloque)
+                self.request.sendall(b"DONE" + struct.pack("<I", 0))
+            elif orden == b"SEND":
+                destino = ruta.rpartition(",")[0] or ruta
+                partes = []
+                while True:
+                    tipo, tamano = struct.unpack("<4sI", self._leer_exacto(8))
+                    if tipo == b"DONE":
+                        break
+                    partes.append(self._leer_exacto(tamano))
+                disp["archivos"][destino] = b"".join(partes)
+                self.request.sendall(b"OKAY" + struct.pack("<I", 0))
+            else:
+                mensaje = f"unknown sync command {orden!r}".encode()
+                self.request.sendall(b"FAIL" + struct.pack("<I", len(mensaje)) + mensaje)
+                return
+
+    def _seguir_dispositivos(self, servidor: "ServidorADBSimulado", largo: bool):
+        """track-devices: enviar el listado ahora y en cada cambio"""
+        self.request.sendall(b"OKAY")
+        version = -1
+        while not servidor.detenido.is_set():
+            with servidor.cambios:
+                if version == servidor.version_dispositivos:
+                    servidor.cambios.wait(timeout=0.5)
+                    if version == servidor.version_dispositivos:
+                        continue
+                version = servidor.version_dispositivos
+            listado = servidor.escenario.listado(largo).encode("utf-8")
+            self.request.sendall(f"{len(listado):04x}".encode() + listado)
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ServidorADBSimulado:
+    """Servidor adb simulado en ``127.0.0.1:puerto`` (0 = puerto libre)"""
+
+    def __init__(self, escenario: Optional[Escenario] = None, puerto: int = 0,
+                 tasa_logcat: float = 0, lineas_logcat: int = 0):
+        self.escenario = escenario or Escenario.por_defecto()
+        self.tasa_logcat = tasa_logcat
+        self.lineas_logcat = lineas_logcat
+        self.detenido = threading.Event()
+        self.cambios = threading.Condition()
+        self.version_dispositivos = 0
+        self._servidor = _ServidorTCP(("127.0.0.1", puerto), _ManejadorADB)
+        self._servidor.simulado = self
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def puerto(self) -> int:
+        return self._servidor.server_address[1]
+
+    def iniciar(self) -> "ServidorADBSimulado":
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="adb-simulado", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.detenido.set()
+        with self.cambios:
+            self.cambios.notify_all()
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def cambiar_dispositivo(self, serial: str, estado: Optional[str]):
+        """Conectar/desconectar o cambiar el estado de un dispositivo (notifica a track-devices)"""
+        self.escenario.establecer_estado(serial, estado)
+        with self.cambios:
+            self.version_dispositivos += 1
+            self.cambios.notify_all()
+
+    def __enter__(self) -> "ServidorADBSimulado":
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+# ========== INSTALACIÓN DEL ENVOLTORIO ==========
+
+def instalar_envoltorio(directorio: Path) -> Path:
+    """Crear ``adb`` (o ``adb.cmd`` en Windows) que invoca este script con el Python actual"""
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    script = Path(__file__).resolve()
+    if sys.platform.startswith("win"):
+        destino = directorio / "adb.cmd"
+        destino.write_text(f'@"{sys.executable}" "{script}" %*\r\n', encoding="utf-8")
+    else:
+        destino = directorio / "adb"
+        destino.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n', encoding="utf-8")
+        destino.chmod(destino.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return destino
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ("--instalar", "--servidor"):
+        parser = argparse.ArgumentParser(description="adb simulado para benchmarks")
+        parser.add_argument("--instalar", type=Path, metavar="DIR", help="crear el envoltorio 'adb' en DIR")
+        parser.add_argument("--servidor", action="store_true", help="servir el protocolo de host de adb")
+        parser.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO)
+        args = parser.parse_args()
+        if args.instalar:
+            print(instalar_envoltorio(args.instalar))
+        if args.servidor:
+            tasa, total = _config_logcat()
+            servidor = ServidorADBSimulado(Escenario.desde_entorno(), args.puerto, tasa, total).iniciar()
+            print(f"adb simulado escuchando en 127.0.0.1:{servidor.puerto} "
+                  f"({', '.join(servidor.escenario.seriales())})")
+            try:
+                servidor.detenido.wait()
+            except KeyboardInterrupt:
+                servidor.detener()
+        return
+
+    try:
+        sys.exit(ejecutar_cli(sys.argv[1:], Escenario.desde_entorno()))
+    except BrokenPipeError:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
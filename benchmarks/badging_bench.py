@@ -0,0 +1,227 @@
+"""
+Benchmark del parser único de ``aapt dump badging`` (utils.badging)
+
+Compara ``parsear_badging`` con los parsers anteriores, que recorrían la
+salida línea por línea lanzando un ``re.search``/``re.findall`` por campo:
+
+  regex_por_campo   bucle de APKParser.parsear_aapt_badging y
+                    FormatUtils._parsear_output_aapt_avanzado (idénticos)
+  find_por_linea    bucle de AppServices._parsear_aapt_directo (str.find)
+
+Las versiones anteriores se reproducen aquí tal cual estaban, ya que los
+módulos ahora delegan en ``parsear_badging``. La salida sintética crece con
+``--permisos`` (más permisos, features, etiquetas por idioma y locales), como
+en apps grandes con muchas dependencias.
+
+Uso:
+    python benchmarks/badging_bench.py [--permisos 500,2000,5000] [--repeticiones 50]
+        [--salida resultados.json]
+"""
+
+import argparse
+import json
+import platform
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.badging import parsear_badging
+from utils.timing import percentil
+
+ESQUEMA_RESULTADOS = "apk-inspector/benchmark-badging"
+VERSION_RESULTADOS = 1
+
+
+def generar_badging_grande(permisos: int) -> str:
+    """Salida de badging con ``permisos`` líneas uses-permission y el resto proporcional"""
+    idiomas = [f"{a}{b}" for a in "abcdefghijklmnopqrstuvwxyz" for b in "aeiou"][:max(10, permisos // 4)]
+    lineas = [
+        "package: name='com.benchmark.grande' versionCode='4200' versionName='4.2.0' "
+        "platformBuildVersionName='14' platformBuildVersionCode='34' compileSdkVersion='34' "
+        "compileSdkVersionCodename='14'",
+        "sdkVersion:'24'",
+        "targetSdkVersion:'34'",
+    ]
+    lineas += [f"uses-permission: name='com.benchmark.permission.P{i}'" for i in range(permisos)]
+    lineas += ["uses-permission: name='android.permission.WRITE_EXTERNAL_STORAGE' maxSdkVersion='28'",
+               "permission: com.benchmark.grande.C2D_MESSAGE", "uses-library-not-required:'org.apache.http.legacy'"]
+    lineas += [f"application-label-{idioma}:'Benchmark {idioma}'" for idioma in idiomas]
+    lineas += [f"application-icon-{d}:'res/mipmap-anydpi-v26/ic_launcher.xml'" for d in (120, 160, 240, 320, 480, 640, 65534)]
+    lineas += [
+        "application: label='Benchmark' icon='res/mipmap-anydpi-v26/ic_launcher.xml'",
+        "launchable-activity: name='com.benchmark.grande.MainActivity'  label='' icon=''",
+        "application-debuggable",
+        "feature-group: label=''",
+    ]
+    lineas += [f"  uses-feature: name='android.hardware.f{i}'" for i in range(permisos // 5)]
+    lineas += [f"  uses-implied-feature: name='android.hardware.f{i}' reason='requested a permission'"
+               for i in range(permisos // 5)]
+    lineas += [
+        "main", "other-activities", "other-receivers", "other-services",
+        "supports-screens: 'small' 'normal' 'large' 'xlarge'", "supports-any-density: 'true'",
+        "locales: '--_--' " + " ".join(f"'{idioma}'" for idioma in idiomas),
+        "densities: '120' '160' '240' '320' '480' '640' '65534'",
+        "native-code: 'arm64-v8a' 'armeabi-v7a' 'x86' 'x86_64'",
+    ]
+    return "\n".join(lineas) + "\n"
+
+
+# ========== PARSERS ANTERIORES (referencia) ==========
+
+def regex_por_campo(salida: str) -> dict:
+    """Bucle de APKParser.parsear_aapt_badging antes del parser único"""
+    info = {"package": None, "version_code": None, "version_name": None, "app_label": None,
+            "min_sdk": None, "target_sdk": None, "permissions": [], "compile_sdk": None,
+            "platform_build_version": None,
+            "debuggable": "application-debuggable" in salida.lower()}
+    patrones = {
+        "package": r"name='([^']*)'",
+        "version_code": r"versionCode='([^']*)'",
+        "version_name": r"versionName='([^']*)'",
+        "platform_build_version": r"platformBuildVersionName='([^']*)'",
+        "compile_sdk": r"compileSdkVersion='([^']*)'",
+    }
+
+    def valor(linea):
+        encontrados = re.findall(r"'([^']*)'", linea)
+        return encontrados[0] if encontrados else None
+
+    for linea in salida.split("\n"):
+        linea = linea.strip()
+        if not linea:
+            continue
+        if linea.startswith("package:"):
+            for campo, patron in patrones.items():
+                encontrado = re.search(patron, linea)
+                if encontrado:
+                    info[campo] = encontrado.group(1)
+        elif linea.startswith("sdkVersion:"):
+            info["min_sdk"] = valor(linea)
+        elif linea.startswith("targetSdkVersion:"):
+            info["target_sdk"] = valor(linea)
+        elif linea.startswith("application-label:"):
+            info["app_label"] = valor(linea)
+        elif linea.startswith("application:") and "label=" in linea:
+            encontrado = re.search(r"label='([^']*)'", linea)
+            if encontrado:
+                info["app_label"] = encontrado.group(1)
+        elif linea.startswith("uses-permission:"):
+            permiso = valor(linea)
+            if permiso and permiso not in info["permissions"]:
+                info["permissions"].append(permiso)
+        elif "platformBuildVersionName" in linea:
+            info["platform_build_version"] = valor(linea)
+        elif "compileSdkVersion" in linea:
+            info["compile_sdk"] = valor(linea)
+    return info
+
+
+def find_por_linea(salida: str) -> dict:
+    """Bucle de AppServices._parsear_aapt_directo antes del parser único"""
+    info = {"package": None, "version_code": None, "version_name": None, "app_label": None,
+            "min_sdk": None, "target_sdk": None, "permissions": [], "debuggable": False}
+
+    def entre(linea, clave):
+        inicio = linea.find(clave)
+        if inicio != -1:
+            fin = linea.find("'", inicio + len(clave))
+            if fin != -1:
+                return linea[inicio + len(clave):fin]
+        return None
+
+    for linea in salida.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+        if linea.startswith("package:"):
+            info["package"] = entre(linea, "name='")
+            info["version_code"] = entre(linea, "versionCode='")
+            info["version_name"] = entre(linea, "versionName='")
+        elif linea.startswith("targetSdkVersion:"):
+            info["target_sdk"] = linea.split("targetSdkVersion:", 1)[1].strip().strip("'\"")
+        elif linea.startswith("sdkVersion:"):
+            info["min_sdk"] = linea.split("sdkVersion:", 1)[1].strip().strip("'\"")
+        elif linea.startswith("uses-permission:"):
+            permiso = entre(linea, "name='")
+            if permiso is not None:
+                info["permissions"].append(permiso)
+        elif linea.startswith("application-label:") and not info["app_label"]:
+            info["app_label"] = linea.split("application-label:", 1)[1].strip().strip("'\"")
+        if "application-debuggable" in linea.lower():
+            info["debuggable"] = True
+    return info
+
+
+PARSERS = {
+    "parser_unico": parsear_badging,
+    "regex_por_campo": regex_por_campo,
+    "find_por_linea": find_por_linea,
+}
+
+
+def medir(funcion, salida: str, repeticiones: int) -> dict:
+    funcion(salida)
+    duraciones = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion(salida)
+        duraciones.append(time.perf_counter() - t0)
+    return {"p50_ms": round(percentil(duraciones, 50) * 1000, 4),
+            "p95_ms": round(percentil(duraciones, 95) * 1000, 4)}
+
+
+def comprobar(salida: str) -> None:
+    """El parser único debe coincidir con el anterior en los campos comunes"""
+    nuevo, anterior = parsear_badging(salida), regex_por_campo(salida)
+    for campo in ("package", "version_code", "version_name", "min_sdk", "target_sdk",
+                  "compile_sdk", "platform_build_version", "app_label", "permissions", "debuggable"):
+        if nuevo[campo] != anterior[campo]:
+            raise SystemExit(f"Diferencia en '{campo}': {nuevo[campo]!r} != {anterior[campo]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del parser único de aapt dump badging")
+    parser.add_argument("--permisos", default="500,2000,5000", help="tamaños de la salida (líneas uses-permission)")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--salida", type=Path, help="archivo JSON de resultados")
+    args = parser.parse_args()
+
+    resultados = {
+        "schema": ESQUEMA_RESULTADOS,
+        "schema_version": VERSION_RESULTADOS,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "tamanos": [],
+    }
+
+    for permisos in (int(p) for p in args.permisos.split(",") if p.strip()):
+        salida = generar_badging_grande(permisos)
+        comprobar(salida)
+        datos = {"permisos": permisos, "lineas": salida.count("\n"), "bytes": len(salida), "parsers": {}}
+        for nombre, funcion in PARSERS.items():
+            datos["parsers"][nombre] = medir(funcion, salida, args.repeticiones)
+        base = datos["parsers"]["parser_unico"]["p50_ms"]
+        for nombre, medida in datos["parsers"].items():
+            if nombre != "parser_unico":
+                medida["aceleracion"] = round(medida["p50_ms"] / base, 1) if base else None
+        resultados["tamanos"].append(datos)
+
+        resumen = " | ".join(
+            f"{nombre} {medida['p50_ms']:.3f} ms" + (f" (x{medida['aceleracion']})" if "aceleracion" in medida else "")
+            for nombre, medida in datos["parsers"].items()
+        )
+        print(f"{permisos:>6} permisos, {datos['lineas']:>6} líneas: {resumen}")
+
+    if args.salida:
+        args.salida.parent.mkdir(parents=True, exist_ok=True)
+        args.salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Generador de un corpus sintético de APKs, reproducible y sin Android SDK.
+
+Los APKs se construyen con ``zipfile`` a partir de una semilla: mismo perfil y
+misma semilla producen los mismos bytes. También se generan las salidas de
+texto que normalmente producen aapt, apksigner, jarsigner y logcat, para medir
+los parsers sin ejecutar herramientas externas.
+
+El AndroidManifest.xml se escribe como XML de texto (no AXML binario): los
+parsers del proyecto trabajan sobre la salida de aapt, no sobre el binario.
+
+Uso:
+    python benchmarks/corpus_sintetico.py DIRECTORIO [--perfiles pequeno,grande] [--semilla 0]
+"""
+
+import argparse
+import random
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Perfiles del corpus: cantidad y tamaño de entradas, dex, ABIs nativas y manifest
+PERFILES: Dict[str, Dict] = {
+    "pequeno": {"entradas": 40, "tam_medio": 2 * 1024, "dex": 1, "abis": [], "permisos": 5, "componentes": 5},
+    "mediano": {"entradas": 800, "tam_medio": 8 * 1024, "dex": 2, "abis": ["arm64-v8a"], "permisos": 20, "componentes": 40},
+    "grande": {"entradas": 6000, "tam_medio": 6 * 1024, "dex": 4, "abis": ["arm64-v8a", "armeabi-v7a"], "permisos": 45, "componentes": 150},
+    "multidex": {"entradas": 300, "tam_medio": 4 * 1024, "dex": 24, "abis": [], "permisos": 15, "componentes": 30},
+    "nativo": {"entradas": 200, "tam_medio": 4 * 1024, "dex": 1, "abis": ["arm64-v8a", "armeabi-v7a", "x86", "x86_64"], "permisos": 10, "componentes": 10},
+    "manifest_grande": {"entradas": 150, "tam_medio": 2 * 1024, "dex": 1, "abis": [], "permisos": 120, "componentes": 1500},
+}
+
+PERFILES_RAPIDOS = ("pequeno", "mediano", "multidex", "nativo")
+
+# Subir al cambiar el generador: invalida los APKs ya generados en disco
+VERSION_CORPUS = 1
+
+PERMISOS_COMUNES = [
+    "INTERNET", "ACCESS_NETWORK_STATE", "CAMERA", "READ_CONTACTS", "ACCESS_FINE_LOCATION",
+    "ACCESS_COARSE_LOCATION", "RECORD_AUDIO", "READ_EXTERNAL_STORAGE", "WRITE_EXTERNAL_STORAGE",
+    "READ_PHONE_STATE", "BLUETOOTH", "NFC", "USE_BIOMETRIC", "RECEIVE_SMS", "SEND_SMS",
+    "WAKE_LOCK", "VIBRATE", "FOREGROUND_SERVICE", "POST_NOTIFICATIONS", "READ_CALENDAR",
+]
+
+TIPOS_COMPONENTE = ("activity", "service", "receiver", "provider")
+NIVELES_LOGCAT = "VDIWEF"
+TAGS_LOGCAT = ("ActivityManager", "PackageManager", "chromium", "OkHttp", "System.err", "AndroidRuntime", "Choreographer")
+
+
+def nombre_package(perfil: str) -> str:
+    return f"com.benchmark.{perfil}"
+
+
+def permisos_perfil(perfil: str) -> List[str]:
+    cantidad = PERFILES[perfil]["permisos"]
+    permisos = [f"android.permission.{p}" for p in PERMISOS_COMUNES[:cantidad]]
+    permisos += [f"{nombre_package(perfil)}.permission.CUSTOM_{i}" for i in range(cantidad - len(permisos))]
+    return permisos
+
+
+def componentes_perfil(perfil: str, semilla: int = 0) -> List[Tuple[str, str, bool]]:
+    """[(tipo, nombre, exportado)]"""
+    rnd = random.Random(f"componentes-{perfil}-{semilla}")
+    package = nombre_package(perfil)
+    return [
+        (TIPOS_COMPONENTE[i % len(TIPOS_COMPONENTE)], f"{package}.Componente{i}", rnd.random() < 0.2)
+        for i in range(PERFILES[perfil]["componentes"])
+    ]
+
+
+def generar_manifest(perfil: str, semilla: int = 0) -> str:
+    package = nombre_package(perfil)
+    lineas = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        f'<manifest xmlns:android="http://schemas.android.com/apk/res/android" package="{package}"'
+        ' android:versionCode="42" android:versionName="4.2.0">',
+        '  <uses-sdk android:minSdkVersion="24" android:targetSdkVersion="34"/>',
+    ]
+    lineas += [f'  <uses-permission android:name="{p}"/>' for p in permisos_perfil(perfil)]
+    lineas.append('  <application android:label="@string/app_name" android:allowBackup="false">')
+    for tipo, nombre, exportado in componentes_perfil(perfil, semilla):
+        lineas.append(f'    <{tipo} android:name="{nombre}" android:exported="{str(exportado).lower()}"/>')
+    lineas += ['  </application>', '</manifest>']
+    return "\n".join(lineas) + "\n"
+
+
+def generar_xmltree(perfil: str, semilla: int = 0) -> str:
+    """Salida equivalente a ``aapt2 dump xmltree`` del AndroidManifest.xml del perfil"""
+    ns = "http://schemas.android.com/apk/res/android"
+    package = nombre_package(perfil)
+    lineas = [
+        f"N: android={ns} (line=2)",
+        "  E: manifest (line=2)",
+        f"    A: {ns}:versionCode(0x0101021b)=42",
+        f'    A: {ns}:versionName(0x0101021c)="4.2.0" (Raw: "4.2.0")',
+        f'    A: package="{package}" (Raw: "{package}")',
+        "    E: uses-sdk (line=3)",
+        f"      A: {ns}:minSdkVersion(0x0101020c)=24",
+        f"      A: {ns}:targetSdkVersion(0x01010270)=34",
+    ]
+    for i, permiso in enumerate(permisos_perfil(perfil)):
+        lineas += [f"    E: uses-permission (line={4 + i})",
+                   f'      A: {ns}:name(0x01010003)="{permiso}" (Raw: "{permiso}")']
+    lineas += ["    E: application (line=100)",
+               f"      A: {ns}:label(0x01010001)=@0x7f0e0001",
+               f"      A: {ns}:allowBackup(0x01010280)=false"]
+    for i, (tipo, nombre, exportado) in enumerate(componentes_perfil(perfil, semilla)):
+        lineas += [f"      E: {tipo} (line={101 + i})",
+                   f'        A: {ns}:name(0x01010003)="{nombre}" (Raw: "{nombre}")',
+                   f"        A: {ns}:exported(0x01010010)={str(exportado).lower()}"]
+    return "\n".join(lineas) + "\n"
+
+
+def _contenido(rnd: random.Random, tamano: int, comprimible: bool) -> bytes:
+    if comprimible:
+        patron = bytes(rnd.getrandbits(8) for _ in range(64))
+        return (patron * (tamano // 64 + 1))[:tamano]
+    return rnd.getrandbits(tamano * 8).to_bytes(tamano, "little") if tamano else b""
+
+
+def generar_apk(destino: Path, perfil: str, semilla: int = 0) -> Path:
+    """Escribir un APK sintético del perfil indicado (determinista para una semilla)"""
+    datos = PERFILES[perfil]
+    rnd = random.Random(f"apk-{perfil}-{semilla}")
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+
+    # Marca de tiempo fija: el ZIP no depende del reloj
+    fecha = (2024, 1, 1, 0, 0, 0)
+
+    def escribir(zf, nombre, contenido, metodo=zipfile.ZIP_DEFLATED):
+        info = zipfile.ZipInfo(nombre, fecha)
+        info.compress_type = metodo
+        zf.writestr(info, contenido)
+
+    with zipfile.ZipFile(destino, "w") as zf:
+        escribir(zf, "AndroidManifest.xml", generar_manifest(perfil, semilla))
+        for i in range(datos["dex"]):
+            nombre = "classes.dex" if i == 0 else f"classes{i + 1}.dex"
+            escribir(zf, nombre, b"dex\n035\0" + _contenido(rnd, datos["tam_medio"] * 8, comprimible=True))
+        for abi in datos["abis"]:
+            for j in range(3):
+                # Las .so se guardan sin comprimir, como con extractNativeLibs=false
+                escribir(zf, f"lib/{abi}/libnativo{j}.so",
+                         b"\x7fELF" + _contenido(rnd, datos["tam_medio"] * 4, comprimible=False),
+                         zipfile.ZIP_STORED)
+        escribir(zf, "res/values/strings.xml",
+                 f'<resources><string name="app_name">Benchmark {perfil}</string>'
+                 f'<string name="package_name">{nombre_package(perfil)}</string></resources>')
+        escribir(zf, "resources.arsc", _contenido(rnd, datos["tam_medio"] * 4, comprimible=True), zipfile.ZIP_STORED)
+
+        for i in range(datos["entradas"]):
+            tamano = max(16, int(rnd.expovariate(1 / datos["tam_medio"])))
+            if i % 3 == 0:
+                # Imágenes: incompresibles y almacenadas
+                escribir(zf, f"res/drawable-xxhdpi/img_{i}.png",
+                         b"\x89PNG" + _contenido(rnd, tamano, comprimible=False), zipfile.ZIP_STORED)
+            elif i % 3 == 1:
+                escribir(zf, f"res/layout/layout_{i}.xml", _contenido(rnd, tamano, comprimible=True))
+            else:
+                escribir(zf, f"assets/datos/archivo_{i}.bin", _contenido(rnd, tamano, comprimible=i % 2 == 0))
+
+        escribir(zf, "META-INF/MANIFEST.MF", "Manifest-Version: 1.0\nCreated-By: corpus_sintetico\n")
+        escribir(zf, "META-INF/CERT.SF", "Signature-Version: 1.0\n")
+        escribir(zf, "META-INF/CERT.RSA", _contenido(rnd, 1200, comprimible=False))
+
+    return destino
+
+
+def generar_badging(perfil: str, semilla: int = 0) -> str:
+    """Salida equivalente a ``aapt dump badging`` para el APK del perfil"""
+    package = nombre_package(perfil)
+    lineas = [
+        f"package: name='{package}' versionCode='42' versionName='4.2.0' platformBuildVersionName='14'",
+        "sdkVersion:'24'",
+        "targetSdkVersion:'34'",
+    ]
+    lineas += [f"uses-permission: name='{p}'" for p in permisos_perfil(perfil)]
+    lineas += [
+        f"application-label:'Benchmark {perfil}'",
+        f"application: label='Benchmark {perfil}' icon='res/mipmap-anydpi-v26/ic_launcher.xml'",
+        f"launchable-activity: name='{package}.Componente0'  label='' icon=''",
+    ]
+    for tipo, nombre, _ in componentes_perfil(perfil, semilla):
+        if tipo == "provider":
+            lineas.append(f"provides-component:'{nombre}'")
+    lineas += ["feature-group: label=''", "  uses-feature: name='android.hardware.camera'",
+               "supports-screens: 'small' 'normal' 'large' 'xlarge'", "locales: '--_--' 'es' 'en'",
+               "densities: '160' '240' '320' '480' '640'"]
+    abis = PERFILES[perfil]["abis"]
+    if abis:
+        lineas.append("native-code: " + " ".join(f"'{abi}'" for abi in abis))
+    return "\n".join(lineas) + "\n"
+
+
+def generar_salida_apksigner(perfil: str) -> str:
+    return "\n".join([
+        "Verifies",
+        "Verified using v1 scheme (JAR signing): true",
+        "Verified using v2 scheme (APK Signature Scheme v2): true",
+        "Verified using v3 scheme (APK Signature Scheme v3): true",
+        "Verified using v4 scheme (APK Signature Scheme v4): false",
+        "Number of signers: 1",
+        f"Signer #1 certificate DN: CN=Benchmark, OU=Perf, O=Benchmark {perfil}, L=Lima, C=PE",
+        "Signer #1 certificate SHA-256 digest: " + "ab" * 32,
+        "Signer #1 certificate SHA-1 digest: " + "cd" * 20,
+        "Signer #1 certificate MD5 digest: " + "ef" * 16,
+    ]) + "\n"
+
+
+def generar_salida_jarsigner(perfil: str, entradas: int = 50) -> str:
+    lineas = [f"sm      1234 Mon Jan 01 00:00:00 UTC 2024 res/layout/layout_{i}.xml" for i in range(entradas)]
+    lineas += [
+        "",
+        "      >>> Signer",
+        f"      X.509, CN=Benchmark, OU=Perf, O=Benchmark {perfil}, L=Lima, C=PE",
+        "      [certificate is valid from 1/1/24, 12:00 AM to 1/1/54, 12:00 AM]",
+        "",
+        "jar verified.",
+    ]
+    return "\n".join(lineas) + "\n"
+
+
+def generar_logcat(lineas: int, semilla: int = 0) -> List[str]:
+    """Líneas en formato ``threadtime`` con niveles y tags variados"""
+    rnd = random.Random(f"logcat-{semilla}")
+    resultado = []
+    for i in range(lineas):
+        nivel = NIVELES_LOGCAT[rnd.randrange(len(NIVELES_LOGCAT))]
+        tag = TAGS_LOGCAT[rnd.randrange(len(TAGS_LOGCAT))]
+        ms = i * 7
+        resultado.append(
+            f"01-01 00:{(ms // 60000) % 60:02d}:{(ms // 1000) % 60:02d}.{ms % 1000:03d}  "
+            f"{1000 + i % 50:5d} {2000 + i % 200:5d} {nivel} {tag}: mensaje sintético número {i} "
+            f"con carga {'x' * rnd.randrange(0, 80)}\n"
+        )
+    return resultado
+
+
+def generar_corpus(directorio: Path, perfiles=None, semilla: int = 0) -> Dict[str, Path]:
+    """Generar (o reutilizar si ya existen) los APKs del corpus: {perfil: ruta}"""
+    directorio = Path(directorio)
+    corpus = {}
+    for perfil in perfiles or PERFILES:
+        ruta = directorio / f"{perfil}_v{VERSION_CORPUS}_s{semilla}.apk"
+        if not ruta.exists():
+            generar_apk(ruta, perfil, semilla)
+        corpus[perfil] = ruta
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar el corpus sintético de APKs")
+    parser.add_argument("directorio", type=Path)
+    parser.add_argument("--perfiles", default=",".join(PERFILES))
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    for perfil, ruta in generar_corpus(args.directorio, args.perfiles.split(","), args.semilla).items():
+        print(f"{perfil:<16} {ruta.stat().st_size / 1024:10.1f} KB  {ruta}")
+
+
+if __name__ == "__main__":
+    main()
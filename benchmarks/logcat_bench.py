@@ -0,0 +1,184 @@
+"""
+Benchmark de captura de logcat y refresco de estadísticas contra el adb simulado
+
+Mide, sin dispositivo:
+
+  captura     líneas/s leídas de ``adb logcat`` con la misma configuración de
+              Popen que ``LogcatManager`` (texto, bufsize=1, readline) más la
+              clasificación de nivel, a varias tasas de emisión
+  render      líneas/s insertadas en un ScrolledText con tags y ``see(END)``,
+              como ``_procesar_linea_logcat`` (se omite si no hay display)
+  estadisticas  latencia p50/p95 de ``LogcatManager._obtener_estadisticas_app``
+              (dumpsys package/meminfo/cpuinfo/netstats/batterystats)
+
+Uso:
+    python benchmarks/logcat_bench.py [--tasas 10000,100000,0] [--lineas 200000]
+        [--render-lineas 20000] [--estadisticas 10] [--salida resultados.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from adb_simulado import instalar_envoltorio
+from utils.timing import percentil
+
+ESQUEMA_RESULTADOS = "apk-inspector/benchmark-logcat"
+VERSION_RESULTADOS = 1
+PACKAGE_PRUEBA = "com.simulado.app0001"
+
+
+def medir_captura(adb: Path, tasa: int, lineas: int) -> dict:
+    from core.logcat import LogcatManager
+
+    entorno = dict(os.environ, ADB_SIMULADO_TASA=str(tasa), ADB_SIMULADO_LINEAS=str(lineas),
+                   ADB_SIMULADO_SERIALES="SIMU0001")
+    clasificar = LogcatManager._determinar_nivel_log
+    niveles = {}
+    recibidas = 0
+
+    t0 = time.perf_counter()
+    proceso = subprocess.Popen(
+        [str(adb), "logcat", "-v", "threadtime"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        encoding="utf-8", errors="ignore", bufsize=1, env=entorno,
+    )
+    for linea in proceso.stdout:
+        if linea.strip():
+            nivel = clasificar(None, linea)
+            niveles[nivel] = niveles.get(nivel, 0) + 1
+            recibidas += 1
+    proceso.wait()
+    duracion = time.perf_counter() - t0
+
+    return {
+        "tasa_objetivo": tasa or None,
+        "lineas": recibidas,
+        "duracion_s": round(duracion, 3),
+        "lineas_por_s": round(recibidas / duracion) if duracion else None,
+        # Con tasa fija, > 1 significa que el consumidor no sigue el ritmo
+        "retraso_relativo": round(duracion / (lineas / tasa), 3) if tasa else None,
+        "niveles": niveles,
+    }
+
+
+def medir_render(lineas: int) -> dict:
+    try:
+        import tkinter as tk
+        from tkinter import scrolledtext
+        root = tk.Tk()
+        root.withdraw()
+    except Exception as e:
+        return {"omitido": f"sin display: {e}"}
+
+    from adb_simulado import Escenario
+    from core.logcat import LogcatManager
+
+    escenario = Escenario.por_defecto(["SIMU0001"])
+    generador = escenario.lineas_logcat("SIMU0001")
+    muestra = [next(generador) for _ in range(lineas)]
+
+    texto = scrolledtext.ScrolledText(root)
+    for tag in ("ERROR", "WARN", "DEBUG", "VERBOSE", "FATAL", "INFO"):
+        texto.tag_configure(tag)
+    clasificar = LogcatManager._determinar_nivel_log
+
+    t0 = time.perf_counter()
+    for linea in muestra:
+        texto.insert(tk.END, linea, clasificar(None, linea))
+        texto.see(tk.END)
+    root.update_idletasks()
+    duracion = time.perf_counter() - t0
+    root.destroy()
+
+    return {"lineas": lineas, "duracion_s": round(duracion, 3), "lineas_por_s": round(lineas / duracion)}
+
+
+def medir_estadisticas(adb: Path, repeticiones: int) -> dict:
+    from core.logcat import LogcatManager
+    from utils.logger import APKLogger
+
+    os.environ["ADB_SIMULADO_SERIALES"] = "SIMU0001"
+    logger = APKLogger(log_dir=Path(tempfile.mkdtemp(prefix="apk_inspector_bench_")))
+    manager = LogcatManager(None, None, None, logger)
+    manager.adb_path = str(adb)
+
+    duraciones = []
+    ok = True
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        exito, stats = manager._obtener_estadisticas_app(PACKAGE_PRUEBA)
+        duraciones.append(time.perf_counter() - t0)
+        ok = ok and exito
+
+    return {
+        "repeticiones": repeticiones,
+        "exito": ok,
+        "campos": sorted(stats) if isinstance(stats, dict) else [],
+        "p50_ms": round(percentil(duraciones, 50) * 1000, 1),
+        "p95_ms": round(percentil(duraciones, 95) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de logcat y estadísticas con adb simulado")
+    parser.add_argument("--tasas", default="10000,100000,0", help="líneas/s de emisión (0 = sin límite)")
+    parser.add_argument("--lineas", type=int, default=200000)
+    parser.add_argument("--render-lineas", type=int, default=20000)
+    parser.add_argument("--estadisticas", type=int, default=10, help="repeticiones del refresco de estadísticas")
+    parser.add_argument("--salida", type=Path, help="archivo JSON de resultados")
+    args = parser.parse_args()
+
+    adb = instalar_envoltorio(Path(tempfile.mkdtemp(prefix="adb_simulado_")))
+
+    resultados = {
+        "schema": ESQUEMA_RESULTADOS,
+        "schema_version": VERSION_RESULTADOS,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "captura": [],
+        "render": None,
+        "estadisticas": None,
+    }
+
+    for tasa in (int(t) for t in args.tasas.split(",") if t.strip()):
+        # A tasa fija se limitan las líneas para que cada corrida dure ~2 s como máximo
+        lineas = min(args.lineas, tasa * 2) if tasa else args.lineas
+        datos = medir_captura(adb, tasa, lineas)
+        resultados["captura"].append(datos)
+        objetivo = f"{tasa:,}/s" if tasa else "sin límite"
+        retraso = f"  retraso x{datos['retraso_relativo']}" if datos["retraso_relativo"] else ""
+        print(f"captura ({objetivo}): {datos['lineas']:,} líneas, {datos['lineas_por_s']:,} líneas/s{retraso}")
+
+    if args.render_lineas > 0:
+        resultados["render"] = medir_render(args.render_lineas)
+        if "omitido" in resultados["render"]:
+            print(f"render: omitido ({resultados['render']['omitido']})")
+        else:
+            print(f"render: {resultados['render']['lineas_por_s']:,} líneas/s")
+
+    if args.estadisticas > 0:
+        resultados["estadisticas"] = medir_estadisticas(adb, args.estadisticas)
+        datos = resultados["estadisticas"]
+        print(f"estadísticas: p50 {datos['p50_ms']} ms | p95 {datos['p95_ms']} ms "
+              f"({len(datos['campos'])} campos, éxito={datos['exito']})")
+
+    if args.salida:
+        args.salida.parent.mkdir(parents=True, exist_ok=True)
+        args.salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Benchmark del pipeline de análisis sobre el corpus sintético (sin SDK ni dispositivo)
+
+Por cada perfil del corpus mide, en varias repeticiones:
+
+  zip_index   construir el índice del directorio central (core.zip_index)
+  archivos    análisis de archivos del APK (libs nativas, strings, build type)
+  manifest    parseo de las salidas de aapt badging y xmltree a parsed_info
+  firma       parseo de las salidas de apksigner/jarsigner
+  pci_dss     puntuación PCI DSS y reporte PCI
+  reporte     construcción del reporte y render en texto, HTML, Markdown y JSON
+
+y además el throughput de clasificación de líneas de logcat (líneas/s).
+
+Los resultados (p50/p95/máx por etapa) se escriben en JSON para seguir
+regresiones; ``--comparar`` contrasta contra una ejecución anterior y termina
+con código 1 si alguna etapa empeora más que ``--umbral``.
+
+Uso:
+    python benchmarks/pipeline_bench.py [--perfiles todos|rapidos|p1,p2] [--repeticiones 7]
+        [--logcat-lineas 200000] [--salida resultados.json] [--comparar base.json]
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus_sintetico import (PERFILES, PERFILES_RAPIDOS, VERSION_CORPUS, generar_badging, generar_corpus,
+                              generar_logcat, generar_salida_apksigner, generar_salida_jarsigner,
+                              generar_xmltree)
+from utils.timing import EstadisticasEtapas, MedicionTiempos
+
+ESQUEMA_RESULTADOS = "apk-inspector/benchmark"
+VERSION_RESULTADOS = 1
+
+
+def _componentes():
+    """Instancias reales del pipeline (sin tool detector: no se ejecutan herramientas)"""
+    from core.apk_analyzer import APKAnalyzer
+    from core.pci_dss_analyzer import PCIDSSAnalyzer
+    from core.signature_verifier import SignatureVerifier
+    return APKAnalyzer(tool_detector=None), PCIDSSAnalyzer(), SignatureVerifier()
+
+
+def medir_perfil(perfil: str, apk_path: Path, repeticiones: int, semilla: int) -> dict:
+    from core.zip_index import ZipIndex
+    from utils.format_utils import FormatUtils
+    from utils.report_model import ReporteAnalisis
+
+    analizador, pci, verificador = _componentes()
+    badging = generar_badging(perfil, semilla)
+    xmltree = generar_xmltree(perfil, semilla)
+    salida_apksigner = generar_salida_apksigner(perfil)
+    salida_jarsigner = generar_salida_jarsigner(perfil)
+    tamano_mb = apk_path.stat().st_size / (1024 * 1024)
+
+    estadisticas = EstadisticasEtapas()
+    entradas = 0
+    for _ in range(repeticiones):
+        tiempos = MedicionTiempos()
+
+        with tiempos.etapa("zip_index"):
+            # Índice nuevo en cada repetición: se mide la construcción, no la caché
+            entradas = len(ZipIndex(apk_path))
+
+        with tiempos.etapa("archivos"):
+            analizador._analizar_por_archivos_mejorado(apk_path)
+
+        with tiempos.etapa("manifest"):
+            parsed_info = analizador.parsear_informacion_apk({"apk_path": str(apk_path), "aapt": badging,
+                                                                "xmltree": xmltree})
+
+        with tiempos.etapa("firma"):
+            signature_info = verificador.parsear_info_firma(salida_apksigner, salida_jarsigner)
+
+        with tiempos.etapa("pci_dss"):
+            pci_analysis = pci.analizar_cumplimiento_pci(parsed_info, signature_info, apk_path)
+            pci_analysis["reporte_completo"] = pci.generar_reporte_pci(pci_analysis)
+
+        with tiempos.etapa("reporte"):
+            reporte = ReporteAnalisis(apk_path.name)
+            FormatUtils.construir_resumen_apk(reporte, parsed_info, signature_info, apk_path.name,
+                                              tamano_mb, pci_analysis)
+            for formato in ReporteAnalisis.FORMATOS:
+                reporte.escribir(io.StringIO(), formato)
+
+        tiempos.finalizar()
+        estadisticas.registrar(tiempos)
+
+    return {
+        "apk": {"archivo": apk_path.name, "tamano_bytes": apk_path.stat().st_size, "entradas": entradas},
+        "etapas": estadisticas.resumen(),
+    }
+
+
+def medir_logcat(lineas: int, repeticiones: int, semilla: int) -> dict:
+    """Throughput de clasificación de nivel de las líneas de logcat"""
+    from core.logcat import LogcatManager
+
+    muestra = generar_logcat(lineas, semilla)
+    clasificar = LogcatManager._determinar_nivel_log
+    duraciones = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for linea in muestra:
+            clasificar(None, linea)
+        duraciones.append(time.perf_counter() - t0)
+
+    mejor = min(duraciones)
+    return {
+        "lineas": lineas,
+        "mejor_s": round(mejor, 4),
+        "lineas_por_s": round(lineas / mejor) if mejor else None,
+    }
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> list:
+    """[(perfil, etapa, p50_base, p50_actual, razón)] de las etapas que empeoraron"""
+    regresiones = []
+    for perfil, datos in actual["perfiles"].items():
+        etapas_base = base.get("perfiles", {}).get(perfil, {}).get("etapas", {})
+        for etapa, valores in datos["etapas"].items():
+            anterior = etapas_base.get(etapa, {}).get("p50_ms")
+            if anterior and valores["p50_ms"] / anterior > umbral:
+                regresiones.append((perfil, etapa, anterior, valores["p50_ms"], valores["p50_ms"] / anterior))
+
+    lps_base = (base.get("logcat") or {}).get("lineas_por_s")
+    lps = (actual.get("logcat") or {}).get("lineas_por_s")
+    if lps_base and lps and lps_base / lps > umbral:
+        regresiones.append(("logcat", "lineas_por_s", lps_base, lps, lps_base / lps))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de análisis con APKs sintéticos")
+    parser.add_argument("--perfiles", default="rapidos",
+                        help="'todos', 'rapidos' o lista separada por comas de: " + ", ".join(PERFILES))
+    parser.add_argument("--repeticiones", type=int, default=7)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--logcat-lineas", type=int, default=200000)
+    parser.add_argument("--corpus", type=Path, default=Path(tempfile.gettempdir()) / "apk_inspector_corpus",
+                        help="directorio del corpus (se reutiliza entre ejecuciones)")
+    parser.add_argument("--salida", type=Path, help="archivo JSON de resultados")
+    parser.add_argument("--comparar", type=Path, help="resultados anteriores para detectar regresiones")
+    parser.add_argument("--umbral", type=float, default=1.25,
+                        help="razón p50 actual/base a partir de la cual se reporta regresión")
+    args = parser.parse_args()
+
+    if args.perfiles == "todos":
+        perfiles = list(PERFILES)
+    elif args.perfiles == "rapidos":
+        perfiles = list(PERFILES_RAPIDOS)
+    else:
+        perfiles = [p.strip() for p in args.perfiles.split(",") if p.strip()]
+        desconocidos = [p for p in perfiles if p not in PERFILES]
+        if desconocidos:
+            parser.error(f"Perfiles desconocidos: {', '.join(desconocidos)}")
+
+    corpus = generar_corpus(args.corpus, perfiles, args.semilla)
+
+    resultados = {
+        "schema": ESQUEMA_RESULTADOS,
+        "schema_version": VERSION_RESULTADOS,
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "parametros": {"repeticiones": args.repeticiones, "semilla": args.semilla,
+                       "version_corpus": VERSION_CORPUS},
+        "perfiles": {},
+        "logcat": None,
+    }
+
+    for perfil in perfiles:
+        datos = medir_perfil(perfil, corpus[perfil], args.repeticiones, args.semilla)
+        resultados["perfiles"][perfil] = datos
+        apk = datos["apk"]
+        print(f"\n{perfil} ({apk['entradas']} entradas, {apk['tamano_bytes'] / 1024:.0f} KB)")
+        print(f"  {'Etapa':<12}{'p50 ms':>10}{'p95 ms':>10}{'máx ms':>10}")
+        for etapa, valores in datos["etapas"].items():
+            print(f"  {etapa:<12}{valores['p50_ms']:>10.2f}{valores['p95_ms']:>10.2f}{valores['max_ms']:>10.2f}")
+
+    if args.logcat_lineas > 0:
+        resultados["logcat"] = medir_logcat(args.logcat_lineas, max(1, min(args.repeticiones, 3)), args.semilla)
+        print(f"\nlogcat: {resultados['logcat']['lineas_por_s']:,} líneas/s "
+              f"({args.logcat_lineas:,} líneas en {resultados['logcat']['mejor_s']:.3f} s)")
+
+    if args.salida:
+        args.salida.parent.mkdir(parents=True, exist_ok=True)
+        args.salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        base = json.loads(args.comparar.read_text(encoding="utf-8"))
+        regresiones = comparar(resultados, base, args.umbral)
+        if regresiones:
+            print(f"\n⚠️ Regresiones (> x{args.umbral:.2f}):")
+            for perfil, etapa, anterior, actual, razon in regresiones:
+                print(f"  {perfil}/{etapa}: {anterior:.2f} -> {actual:.2f} (x{razon:.2f})")
+            sys.exit(1)
+        print("\n✅ Sin regresiones respecto a la base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de arranque basado en ``python -X importtime``
+
+Mide el tiempo de importación del punto de entrada (``app.main``) en procesos
+nuevos y lista los módulos más costosos. Con ``--registro`` mide además la
+construcción de los componentes perezosos en su primer acceso.
+
+Uso:
+    python benchmarks/startup_importtime.py [--repeticiones 5] [--top 15] [--registro]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Mismo sys.path que launcher.py
+CODIGO_IMPORT = (
+    "import sys; "
+    f"sys.path.insert(0, {str(PROJECT_ROOT)!r}); "
+    f"sys.path.insert(0, {str(PROJECT_ROOT / 'app')!r}); "
+    "import app.main"
+)
+
+CODIGO_REGISTRO = CODIGO_IMPORT + """
+import time
+from app.app_initializer import AppInitializer
+class _Pantalla:
+    def actualizar_progreso(self, *a): pass
+ini = AppInitializer(None, _Pantalla())
+t0 = time.perf_counter()
+ini._load_phase_1_basic_components(); ini._load_phase_2_core_components()
+ini._load_phase_3_utils_components(); ini._load_phase_4_setup_components()
+t1 = time.perf_counter()
+ini.components.precargar(['tool_detector', 'apk_analyzer', 'adb_manager', 'format_utils', 'pci_analyzer'])
+t2 = time.perf_counter()
+print(f"registro={t1 - t0:.6f} primer_acceso={t2 - t1:.6f}")
+for nombre, seg in sorted(ini.components.tiempos_construccion().items(), key=lambda x: -x[1]):
+    print(f"  {nombre:<20} {seg * 1000:8.1f} ms")
+"""
+
+
+def parsear_importtime(stderr: str):
+    """Devuelve [(modulo, self_us, acumulado_us)] de la salida de -X importtime"""
+    filas = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) != 3:
+            continue
+        try:
+            filas.append((partes[2].rstrip(), int(partes[0]), int(partes[1])))
+        except ValueError:
+            continue
+    return filas
+
+
+def medir_importacion(repeticiones: int):
+    totales = []
+    ultima = []
+    for _ in range(repeticiones):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CODIGO_IMPORT],
+            capture_output=True, text=True, cwd=str(PROJECT_ROOT),
+            env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+        )
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:])
+            sys.exit(proc.returncode)
+        ultima = parsear_importtime(proc.stderr)
+        raiz = [f for f in ultima if f[0].strip() == "app.main"]
+        totales.append(raiz[-1][2] if raiz else sum(f[1] for f in ultima))
+    return totales, ultima
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de APK Inspector")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--registro", action="store_true",
+                        help="medir también la construcción perezosa de componentes")
+    args = parser.parse_args()
+
+    totales, filas = medir_importacion(args.repeticiones)
+    print(f"Importación de app.main ({args.repeticiones} procesos):")
+    print(f"  mediana {statistics.median(totales) / 1000:.1f} ms | "
+          f"mín {min(totales) / 1000:.1f} ms | máx {max(totales) / 1000:.1f} ms")
+
+    print(f"\nTop {args.top} módulos por tiempo propio (última ejecución):")
+    for modulo, self_us, acumulado_us in sorted(filas, key=lambda f: -f[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (acum. {acumulado_us / 1000:8.1f} ms)  {modulo.strip()}")
+
+    proyecto = [f for f in filas if f[0].strip().split(".")[0] in ("app", "core", "utils", "ui", "components")
+                or f[0].strip() in ("app_services", "app_initializer", "apk_manager")]
+    print("\nMódulos del proyecto cargados al arrancar:")
+    for modulo, self_us, acumulado_us in proyecto:
+        print(f"  {acumulado_us / 1000:8.1f} ms  {modulo.strip()}")
+
+    if args.registro:
+        proc = subprocess.run([sys.executable, "-c", CODIGO_REGISTRO], capture_output=True,
+                              text=True, cwd=str(PROJECT_ROOT))
+        print("\nRegistro de componentes:")
+        print(proc.stdout or proc.stderr[-2000:])
+
+
+if __name__ == "__main__":
+    main()
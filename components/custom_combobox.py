@@ -1,7 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
 
+try:
+    from components.fuzzy_index import IndiceDifuso
+except ImportError:
+    from fuzzy_index import IndiceDifuso
+
 class CustomCombobox:
+    # Filas que se insertan en el Listbox de una vez; el resto se agrega al hacer scroll
+    TAMANO_VENTANA = 60
+
     def __init__(self, parent, all_items, styles, on_select_callback=None, width=30):
         self.parent = parent
         self.all_items = all_items
@@ -9,6 +17,10 @@ class CustomCombobox:
         self.on_select_callback = on_select_callback
         self.width = width
         
+        # Índice de búsqueda (minúsculas + trigramas) construido una sola vez
+        self.indice = IndiceDifuso(all_items)
+        self.filas_materializadas = 0
+        
         # Variables de estado
         self.filtered_items = all_items.copy()
         self.dropdown_visible = False
@@ -81,7 +93,7 @@ class CustomCombobox:
             command=self.listbox.yview
         )
         
-        self.listbox.config(yscrollcommand=self.scrollbar.set)
+        self.listbox.config(yscrollcommand=self._on_listbox_scroll)
         self.listbox.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
         
@@ -208,28 +220,40 @@ class CustomCombobox:
             pass
     
     def _filter_items(self):
-        """Filtrar items basado en el texto actual"""
-        search_text = self.current_value.get().lower()
+        """Filtrar items basado en el texto actual (ranking difuso sobre el índice)"""
+        search_text = self.current_value.get()
         
-        if search_text:
-            self.filtered_items = [
-                item for item in self.all_items 
-                if search_text in item.lower()
-            ]
+        if search_text.strip():
+            filtrados = self.indice.buscar(search_text)
         else:
-            self.filtered_items = self.all_items.copy()
+            filtrados = self.all_items.copy()
         
-        self._update_listbox()
+        if filtrados != self.filtered_items:
+            self.filtered_items = filtrados
+            self._update_listbox()
     
     def _update_listbox(self):
-        """Actualizar el Listbox con items filtrados"""
+        """Actualizar el Listbox materializando solo la primera ventana de filas"""
         self.listbox.delete(0, tk.END)
-        for item in self.filtered_items:
-            self.listbox.insert(tk.END, item)
+        self.filas_materializadas = 0
+        self._materializar_filas(self.TAMANO_VENTANA)
         
         # ✅ Remover efectos hover al actualizar la lista
         self.last_hover_index = -1
     
+    def _materializar_filas(self, cantidad):
+        """Insertar las siguientes ``cantidad`` filas filtradas en el Listbox"""
+        pendientes = self.filtered_items[self.filas_materializadas:self.filas_materializadas + cantidad]
+        if pendientes:
+            self.listbox.insert(tk.END, *pendientes)
+            self.filas_materializadas += len(pendientes)
+    
+    def _on_listbox_scroll(self, first, last):
+        """Agregar la siguiente ventana al acercarse al final de lo materializado"""
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.9 and self.filas_materializadas < len(self.filtered_items):
+            self.listbox.after_idle(self._materializar_filas, self.TAMANO_VENTANA)
+    
     def _show_dropdown(self):
         """Mostrar el dropdown"""
         if self.dropdown_visible or not self.filtered_items:
@@ -337,6 +361,8 @@ class CustomCombobox:
                 self.listbox.see(current_index[0] - 1)
         elif event.keysym == 'Down':
             current_index = self.listbox.curselection()
+            if current_index and current_index[0] >= self.listbox.size() - 2:
+                self._materializar_filas(self.TAMANO_VENTANA)
             last_index = self.listbox.size() - 1
             if current_index and current_index[0] < last_index:
                 self.listbox.selection_clear(0, tk.END)
@@ -349,16 +375,13 @@ class CustomCombobox:
         # Solo aplicar filtro si hay texto, no seleccionar automáticamente
         current_text = self.current_value.get()
         if current_text:
-            # Buscar coincidencia exacta o primera coincidencia
-            matching_items = [item for item in self.all_items if current_text.lower() in item.lower()]
-            if matching_items:
-                # Si hay una coincidencia exacta, seleccionarla
-                exact_match = [item for item in matching_items if item.lower() == current_text.lower()]
-                if exact_match:
-                    self.current_value.set(exact_match[0])
-                else:
-                    # Si no hay exacta, usar la primera coincidencia
-                    self.current_value.set(matching_items[0])
+            # Coincidencia exacta o la mejor según el ranking
+            mejor = self.indice.coincidencia_exacta(current_text)
+            if mejor is None:
+                coincidencias = self.indice.buscar(current_text, limite=1)
+                mejor = coincidencias[0] if coincidencias else None
+            if mejor is not None:
+                self.current_value.set(mejor)
                 self._trigger_callback()
         
         self._hide_dropdown()
@@ -421,6 +444,7 @@ class CustomCombobox:
     def set_items(self, new_items):
         """Actualizar la lista de items"""
         self.all_items = new_items.copy()
+        self.indice = IndiceDifuso(self.all_items)
         self.filtered_items = new_items.copy()
         self._update_listbox()
     
@@ -0,0 +1,146 @@
+import re
+from typing import Dict, List, Optional, Sequence, Set
+
+
+class IndiceDifuso:
+    """Índice en memoria para búsqueda rápida sobre listas de packages.
+
+    Las minúsculas y los trigramas se calculan una sola vez al construir el
+    índice. Las coincidencias se ordenan por relevancia:
+
+      0. igual a la consulta
+      1. empieza por la consulta
+      2. la consulta empieza un segmento (después de '.', '_' o '-')
+      3. contiene la consulta
+      4. coincidencia difusa (las letras aparecen en orden, con saltos)
+
+    Solo se revisan los items que contienen todas las letras de la consulta
+    (índice por carácter, condición necesaria también para la coincidencia
+    difusa) y, de ellos, solo los que tienen todos sus trigramas pasan la
+    comprobación de subcadena. Si la consulta nueva extiende la anterior (el
+    usuario sigue escribiendo), solo se revisan las coincidencias previas.
+    """
+
+    SEPARADORES = ".:_-/"
+
+    def __init__(self, items: Sequence[str]):
+        self.items: List[str] = list(items)
+        self.minusculas: List[str] = [item.lower() for item in self.items]
+        self.trigramas: Dict[str, Set[int]] = {}
+        self.caracteres: Dict[str, Set[int]] = {}
+        for i, texto in enumerate(self.minusculas):
+            for j in range(len(texto) - 2):
+                self.trigramas.setdefault(texto[j:j + 3], set()).add(i)
+            for caracter in set(texto):
+                self.caracteres.setdefault(caracter, set()).add(i)
+        # Items revisados en la última búsqueda: con subcadena (_rango) y con el patrón difuso
+        self.ultimas_revisiones: Dict[str, int] = {"subcadena": 0, "difusa": 0}
+        self._ultima_consulta: Optional[str] = None
+        self._ultimas_coincidencias: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _candidatos_trigrama(self, consulta: str) -> Optional[Set[int]]:
+        """Items que contienen todos los trigramas de la consulta (superconjunto de las subcadenas)"""
+        if len(consulta) < 3:
+            return None
+        conjuntos = []
+        for j in range(len(consulta) - 2):
+            conjunto = self.trigramas.get(consulta[j:j + 3])
+            if not conjunto:
+                return set()
+            conjuntos.append(conjunto)
+        conjuntos.sort(key=len)
+        resultado = set(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            resultado &= conjunto
+            if not resultado:
+                break
+        return resultado
+
+    def _candidatos_caracteres(self, consulta: str) -> Set[int]:
+        """Items que contienen todas las letras de la consulta (superconjunto de las coincidencias difusas)"""
+        conjuntos = []
+        for caracter in set(consulta):
+            conjunto = self.caracteres.get(caracter)
+            if not conjunto:
+                return set()
+            conjuntos.append(conjunto)
+        conjuntos.sort(key=len)
+        resultado = set(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            resultado &= conjunto
+            if not resultado:
+                break
+        return resultado
+
+    def _rango(self, texto: str, consulta: str) -> Optional[tuple]:
+        """Clave de orden de un item para la consulta, o None si no coincide"""
+        pos = texto.find(consulta)
+        if pos == 0:
+            return (0 if len(texto) == len(consulta) else 1, 0, len(texto))
+        if pos > 0:
+            # Buscar una aparición al inicio de un segmento
+            inicio = pos
+            while inicio != -1:
+                if texto[inicio - 1] in self.SEPARADORES:
+                    return (2, inicio, len(texto))
+                inicio = texto.find(consulta, inicio + 1)
+            return (3, pos, len(texto))
+        return None
+
+    def buscar(self, consulta: str, limite: Optional[int] = None) -> List[str]:
+        """Items que coinciden con ``consulta``, ordenados por relevancia"""
+        return [self.items[i] for i in self.buscar_indices(consulta, limite)]
+
+    def buscar_indices(self, consulta: str, limite: Optional[int] = None) -> List[int]:
+        consulta = consulta.lower().strip()
+        if not consulta:
+            self._ultima_consulta, self._ultimas_coincidencias = None, None
+            indices = list(range(len(self.items)))
+            return indices[:limite] if limite else indices
+
+        # Solo items con todas las letras de la consulta; al seguir escribiendo,
+        # además, solo los que coincidían antes
+        candidatos = self._candidatos_caracteres(consulta)
+        if (self._ultima_consulta is not None and consulta.startswith(self._ultima_consulta)
+                and self._ultimas_coincidencias is not None):
+            universo = [i for i in self._ultimas_coincidencias if i in candidatos]
+        else:
+            universo = candidatos
+
+        candidatos_subcadena = self._candidatos_trigrama(consulta)
+        patron_difuso = re.compile(".*?".join(re.escape(c) for c in consulta))
+
+        puntuados = []
+        revisiones = {"subcadena": 0, "difusa": 0}
+        for i in universo:
+            texto = self.minusculas[i]
+            rango = None
+            if candidatos_subcadena is None or i in candidatos_subcadena:
+                revisiones["subcadena"] += 1
+                rango = self._rango(texto, consulta)
+            if rango is None:
+                revisiones["difusa"] += 1
+                match = patron_difuso.search(texto)
+                if not match:
+                    continue
+                # Coincidencias difusas más compactas primero
+                rango = (4, match.end() - match.start(), len(texto))
+            puntuados.append((rango, texto, i))
+
+        puntuados.sort()
+        coincidencias = [i for _, _, i in puntuados]
+
+        self._ultima_consulta = consulta
+        self._ultimas_coincidencias = coincidencias
+        self.ultimas_revisiones = revisiones
+        return coincidencias[:limite] if limite else coincidencias
+
+    def coincidencia_exacta(self, consulta: str) -> Optional[str]:
+        consulta = consulta.lower().strip()
+        for i, texto in enumerate(self.minusculas):
+            if texto == consulta:
+                return self.items[i]
+        return None
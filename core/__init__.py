@@ -2,16 +2,37 @@
 Módulos core para APK Inspector & Verifier
 """
 
-from .tool_detector import ToolDetector
-from .apk_analyzer import APKAnalyzer
-from .signature_verifier import SignatureVerifier
-from .adb_manager import ADBManager
-from .apk_signer import APKSigner
+import importlib
 
-__all__ = [
-    'ToolDetector',
-    'APKAnalyzer', 
-    'SignatureVerifier',
-    'ADBManager',
-    'APKSigner',
-]
\ No newline at end of file
+# Las clases se importan al primer acceso (PEP 562): importar un submódulo
+# como ``core.adb_manager`` no arrastra el analizador, el firmador ni PCI DSS.
+_EXPORTS = {
+    'ToolDetector': '.tool_detector',
+    'APKAnalyzer': '.apk_analyzer',
+    'SignatureVerifier': '.signature_verifier',
+    'ADBManager': '.adb_manager',
+    'ClienteADB': '.adb_client',
+    'SeguidorDispositivos': '.device_tracker',
+    'InventarioDispositivos': '.device_inventory',
+    'APKSigner': '.apk_signer',
+    'BatchSigner': '.batch_signer',
+    'InstallEngine': '.install_engine',
+    'DeviceFleet': '.device_fleet',
+    'AnalizadorBundle': '.bundle_analyzer',
+    'DeviceAudit': '.device_audit',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    modulo = _EXPORTS.get(name)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
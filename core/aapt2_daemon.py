@@ -0,0 +1,238 @@
+import atexit
+import os
+import queue
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.debug_trace import obtener_traza
+from utils.process_pool import PoolPrestamo
+
+_traza = obtener_traza("herramientas")
+
+# Tras cada comando se envía ``version``: su línea en stdout delimita la salida
+# del comando (aapt2 solo marca el fin con "Done" en stderr)
+COMANDO_CENTINELA = "version"
+PREFIJO_CENTINELA = "Android Asset Packaging Tool"
+
+
+class Aapt2Daemon:
+    """Proceso ``aapt2 daemon`` de larga duración.
+
+    El daemon lee de stdin los argumentos de cada comando, uno por línea y
+    terminados con una línea vacía; escribe la salida en stdout y los
+    diagnósticos, ``Error`` y ``Done`` en stderr. Un hilo por tubería vuelca
+    las líneas en una cola común que ``ejecutar`` demultiplexa.
+    """
+
+    def __init__(self, aapt2_bin: Path, timeout_inicio: float = 15):
+        self.aapt2_bin = Path(aapt2_bin)
+        self.timeout_inicio = timeout_inicio
+        self.proceso: Optional[subprocess.Popen] = None
+        self.comandos_ejecutados = 0
+        self.reinicios = 0
+        self._cola: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def vivo(self) -> bool:
+        return self.proceso is not None and self.proceso.poll() is None
+
+    def iniciar(self):
+        """Lanzar el daemon y esperar ``Ready``; RuntimeError si no responde"""
+        self._cola = queue.Queue()
+        self.proceso = subprocess.Popen(
+            [str(self.aapt2_bin), "daemon"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="ignore", bufsize=1,
+        )
+        for canal, tuberia in (("out", self.proceso.stdout), ("err", self.proceso.stderr)):
+            threading.Thread(target=self._leer, args=(canal, tuberia, self._cola),
+                             name=f"aapt2-daemon-{canal}", daemon=True).start()
+
+        try:
+            while True:
+                canal, linea = self._cola.get(timeout=self.timeout_inicio)
+                if linea is None:
+                    raise RuntimeError("aapt2 terminó al iniciar el modo daemon")
+                if canal == "out" and linea.strip() == "Ready":
+                    return
+        except queue.Empty:
+            self.cerrar()
+            raise RuntimeError("aapt2 daemon no respondió 'Ready'")
+        except RuntimeError:
+            self.cerrar()
+            raise
+
+    @staticmethod
+    def _leer(canal: str, tuberia, cola: queue.Queue):
+        try:
+            for linea in tuberia:
+                cola.put((canal, linea))
+        except (OSError, ValueError):
+            pass
+        finally:
+            cola.put((canal, None))
+
+    def ejecutar(self, args: List[str], timeout: float = 30) -> Tuple[int, str]:
+        """Ejecutar un comando de aapt2 (p. ej. ``["dump", "badging", apk]``).
+
+        Si el daemon muere durante el comando se reinicia y se reintenta una
+        vez; si excede ``timeout`` se mata y se reinicia en el próximo uso.
+        """
+        with self._lock:
+            for intento in range(2):
+                if not self.vivo():
+                    self.cerrar()
+                    self.iniciar()
+                try:
+                    return self._ejecutar_uno(args, timeout)
+                except (BrokenPipeError, _DaemonCaido):
+                    # Proceso caído: descartarlo; el próximo uso arranca uno nuevo
+                    self.cerrar()
+                    self.reinicios += 1
+                except _DaemonTimeout:
+                    self.cerrar()
+                    self.reinicios += 1
+                    return 1, f"Tiempo de espera agotado ({timeout}s) en aapt2 daemon: {' '.join(args[:2])}"
+            return 1, "aapt2 daemon terminó inesperadamente"
+
+    def _ejecutar_uno(self, args: List[str], timeout: float) -> Tuple[int, str]:
+        self.proceso.stdin.write("\n".join(args) + "\n\n" + COMANDO_CENTINELA + "\n\n")
+        self.proceso.stdin.flush()
+
+        salida, diagnosticos = [], []
+        fines, error, centinela = 0, False, False
+        limite = time.monotonic() + timeout
+        while fines < 2 or not centinela:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise _DaemonTimeout()
+            try:
+                canal, linea = self._cola.get(timeout=restante)
+            except queue.Empty:
+                raise _DaemonTimeout()
+            if linea is None:
+                raise _DaemonCaido()
+
+            if canal == "err":
+                texto = linea.strip()
+                if texto == "Done":
+                    fines += 1
+                elif fines == 0:
+                    if texto == "Error":
+                        error = True
+                    else:
+                        diagnosticos.append(linea)
+            elif not centinela:
+                if linea.startswith(PREFIJO_CENTINELA):
+                    centinela = True
+                else:
+                    salida.append(linea)
+
+        self.comandos_ejecutados += 1
+        return (1 if error else 0), "".join(salida) + "".join(diagnosticos)
+
+    def cerrar(self):
+        proceso, self.proceso = self.proceso, None
+        if proceso is None:
+            return
+        try:
+            if proceso.poll() is None:
+                proceso.stdin.write("quit\n\n")
+                proceso.stdin.flush()
+                proceso.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proceso.kill()
+        finally:
+            for tuberia in (proceso.stdin, proceso.stdout, proceso.stderr):
+                try:
+                    tuberia.close()
+                except (OSError, ValueError):
+                    pass
+
+
+class _DaemonCaido(Exception):
+    pass
+
+
+class _DaemonTimeout(Exception):
+    pass
+
+
+# ========== POOL COMPARTIDO DE DAEMONS ==========
+
+# Daemons por binario como máximo: los pools de hilos crean hilos nuevos en cada
+# análisis/auditoría, así que los daemons no pueden pertenecer a un hilo
+MAX_DAEMONS_POR_BINARIO = max(1, min(4, os.cpu_count() or 2))
+
+_pools: Dict[str, PoolPrestamo[Aapt2Daemon]] = {}
+# Por binario: None sin probar, True salida verificada, False modo daemon no utilizable
+_soporte: Dict[str, Optional[bool]] = {}
+_lock = threading.Lock()
+
+
+def _obtener_pool(aapt2_bin: Path) -> PoolPrestamo[Aapt2Daemon]:
+    with _lock:
+        pool = _pools.get(str(aapt2_bin))
+        if pool is None:
+            pool = _pools[str(aapt2_bin)] = PoolPrestamo(lambda: Aapt2Daemon(aapt2_bin), MAX_DAEMONS_POR_BINARIO)
+        return pool
+
+
+def ejecutar_aapt2(aapt2_bin: Path, args: List[str], directo: Callable[[Path, List[str]], Tuple[int, str]],
+                   timeout: float = 30) -> Tuple[int, str]:
+    """Ejecutar ``aapt2 <args>`` con un daemon prestado del pool del binario.
+
+    ``directo`` ejecuta el comando en un proceso nuevo: se usa si el binario no
+    soporta el modo daemon y, una única vez por binario, para comprobar que la
+    salida demultiplexada coincide con la de una ejecución normal.
+    """
+    clave = str(aapt2_bin)
+    if _soporte.get(clave) is False:
+        return directo(aapt2_bin, args)
+
+    with _obtener_pool(aapt2_bin).prestar() as daemon:
+        try:
+            rc, salida = daemon.ejecutar(args, timeout)
+        except (OSError, RuntimeError) as e:
+            if _traza.activa:
+                _traza(f"aapt2 daemon no disponible ({e}); se usa un proceso por comando")
+            _soporte[clave] = False
+            return directo(aapt2_bin, args)
+
+        if _soporte.get(clave) is None:
+            rc_directo, salida_directa = directo(aapt2_bin, args)
+            coincide = rc == rc_directo and salida.strip() == salida_directa.strip()
+            _soporte[clave] = coincide
+            if not coincide:
+                if _traza.activa:
+                    _traza("La salida de aapt2 daemon no coincide con la ejecución directa; daemon desactivado")
+                daemon.cerrar()
+                return rc_directo, salida_directa
+
+    return rc, salida
+
+
+def _todos_los_daemons() -> List[Aapt2Daemon]:
+    with _lock:
+        pools = list(_pools.values())
+    return [daemon for pool in pools for daemon in pool.todos()]
+
+
+def estado_daemons() -> List[Dict]:
+    return [
+        {"binario": str(d.aapt2_bin), "vivo": d.vivo(), "comandos": d.comandos_ejecutados,
+         "reinicios": d.reinicios, "soporte": _soporte.get(str(d.aapt2_bin))}
+        for d in _todos_los_daemons()
+    ]
+
+
+def cerrar_daemons():
+    """Terminar los procesos; los daemons siguen en su pool y se relanzan en el próximo uso"""
+    for daemon in _todos_los_daemons():
+        daemon.cerrar()
+
+
+atexit.register(cerrar_daemons)
@@ -0,0 +1,550 @@
+"""
+Cliente del servidor adb (protocolo de host, "smart sockets") sin lanzar el ejecutable
+
+Cada petición es ``<longitud en 4 hex><servicio>`` y el servidor responde
+``OKAY`` o ``FAIL<4 hex><mensaje>``. Los servicios ``host:`` (devices,
+version...) se responden en la misma conexión; para hablar con un dispositivo
+se elige el transporte (``host:transport:<serial>``) y después se abre un
+servicio del dispositivo (``shell:``, ``exec:``, ``sync:``) que consume la
+conexión.
+
+Las sesiones ``sync:`` (pull/push/stat) admiten varias transferencias, así que
+se reutilizan desde un pool por dispositivo; ``shell:`` cierra la conexión al
+terminar el comando. Un semáforo por dispositivo limita las conexiones
+simultáneas. ``ejecutar_adb`` traduce los argumentos de la línea de comandos
+de adb (``-s X shell ...``, ``devices``, ``install``, ``pull``...) al
+protocolo y recurre al ejecutable solo para lo que no sabe traducir o si no
+hay servidor al que conectarse.
+"""
+
+import os
+import shlex
+import socket
+import stat as stat_mod
+import struct
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("herramientas")
+
+HOST_POR_DEFECTO = "127.0.0.1"
+PUERTO_POR_DEFECTO = 5037
+
+# Desactiva el cliente nativo (todo por el ejecutable): APK_INSPECTOR_ADB_NATIVO=0
+VARIABLE_DESACTIVAR = "APK_INSPECTOR_ADB_NATIVO"
+
+TAM_BLOQUE_SYNC = 64 * 1024
+# Marca para recuperar el código de salida con el servicio shell: (v1)
+MARCA_CODIGO = "@@apk_inspector_rc:"
+
+
+class ErrorADB(Exception):
+    """Respuesta FAIL del servidor o del dispositivo"""
+
+
+class ServidorNoDisponible(ErrorADB):
+    """No hay servidor adb escuchando (ni se pudo iniciar)"""
+
+
+class ClienteADB:
+    """Conexiones al servidor adb en ``host:puerto`` con pool de sesiones sync por dispositivo"""
+
+    def __init__(self, host: str = HOST_POR_DEFECTO, puerto: int = PUERTO_POR_DEFECTO,
+                 adb_bin: Optional[str] = None, max_por_dispositivo: int = 4, timeout: float = 10.0):
+        self.host = host
+        self.puerto = puerto
+        self.adb_bin = adb_bin
+        self.max_por_dispositivo = max(1, max_por_dispositivo)
+        self.timeout = timeout
+        self._sync_libres: Dict[str, List[socket.socket]] = {}
+        self._semaforos: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._servidor_iniciado = False
+
+    # ========== CONEXIÓN ==========
+
+    def _conectar(self, timeout: Optional[float] = None) -> socket.socket:
+        try:
+            try:
+                sock = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+            except ConnectionRefusedError:
+                if not self._iniciar_servidor():
+                    raise
+                sock = socket.create_connection((self.host, self.puerto), timeout=self.timeout)
+        except OSError as e:
+            raise ServidorNoDisponible(f"servidor adb no disponible en {self.host}:{self.puerto}: {e}") from e
+        sock.settimeout(timeout or self.timeout)
+        return sock
+
+    def _iniciar_servidor(self) -> bool:
+        """``adb start-server`` una sola vez, como hace el propio cliente de adb"""
+        with self._lock:
+            if self._servidor_iniciado or not self.adb_bin:
+                return False
+            self._servidor_iniciado = True
+        try:
+            subprocess.run([str(self.adb_bin), "-P", str(self.puerto), "start-server"],
+                           capture_output=True, timeout=30)
+            return True
+        except (OSError, subprocess.SubprocessError) as e:
+            _traza.error(f"No se pudo iniciar el servidor adb: {e}")
+            return False
+
+    @staticmethod
+    def _leer_exacto(sock: socket.socket, n: int) -> bytes:
+        datos = bytearray()
+        while len(datos) < n:
+            bloque = sock.recv(n - len(datos))
+            if not bloque:
+                raise ConnectionError("conexión cerrada por el servidor adb")
+            datos += bloque
+        return bytes(datos)
+
+    @staticmethod
+    def _leer_hasta_fin(sock: socket.socket) -> bytes:
+        partes = []
+        while True:
+            bloque = sock.recv(65536)
+            if not bloque:
+                return b"".join(partes)
+            partes.append(bloque)
+
+    def _leer_cadena(self, sock: socket.socket) -> str:
+        longitud = int(self._leer_exacto(sock, 4), 16)
+        return self._leer_exacto(sock, longitud).decode("utf-8", errors="replace")
+
+    def _peticion(self, sock: socket.socket, servicio: str):
+        """Enviar un servicio y esperar OKAY (FAIL -> ErrorADB)"""
+        datos = servicio.encode("utf-8")
+        sock.sendall(f"{len(datos):04x}".encode() + datos)
+        estado = self._leer_exacto(sock, 4)
+        if estado == b"OKAY":
+            return
+        if estado == b"FAIL":
+            raise ErrorADB(self._leer_cadena(sock))
+        raise ErrorADB(f"respuesta inesperada del servidor adb: {estado!r}")
+
+    def _consulta_host(self, servicio: str) -> str:
+        with self._conectar() as sock:
+            self._peticion(sock, servicio)
+            return self._leer_cadena(sock)
+
+    def _abrir_servicio(self, serial: Optional[str], servicio: str, timeout: Optional[float] = None) -> socket.socket:
+        """Conexión con el transporte del dispositivo elegido y el servicio ya abierto"""
+        sock = self._conectar(timeout)
+        try:
+            self._peticion(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+            self._peticion(sock, servicio)
+            return sock
+        except BaseException:
+            sock.close()
+            raise
+
+    def _semaforo(self, serial: Optional[str]) -> threading.BoundedSemaphore:
+        with self._lock:
+            clave = serial or ""
+            if clave not in self._semaforos:
+                self._semaforos[clave] = threading.BoundedSemaphore(self.max_por_dispositivo)
+            return self._semaforos[clave]
+
+    # ========== SERVICIOS DE HOST ==========
+
+    def version(self) -> int:
+        return int(self._consulta_host("host:version"), 16)
+
+    def listado_dispositivos(self, largo: bool = False) -> str:
+        """Cuerpo de ``adb devices`` (una línea ``serial\\testado`` por dispositivo)"""
+        return self._consulta_host("host:devices-l" if largo else "host:devices")
+
+    def dispositivos(self) -> List[Tuple[str, str]]:
+        """[(serial, estado)] de todos los dispositivos, conectados o no"""
+        resultado = []
+        for linea in self.listado_dispositivos().splitlines():
+            serial, _, estado = linea.partition("\t")
+            if serial.strip():
+                resultado.append((serial.strip(), estado.strip()))
+        return resultado
+
+    def estado(self, serial: Optional[str] = None) -> str:
+        return self._consulta_host(f"host-serial:{serial}:get-state" if serial else "host:get-state")
+
+    def seguir_dispositivos(self, largo: bool = False) -> socket.socket:
+        """Conexión suscrita a ``host:track-devices``: cada cambio llega como ``<4 hex><listado>``"""
+        sock = self._conectar()
+        try:
+            self._peticion(sock, "host:track-devices-l" if largo else "host:track-devices")
+        except BaseException:
+            sock.close()
+            raise
+        # La suscripción espera cambios indefinidamente
+        sock.settimeout(None)
+        return sock
+
+    def leer_listado(self, sock: socket.socket) -> str:
+        """Siguiente listado de una conexión de ``seguir_dispositivos`` (bloquea hasta el cambio)"""
+        return self._leer_cadena(sock)
+
+    def permitir_inicio_servidor(self):
+        """Permitir otro ``start-server`` en la próxima conexión rechazada (p. ej. tras caerse el servidor)"""
+        with self._lock:
+            self._servidor_iniciado = False
+
+    def detener_servidor(self):
+        with self._lock:
+            libres = [s for lista in self._sync_libres.values() for s in lista]
+            self._sync_libres.clear()
+        for sock in libres:
+            sock.close()
+        with self._conectar() as sock:
+            self._peticion(sock, "host:kill")
+        # La próxima conexión puede volver a arrancarlo
+        self._servidor_iniciado = False
+
+    # ========== SHELL ==========
+
+    def shell(self, serial: Optional[str], comando: str, timeout: Optional[float] = None) -> Tuple[int, str]:
+        """(código de salida, salida) de ``adb shell <comando>``"""
+        with self._semaforo(serial):
+            with self._abrir_servicio(serial, f"shell:{comando}; echo {MARCA_CODIGO}$?", timeout) as sock:
+                texto = self._leer_hasta_fin(sock).decode("utf-8", errors="ignore")
+        texto = texto.replace("\r\n", "\n")
+        posicion = texto.rfind(MARCA_CODIGO)
+        if posicion < 0:
+            return 0, texto
+        codigo = texto[posicion + len(MARCA_CODIGO):].strip()
+        return (int(codigo) if codigo.isdigit() else 0), texto[:posicion]
+
+    def abrir_shell(self, serial: Optional[str], comando: str) -> socket.socket:
+        """Conexión con la salida en streaming de un comando (p. ej. logcat); cerrarla lo detiene"""
+        sock = self._abrir_servicio(serial, f"shell:{comando}")
+        # Un stream puede pasar mucho tiempo sin datos (logcat filtrado): sin timeout de lectura
+        sock.settimeout(None)
+        return sock
+
+    # ========== SYNC (pull / push / stat) ==========
+
+    @staticmethod
+    def _sigue_abierta(sock: socket.socket) -> bool:
+        """Una sesión del pool pudo cerrarse (dispositivo desconectado, servidor reiniciado)"""
+        try:
+            # setblocking(True) borraría el timeout: se restaura el que tenía
+            timeout = sock.gettimeout()
+            sock.setblocking(False)
+            try:
+                return sock.recv(1, socket.MSG_PEEK) != b""
+            except BlockingIOError:
+                return True
+            finally:
+                sock.settimeout(timeout)
+        except OSError:
+            return False
+
+    def _tomar_sync(self, clave: str) -> Optional[socket.socket]:
+        while True:
+            with self._lock:
+                libres = self._sync_libres.get(clave)
+                sock = libres.pop() if libres else None
+            if sock is None or self._sigue_abierta(sock):
+                return sock
+            sock.close()
+
+    @contextmanager
+    def _sesion_sync(self, serial: Optional[str]):
+        """Sesión ``sync:`` del pool del dispositivo; se devuelve al pool si termina sin error"""
+        clave = serial or ""
+        with self._semaforo(serial):
+            sock = self._tomar_sync(clave)
+            if sock is None:
+                sock = self._abrir_servicio(serial, "sync:")
+            try:
+                yield sock
+            except BaseException:
+                sock.close()
+                raise
+            sock.settimeout(self.timeout)
+            with self._lock:
+                self._sync_libres.setdefault(clave, []).append(sock)
+
+    @staticmethod
+    def _enviar_sync(sock: socket.socket, orden: bytes, datos: bytes = b""):
+        sock.sendall(orden + struct.pack("<I", len(datos)) + datos)
+
+    def _stat_en_sesion(self, sock: socket.socket, ruta: str) -> Tuple[int, int, int]:
+        self._enviar_sync(sock, b"STAT", ruta.encode("utf-8"))
+        respuesta = self._leer_exacto(sock, 16)
+        if respuesta[:4] != b"STAT":
+            raise ErrorADB(f"respuesta sync inesperada: {respuesta[:4]!r}")
+        return struct.unpack("<III", respuesta[4:])
+
+    def stat(self, serial: Optional[str], ruta: str) -> Optional[Dict]:
+        """{modo, tamano, mtime} de un archivo del dispositivo o None si no existe"""
+        with self._sesion_sync(serial) as sock:
+            modo, tamano, mtime = self._stat_en_sesion(sock, ruta)
+        if modo == 0 and tamano == 0 and mtime == 0:
+            return None
+        return {"modo": modo, "tamano": tamano, "mtime": mtime}
+
+    def pull(self, serial: Optional[str], remota: str, local: Path, timeout: Optional[float] = None) -> int:
+        """Copiar un archivo del dispositivo; retorna los bytes recibidos"""
+        local = Path(local)
+        if local.is_dir():
+            local = local / remota.rstrip("/").rpartition("/")[2]
+        recibidos = 0
+        with self._sesion_sync(serial) as sock:
+            # Plazo por operación de lectura, no para toda la transferencia
+            sock.settimeout(timeout or self.timeout)
+            self._enviar_sync(sock, b"RECV", remota.encode("utf-8"))
+            with open(local, "wb") as f:
+                while True:
+                    orden, longitud = struct.unpack("<4sI", self._leer_exacto(sock, 8))
+                    if orden == b"DATA":
+                        bloque = self._leer_exacto(sock, longitud)
+                        f.write(bloque)
+                        recibidos += len(bloque)
+                    elif orden == b"DONE":
+                        break
+                    elif orden == b"FAIL":
+                        mensaje = self._leer_exacto(sock, longitud).decode("utf-8", errors="replace")
+                        f.close()
+                        local.unlink(missing_ok=True)
+                        raise ErrorADB(f"{remota}: {mensaje}")
+                    else:
+                        raise ErrorADB(f"respuesta sync inesperada: {orden!r}")
+        return recibidos
+
+    def push(self, serial: Optional[str], local: Path, remota: str, modo: int = 0o644,
+             timeout: Optional[float] = None) -> int:
+        """Copiar un archivo al dispositivo; retorna los bytes enviados"""
+        local = Path(local)
+        enviados = 0
+        with self._sesion_sync(serial) as sock:
+            sock.settimeout(timeout or self.timeout)
+            self._enviar_sync(sock, b"SEND", f"{remota},{stat_mod.S_IFREG | modo}".encode("utf-8"))
+            with open(local, "rb") as f:
+                while True:
+                    bloque = f.read(TAM_BLOQUE_SYNC)
+                    if not bloque:
+                        break
+                    self._enviar_sync(sock, b"DATA", bloque)
+                    enviados += len(bloque)
+            sock.sendall(b"DONE" + struct.pack("<I", int(time.time())))
+            orden, longitud = struct.unpack("<4sI", self._leer_exacto(sock, 8))
+            if orden == b"FAIL":
+                raise ErrorADB(f"{remota}: {self._leer_exacto(sock, longitud).decode('utf-8', errors='replace')}")
+            if orden != b"OKAY":
+                raise ErrorADB(f"respuesta sync inesperada: {orden!r}")
+        return enviados
+
+    # ========== PAQUETES ==========
+
+    def instalar(self, serial: Optional[str], apk: Path, opciones: List[str] = None,
+                 timeout: Optional[float] = None,
+                 callback_progreso: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str]:
+        """Instalación en streaming (``cmd package install -S``), como ``adb install``.
+
+        ``opciones`` por defecto ``["-r"]``. ``callback_progreso(enviados, total)``
+        se invoca tras cada bloque. Si el dispositivo no tiene ``cmd package``
+        (Android < 7) se copia a /data/local/tmp y se instala con ``pm install``.
+        """
+        apk = Path(apk)
+        opciones = ["-r"] if opciones is None else list(opciones)
+        tamano = apk.stat().st_size
+        servicio = "exec:" + " ".join(["cmd", "package", "install"] + opciones + ["-S", str(tamano)])
+        with self._semaforo(serial):
+            with self._abrir_servicio(serial, servicio, timeout) as sock:
+                enviados = 0
+                with open(apk, "rb") as f:
+                    while True:
+                        bloque = f.read(TAM_BLOQUE_SYNC)
+                        if not bloque:
+                            break
+                        sock.sendall(bloque)
+                        enviados += len(bloque)
+                        if callback_progreso:
+                            callback_progreso(enviados, tamano)
+                salida = self._leer_hasta_fin(sock).decode("utf-8", errors="ignore")
+        if "Success" in salida:
+            return True, salida
+        if "Failure" in salida:
+            return False, salida
+
+        remota = f"/data/local/tmp/{apk.name}"
+        self.push(serial, apk, remota, timeout=timeout)
+        rc, salida = self.shell(serial, f"pm install {' '.join(opciones)} {remota}", timeout)
+        self.shell(serial, f"rm -f {remota}")
+        return rc == 0 and "Success" in salida, salida
+
+    def desinstalar(self, serial: Optional[str], paquete: str, conservar_datos: bool = False) -> Tuple[bool, str]:
+        rc, salida = self.shell(serial, f"pm uninstall {'-k ' if conservar_datos else ''}{paquete}")
+        return rc == 0 and "Success" in salida, salida
+
+    # ========== ARGUMENTOS DE LA LÍNEA DE COMANDOS ==========
+
+    def ejecutar_args(self, args: List[str], timeout: Optional[float] = None) -> Optional[Tuple[int, str]]:
+        """(código, salida) de los argumentos de ``adb`` o None si no se traducen al protocolo"""
+        args = [str(a) for a in args]
+        serial = os.environ.get("ANDROID_SERIAL") or None
+        while args and args[0].startswith("-"):
+            if args[0] == "-s" and len(args) > 1:
+                serial, args = args[1], args[2:]
+            else:
+                # -d/-e/-t/-H/-P...: los resuelve el ejecutable
+                return None
+        if not args:
+            return None
+        comando, resto = args[0], args[1:]
+
+        try:
+            if comando == "devices":
+                return 0, "List of devices attached\n" + self.listado_dispositivos(largo="-l" in resto) + "\n"
+            if comando == "version":
+                return 0, f"Android Debug Bridge version 1.0.{self.version()}\n"
+            if comando == "start-server":
+                self.version()
+                return 0, ""
+            if comando == "kill-server":
+                self.detener_servidor()
+                return 0, ""
+            if comando == "get-state":
+                return 0, self.estado(serial) + "\n"
+            if comando == "shell" and resto and resto[0] not in ("-t", "-T", "-x", "-n"):
+                return self.shell(serial, " ".join(resto), timeout)
+            if comando == "pull" and len(resto) == 2:
+                recibidos = self.pull(serial, resto[0], Path(resto[1]), timeout)
+                return 0, f"{resto[0]}: 1 file pulled, 0 skipped. ({recibidos} bytes)\n"
+            if comando == "push" and len(resto) == 2 and Path(resto[0]).is_file():
+                remota = resto[1] + Path(resto[0]).name if resto[1].endswith("/") else resto[1]
+                enviados = self.push(serial, Path(resto[0]), remota, timeout=timeout)
+                return 0, f"{resto[0]}: 1 file pushed, 0 skipped. ({enviados} bytes)\n"
+            if (comando == "install" and resto and resto[-1].lower().endswith(".apk")
+                    and "--incremental" not in resto):
+                ok, salida = self.instalar(serial, Path(resto[-1]), resto[:-1], timeout)
+                return (0 if ok else 1), salida
+            if comando == "uninstall" and resto:
+                ok, salida = self.desinstalar(serial, resto[-1], conservar_datos="-k" in resto[:-1])
+                return (0 if ok else 1), salida
+        except ServidorNoDisponible:
+            raise
+        except ErrorADB as e:
+            return 1, f"adb: error: {e}\n"
+        except socket.timeout:
+            return 1, f"Tiempo de espera agotado ({timeout}s)"
+        except OSError as e:
+            return 1, f"Error ejecutando comando: {str(e)}"
+        return None
+
+
+_clientes: Dict[Tuple[str, int], ClienteADB] = {}
+_lock_clientes = threading.Lock()
+
+
+def nativo_activo() -> bool:
+    return os.environ.get(VARIABLE_DESACTIVAR, "1").strip().lower() not in ("0", "false", "no")
+
+
+def obtener_cliente(adb_bin: Optional[str] = None) -> ClienteADB:
+    """Cliente compartido del servidor adb (``ANDROID_ADB_SERVER_PORT`` como en adb)"""
+    puerto = int(os.environ.get("ANDROID_ADB_SERVER_PORT") or PUERTO_POR_DEFECTO)
+    clave = (HOST_POR_DEFECTO, puerto)
+    with _lock_clientes:
+        cliente = _clientes.get(clave)
+        if cliente is None:
+            cliente = _clientes[clave] = ClienteADB(HOST_POR_DEFECTO, puerto, adb_bin)
+        elif adb_bin and not cliente.adb_bin:
+            cliente.adb_bin = adb_bin
+    return cliente
+
+
+class ShellEnStreaming:
+    """Conexión de ``abrir_shell`` con la parte de ``subprocess.Popen`` que usan los lectores
+
+    ``stdout`` es texto línea a línea; ``terminate``/``kill`` cierran la
+    conexión (el comando termina en el dispositivo) y desbloquean la lectura.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self.stdout = sock.makefile("r", encoding="utf-8", errors="ignore", newline=None)
+        self.returncode: Optional[int] = None
+
+    def poll(self) -> Optional[int]:
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        # El protocolo shell v1 no informa del código: el fin del stream es la salida
+        if self.returncode is None:
+            self.returncode = 0
+        return self.returncode
+
+    def terminate(self):
+        if self.returncode is None:
+            self.returncode = -1
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    kill = terminate
+
+
+def abrir_shell_adb(adb_bin, serial: Optional[str], comando: List[str]):
+    """Salida en streaming de ``adb [-s serial] shell <comando>`` (p. ej. logcat)
+
+    Devuelve un ``ShellEnStreaming`` sobre el servidor adb o, si el cliente
+    nativo está desactivado o no hay servidor, el ``Popen`` del ejecutable;
+    ambos se leen por ``stdout`` y se detienen con ``terminate``.
+    """
+    if nativo_activo():
+        try:
+            return ShellEnStreaming(obtener_cliente(str(adb_bin)).abrir_shell(serial, shlex.join(comando)))
+        except ServidorNoDisponible as e:
+            if _traza.activa:
+                _traza(f"Cliente adb nativo no disponible ({e}), se usa el ejecutable")
+
+    return subprocess.Popen(
+        [str(adb_bin)] + (["-s", serial] if serial else []) + ["shell"] + [str(a) for a in comando],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='ignore',
+        bufsize=1,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    )
+
+
+def ejecutar_adb(adb_bin, args: List[str], timeout: int = 60) -> Tuple[int, str]:
+    """(código, stdout + stderr) de ``adb <args>``: por el protocolo si se puede, si no con el ejecutable"""
+    if nativo_activo():
+        try:
+            resultado = obtener_cliente(str(adb_bin)).ejecutar_args(args, timeout)
+            if resultado is not None:
+                return resultado
+        except ServidorNoDisponible as e:
+            # Sin servidor accesible: el ejecutable lo arranca o informa del error
+            if _traza.activa:
+                _traza(f"Cliente adb nativo no disponible ({e}), se usa el ejecutable")
+
+    try:
+        proc = subprocess.run(
+            [str(adb_bin)] + [str(a) for a in args],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            encoding='utf-8',
+            errors='ignore',
+            # En Windows, sin abrir una ventana de consola por comando
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        return proc.returncode, proc.stdout + proc.stderr
+    except subprocess.TimeoutExpired:
+        return 1, f"Tiempo de espera agotado ({timeout}s)"
+    except Exception as e:
+        return 1, f"Error ejecutando comando: {str(e)}"
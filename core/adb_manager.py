@@ -3,6 +3,8 @@ from pathlib import Path
 from typing import List, Tuple, Dict
 import sys
 
+from core.install_engine import InstallEngine
+
 class ADBManager:
     def __init__(self):
         self.devices_cache = None
@@ -18,6 +20,16 @@ class ADBManager:
         if not adb_bin.exists():
             return False, [f"ADB no encontrado en: {platform_path}"]
             
+        # Tabla viva de host:track-devices: sin lanzar 'adb devices' en cada consulta
+        from core.device_tracker import dispositivos_listos
+        try:
+            dispositivos = dispositivos_listos(adb_bin)
+        except Exception:
+            dispositivos = None
+        if dispositivos is not None:
+            self.devices_cache = dispositivos
+            return True, dispositivos
+
         try:
             rc, output = self._ejecutar_comando(adb_bin, ["devices"])
             if rc != 0:
@@ -69,7 +81,8 @@ class ADBManager:
         comando.extend(["install", "-r", str(apk_path)])
         
         try:
-            rc, output = self._ejecutar_comando(adb_bin, comando, timeout=120)  # 2 minutos timeout
+            timeout = InstallEngine.calcular_timeout(apk_path.stat().st_size)
+            rc, output = self._ejecutar_comando(adb_bin, comando, timeout=timeout)
             exito = rc == 0
             return exito, output
             
@@ -79,25 +92,13 @@ class ADBManager:
             return False, f"Error durante instalación: {str(e)}"
 
     def _ejecutar_comando(self, command_path: Path, args: list, timeout: int = 60) -> Tuple[int, str]:
-        """Ejecutar comando ADB"""
-        try:
-            cmd = [str(command_path)] + args
-            proc = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=timeout,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            return proc.returncode, proc.stdout + proc.stderr
-        except subprocess.TimeoutExpired:
-            return 1, f"Tiempo de espera agotado ({timeout}s)"
-        except Exception as e:
-            return 1, f"Error ejecutando comando: {str(e)}"
+        """Ejecutar comando ADB (protocolo del servidor adb, con el ejecutable como respaldo)"""
+        from core.adb_client import ejecutar_adb
+        return ejecutar_adb(command_path, args, timeout)
 
-    def obtener_info_dispositivo(self, platform_tools_path: str, device_id: str) -> Dict:
-        """Obtener información detallada del dispositivo"""
+    def obtener_inventario_dispositivo(self, platform_tools_path: str, device_id: str = None,
+                                       forzar: bool = False) -> Dict:
+        """Inventario del dispositivo (SDK, ABIs, parche, RAM, GPU...) desde un único getprop en caché"""
         if not platform_tools_path:
             return {"error": "Platform-tools no configurado"}
             
@@ -107,32 +108,29 @@ class ADBManager:
         if not adb_bin.exists():
             return {"error": "ADB no encontrado"}
             
+        from core.device_inventory import obtener_inventario
+        return obtener_inventario(adb_bin).inventario(device_id, forzar)
+
+    def obtener_info_dispositivo(self, platform_tools_path: str, device_id: str) -> Dict:
+        """Obtener información detallada del dispositivo"""
+        inventario = self.obtener_inventario_dispositivo(platform_tools_path, device_id)
+        if "error" in inventario:
+            return {"error": inventario["error"]}
+            
         info = {}
-        
-        # Construir comando base con -s si hay device_id
-        base_cmd = []
-        if device_id:
-            base_cmd.extend(["-s", device_id])
-        
-        # Obtener modelo
-        rc, output = self._ejecutar_comando(adb_bin, base_cmd + ["shell", "getprop", "ro.product.model"])
-        if rc == 0 and output.strip():
-            info["modelo"] = output.strip()
-            
-        # Obtener versión Android
-        rc, output = self._ejecutar_comando(adb_bin, base_cmd + ["shell", "getprop", "ro.build.version.release"])
-        if rc == 0 and output.strip():
-            info["android_version"] = output.strip()
-            
-        # Obtener fabricante
-        rc, output = self._ejecutar_comando(adb_bin, base_cmd + ["shell", "getprop", "ro.product.manufacturer"])
-        if rc == 0 and output.strip():
-            info["fabricante"] = output.strip()
-            
-        # Obtener nombre del dispositivo
-        rc, output = self._ejecutar_comando(adb_bin, base_cmd + ["shell", "getprop", "ro.product.name"])
-        if rc == 0 and output.strip():
-            info["nombre"] = output.strip()
+        for clave in ("modelo", "android_version", "fabricante", "nombre"):
+            if inventario.get(clave):
+                info[clave] = inventario[clave]
+        if inventario.get("sdk"):
+            info["sdk"] = inventario["sdk"]
+        if inventario.get("parche_seguridad"):
+            info["parche_seguridad"] = inventario["parche_seguridad"]
+        if inventario.get("abis"):
+            info["abis"] = ", ".join(inventario["abis"])
+        if inventario.get("ram_mb"):
+            info["ram"] = f"{inventario['ram_mb'] / 1024:.1f} GB"
+        if inventario.get("gpu"):
+            info["gpu"] = inventario["gpu"]
             
         return info
 
@@ -181,8 +179,9 @@ class ADBManager:
         except Exception as e:
             return False, f"Error reiniciando ADB: {str(e)}"
 
-    def obtener_paquetes_instalados(self, platform_tools_path: str, device_id: str = None) -> Tuple[bool, List[str]]:
-        """Obtener lista de paquetes instalados en el dispositivo"""
+    def obtener_paquetes_instalados(self, platform_tools_path: str, device_id: str = None,
+                                    solo_terceros: bool = False) -> Tuple[bool, List[str]]:
+        """Obtener lista de paquetes instalados en el dispositivo (solo los de usuario con solo_terceros)"""
         if not platform_tools_path:
             return False, ["Platform-tools no configurado"]
             
@@ -197,6 +196,8 @@ class ADBManager:
         if device_id:
             comando.extend(["-s", device_id])
         comando.extend(["shell", "pm", "list", "packages"])
+        if solo_terceros:
+            comando.append("-3")
         
         try:
             rc, output = self._ejecutar_comando(adb_bin, comando, timeout=30)
@@ -6,10 +6,21 @@ import re
 import os
 import zipfile
 
+from utils.badging import parsear_badging
+from utils.debug_trace import obtener_traza
+from utils.timing import MedicionTiempos
+from utils.xmltree import extraer_manifest
+
+_traza = obtener_traza("analisis")
+
 class APKAnalyzer:
     def __init__(self, tool_detector, logger=None):
         self.tool_detector = tool_detector
         self.logger = logger
+        # aapt2 se ejecuta en modo daemon (pool acotado de procesos persistentes)
+        self.usar_daemon_aapt2 = True
+        # apksigner/jarsigner se ejecutan en una JVM persistente si hay Java disponible
+        self.usar_host_jvm = True
         
         # Inicializar componentes
         self._initialize_components()
@@ -43,13 +54,22 @@ class APKAnalyzer:
             elif level == "warning":
                 self.logger.log_warning(message)
 
-    def analizar_apk_completo(self, apk_path: Path, config: Dict = None) -> Dict[str, str]:
+    def analizar_apk_completo(self, apk_path: Path, config: Dict = None,
+                              tiempos: MedicionTiempos = None) -> Dict[str, str]:
         """Analizar APK con múltiples métodos - MÉTODO PRINCIPAL"""
         self._log(f"🔍 INICIANDO ANÁLISIS COMPLETO: {apk_path.name}")
         resultados = {}
         
         if config is None:
             config = {}
+        if tiempos is None:
+            tiempos = MedicionTiempos()
+
+        # .apks / .xapk / .aab: análisis por splits sobre el contenedor
+        if Path(apk_path).suffix.lower() != ".apk":
+            from core.bundle_analyzer import detectar_formato
+            if detectar_formato(apk_path) != "apk":
+                return self._analizar_bundle(Path(apk_path), config, tiempos)
 
         # Guardar ruta del APK para análisis posterior
         resultados["apk_path"] = str(apk_path)
@@ -58,35 +78,82 @@ class APKAnalyzer:
         jdk_bin_path = config.get("jdk_bin")
 
         # ✅ PRIMERO: Verificar si las herramientas están disponibles
-        herramientas_disponibles = self._verificar_herramientas_disponibles(build_tools_path)
+        with tiempos.etapa("busqueda_herramientas"):
+            herramientas_disponibles = self._verificar_herramientas_disponibles(build_tools_path)
         
         # ✅ SOLO EJECUTAR HERRAMIENTAS DISPONIBLES
         if herramientas_disponibles.get("aapt"):
-            resultados["aapt"] = self._analizar_con_aapt(apk_path, build_tools_path)
+            with tiempos.etapa("aapt"):
+                resultados["aapt"] = self._analizar_con_aapt(apk_path, build_tools_path)
         else:
             resultados["aapt"] = "aapt no disponible"
             
         if herramientas_disponibles.get("aapt2"):
-            resultados["aapt2"] = self._analizar_con_aapt2(apk_path, build_tools_path)
+            with tiempos.etapa("aapt2"):
+                resultados["aapt2"] = self._analizar_con_aapt2(apk_path, build_tools_path)
         else:
             resultados["aapt2"] = "aapt2 no disponible"
             
         if herramientas_disponibles.get("apksigner"):
-            resultados["apksigner"] = self._analizar_con_apksigner(apk_path, build_tools_path)
+            with tiempos.etapa("apksigner"):
+                resultados["apksigner"] = self._analizar_con_apksigner(apk_path, build_tools_path)
         else:
             resultados["apksigner"] = "apksigner no disponible"
             
-        if herramientas_disponibles.get("jarsigner"):
-            resultados["jarsigner"] = self._analizar_con_jarsigner(apk_path, jdk_bin_path)
+        # Firma v1 verificada en proceso; jarsigner solo si el verificador integrado falla
+        with tiempos.etapa("firma_v1"):
+            resultados["firma_v1"] = self._verificar_firma_v1(apk_path)
+        if resultados["firma_v1"] is not None:
+            from core.jar_verifier import formatear_salida_v1
+            resultados["jarsigner"] = formatear_salida_v1(resultados["firma_v1"])
+        elif herramientas_disponibles.get("jarsigner"):
+            with tiempos.etapa("jarsigner"):
+                resultados["jarsigner"] = self._analizar_con_jarsigner(apk_path, jdk_bin_path)
         else:
             resultados["jarsigner"] = "jarsigner no disponible"
 
         # Siempre intentar análisis de archivos
-        resultados["xmltree"] = self._analizar_con_xmltree(apk_path, build_tools_path)
+        with tiempos.etapa("xmltree"):
+            resultados["xmltree"] = self._analizar_con_xmltree(apk_path, build_tools_path)
 
         self._log("✅ Análisis completo finalizado")
         return resultados
 
+    def _analizar_bundle(self, bundle_path: Path, config: Dict, tiempos: MedicionTiempos) -> Dict:
+        """Analizar un .apks/.xapk (herramientas sobre el split base) o un .aab (en proceso)"""
+        from core.bundle_analyzer import AnalizadorBundle
+
+        with tiempos.etapa("splits"):
+            bundle = AnalizadorBundle(bundle_path)
+            resumen = bundle.analizar_splits()
+        self._log(f"📦 {bundle.formato.upper()}: {len(resumen['splits'])} splits/módulos")
+
+        if bundle.formato == "aab":
+            # Sin APK que pasar a aapt: manifest protobuf y firma v1 (jarsigner) en proceso
+            resultados = {"apk_path": str(bundle_path)}
+            with tiempos.etapa("manifest_aab"):
+                resultados["manifest_aab"] = bundle.manifest_aab()
+            with tiempos.etapa("firma_v1"):
+                resultados["firma_v1"] = self._verificar_firma_v1(bundle_path)
+            if resultados["firma_v1"] is not None:
+                from core.jar_verifier import formatear_salida_v1
+                resultados["jarsigner"] = formatear_salida_v1(resultados["firma_v1"])
+            resultados["aapt"] = "aapt no aplica a App Bundles (.aab)"
+            resultados["aapt2"] = "aapt2 no aplica a App Bundles (.aab)"
+            resultados["apksigner"] = "apksigner no aplica a App Bundles (.aab): solo firma JAR (v1)"
+        else:
+            with tiempos.etapa("extraer_base"):
+                base = bundle.materializar_base()
+            if base is None:
+                resultados = {"apk_path": str(bundle_path), "aapt": f"{bundle_path.name} no contiene un split base"}
+            else:
+                # Mismo pipeline que un APK, sobre el split base extraído una sola vez
+                resultados = self.analizar_apk_completo(base, config, tiempos)
+
+        resultados["contenedor"] = str(bundle_path)
+        resultados["bundle"] = resumen
+        return resultados
+
     def parsear_informacion_apk(self, resultados_analisis: Dict) -> Dict:
         """Parsear información del APK usando múltiples fuentes - MEJORADO"""
         parsed_info = {
@@ -97,7 +164,8 @@ class APKAnalyzer:
             "file_path": resultados_analisis.get("apk_path", ""),
             "metodo_analisis": "standard",
             "native_libs": False,
-            "architectures": []
+            "architectures": [],
+            "componentes": []
         }
 
         # ✅ ESTRATEGIA 1: Intentar con aapt primero
@@ -106,7 +174,8 @@ class APKAnalyzer:
             if aapt_info.get("package") or aapt_info.get("app_name"):
                 parsed_info.update(aapt_info)
                 parsed_info["metodo_analisis"] = "aapt"
-                print(f"✅ Info extraída con aapt: {aapt_info.get('package')}")
+                if _traza.activa:
+                    _traza(f"✅ Info extraída con aapt: {aapt_info.get('package')}")
 
         # ✅ ESTRATEGIA 2: Si aapt falla, usar aapt2
         if (not parsed_info.get("package") and not parsed_info.get("app_name") and 
@@ -115,7 +184,20 @@ class APKAnalyzer:
             if aapt2_info.get("package") or aapt2_info.get("app_name"):
                 parsed_info.update(aapt2_info)
                 parsed_info["metodo_analisis"] = "aapt2"
-                print(f"✅ Info extraída con aapt2: {aapt2_info.get('package')}")
+                if _traza.activa:
+                    _traza(f"✅ Info extraída con aapt2: {aapt2_info.get('package')}")
+
+        # ✅ ESTRATEGIA 2b: Manifest protobuf de un App Bundle (.aab)
+        manifest_aab = resultados_analisis.get("manifest_aab")
+        if manifest_aab and not parsed_info.get("package"):
+            for campo in ("package", "version_name", "version_code", "min_sdk", "target_sdk", "permissions"):
+                if manifest_aab.get(campo):
+                    parsed_info[campo] = manifest_aab[campo]
+            parsed_info["componentes"] = manifest_aab["componentes"]
+            parsed_info["allow_backup"] = manifest_aab["allow_backup"]
+            parsed_info["uses_cleartext_traffic"] = manifest_aab["uses_cleartext_traffic"]
+            parsed_info["debuggable"] = parsed_info["debug_mode"] = manifest_aab["debuggable"]
+            parsed_info["metodo_analisis"] = "aab_manifest"
 
         # ✅ ESTRATEGIA 3: Si aún no hay información, usar análisis de archivos
         if (not parsed_info.get("package") and not parsed_info.get("app_name") and 
@@ -124,7 +206,8 @@ class APKAnalyzer:
             if file_analysis.get("package") or file_analysis.get("app_name"):
                 parsed_info.update(file_analysis)
                 parsed_info["metodo_analisis"] = "fallback"
-                print(f"✅ Info extraída con análisis de archivos: {file_analysis.get('app_name')}")
+                if _traza.activa:
+                    _traza(f"✅ Info extraída con análisis de archivos: {file_analysis.get('app_name')}")
 
         # ✅ ESTRATEGIA 4: Extraer información del nombre del archivo como último recurso
         if (not parsed_info.get("package") and not parsed_info.get("app_name") and 
@@ -133,7 +216,33 @@ class APKAnalyzer:
             if filename_info.get("app_name"):
                 parsed_info.update(filename_info)
                 parsed_info["metodo_analisis"] = "filename"
-                print(f"✅ Info extraída desde nombre: {filename_info.get('app_name')}")
+                if _traza.activa:
+                    _traza(f"✅ Info extraída desde nombre: {filename_info.get('app_name')}")
+
+        # ✅ Componentes, allowBackup y debuggable desde el árbol del manifest
+        manifest = extraer_manifest(resultados_analisis.get("xmltree") or "")
+        if manifest:
+            parsed_info["componentes"] = manifest["componentes"]
+            parsed_info["allow_backup"] = manifest["allow_backup"]
+            parsed_info["uses_cleartext_traffic"] = manifest["uses_cleartext_traffic"]
+            if manifest["debuggable"]:
+                parsed_info["debuggable"] = parsed_info["debug_mode"] = True
+            if _traza.activa:
+                exportados = sum(1 for c in manifest["componentes"] if c["exportado"])
+                _traza(f"✅ xmltree: {len(manifest['componentes'])} componentes ({exportados} exportados), "
+                       f"allowBackup={manifest['allow_backup']}")
+
+        # ✅ Bundle: splits y desglose de tamaño por ABI/densidad/idioma
+        bundle = resultados_analisis.get("bundle")
+        if bundle:
+            parsed_info["bundle"] = bundle
+            parsed_info["file_path"] = resultados_analisis.get("contenedor", parsed_info["file_path"])
+            if bundle["por_abi"]:
+                parsed_info["native_libs"] = True
+                parsed_info["architectures"] = sorted(bundle["por_abi"])
+            for campo in ("package", "version_name", "version_code"):
+                if not parsed_info.get(campo) and bundle.get(campo):
+                    parsed_info[campo] = bundle[campo]
 
         # ✅ CORREGIR: Determinar build_type basado en debuggable
         if parsed_info.get("debuggable"):
@@ -146,14 +255,15 @@ class APKAnalyzer:
             parsed_info["package_name"] = parsed_info["package"]
 
         # ✅ DEBUG: Mostrar qué información se encontró
-        print(f"🔍 RESUMEN ANÁLISIS:")
-        print(f"   Package: {parsed_info.get('package')}")
-        print(f"   App: {parsed_info.get('app_name')}")
-        print(f"   Versión: {parsed_info.get('version_name')}")
-        print(f"   Target SDK: {parsed_info.get('target_sdk')}")
-        print(f"   Min SDK: {parsed_info.get('min_sdk')}")
-        print(f"   Método: {parsed_info.get('metodo_analisis')}")
-        print(f"   Build Type: {parsed_info.get('build_type')}")
+        if _traza.activa:
+            _traza(f"🔍 RESUMEN ANÁLISIS:")
+            _traza(f"   Package: {parsed_info.get('package')}")
+            _traza(f"   App: {parsed_info.get('app_name')}")
+            _traza(f"   Versión: {parsed_info.get('version_name')}")
+            _traza(f"   Target SDK: {parsed_info.get('target_sdk')}")
+            _traza(f"   Min SDK: {parsed_info.get('min_sdk')}")
+            _traza(f"   Método: {parsed_info.get('metodo_analisis')}")
+            _traza(f"   Build Type: {parsed_info.get('build_type')}")
 
         return parsed_info
 
@@ -169,84 +279,33 @@ class APKAnalyzer:
         if not aapt_output or "error" in aapt_output.lower():
             return parsed
 
-        lines = aapt_output.splitlines()
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # ✅ BUSCAR INFORMACIÓN INCLUSO EN LÍNEAS CON ERRORES
-            try:
-                if line.startswith("package:"):
-                    self._parse_package_line_mejorado(line, parsed)
-                elif line.startswith("targetSdkVersion:"):
-                    parsed["target_sdk"] = self._extract_value_mejorado(line, "targetSdkVersion:")
-                elif line.startswith("sdkVersion:"):
-                    parsed["min_sdk"] = self._extract_value_mejorado(line, "sdkVersion:")
-                elif line.startswith("uses-permission:"):
-                    self._parse_permission_line_mejorado(line, parsed)
-                elif line.startswith("application-label:") and not parsed["app_label"]:
-                    parsed["app_label"] = self._extract_value_mejorado(line, "application-label:")
-                    parsed["app_name"] = self._extract_value_mejorado(line, "application-label:")
-                elif line.startswith("application-label-") and not parsed["app_label"]:
-                    # Tomar cualquier application-label como fallback
-                    parsed["app_label"] = self._extract_value_mejorado(line.split(':', 1)[1])
-                    parsed["app_name"] = self._extract_value_mejorado(line.split(':', 1)[1])
-                
-                # ✅ DETECTAR DEBUGGABLE INCLUSO CON ERRORES
-                if 'application-debuggable' in line.lower():
-                    parsed["debug_mode"] = True
-                    parsed["debuggable"] = True
-                elif 'android:debuggable' in line.lower():
-                    if '="true"' in line.lower() or '(0xffffffff)' in line:
-                        parsed["debug_mode"] = True
-                        parsed["debuggable"] = True
-                
-            except Exception as e:
-                # Continuar incluso si hay errores en una línea
-                continue
-
-        parsed["package_name"] = parsed["package"]
+        datos = parsear_badging(aapt_output)
+        parsed["package"] = parsed["package_name"] = datos["package"]
+        for campo in ("version_name", "version_code", "target_sdk", "min_sdk", "permissions"):
+            parsed[campo] = datos[campo]
+        # parsear_badging ya recurre a la primera application-label-xx
+        parsed["app_label"] = parsed["app_name"] = datos["app_label"]
+
+        debuggable = datos["debuggable"]
+        if not debuggable and "android:debuggable" in aapt_output:
+            # ✅ DETECTAR DEBUGGABLE INCLUSO CON ERRORES (volcado de xmltree mezclado)
+            for line in aapt_output.splitlines():
+                if "android:debuggable" in line and ('="true"' in line.lower() or "(0xffffffff)" in line):
+                    debuggable = True
+                    break
+        parsed["debug_mode"] = parsed["debuggable"] = debuggable
+
+        # Campos que solo aporta el badging completo
+        if datos["native_code"]:
+            parsed["native_libs"] = True
+            parsed["architectures"] = datos["native_code"]
+        parsed["uses_features"] = datos["uses_features"]
+        parsed["launchable_activity"] = (datos["launchable_activity"] or {}).get("name")
+        parsed["locales"] = datos["locales"]
+        parsed["densities"] = datos["densities"]
+        parsed["supports_screens"] = datos["supports_screens"]
         return parsed
 
-    def _parse_package_line_mejorado(self, line: str, parsed: Dict):
-        """Parsear línea de package - MEJORADO para errores"""
-        try:
-            # Método 1: Buscar con comillas simples
-            name_match = re.search(r"name='([^']*)'", line)
-            if name_match:
-                parsed["package"] = name_match.group(1)
-                parsed["package_name"] = name_match.group(1)
-
-            # Método 2: Buscar con comillas dobles
-            if not parsed["package"]:
-                name_match = re.search(r'name="([^"]*)"', line)
-                if name_match:
-                    parsed["package"] = name_match.group(1)
-                    parsed["package_name"] = name_match.group(1)
-
-            # Buscar versionCode
-            vc_match = re.search(r"versionCode='([^']*)'", line)
-            if vc_match:
-                parsed["version_code"] = vc_match.group(1)
-            else:
-                vc_match = re.search(r'versionCode="([^"]*)"', line)
-                if vc_match:
-                    parsed["version_code"] = vc_match.group(1)
-
-            # Buscar versionName
-            vn_match = re.search(r"versionName='([^']*)'", line)
-            if vn_match:
-                parsed["version_name"] = vn_match.group(1)
-            else:
-                vn_match = re.search(r'versionName="([^"]*)"', line)
-                if vn_match:
-                    parsed["version_name"] = vn_match.group(1)
-                    
-        except Exception:
-            pass
-
     def _analizar_por_archivos_mejorado(self, apk_path: Path) -> Dict:
         """Análisis mejorado basado en archivos del APK"""
         info = {}
@@ -316,7 +375,7 @@ class APKAnalyzer:
                     info['build_type'] = 'Release'
                     
         except Exception as e:
-            print(f"⚠️ Error en análisis de archivos: {e}")
+            _traza.error(f"⚠️ Error en análisis de archivos: {e}")
         
         return info
 
@@ -380,22 +439,6 @@ class APKAnalyzer:
         
         return None
 
-    def _extract_value_mejorado(self, line: str, prefix: str = "") -> str:
-        """Extraer valor - MEJORADO para manejar errores"""
-        try:
-            if prefix:
-                # Buscar después del prefix
-                if prefix in line:
-                    parts = line.split(prefix, 1)
-                    if len(parts) > 1:
-                        value = parts[1].strip()
-                        # Limpiar comillas y espacios
-                        value = value.strip("'\" \t")
-                        return value
-            return line.strip().strip("'\"")
-        except Exception:
-            return ""
-
     # Los métodos existentes se mantienen igual...
     def _verificar_herramientas_disponibles(self, build_tools_path: str = None) -> Dict[str, bool]:
         """Verificar qué herramientas están disponibles"""
@@ -498,6 +541,11 @@ class APKAnalyzer:
                 
         return self._buscar_herramienta_en_path("jarsigner")
 
+    def _encontrar_java(self, jarsigner_bin: Path = None) -> Path:
+        """java de la JDK de jarsigner, de JAVA_HOME o del PATH"""
+        from core.jvm_host import encontrar_java
+        return encontrar_java(cerca_de=jarsigner_bin or self._encontrar_jarsigner())
+
     def _encontrar_build_tools_dirs(self) -> List[Path]:
         """Encontrar directorios de build-tools automáticamente"""
         sdk_locations = [
@@ -565,6 +613,29 @@ class APKAnalyzer:
             self._log(error_msg, "error")
             return 1, error_msg
 
+    def _ejecutar_aapt2(self, aapt2_bin: Path, args: list, timeout: int = 30) -> Tuple[int, str]:
+        """Ejecutar aapt2 por el daemon persistente del hilo (sin coste de arranque por APK)"""
+        if not self.usar_daemon_aapt2:
+            return self._ejecutar_herramienta(aapt2_bin, args, timeout=timeout)
+        from core.aapt2_daemon import ejecutar_aapt2
+        return ejecutar_aapt2(
+            aapt2_bin, args,
+            lambda binario, argumentos: self._ejecutar_herramienta(binario, argumentos, timeout=timeout),
+            timeout=timeout,
+        )
+
+    def _ejecutar_java(self, herramienta: str, args: list, directo, apksigner_bin: Path = None,
+                       java_bin: Path = None, timeout: int = 30) -> Tuple[int, str]:
+        """Ejecutar apksigner/jarsigner en el host JVM persistente; ``directo`` si no está disponible"""
+        if self.usar_host_jvm:
+            from core.jvm_host import ejecutar_en_jvm
+            resultado = ejecutar_en_jvm(herramienta, args, apksigner_bin=apksigner_bin,
+                                        java_bin=java_bin, timeout=timeout)
+            if resultado is not None:
+                rc, salida, errores = resultado
+                return rc, salida + errores
+        return directo()
+
     def _analizar_con_aapt(self, apk_path: Path, build_tools_path: str = None) -> str:
         """Analizar con aapt"""
         aapt_bin = self._encontrar_aapt(build_tools_path)
@@ -588,7 +659,7 @@ class APKAnalyzer:
             return "aapt2 no encontrado en el sistema"
         
         self._log(f"Analizando APK con aapt2: {apk_path.name}")
-        rc, output = self._ejecutar_herramienta(aapt2_bin, ["dump", "badging", str(apk_path)])
+        rc, output = self._ejecutar_aapt2(aapt2_bin, ["dump", "badging", str(apk_path)])
         
         if rc != 0:
             return f"Error ejecutando aapt2: {output}"
@@ -601,7 +672,7 @@ class APKAnalyzer:
         
         if aapt2_bin:
             self._log(f"Analizando AndroidManifest.xml con aapt2: {apk_path.name}")
-            rc, output = self._ejecutar_herramienta(aapt2_bin, ["dump", "xmltree", str(apk_path), "AndroidManifest.xml"])
+            rc, output = self._ejecutar_aapt2(aapt2_bin, ["dump", "xmltree", str(apk_path), "AndroidManifest.xml"])
             if rc == 0:
                 return output
         
@@ -627,20 +698,28 @@ class APKAnalyzer:
         
         self._log(f"Verificando firma con apksigner: {apk_path.name}")
         
+        args = ["verify", "--verbose", "--print-certs", str(apk_path)]
         if apksigner_bin.name.endswith('.jar'):
-            rc, output = self._ejecutar_herramienta(
-                Path("java"), ["-jar", str(apksigner_bin), "verify", "--verbose", "--print-certs", str(apk_path)]
-            )
+            directo = lambda: self._ejecutar_herramienta(Path("java"), ["-jar", str(apksigner_bin)] + args)
         else:
-            rc, output = self._ejecutar_herramienta(
-                apksigner_bin, ["verify", "--verbose", "--print-certs", str(apk_path)]
-            )
+            directo = lambda: self._ejecutar_herramienta(apksigner_bin, args)
+        rc, output = self._ejecutar_java("apksigner", args, directo, apksigner_bin=apksigner_bin,
+                                         java_bin=self._encontrar_java())
         
         if rc != 0:
             return f"Error ejecutando apksigner: {output}"
             
         return output
 
+    def _verificar_firma_v1(self, apk_path: Path):
+        """Verificar la firma v1 (JAR) sin JDK; None si el APK no se pudo procesar"""
+        try:
+            from core.jar_verifier import verificar_firma_v1
+            return verificar_firma_v1(apk_path)
+        except Exception as e:
+            self._log(f"Verificación v1 integrada no disponible: {e}", "warning")
+            return None
+
     def _analizar_con_jarsigner(self, apk_path: Path, jdk_bin_path: str = None) -> str:
         """Analizar firma con jarsigner"""
         jarsigner_bin = self._encontrar_jarsigner()
@@ -649,8 +728,10 @@ class APKAnalyzer:
             return "jarsigner no encontrado en el sistema"
         
         self._log(f"Verificando firma con jarsigner: {apk_path.name}")
-        rc, output = self._ejecutar_herramienta(
-            jarsigner_bin, ["-verify", "-verbose", "-certs", str(apk_path)]
+        args = ["-verify", "-verbose", "-certs", str(apk_path)]
+        rc, output = self._ejecutar_java(
+            "jarsigner", args, lambda: self._ejecutar_herramienta(jarsigner_bin, args),
+            java_bin=self._encontrar_java(jarsigner_bin),
         )
         
         if rc != 0:
@@ -658,10 +739,10 @@ class APKAnalyzer:
             
         return output
 
-    def parsear_informacion_firma(self, apksigner_output: str, jarsigner_output: str) -> Dict:
+    def parsear_informacion_firma(self, apksigner_output: str, jarsigner_output: str, firma_v1: Dict = None) -> Dict:
         """Parsear información de firma"""
         if self.signature_verifier:
-            return self.signature_verifier.parsear_info_firma(apksigner_output, jarsigner_output)
+            return self.signature_verifier.parsear_info_firma(apksigner_output, jarsigner_output, firma_v1)
         else:
             return {
                 "company": "Desconocida", "is_valid": False,
@@ -677,6 +758,19 @@ class APKAnalyzer:
         else:
             return False, "APKSigner no disponible"
 
+    def firmar_lote_apks(self, apks: List[Path], jks_path: Path, password: str, build_tools_path: str,
+                         carpeta_destino: Path, alias: str = None, callback_progreso=None) -> Tuple[bool, Dict]:
+        """Firmar un lote de APKs con el mismo keystore, sin diálogos"""
+        if self.apk_signer:
+            from core.batch_signer import BatchSigner
+            batch_signer = BatchSigner(self.logger, self.apk_signer)
+            return batch_signer.firmar_lote(
+                apks, jks_path, password, build_tools_path, carpeta_destino,
+                alias=alias, callback_progreso=callback_progreso
+            )
+        else:
+            return False, {"error": "APKSigner no disponible"}
+
     def verificar_firma_apk(self, apk_path: Path, build_tools_path: str) -> Tuple[bool, str]:
         """Verificar firma APK"""
         if self.apk_signer:
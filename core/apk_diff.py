@@ -0,0 +1,416 @@
+"""
+Comparación entre versiones de un APK (roadmap v2.0)
+Diff campo a campo de dos análisis más diff de entradas sobre el índice ZIP
+"""
+
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.zip_index import METODO_STORED, leer_bloques, obtener_indice
+
+
+# Campos del manifest comparados directamente
+CAMPOS_MANIFEST = (
+    "package", "version_name", "version_code", "min_sdk", "target_sdk",
+    "app_label", "debuggable", "allow_backup", "launchable_activity",
+)
+
+CAMPOS_FIRMA = ("cert_hash", "company", "signature_type", "is_valid")
+
+# Offset de method_ids_size dentro del header DEX
+OFFSET_DEX_METHOD_IDS = 0x58
+TAM_HEADER_DEX = 0x70
+# Datos comprimidos leídos por paso al inflar solo el header
+TAM_BLOQUE_HEADER_DEX = 4096
+
+# Conteo de métodos por (crc, tamaño): una DEX idéntica entre builds se lee una sola vez
+_cache_dex: Dict[Tuple[int, int], int] = {}
+_lock_dex = threading.Lock()
+
+
+class APKDiff:
+    """Motor de diff entre dos análisis de APK"""
+
+    def __init__(self, logger=None):
+        self.logger = logger
+
+    def _log(self, message: str, level: str = "info"):
+        if self.logger:
+            if level == "info":
+                self.logger.log_info(message)
+            elif level == "error":
+                self.logger.log_error(message)
+            elif level == "warning":
+                self.logger.log_warning(message)
+
+    @staticmethod
+    def _ruta_apk(analisis: Dict) -> Optional[Path]:
+        """Ruta del APK desde current_analysis o desde un documento JSON exportado"""
+        ruta = (analisis.get("results") or {}).get("apk_path")
+        if not ruta:
+            ruta = (analisis.get("apk") or {}).get("ruta")
+        if not ruta:
+            ruta = (analisis.get("parsed_info") or {}).get("file_path")
+        return Path(ruta) if ruta else None
+
+    def comparar(self, analisis_a: Dict, analisis_b: Dict) -> Dict:
+        """Comparar el análisis anterior (a) con el nuevo (b)"""
+        info_a = analisis_a.get("parsed_info") or {}
+        info_b = analisis_b.get("parsed_info") or {}
+        firma_a = analisis_a.get("signature_info") or {}
+        firma_b = analisis_b.get("signature_info") or {}
+
+        apk_a = self._ruta_apk(analisis_a)
+        apk_b = self._ruta_apk(analisis_b)
+
+        diff = {
+            "apk_a": str(apk_a) if apk_a else None,
+            "apk_b": str(apk_b) if apk_b else None,
+            "manifest": self._diff_campos(info_a, info_b, CAMPOS_MANIFEST),
+            "permisos": self._diff_conjuntos(info_a.get("permissions"), info_b.get("permissions")),
+            "componentes": self._diff_conjuntos(
+                self._nombres_componentes(info_a), self._nombres_componentes(info_b)
+            ),
+            "firma": self._diff_campos(firma_a, firma_b, CAMPOS_FIRMA),
+            "versiones_firma": self._diff_conjuntos(
+                firma_a.get("signature_versions"), firma_b.get("signature_versions")
+            ),
+        }
+
+        if apk_a and apk_b and apk_a.exists() and apk_b.exists():
+            try:
+                diff.update(self._diff_archivos(apk_a, apk_b))
+            except Exception as e:
+                self._log(f"Error comparando entradas ZIP: {str(e)}", "warning")
+                diff["error_entradas"] = str(e)
+
+        diff["regresiones"] = self._detectar_regresiones(diff, info_a, info_b)
+        diff["sin_cambios"] = not any(
+            diff[clave] for clave in ("manifest", "firma")
+        ) and not any(
+            diff[clave]["agregados"] or diff[clave]["eliminados"]
+            for clave in ("permisos", "componentes", "versiones_firma")
+        ) and not (diff.get("entradas") or {}).get("total_cambios")
+
+        self._log(f"🔀 Diff completado: {len(diff['regresiones'])} regresiones detectadas")
+        return diff
+
+    # ========== DIFF DE CAMPOS ==========
+
+    @staticmethod
+    def _diff_campos(a: Dict, b: Dict, campos) -> Dict:
+        cambios = {}
+        for campo in campos:
+            antes, despues = a.get(campo), b.get(campo)
+            if antes != despues and (antes is not None or despues is not None):
+                cambios[campo] = {"antes": antes, "despues": despues}
+        return cambios
+
+    @staticmethod
+    def _diff_conjuntos(a, b) -> Dict:
+        conjunto_a, conjunto_b = set(a or []), set(b or [])
+        return {
+            "agregados": sorted(conjunto_b - conjunto_a),
+            "eliminados": sorted(conjunto_a - conjunto_b),
+        }
+
+    @staticmethod
+    def _nombres_componentes(parsed_info: Dict) -> List[str]:
+        componentes = parsed_info.get("componentes") or []
+        nombres = []
+        for componente in componentes:
+            if isinstance(componente, dict):
+                nombre = componente.get("nombre")
+                if nombre:
+                    nombres.append(f"{componente.get('tipo', 'componente')}:{nombre}")
+            elif componente:
+                nombres.append(str(componente))
+        return nombres
+
+    # ========== DIFF DE ARCHIVOS ==========
+
+    def _diff_archivos(self, apk_a: Path, apk_b: Path) -> Dict:
+        """Diff de entradas, librerías nativas y DEX usando CRC del directorio central"""
+        indice_a = obtener_indice(apk_a)
+        indice_b = obtener_indice(apk_b)
+
+        agregadas, eliminadas, modificadas = [], [], []
+        sin_cambios = 0
+
+        for nombre, entrada_b in indice_b.por_nombre.items():
+            entrada_a = indice_a.por_nombre.get(nombre)
+            if entrada_a is None:
+                agregadas.append({"nombre": nombre, "tam": entrada_b["tam_original"]})
+            elif (entrada_a["crc"] == entrada_b["crc"]
+                  and entrada_a["tam_original"] == entrada_b["tam_original"]):
+                # Mismo CRC y tamaño: no se vuelve a leer ni a hashear
+                sin_cambios += 1
+            else:
+                modificadas.append({
+                    "nombre": nombre,
+                    "tam_a": entrada_a["tam_original"],
+                    "tam_b": entrada_b["tam_original"],
+                    "delta": entrada_b["tam_original"] - entrada_a["tam_original"],
+                    "delta_comprimido": entrada_b["tam_comprimido"] - entrada_a["tam_comprimido"],
+                })
+
+        for nombre, entrada_a in indice_a.por_nombre.items():
+            if nombre not in indice_b.por_nombre:
+                eliminadas.append({"nombre": nombre, "tam": entrada_a["tam_original"]})
+
+        modificadas.sort(key=lambda e: abs(e["delta"]), reverse=True)
+        comp_a, orig_a = indice_a.tamano_total()
+        comp_b, orig_b = indice_b.tamano_total()
+
+        return {
+            "entradas": {
+                "agregadas": agregadas,
+                "eliminadas": eliminadas,
+                "modificadas": modificadas,
+                "sin_cambios": sin_cambios,
+                "total_cambios": len(agregadas) + len(eliminadas) + len(modificadas),
+                "delta_total_comprimido": comp_b - comp_a,
+                "delta_total_original": orig_b - orig_a,
+            },
+            "librerias_nativas": self._diff_librerias(indice_a, indice_b),
+            "dex": self._diff_dex(apk_a, indice_a, apk_b, indice_b),
+        }
+
+    @staticmethod
+    def _librerias(indice) -> Dict[str, Dict]:
+        return {
+            nombre: entrada for nombre, entrada in indice.por_nombre.items()
+            if nombre.startswith("lib/") and nombre.endswith(".so")
+        }
+
+    def _diff_librerias(self, indice_a, indice_b) -> Dict:
+        libs_a, libs_b = self._librerias(indice_a), self._librerias(indice_b)
+        abis_a = {n.split("/")[1] for n in libs_a if n.count("/") >= 2}
+        abis_b = {n.split("/")[1] for n in libs_b if n.count("/") >= 2}
+
+        return {
+            "agregadas": sorted(set(libs_b) - set(libs_a)),
+            "eliminadas": sorted(set(libs_a) - set(libs_b)),
+            "modificadas": sorted(
+                n for n in set(libs_a) & set(libs_b) if libs_a[n]["crc"] != libs_b[n]["crc"]
+            ),
+            "abis_agregadas": sorted(abis_b - abis_a),
+            "abis_eliminadas": sorted(abis_a - abis_b),
+        }
+
+    @staticmethod
+    def contar_metodos_dex(apk_path: Path, entrada: Dict) -> Optional[int]:
+        """method_ids_size del header DEX, leyendo solo los primeros 112 bytes
+
+        Usa la entrada del índice compartido: sin volver a abrir el APK como
+        ZIP, se lee desde ``offset_datos`` (e inflando solo el principio si
+        la entrada está comprimida).
+        """
+        clave = (entrada["crc"], entrada["tam_original"])
+        with _lock_dex:
+            if clave in _cache_dex:
+                return _cache_dex[clave]
+        try:
+            with open(apk_path, "rb") as f:
+                if entrada["metodo"] == METODO_STORED:
+                    f.seek(entrada["offset_datos"])
+                    header = f.read(min(TAM_HEADER_DEX, entrada["tam_comprimido"]))
+                else:
+                    header = b""
+                    for bloque in leer_bloques(f, entrada, TAM_BLOQUE_HEADER_DEX):
+                        header += bloque
+                        if len(header) >= TAM_HEADER_DEX:
+                            break
+                    header = header[:TAM_HEADER_DEX]
+            if len(header) < TAM_HEADER_DEX or not header.startswith(b"dex\n"):
+                return None
+            metodos = struct.unpack_from("<I", header, OFFSET_DEX_METHOD_IDS)[0]
+        except Exception:
+            return None
+        with _lock_dex:
+            _cache_dex[clave] = metodos
+        return metodos
+
+    def _diff_dex(self, apk_a: Path, indice_a, apk_b: Path, indice_b) -> Dict:
+        def dex_de(indice):
+            return {n: e for n, e in indice.por_nombre.items()
+                    if n.startswith("classes") and n.endswith(".dex") and "/" not in n}
+
+        dex_a, dex_b = dex_de(indice_a), dex_de(indice_b)
+        por_archivo = {}
+        total_a = total_b = 0
+
+        for nombre in sorted(set(dex_a) | set(dex_b)):
+            metodos_a = self.contar_metodos_dex(apk_a, dex_a[nombre]) if nombre in dex_a else None
+            metodos_b = self.contar_metodos_dex(apk_b, dex_b[nombre]) if nombre in dex_b else None
+            total_a += metodos_a or 0
+            total_b += metodos_b or 0
+            if metodos_a != metodos_b:
+                por_archivo[nombre] = {"antes": metodos_a, "despues": metodos_b}
+
+        return {
+            "archivos_a": len(dex_a),
+            "archivos_b": len(dex_b),
+            "metodos_a": total_a,
+            "metodos_b": total_b,
+            "delta_metodos": total_b - total_a,
+            "por_archivo": por_archivo,
+        }
+
+    # ========== REGRESIONES ==========
+
+    @staticmethod
+    def _a_entero(valor) -> Optional[int]:
+        try:
+            return int(str(valor).strip())
+        except (TypeError, ValueError):
+            return None
+
+    def _detectar_regresiones(self, diff: Dict, info_a: Dict, info_b: Dict) -> List[Dict]:
+        """Cambios entre versiones que empeoran la postura de seguridad"""
+        regresiones = []
+
+        if "cert_hash" in diff["firma"]:
+            regresiones.append({
+                "tipo": "CAMBIO_CERTIFICADO",
+                "nivel": "ALTO",
+                "descripcion": "El certificado de firma cambió entre versiones",
+            })
+
+        versiones_perdidas = diff["versiones_firma"]["eliminados"]
+        if versiones_perdidas:
+            regresiones.append({
+                "tipo": "DEGRADACION_FIRMA",
+                "nivel": "ALTO",
+                "descripcion": f"Esquemas de firma eliminados: {', '.join(versiones_perdidas)}",
+            })
+
+        if not info_a.get("debuggable") and info_b.get("debuggable"):
+            regresiones.append({
+                "tipo": "DEBUG_HABILITADO",
+                "nivel": "ALTO",
+                "descripcion": "La nueva versión es debuggable",
+            })
+
+        cambio_backup = diff["manifest"].get("allow_backup")
+        if cambio_backup and cambio_backup["despues"] and not cambio_backup["antes"]:
+            regresiones.append({
+                "tipo": "BACKUP_HABILITADO",
+                "nivel": "MEDIO",
+                "descripcion": "La nueva versión habilita allowBackup",
+            })
+
+        for campo, tipo in (("min_sdk", "MIN_SDK_REDUCIDO"), ("target_sdk", "TARGET_SDK_REDUCIDO")):
+            antes = self._a_entero(info_a.get(campo))
+            despues = self._a_entero(info_b.get(campo))
+            if antes is not None and despues is not None and despues < antes:
+                regresiones.append({
+                    "tipo": tipo,
+                    "nivel": "MEDIO",
+                    "descripcion": f"{campo} bajó de {antes} a {despues}",
+                })
+
+        permisos_nuevos = diff["permisos"]["agregados"]
+        if permisos_nuevos:
+            regresiones.append({
+                "tipo": "NUEVOS_PERMISOS",
+                "nivel": "MEDIO",
+                "descripcion": f"{len(permisos_nuevos)} permisos nuevos",
+                "permisos": permisos_nuevos,
+            })
+
+        exportados_nuevos = self._componentes_exportados_nuevos(info_a, info_b)
+        if exportados_nuevos:
+            regresiones.append({
+                "tipo": "NUEVOS_COMPONENTES_EXPORTADOS",
+                "nivel": "ALTO",
+                "descripcion": f"{len(exportados_nuevos)} componentes exportados nuevos",
+                "componentes": exportados_nuevos,
+            })
+
+        return regresiones
+
+    def _componentes_exportados_nuevos(self, info_a: Dict, info_b: Dict) -> List[str]:
+        def exportados(info):
+            return {
+                c.get("nombre") for c in (info.get("componentes") or [])
+                if isinstance(c, dict) and c.get("exportado") and not c.get("permiso")
+            }
+        return sorted(exportados(info_b) - exportados(info_a))
+
+    # ========== REPORTE ==========
+
+    @staticmethod
+    def generar_reporte_diff(diff: Dict) -> str:
+        """Reporte legible del diff"""
+        reporte = ["=== COMPARACIÓN ENTRE VERSIONES ===\n\n"]
+        reporte.append(f"📦 Anterior: {diff.get('apk_a') or 'N/A'}\n")
+        reporte.append(f"📦 Nueva: {diff.get('apk_b') or 'N/A'}\n\n")
+
+        if diff.get("sin_cambios"):
+            reporte.append("✅ No se detectaron cambios\n")
+            return "".join(reporte)
+
+        if diff["manifest"]:
+            reporte.append("📝 MANIFEST:\n")
+            for campo, cambio in diff["manifest"].items():
+                reporte.append(f"  • {campo}: {cambio['antes']} → {cambio['despues']}\n")
+            reporte.append("\n")
+
+        for clave, titulo in (("permisos", "🚨 PERMISOS"), ("componentes", "🧩 COMPONENTES"),
+                              ("versiones_firma", "🔐 ESQUEMAS DE FIRMA")):
+            cambios = diff[clave]
+            if cambios["agregados"] or cambios["eliminados"]:
+                reporte.append(f"{titulo}:\n")
+                for item in cambios["agregados"]:
+                    reporte.append(f"  + {item}\n")
+                for item in cambios["eliminados"]:
+                    reporte.append(f"  - {item}\n")
+                reporte.append("\n")
+
+        if diff["firma"]:
+            reporte.append("🔑 FIRMA:\n")
+            for campo, cambio in diff["firma"].items():
+                reporte.append(f"  • {campo}: {cambio['antes']} → {cambio['despues']}\n")
+            reporte.append("\n")
+
+        libs = diff.get("librerias_nativas")
+        if libs and any(libs.values()):
+            reporte.append("💻 LIBRERÍAS NATIVAS:\n")
+            for nombre in libs["agregadas"]:
+                reporte.append(f"  + {nombre}\n")
+            for nombre in libs["eliminadas"]:
+                reporte.append(f"  - {nombre}\n")
+            for nombre in libs["modificadas"]:
+                reporte.append(f"  ~ {nombre}\n")
+            reporte.append("\n")
+
+        dex = diff.get("dex")
+        if dex:
+            reporte.append("🧠 DEX:\n")
+            reporte.append(f"  • Archivos: {dex['archivos_a']} → {dex['archivos_b']}\n")
+            reporte.append(f"  • Métodos: {dex['metodos_a']} → {dex['metodos_b']} ({dex['delta_metodos']:+d})\n\n")
+
+        entradas = diff.get("entradas")
+        if entradas:
+            reporte.append("📊 ENTRADAS:\n")
+            reporte.append(f"  • Agregadas: {len(entradas['agregadas'])}\n")
+            reporte.append(f"  • Eliminadas: {len(entradas['eliminadas'])}\n")
+            reporte.append(f"  • Modificadas: {len(entradas['modificadas'])}\n")
+            reporte.append(f"  • Sin cambios: {entradas['sin_cambios']}\n")
+            reporte.append(f"  • Delta de tamaño: {entradas['delta_total_original']:+d} bytes "
+                           f"({entradas['delta_total_comprimido']:+d} comprimido)\n")
+            for entrada in entradas["modificadas"][:10]:
+                reporte.append(f"    ~ {entrada['nombre']}: {entrada['delta']:+d} bytes\n")
+            reporte.append("\n")
+
+        if diff["regresiones"]:
+            reporte.append("🔴 REGRESIONES:\n")
+            for regresion in diff["regresiones"]:
+                reporte.append(f"  [{regresion['nivel']}] {regresion['descripcion']}\n")
+        else:
+            reporte.append("✅ Sin regresiones de seguridad\n")
+
+        return "".join(reporte)
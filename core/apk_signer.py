@@ -1,7 +1,7 @@
 import os
 import subprocess
 from pathlib import Path
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Dict
 import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox
@@ -10,6 +10,8 @@ import platform
 class APKSigner:
     def __init__(self, logger=None):
         self.logger = logger
+        # apksigner se ejecuta en una JVM persistente si hay Java disponible
+        self.usar_host_jvm = True
     
     def _log(self, message: str, level: str = "info"):
         if self.logger:
@@ -20,7 +22,9 @@ class APKSigner:
             elif level == "warning":
                 self.logger.log_warning(message)
 
-    def ejecutar_comando(self, comando: List[str], timeout: int = 60) -> Tuple[int, str]:
+    def ejecutar_comando(self, comando: List[str], timeout: int = 60,
+                         env: Optional[Dict[str, str]] = None,
+                         entrada: Optional[str] = None) -> Tuple[int, str]:
         try:
             self._log(f"Ejecutando: {' '.join(comando)}")
             
@@ -30,7 +34,9 @@ class APKSigner:
                 text=True,
                 timeout=timeout,
                 encoding="utf-8",
-                errors="ignore"
+                errors="ignore",
+                env=env,
+                input=entrada
             )
             
             output = proc.stdout
@@ -55,6 +61,17 @@ class APKSigner:
             self._log(error_msg, "error")
             return 1, error_msg
     
+    def ejecutar_apksigner(self, apksigner_bin: Path, args: List[str], timeout: int = 60) -> Tuple[int, str]:
+        """Ejecutar apksigner en el host JVM persistente o, si no está disponible, como proceso"""
+        if self.usar_host_jvm:
+            from core.jvm_host import ejecutar_en_jvm
+            resultado = ejecutar_en_jvm("apksigner", args, apksigner_bin=apksigner_bin, timeout=timeout)
+            if resultado is not None:
+                rc, salida, errores = resultado
+                self._log(f"apksigner {args[0]} (JVM persistente): {rc}")
+                return rc, salida + (f"\nSTDERR: {errores}" if errores else "")
+        return self.ejecutar_comando([str(apksigner_bin)] + args, timeout=timeout)
+
     def encontrar_apksigner(self, build_tools_path: str) -> Optional[Path]:
         if not build_tools_path:
             self._log("Ruta de build-tools no configurada", "error")
@@ -170,23 +187,30 @@ class APKSigner:
                     # Si no hay ventana padre, simplemente eliminar
                     apk_signed_path.unlink()
             
+            # zipalign debe ir antes de la firma: alinear cambia los offsets firmados
+            ok_alineacion, apk_a_firmar, mensaje_alineacion = self.preparar_alineacion(apk_path, carpeta_destino)
+            if not ok_alineacion:
+                return False, mensaje_alineacion
+            
             self._log(f"Firmando APK: {apk_path.name} -> {apk_signed_path.name}")
             
-            comando = [
-                str(apksigner_bin),
+            args = [
                 "sign",
                 "--ks", str(jks_path),
                 "--ks-pass", f"pass:{password}",
                 "--out", str(apk_signed_path),
-                str(apk_path)
+                str(apk_a_firmar)
             ]
             
             if alias:
-                comando.extend(["--ks-key-alias", alias])
+                args.extend(["--ks-key-alias", alias])
             
             self._log(f"Iniciando firma de APK: {apk_path.name}")
             
-            rc, output = self.ejecutar_comando(comando, timeout=120)
+            rc, output = self.ejecutar_apksigner(apksigner_bin, args, timeout=120)
+            
+            if apk_a_firmar != apk_path and apk_a_firmar.exists():
+                apk_a_firmar.unlink()
             
             if rc == 0:
                 if apk_signed_path.exists():
@@ -222,6 +246,20 @@ class APKSigner:
             self._log(error_msg, "error")
             return False, error_msg
 
+    def preparar_alineacion(self, apk_path: Path, carpeta_trabajo: Path) -> Tuple[bool, Path, str]:
+        """Verificar zipalign y generar una copia alineada si es necesario"""
+        try:
+            from core.zipalign import ZipAligner
+        except ImportError:
+            return True, apk_path, "Verificación zipalign no disponible"
+        
+        ok, apk_a_firmar, mensaje = ZipAligner(self.logger).preparar_para_firma(apk_path, carpeta_trabajo)
+        if ok:
+            self._log(f"Alineación: {mensaje}")
+        else:
+            self._log(f"Error de alineación: {mensaje}", "error")
+        return ok, apk_a_firmar, mensaje
+
     def _procesar_error_firma(self, output: str) -> str:
         """Procesar el output de error para dar mensajes más específicos"""
         output_lower = output.lower()
@@ -246,14 +284,7 @@ class APKSigner:
             if not apksigner_bin:
                 return False, "apksigner no encontrado"
             
-            comando = [
-                str(apksigner_bin),
-                "verify",
-                "--verbose",
-                str(apk_path)
-            ]
-            
-            rc, output = self.ejecutar_comando(comando, timeout=30)
+            rc, output = self.ejecutar_apksigner(apksigner_bin, ["verify", "--verbose", str(apk_path)], timeout=30)
             
             if rc == 0:
                 return True, "Firma verificada correctamente"
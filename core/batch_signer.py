@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+from pathlib import Path
+from typing import Tuple, List, Optional, Dict, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.apk_signer import APKSigner
+
+
+class BatchSigner:
+    """Firma por lotes de APKs con un único keystore/alias, sin diálogos de UI"""
+
+    ENV_KS_PASS = "APK_INSPECTOR_KS_PASS"
+    ENV_KEY_PASS = "APK_INSPECTOR_KEY_PASS"
+    MANIFEST_NOMBRE = "firmas_manifest.json"
+
+    def __init__(self, logger=None, apk_signer: Optional[APKSigner] = None, max_workers: Optional[int] = None):
+        self.logger = logger
+        self.apk_signer = apk_signer or APKSigner(logger)
+        # apksigner es un proceso JVM: limitar workers para no saturar memoria
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+
+    def _log(self, message: str, level: str = "info"):
+        if self.logger:
+            if level == "info":
+                self.logger.log_info(message)
+            elif level == "error":
+                self.logger.log_error(message)
+            elif level == "warning":
+                self.logger.log_warning(message)
+
+    def firmar_lote(self, apks: List[Path], jks_path: Path, password: str, build_tools_path: str,
+                    carpeta_destino: Path, alias: str = None, key_password: str = None,
+                    modo_password: str = "env",
+                    callback_progreso: Optional[Callable[[int, int, Dict], None]] = None) -> Tuple[bool, Dict]:
+        """Firmar y verificar una lista de APKs en paralelo.
+
+        La contraseña nunca aparece en la línea de comandos: se entrega a apksigner
+        por variable de entorno (``modo_password="env"``) o por stdin (``"stdin"``).
+        El primer APK se firma solo, para validar el keystore una única vez antes
+        de lanzar el resto del lote.
+
+        Retorna (todos_ok, manifest) y escribe el manifest en ``carpeta_destino``.
+        """
+        apks = [Path(apk) for apk in apks]
+        jks_path = Path(jks_path)
+        carpeta_destino = Path(carpeta_destino)
+
+        if not apks:
+            return False, {"error": "No hay APKs para firmar"}
+
+        if not jks_path.exists():
+            return False, {"error": f"Keystore JKS no encontrado: {jks_path}"}
+
+        if not password:
+            return False, {"error": "La contraseña no puede estar vacía"}
+
+        if modo_password not in ("env", "stdin"):
+            return False, {"error": f"Modo de contraseña no soportado: {modo_password}"}
+
+        apksigner_bin = self.apk_signer.encontrar_apksigner(build_tools_path)
+        if not apksigner_bin:
+            return False, {"error": "apksigner no encontrado en build-tools"}
+
+        carpeta_destino.mkdir(parents=True, exist_ok=True)
+
+        credenciales = self._preparar_credenciales(password, key_password, modo_password)
+        total = len(apks)
+        resultados = []
+        inicio = time.perf_counter()
+
+        self._log(f"🔏 Firma por lotes: {total} APKs con {self.max_workers} workers")
+
+        destinos = self._nombres_firmados(apks, carpeta_destino)
+
+        # Primera firma en serie: si el keystore o la contraseña fallan, no lanzar el lote
+        primero = self._firmar_y_verificar(apksigner_bin, apks[0], destinos[0], jks_path, alias, credenciales)
+        resultados.append(primero)
+        self._notificar_progreso(callback_progreso, len(resultados), total, primero)
+
+        if not primero["ok"] and primero.get("error_keystore"):
+            self._log(f"❌ Keystore inválido, lote abortado: {primero['mensaje']}", "error")
+            for apk in apks[1:]:
+                omitido = self._resultado_base(apk)
+                omitido["mensaje"] = "Omitido: falló la validación del keystore"
+                resultados.append(omitido)
+        elif total > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futuros = {
+                    executor.submit(self._firmar_y_verificar, apksigner_bin, apk, destino,
+                                    jks_path, alias, credenciales): apk
+                    for apk, destino in zip(apks[1:], destinos[1:])
+                }
+                for futuro in as_completed(futuros):
+                    resultado = futuro.result()
+                    resultados.append(resultado)
+                    self._notificar_progreso(callback_progreso, len(resultados), total, resultado)
+
+        # Mantener el orden de entrada en el manifest
+        orden = {str(apk): i for i, apk in enumerate(apks)}
+        resultados.sort(key=lambda r: orden.get(r["apk_origen"], total))
+
+        manifest = {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "keystore": str(jks_path),
+            "alias": alias,
+            "total": total,
+            "firmados": sum(1 for r in resultados if r["ok"]),
+            "fallidos": sum(1 for r in resultados if not r["ok"]),
+            "duracion_s": round(time.perf_counter() - inicio, 3),
+            "apks": resultados,
+        }
+
+        manifest_path = self._escribir_manifest(carpeta_destino, manifest)
+        if manifest_path:
+            manifest["manifest_path"] = str(manifest_path)
+
+        todos_ok = manifest["fallidos"] == 0
+        nivel = "info" if todos_ok else "warning"
+        self._log(f"🔏 Lote finalizado: {manifest['firmados']}/{total} firmados en {manifest['duracion_s']}s", nivel)
+        return todos_ok, manifest
+
+    def _preparar_credenciales(self, password: str, key_password: Optional[str], modo_password: str) -> Dict:
+        """Construir argumentos, entorno y stdin para pasar contraseñas a apksigner"""
+        if modo_password == "stdin":
+            args = ["--ks-pass", "stdin"]
+            entrada = password + "\n"
+            if key_password:
+                args.extend(["--key-pass", "stdin"])
+                entrada += key_password + "\n"
+            return {"args": args, "env": None, "entrada": entrada}
+
+        env = os.environ.copy()
+        env[self.ENV_KS_PASS] = password
+        args = ["--ks-pass", f"env:{self.ENV_KS_PASS}"]
+        if key_password:
+            env[self.ENV_KEY_PASS] = key_password
+            args.extend(["--key-pass", f"env:{self.ENV_KEY_PASS}"])
+        return {"args": args, "env": env, "entrada": None}
+
+    @staticmethod
+    def _nombres_firmados(apks: List[Path], carpeta_destino: Path) -> List[Path]:
+        """``<nombre>-signed.apk`` por APK; los nombres repetidos (otras carpetas) llevan ``-2``, ``-3``...
+
+        Sin esto, dos workers escribirían el mismo archivo de salida a la vez.
+        """
+        usados = set()
+        destinos = []
+        for apk in apks:
+            nombre = f"{apk.stem}-signed{apk.suffix}"
+            n = 1
+            # Comparación sin mayúsculas: Windows y macOS no distinguen App.apk de app.apk
+            while nombre.lower() in usados:
+                n += 1
+                nombre = f"{apk.stem}-{n}-signed{apk.suffix}"
+            usados.add(nombre.lower())
+            destinos.append(carpeta_destino / nombre)
+        return destinos
+
+    def _resultado_base(self, apk_path: Path) -> Dict:
+        return {
+            "apk_origen": str(apk_path),
+            "apk_firmado": None,
+            "sha256_origen": None,
+            "sha256_firmado": None,
+            "tamano_bytes": None,
+            "ok": False,
+            "verificado": False,
+            "mensaje": "",
+            "duracion_s": 0.0,
+        }
+
+    def _firmar_y_verificar(self, apksigner_bin: Path, apk_path: Path, apk_signed_path: Path,
+                            jks_path: Path, alias: Optional[str], credenciales: Dict) -> Dict:
+        """Firmar un APK en ``apk_signed_path`` y verificar la firma resultante, sin interacción"""
+        resultado = self._resultado_base(apk_path)
+        inicio = time.perf_counter()
+
+        try:
+            if not apk_path.exists():
+                resultado["mensaje"] = f"APK no encontrado: {apk_path}"
+                return resultado
+
+            if apk_signed_path.exists():
+                apk_signed_path.unlink()
+
+            resultado["sha256_origen"] = self.calcular_sha256(apk_path)
+
+            ok_alineacion, apk_a_firmar, mensaje_alineacion = self.apk_signer.preparar_alineacion(
+                apk_path, apk_signed_path.parent
+            )
+            if not ok_alineacion:
+                resultado["mensaje"] = mensaje_alineacion
+                return resultado
+            resultado["alineacion"] = mensaje_alineacion
+
+            comando = [str(apksigner_bin), "sign", "--ks", str(jks_path)]
+            comando.extend(credenciales["args"])
+            if alias:
+                comando.extend(["--ks-key-alias", alias])
+            comando.extend(["--out", str(apk_signed_path), str(apk_a_firmar)])
+
+            # La firma sigue siendo un proceso propio: las contraseñas llegan por su entorno o su stdin,
+            # que el host JVM compartido no tiene
+            rc, output = self.apk_signer.ejecutar_comando(
+                comando, timeout=120, env=credenciales["env"], entrada=credenciales["entrada"]
+            )
+
+            if apk_a_firmar != apk_path and apk_a_firmar.exists():
+                apk_a_firmar.unlink()
+
+            if rc != 0 or not apk_signed_path.exists():
+                if apk_signed_path.exists():
+                    apk_signed_path.unlink()
+                mensaje = self.apk_signer._procesar_error_firma(output)
+                resultado["mensaje"] = mensaje
+                resultado["error_keystore"] = mensaje.startswith((
+                    "Error: Contraseña", "Error: Keystore", "Error: Alias"
+                ))
+                return resultado
+
+            # La verificación no lleva secretos: va al host JVM persistente (sin arranque en frío por APK)
+            rc, output = self.apk_signer.ejecutar_apksigner(
+                apksigner_bin, ["verify", "--verbose", str(apk_signed_path)], timeout=60
+            )
+            if rc != 0:
+                apk_signed_path.unlink()
+                resultado["mensaje"] = f"APK firmado pero falló la verificación: {output}"
+                return resultado
+
+            resultado.update({
+                "apk_firmado": str(apk_signed_path),
+                "sha256_firmado": self.calcular_sha256(apk_signed_path),
+                "tamano_bytes": apk_signed_path.stat().st_size,
+                "ok": True,
+                "verificado": True,
+                "mensaje": "Firmado y verificado",
+            })
+            self._log(f"✅ Firmado: {apk_path.name} -> {apk_signed_path.name}")
+
+        except Exception as e:
+            resultado["mensaje"] = f"Error durante la firma: {str(e)}"
+            self._log(f"Error firmando {apk_path.name}: {str(e)}", "error")
+
+        finally:
+            resultado["duracion_s"] = round(time.perf_counter() - inicio, 3)
+
+        return resultado
+
+    def _notificar_progreso(self, callback: Optional[Callable], completados: int, total: int, resultado: Dict):
+        if callback:
+            try:
+                callback(completados, total, resultado)
+            except Exception as e:
+                self._log(f"Error en callback de progreso: {str(e)}", "warning")
+
+    def _escribir_manifest(self, carpeta_destino: Path, manifest: Dict) -> Optional[Path]:
+        """Escribir el manifest del lote en JSON junto a los APKs firmados"""
+        try:
+            manifest_path = carpeta_destino / self.MANIFEST_NOMBRE
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+            self._log(f"📄 Manifest de firmas: {manifest_path}")
+            return manifest_path
+        except Exception as e:
+            self._log(f"Error escribiendo manifest de firmas: {str(e)}", "error")
+            return None
+
+    @staticmethod
+    def calcular_sha256(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+        """SHA-256 de un archivo leído por bloques"""
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for bloque in iter(lambda: f.read(chunk_size), b''):
+                sha.update(bloque)
+        return sha.hexdigest()
@@ -0,0 +1,418 @@
+"""
+Análisis de contenedores de splits (.apks, .xapk) y App Bundles (.aab)
+
+El contenedor se indexa una sola vez (core.zip_index). Los splits guardados
+sin comprimir se indexan en su sitio, con offsets dentro del contenedor; los
+comprimidos se extraen una vez a un directorio temporal. Cada split se
+procesa en paralelo y el resultado se combina en un resumen con el desglose
+de tamaño por ABI, densidad e idioma. El manifest de un .aab está en formato
+protobuf (aapt2 ``XmlNode``) y se decodifica en proceso.
+"""
+
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.zip_index import METODO_STORED, leer_bloques, obtener_indice
+from utils.debug_trace import obtener_traza
+from utils.xmltree import ElementoXml, datos_manifest
+
+_traza = obtener_traza("analisis")
+
+EXTENSIONES_BUNDLE = (".apks", ".xapk", ".aab")
+EXTENSIONES_ANALIZABLES = (".apk",) + EXTENSIONES_BUNDLE
+
+# Sufijos de los splits de configuración (base-arm64_v8a.apk, config.xxhdpi.apk...)
+ABIS_SPLIT = {"armeabi", "armeabi_v7a", "arm64_v8a", "x86", "x86_64", "mips", "mips64", "riscv64"}
+DENSIDADES = {"ldpi", "mdpi", "tvdpi", "hdpi", "xhdpi", "xxhdpi", "xxxhdpi", "nodpi", "anydpi"}
+
+MANIFEST_AAB = "manifest/AndroidManifest.xml"
+
+
+def detectar_formato(ruta: Path) -> str:
+    """"apk", "apks", "xapk" o "aab" según la extensión y, si no es concluyente, el contenido"""
+    ruta = Path(ruta)
+    sufijo = ruta.suffix.lower()
+    if sufijo in EXTENSIONES_BUNDLE:
+        return sufijo[1:]
+    try:
+        indice = obtener_indice(ruta)
+    except (OSError, ValueError):
+        return "apk"
+    if indice.obtener("AndroidManifest.xml"):
+        return "apk"
+    if indice.obtener("BundleConfig.pb") or indice.obtener("base/" + MANIFEST_AAB):
+        return "aab"
+    if indice.obtener("manifest.json"):
+        return "xapk"
+    if any(nombre.endswith(".apk") for nombre in indice.nombres()):
+        return "apks"
+    return "apk"
+
+
+def clasificar_split(nombre: str) -> Tuple[str, Optional[str]]:
+    """(tipo, configuración) de un split por su nombre.
+
+    tipo es base, abi, densidad, idioma, modulo o standalone.
+    """
+    base = Path(nombre).stem
+    if base in ("base", "base-master", "universal") or base.startswith("standalone"):
+        return ("standalone" if base.startswith("standalone") or base == "universal" else "base"), None
+
+    # bundletool: <modulo>-<config>; dispositivo/xapk: [split_]config.<config>
+    for prefijo in ("split_config.", "config."):
+        if base.startswith(prefijo):
+            config = base[len(prefijo):]
+            break
+    else:
+        modulo, _, config = base.partition("-")
+        if not config or config.startswith("master"):
+            return ("base" if modulo == "base" else "modulo"), None
+
+    if config in ABIS_SPLIT:
+        return "abi", config.replace("_", "-")
+    if config in DENSIDADES:
+        return "densidad", config
+    return "idioma", config
+
+
+def _densidad_de(ruta_res: str) -> Optional[str]:
+    """Densidad del directorio de recursos (res/drawable-xxhdpi-v4/x.png -> xxhdpi)"""
+    partes = ruta_res.split("/")
+    if len(partes) < 3:
+        return None
+    for calificador in partes[1].split("-")[1:]:
+        if calificador in DENSIDADES:
+            return calificador
+    return None
+
+
+def estadisticas_entradas(entradas: List[Dict], prefijo: str = "") -> Dict:
+    """Número de entradas, DEX, manifest y bytes por ABI/densidad de un APK o módulo"""
+    datos = {"entradas": 0, "dex": 0, "manifest": False, "por_abi": {}, "por_densidad": {},
+             "tam_comprimido": 0, "tam_original": 0}
+    largo = len(prefijo)
+    for entrada in entradas:
+        nombre = entrada["nombre"]
+        if largo:
+            if not nombre.startswith(prefijo):
+                continue
+            nombre = nombre[largo:]
+        datos["entradas"] += 1
+        datos["tam_comprimido"] += entrada["tam_comprimido"]
+        datos["tam_original"] += entrada["tam_original"]
+
+        destino = None
+        if nombre.startswith("lib/"):
+            abi = nombre.split("/")[1] if nombre.count("/") >= 2 else None
+            destino = datos["por_abi"].setdefault(abi, {"comprimido": 0, "original": 0}) if abi else None
+        elif nombre.startswith("res/"):
+            densidad = _densidad_de(nombre)
+            destino = datos["por_densidad"].setdefault(densidad, {"comprimido": 0, "original": 0}) if densidad else None
+        elif nombre.endswith(".dex") and ("/" not in nombre or nombre.startswith("dex/")):
+            datos["dex"] += 1
+        elif nombre in ("AndroidManifest.xml", MANIFEST_AAB):
+            datos["manifest"] = True
+
+        if destino is not None:
+            destino["comprimido"] += entrada["tam_comprimido"]
+            destino["original"] += entrada["tam_original"]
+    return datos
+
+
+def _sumar(total: Dict[str, Dict], parcial: Dict[str, Dict]):
+    for clave, valores in parcial.items():
+        acumulado = total.setdefault(clave, {"comprimido": 0, "original": 0})
+        acumulado["comprimido"] += valores["comprimido"]
+        acumulado["original"] += valores["original"]
+
+
+# ========== MANIFEST PROTOBUF (AAB) ==========
+
+def _varint(datos: bytes, pos: int) -> Tuple[int, int]:
+    resultado = desplazamiento = 0
+    while True:
+        byte = datos[pos]
+        pos += 1
+        resultado |= (byte & 0x7F) << desplazamiento
+        if byte < 0x80:
+            return resultado, pos
+        desplazamiento += 7
+
+
+def _campos(datos: bytes):
+    """Generador de (número de campo, valor) de un mensaje protobuf (valor int o bytes)"""
+    pos, fin = 0, len(datos)
+    while pos < fin:
+        clave, pos = _varint(datos, pos)
+        tipo = clave & 7
+        if tipo == 0:
+            valor, pos = _varint(datos, pos)
+        elif tipo == 2:
+            largo, pos = _varint(datos, pos)
+            valor = datos[pos:pos + largo]
+            pos += largo
+        elif tipo == 5:
+            valor = int.from_bytes(datos[pos:pos + 4], "little")
+            pos += 4
+        elif tipo == 1:
+            valor = int.from_bytes(datos[pos:pos + 8], "little")
+            pos += 8
+        else:
+            raise ValueError(f"Tipo de campo protobuf no soportado: {tipo}")
+        yield clave >> 3, valor
+
+
+def _valor_compilado(item: bytes) -> Optional[str]:
+    """Valor de un ``Item`` compilado: referencia, cadena o primitivo"""
+    for numero, valor in _campos(item):
+        if numero == 1:  # Reference
+            for campo, dato in _campos(valor):
+                if campo == 2:
+                    return f"@0x{dato:08x}"
+        elif numero in (2, 3):  # String / RawString
+            for campo, dato in _campos(valor):
+                if campo == 1:
+                    return dato.decode("utf-8", errors="replace")
+        elif numero == 7:  # Primitive
+            for campo, dato in _campos(valor):
+                if campo == 8:
+                    return "true" if dato else "false"
+                if campo == 6:
+                    return str(dato - (1 << 64) if dato >= 1 << 63 else dato)
+                if campo == 7:
+                    return str(dato)
+    return None
+
+
+def _elemento_protobuf(datos: bytes) -> ElementoXml:
+    nombre, atributos, hijos = "", {}, []
+    for numero, valor in _campos(datos):
+        if numero == 3:
+            nombre = valor.decode("utf-8", errors="replace")
+        elif numero == 4:
+            atributo, texto, compilado = "", "", None
+            for campo, dato in _campos(valor):
+                if campo == 2:
+                    atributo = dato.decode("utf-8", errors="replace")
+                elif campo == 3:
+                    texto = dato.decode("utf-8", errors="replace")
+                elif campo == 6:
+                    compilado = _valor_compilado(dato)
+            atributos[atributo] = texto or compilado or ""
+        elif numero == 5:
+            hijo = _nodo_protobuf(valor)
+            if hijo is not None:
+                hijos.append(hijo)
+    elemento = ElementoXml(nombre, atributos=atributos)
+    elemento.hijos = hijos
+    return elemento
+
+
+def _nodo_protobuf(datos: bytes) -> Optional[ElementoXml]:
+    """``XmlNode``: solo interesan los elementos (campo 1), no el texto"""
+    for numero, valor in _campos(datos):
+        if numero == 1:
+            return _elemento_protobuf(valor)
+    return None
+
+
+def decodificar_manifest_protobuf(datos: bytes) -> Optional[ElementoXml]:
+    """Árbol del AndroidManifest.xml de un .aab (formato protobuf de aapt2)"""
+    try:
+        return _nodo_protobuf(datos)
+    except (IndexError, ValueError):
+        return None
+
+
+# ========== SPLITS EXTRAÍDOS ==========
+
+_dir_temporal: Optional[Path] = None
+_extraidos: Dict[Tuple, Path] = {}
+_lock = threading.Lock()
+
+
+def _directorio_temporal() -> Path:
+    global _dir_temporal
+    with _lock:
+        if _dir_temporal is None:
+            _dir_temporal = Path(tempfile.mkdtemp(prefix="apk_inspector_splits_"))
+        return _dir_temporal
+
+
+def leer_entrada(contenedor: Path, entrada: Dict) -> bytes:
+    with open(contenedor, "rb") as f:
+        return b"".join(leer_bloques(f, entrada))
+
+
+def extraer_entrada(contenedor: Path, entrada: Dict) -> Path:
+    """Extraer una entrada del contenedor a disco una sola vez (se reutiliza mientras no cambie)"""
+    stat = Path(contenedor).stat()
+    clave = (os.path.abspath(contenedor), stat.st_size, stat.st_mtime_ns, entrada["nombre"])
+    with _lock:
+        ruta = _extraidos.get(clave)
+    if ruta is not None and ruta.exists():
+        return ruta
+
+    destino_dir = Path(tempfile.mkdtemp(dir=_directorio_temporal()))
+    ruta = destino_dir / Path(entrada["nombre"]).name
+    with open(contenedor, "rb") as f, open(ruta, "wb") as salida:
+        for bloque in leer_bloques(f, entrada):
+            salida.write(bloque)
+    with _lock:
+        _extraidos[clave] = ruta
+    return ruta
+
+
+def limpiar_splits_extraidos():
+    global _dir_temporal
+    with _lock:
+        directorio, _dir_temporal = _dir_temporal, None
+        _extraidos.clear()
+    if directorio is not None:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+atexit.register(limpiar_splits_extraidos)
+
+
+# ========== ANALIZADOR ==========
+
+class AnalizadorBundle:
+    """Contenedor .apks/.xapk/.aab abierto una sola vez"""
+
+    def __init__(self, ruta: Path, formato: Optional[str] = None, max_hilos: Optional[int] = None):
+        self.ruta = Path(ruta)
+        self.formato = formato or detectar_formato(self.ruta)
+        self.max_hilos = max_hilos or min(8, os.cpu_count() or 4)
+        self.indice = obtener_indice(self.ruta)
+        self.metadatos = self._leer_metadatos()
+        self.splits = self._listar_splits()
+
+    def _leer_metadatos(self) -> Dict:
+        """manifest.json de un .xapk (package, versión y lista de splits)"""
+        if self.formato != "xapk":
+            return {}
+        entrada = self.indice.obtener("manifest.json")
+        if entrada is None:
+            return {}
+        try:
+            return json.loads(leer_entrada(self.ruta, entrada).decode("utf-8", errors="replace"))
+        except (ValueError, OSError):
+            return {}
+
+    def _listar_splits(self) -> List[Dict]:
+        if self.formato == "aab":
+            # Cada módulo es un directorio con manifest/AndroidManifest.xml
+            modulos = [n[:-len(MANIFEST_AAB)] for n in self.indice.nombres() if n.endswith("/" + MANIFEST_AAB)]
+            return [{"nombre": prefijo.rstrip("/"), "prefijo": prefijo,
+                     "tipo": "base" if prefijo == "base/" else "modulo", "config": None}
+                    for prefijo in modulos]
+
+        splits = []
+        for entrada in self.indice.entradas:
+            if not entrada["nombre"].endswith(".apk"):
+                continue
+            tipo, config = clasificar_split(entrada["nombre"])
+            splits.append({"nombre": entrada["nombre"], "entrada": entrada, "tipo": tipo, "config": config})
+
+        # manifest.json del xapk marca la base explícitamente; sin split_apks,
+        # la base es el APK con el nombre del paquete (com.app.apk)
+        bases = {s.get("file") for s in self.metadatos.get("split_apks") or [] if s.get("id") == "base"}
+        if self.metadatos.get("package_name"):
+            bases.add(self.metadatos["package_name"] + ".apk")
+        for split in splits:
+            if split["nombre"] in bases:
+                split["tipo"] = "base"
+        return splits
+
+    def split_base(self) -> Optional[Dict]:
+        """Split base (o standalone/universal, o un módulo si no hay); el más grande como último recurso"""
+        for tipo in ("base", "standalone", "modulo"):
+            candidatos = [s for s in self.splits if s["tipo"] == tipo]
+            if candidatos:
+                return min(candidatos, key=lambda s: len(s["nombre"]))
+        if self.splits and self.formato != "aab":
+            return max(self.splits, key=lambda s: s["entrada"]["tam_original"])
+        return None
+
+    def materializar_base(self) -> Optional[Path]:
+        """Ruta de un APK base en disco sobre el que ejecutar aapt/apksigner"""
+        split = self.split_base()
+        if split is None or self.formato == "aab":
+            return None
+        return extraer_entrada(self.ruta, split["entrada"])
+
+    def _indice_split(self, split: Dict):
+        entrada = split["entrada"]
+        if entrada["metodo"] == METODO_STORED:
+            return obtener_indice(self.ruta, entrada["offset_datos"], entrada["tam_original"])
+        return obtener_indice(extraer_entrada(self.ruta, entrada))
+
+    def _analizar_split(self, split: Dict) -> Dict:
+        resultado = {"nombre": split["nombre"], "tipo": split["tipo"], "config": split["config"]}
+        try:
+            if self.formato == "aab":
+                datos = estadisticas_entradas(self.indice.entradas, split["prefijo"])
+            else:
+                datos = estadisticas_entradas(self._indice_split(split).entradas)
+                # Tamaño del split tal como se descarga/instala
+                datos["tam_archivo"] = split["entrada"]["tam_original"]
+            resultado.update(datos)
+        except (OSError, ValueError, zlib.error) as e:
+            resultado["error"] = str(e)
+        return resultado
+
+    def analizar_splits(self) -> Dict:
+        """Procesar los splits en paralelo y combinar el desglose de tamaños"""
+        if len(self.splits) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_hilos, len(self.splits))) as ejecutor:
+                splits = list(ejecutor.map(self._analizar_split, self.splits))
+        else:
+            splits = [self._analizar_split(s) for s in self.splits]
+
+        por_abi, por_densidad, por_idioma = {}, {}, {}
+        for split in splits:
+            _sumar(por_abi, split.get("por_abi", {}))
+            _sumar(por_densidad, split.get("por_densidad", {}))
+            if split["tipo"] == "idioma":
+                por_idioma[split["config"]] = split.get("tam_archivo", split.get("tam_comprimido", 0))
+
+        base = self.split_base()
+        resumen = {
+            "formato": self.formato,
+            "contenedor": self.ruta.name,
+            "tam_contenedor": self.ruta.stat().st_size,
+            "base": base["nombre"] if base else None,
+            "splits": splits,
+            "por_abi": por_abi,
+            "por_densidad": por_densidad,
+            "por_idioma": por_idioma,
+        }
+        if self.metadatos:
+            resumen["package"] = self.metadatos.get("package_name")
+            resumen["version_name"] = self.metadatos.get("version_name")
+            resumen["version_code"] = str(self.metadatos.get("version_code") or "") or None
+        if _traza.activa:
+            _traza(f"📦 {self.formato.upper()} {self.ruta.name}: {len(splits)} splits, ABIs {sorted(por_abi)}")
+        return resumen
+
+    def manifest_aab(self) -> Optional[Dict]:
+        """Datos del manifest del módulo base de un .aab, decodificado en proceso"""
+        if self.formato != "aab":
+            return None
+        entrada = self.indice.obtener("base/" + MANIFEST_AAB)
+        if entrada is None:
+            return None
+        try:
+            raiz = decodificar_manifest_protobuf(leer_entrada(self.ruta, entrada))
+        except (OSError, ValueError, zlib.error):
+            return None
+        return datos_manifest(raiz)
@@ -0,0 +1,439 @@
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.adb_manager import ADBManager
+from core.install_engine import InstallEngine
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("auditoria")
+
+# Nombres de paquete válidos: se interpolan en comandos de shell del dispositivo
+_PAQUETE_VALIDO = re.compile(r"[A-Za-z0-9_]+(?:\.[A-Za-z0-9_]+)*")
+
+MARCA_PAQUETE = "@@paquete:"
+
+
+class CacheAuditoria:
+    """Resultados de auditorías anteriores por (dispositivo, paquete).
+
+    Cada resultado guarda la huella del paquete instalado (rutas de los APK,
+    tamaños y ``lastUpdateTime``); solo se reutiliza si la huella coincide.
+    """
+
+    VERSION_CACHE = 1
+
+    def __init__(self, ruta: Optional[Path] = None):
+        self.ruta = Path(ruta) if ruta else Path.home() / ".apk_inspector_auditoria.json"
+        self._datos: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def _cargar(self) -> Dict:
+        if self._datos is None:
+            from utils.version import __version__
+            self._datos = {}
+            try:
+                with open(self.ruta, "r", encoding="utf-8") as f:
+                    datos = json.load(f)
+                # Otra versión de la herramienta puede producir otros resultados
+                if datos.get("version") == self.VERSION_CACHE and datos.get("herramienta") == __version__:
+                    self._datos = datos.get("dispositivos") or {}
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                _traza.error(f"Cache de auditoría inválida, se descarta: {e}")
+        return self._datos
+
+    def obtener(self, dispositivo: str, paquete: str, huella: Dict) -> Optional[Dict]:
+        with self._lock:
+            entrada = self._cargar().get(dispositivo, {}).get(paquete)
+        if entrada and entrada.get("huella") == huella:
+            return entrada.get("resultado")
+        return None
+
+    def guardar(self, dispositivo: str, paquete: str, huella: Dict, resultado: Dict):
+        with self._lock:
+            self._cargar().setdefault(dispositivo, {})[paquete] = {"huella": huella, "resultado": resultado}
+
+    def olvidar(self, dispositivo: str, paquetes_presentes: List[str]):
+        """Quitar los paquetes que ya no están instalados en el dispositivo"""
+        with self._lock:
+            entradas = self._cargar().get(dispositivo, {})
+            for paquete in set(entradas) - set(paquetes_presentes):
+                del entradas[paquete]
+
+    def persistir(self) -> bool:
+        from utils.version import __version__
+        with self._lock:
+            if self._datos is None:
+                return True
+            contenido = json.dumps({
+                "version": self.VERSION_CACHE,
+                "herramienta": __version__,
+                "dispositivos": self._datos,
+            }, ensure_ascii=False, default=str)
+        try:
+            # Escritura atómica: una auditoría interrumpida no deja la cache a medias
+            temporal = self.ruta.with_name(self.ruta.name + ".tmp")
+            temporal.write_text(contenido, encoding="utf-8")
+            os.replace(temporal, self.ruta)
+            return True
+        except OSError as e:
+            _traza.error(f"No se pudo guardar la cache de auditoría: {e}")
+            return False
+
+
+class DeviceAudit:
+    """Auditoría de las apps instaladas en un dispositivo.
+
+    Resuelve ``pm path`` de cada paquete y su ``lastUpdateTime`` con unos pocos
+    comandos de shell agrupados, descarga los APK y splits en paralelo y lanza
+    el análisis de cada paquete en cuanto termina su descarga, de modo que la
+    transferencia por USB y el análisis en CPU se solapan. Los paquetes cuya
+    huella (ruta + tamaño + lastUpdateTime) no cambió desde la auditoría
+    anterior se toman de la cache sin descargarlos.
+    """
+
+    PAQUETES_POR_COMANDO = 100
+    RUTAS_POR_COMANDO = 100
+    # Textos del informe PCI que no hace falta guardar por paquete
+    CLAVES_PCI_TEXTO = ("reporte_completo", "resumen_compacto")
+
+    def __init__(self, adb_manager=None, apk_analyzer=None, logger=None, cache: Optional[CacheAuditoria] = None,
+                 max_descargas: int = 4, max_analisis: Optional[int] = None):
+        self.adb_manager = adb_manager or ADBManager()
+        self.apk_analyzer = apk_analyzer
+        self.logger = logger
+        self.cache = cache or CacheAuditoria()
+        self.max_descargas = max(1, max_descargas)
+        self.max_analisis = max(1, max_analisis or min(4, os.cpu_count() or 2))
+
+    def _log(self, message: str, level: str = "info"):
+        if self.logger:
+            if level == "info":
+                self.logger.log_info(message)
+            elif level == "error":
+                self.logger.log_error(message)
+            elif level == "warning":
+                self.logger.log_warning(message)
+
+    @staticmethod
+    def _adb_bin(platform_tools_path: str) -> Path:
+        return Path(platform_tools_path) / ("adb.exe" if sys.platform.startswith("win") else "adb")
+
+    def _notificar(self, callback: Optional[Callable], paquete: str, estado: str, completados: int = 0, total: int = 0):
+        if callback:
+            try:
+                callback(paquete, estado, completados, total)
+            except Exception as e:
+                self._log(f"Error en callback de progreso: {str(e)}", "warning")
+
+    def _shell(self, adb_bin: Path, dispositivo: str, script: str, timeout: int = 60) -> Tuple[int, str]:
+        return self.adb_manager._ejecutar_comando(adb_bin, ["-s", dispositivo, "shell", script], timeout=timeout)
+
+    # ========== RESOLUCIÓN DE PAQUETES ==========
+
+    def resolver_rutas(self, adb_bin: Path, dispositivo: str, paquetes: List[str]) -> Dict[str, List[str]]:
+        """{paquete: [rutas de base.apk y splits]} con un ``pm path`` por paquete, agrupados por comando"""
+        rutas = {}
+        for i in range(0, len(paquetes), self.PAQUETES_POR_COMANDO):
+            grupo = paquetes[i:i + self.PAQUETES_POR_COMANDO]
+            script = "; ".join(f"echo {MARCA_PAQUETE}{p}; pm path {p}" for p in grupo)
+            _, salida = self._shell(adb_bin, dispositivo, script)
+            actual = None
+            for linea in salida.splitlines():
+                linea = linea.strip()
+                if linea.startswith(MARCA_PAQUETE):
+                    actual = linea[len(MARCA_PAQUETE):]
+                    rutas[actual] = []
+                elif linea.startswith("package:") and actual:
+                    rutas[actual].append(linea[len("package:"):])
+        return {p: r for p, r in rutas.items() if r}
+
+    def obtener_actualizaciones(self, adb_bin: Path, dispositivo: str) -> Dict[str, str]:
+        """{paquete: lastUpdateTime} de todos los paquetes con un único dumpsys filtrado en el dispositivo"""
+        _, salida = self._shell(adb_bin, dispositivo,
+                                "dumpsys package packages | grep -E '^  Package \\[|lastUpdateTime='", timeout=120)
+        actualizaciones = {}
+        actual = None
+        for linea in salida.splitlines():
+            if linea.startswith("  Package ["):
+                actual = linea[len("  Package ["):].partition("]")[0]
+            elif actual and "lastUpdateTime=" in linea:
+                # La primera aparición es la instalada; "Hidden system packages" la repite
+                actualizaciones.setdefault(actual, linea.partition("lastUpdateTime=")[2].strip())
+                actual = None
+        return actualizaciones
+
+    def obtener_tamanos(self, adb_bin: Path, dispositivo: str, rutas: List[str]) -> Dict[str, int]:
+        """{ruta: tamaño en bytes} con ``stat`` agrupado"""
+        tamanos = {}
+        for i in range(0, len(rutas), self.RUTAS_POR_COMANDO):
+            grupo = rutas[i:i + self.RUTAS_POR_COMANDO]
+            _, salida = self._shell(adb_bin, dispositivo, "stat -c '%s %n' " + " ".join(grupo))
+            for linea in salida.splitlines():
+                tamano, _, ruta = linea.strip().partition(" ")
+                if tamano.isdigit():
+                    tamanos[ruta] = int(tamano)
+        return tamanos
+
+    # ========== AUDITORÍA ==========
+
+    def auditar_dispositivo(self, platform_tools_path: str, dispositivo: str, paquetes: List[str] = None,
+                            config: Dict = None, solo_terceros: bool = True, forzar: bool = False,
+                            carpeta_destino: Optional[Path] = None,
+                            callback_progreso: Optional[Callable[[str, str, int, int], None]] = None) -> Tuple[bool, Dict]:
+        """Analizar los paquetes indicados (o todos los instalados) del dispositivo.
+
+        ``callback_progreso(paquete, estado, completados, total)`` se invoca desde
+        hilos de trabajo con los estados "cache", "descargando", "analizando",
+        "completado" y "error". Con ``carpeta_destino`` los APK descargados se
+        conservan en ``carpeta_destino/<paquete>/``. Retorna (todos_ok, reporte).
+        """
+        if not platform_tools_path:
+            return False, {"error": "Platform-tools no configurado"}
+        adb_bin = self._adb_bin(platform_tools_path)
+        if not adb_bin.exists():
+            return False, {"error": f"ADB no encontrado en: {platform_tools_path}"}
+        if not self.apk_analyzer:
+            return False, {"error": "APK Analyzer no disponible"}
+
+        inicio = time.perf_counter()
+        todos_los_paquetes = paquetes is None
+        if todos_los_paquetes:
+            exito, paquetes = self.adb_manager.obtener_paquetes_instalados(
+                platform_tools_path, dispositivo, solo_terceros=solo_terceros)
+            if not exito:
+                return False, {"error": paquetes[0] if paquetes else "Error obteniendo paquetes"}
+        paquetes = [p for p in dict.fromkeys(paquetes) if _PAQUETE_VALIDO.fullmatch(p)]
+        if not paquetes:
+            return False, {"error": "No hay paquetes que auditar"}
+
+        self._log(f"🔎 Auditoría de {dispositivo}: resolviendo {len(paquetes)} paquetes")
+        rutas = self.resolver_rutas(adb_bin, dispositivo, paquetes)
+        actualizaciones = self.obtener_actualizaciones(adb_bin, dispositivo)
+        tamanos = self.obtener_tamanos(adb_bin, dispositivo, [r for lista in rutas.values() for r in lista])
+
+        resultados: Dict[str, Dict] = {}
+        pendientes: List[Tuple[str, Dict]] = []
+        for paquete in paquetes:
+            if paquete not in rutas:
+                resultados[paquete] = self._resultado_base(paquete, None)
+                resultados[paquete].update(estado="error", motivo="pm path no devolvió rutas")
+                continue
+            huella = {
+                "rutas": rutas[paquete],
+                "tamanos": [tamanos.get(r) for r in rutas[paquete]],
+                "ultima_actualizacion": actualizaciones.get(paquete),
+            }
+            previo = None if forzar else self.cache.obtener(dispositivo, paquete, huella)
+            if previo is not None:
+                resultados[paquete] = self._resultado_base(paquete, huella)
+                resultados[paquete].update(ok=True, estado="cache", resultado=previo)
+            else:
+                pendientes.append((paquete, huella))
+
+        total = len(paquetes)
+        completados = [len(resultados)]
+        for paquete, resultado in resultados.items():
+            self._notificar(callback_progreso, paquete, "cache" if resultado["ok"] else "error", 0, total)
+
+        if pendientes:
+            self._log(f"📥 {len(pendientes)} paquetes nuevos o actualizados, "
+                      f"{len(resultados)} desde cache o sin rutas")
+            resultados.update(self._descargar_y_analizar(
+                adb_bin, dispositivo, pendientes, config or {}, carpeta_destino,
+                callback_progreso, completados, total))
+
+        if todos_los_paquetes:
+            self.cache.olvidar(dispositivo, paquetes)
+        self.cache.persistir()
+
+        reporte = self._construir_reporte(dispositivo, paquetes, resultados, inicio)
+        return reporte["fallidos"] == 0, reporte
+
+    @staticmethod
+    def _resultado_base(paquete: str, huella: Optional[Dict]) -> Dict:
+        return {
+            "paquete": paquete,
+            "ok": False,
+            "estado": None,
+            "huella": huella,
+            "bytes_descargados": 0,
+            "descarga_s": 0.0,
+            "analisis_s": 0.0,
+            "motivo": "",
+            "resultado": None,
+        }
+
+    def _descargar_y_analizar(self, adb_bin: Path, dispositivo: str, pendientes: List[Tuple[str, Dict]],
+                              config: Dict, carpeta_destino: Optional[Path], callback: Optional[Callable],
+                              completados: List[int], total: int) -> Dict[str, Dict]:
+        """Descargas en un pool y análisis en otro: cada paquete pasa al análisis al terminar su última descarga"""
+        temporal = None if carpeta_destino else Path(tempfile.mkdtemp(prefix="apk_inspector_auditoria_"))
+        raiz = Path(carpeta_destino) if carpeta_destino else temporal
+        resultados = {paquete: self._resultado_base(paquete, huella) for paquete, huella in pendientes}
+        restantes = {paquete: len(huella["rutas"]) for paquete, huella in pendientes}
+        lock = threading.Lock()
+        futuros_analisis = []
+
+        def terminar(paquete: str, estado: str):
+            with lock:
+                completados[0] += 1
+                hechos = completados[0]
+            self._notificar(callback, paquete, estado, hechos, total)
+
+        def analizar(paquete: str, huella: Dict, archivos: List[Path]):
+            resultado = resultados[paquete]
+            self._notificar(callback, paquete, "analizando", completados[0], total)
+            t0 = time.perf_counter()
+            try:
+                resultado["resultado"] = self._analizar_paquete(paquete, huella, archivos, config)
+                resultado.update(ok=True, estado="analizado")
+                self.cache.guardar(dispositivo, paquete, huella, resultado["resultado"])
+            except Exception as e:
+                resultado.update(estado="error", motivo=f"Error analizando: {str(e)}")
+                _traza.error(f"Error analizando {paquete}: {e}")
+            finally:
+                resultado["analisis_s"] = round(time.perf_counter() - t0, 3)
+                if temporal is not None:
+                    shutil.rmtree(archivos[0].parent, ignore_errors=True)
+            terminar(paquete, "completado" if resultado["ok"] else "error")
+
+        def descargar(paquete: str, huella: Dict, indice: int, ejecutor_analisis: ThreadPoolExecutor):
+            resultado = resultados[paquete]
+            remota = huella["rutas"][indice]
+            local = raiz / paquete / Path(remota).name
+            tamano = huella["tamanos"][indice] or 0
+            t0 = time.perf_counter()
+            rc, salida = self.adb_manager._ejecutar_comando(
+                adb_bin, ["-s", dispositivo, "pull", remota, str(local)],
+                timeout=InstallEngine.calcular_timeout(tamano))
+            with lock:
+                resultado["descarga_s"] = round(resultado["descarga_s"] + time.perf_counter() - t0, 3)
+                if rc != 0 or not local.exists():
+                    resultado["motivo"] = resultado["motivo"] or f"Error descargando {remota}: {salida.strip()[-200:]}"
+                else:
+                    resultado["bytes_descargados"] += local.stat().st_size
+                restantes[paquete] -= 1
+                ultimo = restantes[paquete] == 0
+            if not ultimo:
+                return
+            if resultado["motivo"]:
+                resultado["estado"] = "error"
+                terminar(paquete, "error")
+            else:
+                archivos = [raiz / paquete / Path(r).name for r in huella["rutas"]]
+                futuros_analisis.append(ejecutor_analisis.submit(analizar, paquete, huella, archivos))
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_analisis) as ejecutor_analisis:
+                with ThreadPoolExecutor(max_workers=self.max_descargas) as ejecutor_descargas:
+                    for paquete, huella in pendientes:
+                        (raiz / paquete).mkdir(parents=True, exist_ok=True)
+                        self._notificar(callback, paquete, "descargando", completados[0], total)
+                        for indice in range(len(huella["rutas"])):
+                            ejecutor_descargas.submit(descargar, paquete, huella, indice, ejecutor_analisis)
+                # Al salir de los bloques se espera a descargas y análisis pendientes
+        finally:
+            if temporal is not None:
+                shutil.rmtree(temporal, ignore_errors=True)
+
+        for futuro in futuros_analisis:
+            futuro.result()
+        return resultados
+
+    def _analizar_paquete(self, paquete: str, huella: Dict, archivos: List[Path], config: Dict) -> Dict:
+        """Análisis del base.apk y desglose de los splits del paquete"""
+        from core.bundle_analyzer import clasificar_split, estadisticas_entradas
+        from core.zip_index import obtener_indice
+        from utils.timing import MedicionTiempos
+
+        base = next((a for a in archivos if a.name == "base.apk"), archivos[0])
+        tiempos = MedicionTiempos()
+        resultados = self.apk_analyzer.analizar_apk_completo(base, config, tiempos)
+        parsed_info = self.apk_analyzer.parsear_informacion_apk(resultados)
+        signature_info = self.apk_analyzer.parsear_informacion_firma(
+            resultados.get("apksigner", ""), resultados.get("jarsigner", ""), resultados.get("firma_v1"))
+        pci_analysis = self.apk_analyzer.ejecutar_analisis_pci_dss(parsed_info, signature_info)
+        if isinstance(pci_analysis, dict):
+            pci_analysis = {k: v for k, v in pci_analysis.items() if k not in self.CLAVES_PCI_TEXTO}
+
+        # Rutas del dispositivo, no del directorio temporal
+        parsed_info["file_path"] = huella["rutas"][archivos.index(base)]
+        parsed_info["file_name"] = f"{paquete}/{base.name}"
+
+        splits = []
+        for archivo, remota in zip(archivos, huella["rutas"]):
+            if archivo == base:
+                continue
+            tipo, config_split = clasificar_split(archivo.name)
+            split = {"nombre": archivo.name, "ruta": remota, "tipo": tipo, "config": config_split,
+                     "tam_archivo": archivo.stat().st_size}
+            try:
+                split.update(estadisticas_entradas(obtener_indice(archivo).entradas))
+            except (OSError, ValueError) as e:
+                split["error"] = str(e)
+            splits.append(split)
+        if splits:
+            abis = [s["config"] for s in splits if s["tipo"] == "abi"]
+            parsed_info["architectures"] = list(dict.fromkeys((parsed_info.get("architectures") or []) + abis))
+
+        tiempos.finalizar()
+        return {
+            "parsed_info": parsed_info,
+            "signature_info": signature_info,
+            "pci_analysis": pci_analysis,
+            "splits": splits,
+            "tiempos": tiempos.a_dict(),
+        }
+
+    def _construir_reporte(self, dispositivo: str, paquetes: List[str], resultados: Dict[str, Dict], inicio: float) -> Dict:
+        ordenados = [resultados[p] for p in paquetes if p in resultados]
+        reporte = {
+            "operacion": "auditoria",
+            "dispositivo": dispositivo,
+            "total": len(paquetes),
+            "analizados": sum(1 for r in ordenados if r["estado"] == "analizado"),
+            "en_cache": sum(1 for r in ordenados if r["estado"] == "cache"),
+            "fallidos": sum(1 for r in ordenados if not r["ok"]),
+            "bytes_descargados": sum(r["bytes_descargados"] for r in ordenados),
+            "duracion_s": round(time.perf_counter() - inicio, 3),
+            "paquetes": ordenados,
+        }
+        self._log(f"🔎 Auditoría de {dispositivo}: {reporte['analizados']} analizados, "
+                  f"{reporte['en_cache']} desde cache, {reporte['fallidos']} con error en {reporte['duracion_s']}s",
+                  "info" if not reporte["fallidos"] else "warning")
+        return reporte
+
+    @staticmethod
+    def formatear_reporte(reporte: Dict) -> str:
+        """Resumen legible por paquete"""
+        if "error" in reporte:
+            return f"❌ {reporte['error']}"
+        lineas = [
+            f"Dispositivo {reporte['dispositivo']}: {reporte['total']} paquetes "
+            f"({reporte['analizados']} analizados, {reporte['en_cache']} sin cambios, "
+            f"{reporte['fallidos']} con error) en {reporte['duracion_s']:.1f}s",
+            "",
+        ]
+        for r in reporte["paquetes"]:
+            if not r["ok"]:
+                lineas.append(f"❌ {r['paquete']}: {r['motivo']}")
+                continue
+            info = (r["resultado"] or {}).get("parsed_info") or {}
+            pci = (r["resultado"] or {}).get("pci_analysis") or {}
+            detalle = f" v{info['version_name']}" if info.get("version_name") else ""
+            if isinstance(pci, dict) and pci.get("cumplimiento_general"):
+                detalle += f" - PCI: {pci['cumplimiento_general']} ({pci.get('puntuacion_total', 0)}%)"
+            origen = "♻️" if r["estado"] == "cache" else "✅"
+            lineas.append(f"{origen} {r['paquete']}{detalle}")
+        return "\n".join(lineas)
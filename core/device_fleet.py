@@ -0,0 +1,368 @@
+import re
+import sys
+import time
+import queue
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.adb_client import ejecutar_adb
+from core.install_engine import InstallEngine
+
+
+class DeviceFleet:
+    """Instalación y desinstalación en paralelo sobre todos los dispositivos conectados.
+
+    La instalación lee el APK una sola vez en el host y reparte cada bloque a
+    todos los dispositivos del grupo (``exec-in cmd package install -S``). Si un
+    dispositivo no soporta el modo streaming se reintenta con ``adb install``.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+    COLA_MAX_BLOQUES = 16  # contrapresión: el dispositivo más lento marca el ritmo
+    # Un dispositivo que no acepta un bloque en este plazo se da por bloqueado y sale del grupo
+    PLAZO_SIN_AVANCE_S = 30
+    def __init__(self, adb_manager=None, logger=None, max_workers: int = 4):
+        self.adb_manager = adb_manager
+        self.logger = logger
+        self.max_workers = max(1, max_workers)
+
+    def _log(self, message: str, level: str = "info"):
+        if self.logger:
+            if level == "info":
+                self.logger.log_info(message)
+            elif level == "error":
+                self.logger.log_error(message)
+            elif level == "warning":
+                self.logger.log_warning(message)
+
+    @staticmethod
+    def _adb_bin(platform_tools_path: str) -> Path:
+        return Path(platform_tools_path) / ("adb.exe" if sys.platform.startswith("win") else "adb")
+
+    @staticmethod
+    def _resultado_base(dispositivo: str) -> Dict:
+        return {
+            "dispositivo": dispositivo,
+            "ok": False,
+            "metodo": None,
+            "bytes_enviados": 0,
+            "duracion_s": 0.0,
+            "motivo": "",
+            "salida": "",
+        }
+
+    @staticmethod
+    def extraer_motivo_fallo(output: str) -> str:
+        """Motivo legible a partir de la salida de pm/adb"""
+        match = re.search(r'Failure \[([^\]]+)\]', output or "")
+        if match:
+            return match.group(1)
+        for linea in (output or "").splitlines():
+            linea = linea.strip()
+            if linea.lower().startswith(("error", "adb: ", "failure")):
+                return linea
+        return (output or "").strip()[-200:] or "Error desconocido"
+
+    def _notificar(self, callback: Optional[Callable], dispositivo: str, estado: str, enviados: int = 0, total: int = 0):
+        if callback:
+            try:
+                callback(dispositivo, estado, enviados, total)
+            except Exception as e:
+                self._log(f"Error en callback de progreso: {str(e)}", "warning")
+
+    def _resolver_dispositivos(self, platform_tools_path: str, dispositivos: Optional[List[str]]) -> Tuple[bool, List[str]]:
+        if dispositivos:
+            return True, list(dispositivos)
+        if not self.adb_manager:
+            return False, ["ADBManager no disponible"]
+        return self.adb_manager.obtener_dispositivos(platform_tools_path)
+
+    # ========== INSTALACIÓN ==========
+
+    def instalar_en_dispositivos(self, apk_path: Path, platform_tools_path: str,
+                                 dispositivos: List[str] = None, reemplazar: bool = True,
+                                 callback_progreso: Optional[Callable[[str, str, int, int], None]] = None) -> Tuple[bool, Dict]:
+        """Instalar el APK en todos los dispositivos indicados (o conectados).
+
+        ``callback_progreso(dispositivo, estado, bytes_enviados, bytes_totales)`` se
+        invoca desde hilos de trabajo. Retorna (todos_ok, reporte).
+        """
+        apk_path = Path(apk_path)
+        if not platform_tools_path:
+            return False, {"error": "Platform-tools no configurado"}
+        adb_bin = self._adb_bin(platform_tools_path)
+        if not adb_bin.exists():
+            return False, {"error": f"ADB no encontrado en: {platform_tools_path}"}
+        if not apk_path.exists():
+            return False, {"error": f"APK no encontrado: {apk_path}"}
+
+        exito, dispositivos = self._resolver_dispositivos(platform_tools_path, dispositivos)
+        if not exito:
+            return False, {"error": dispositivos[0] if dispositivos else "Error obteniendo dispositivos"}
+        if not dispositivos:
+            return False, {"error": "No hay dispositivos Android conectados"}
+
+        inicio = time.perf_counter()
+        resultados = {}
+        self._log(f"📲 Instalación en flota: {apk_path.name} -> {len(dispositivos)} dispositivos")
+
+        # Grupos del tamaño del pool: cada grupo comparte una única lectura del APK
+        for i in range(0, len(dispositivos), self.max_workers):
+            grupo = dispositivos[i:i + self.max_workers]
+            resultados.update(self._instalar_grupo_stream(adb_bin, apk_path, grupo, reemplazar, callback_progreso))
+
+        # Reintento clásico para dispositivos sin soporte de streaming
+        pendientes = [d for d, r in resultados.items() if not r["ok"] and r.get("reintentar")]
+        if pendientes:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futuros = {
+                    executor.submit(self._instalar_clasico, adb_bin, apk_path, d, reemplazar, callback_progreso): d
+                    for d in pendientes
+                }
+                for futuro in as_completed(futuros):
+                    resultado = futuro.result()
+                    resultados[resultado["dispositivo"]] = resultado
+
+        reporte = self._construir_reporte("instalacion", dispositivos, resultados, inicio)
+        reporte["apk"] = str(apk_path)
+        return reporte["fallidos"] == 0, reporte
+
+    def _instalar_grupo_stream(self, adb_bin: Path, apk_path: Path, grupo: List[str],
+                               reemplazar: bool, callback: Optional[Callable]) -> Dict[str, Dict]:
+        total = apk_path.stat().st_size
+        timeout = InstallEngine.calcular_timeout(total)
+        resultados = {d: self._resultado_base(d) for d in grupo}
+        colas = {}
+        hilos = {}
+        procesos = {}
+        inicios = {}
+
+        def plazo_restante(dispositivo: str) -> float:
+            return max(0.0, inicios[dispositivo] + timeout - time.perf_counter())
+
+        def agotar_plazo(dispositivo: str, salida: str):
+            """Un dispositivo bloqueado no detiene al grupo: se corta su proceso y se marca como fallido"""
+            resultado = resultados[dispositivo]
+            if resultado.get("plazo_agotado"):
+                return
+            resultado["plazo_agotado"] = salida
+            self._log(f"⏰ {dispositivo}: instalación bloqueada, se cancela", "warning")
+            try:
+                procesos[dispositivo].kill()
+            except OSError:
+                pass
+
+        def escritor(dispositivo: str):
+            proc = procesos[dispositivo]
+            resultado = resultados[dispositivo]
+            cola = colas[dispositivo]
+            try:
+                while True:
+                    bloque = cola.get()
+                    if bloque is None:
+                        break
+                    if resultado.get("plazo_agotado"):
+                        continue
+                    proc.stdin.write(bloque)
+                    resultado["bytes_enviados"] += len(bloque)
+                    self._notificar(callback, dispositivo, "enviando", resultado["bytes_enviados"], total)
+            except (BrokenPipeError, OSError):
+                resultado["fallo_envio"] = True
+                # Vaciar la cola para no bloquear al lector
+                while True:
+                    try:
+                        if cola.get_nowait() is None:
+                            break
+                    except queue.Empty:
+                        time.sleep(0.01)
+
+        comando_base = ["exec-in", "cmd", "package", "install"]
+        if reemplazar:
+            comando_base.append("-r")
+        comando_base.extend(["-S", str(total)])
+
+        for dispositivo in grupo:
+            try:
+                procesos[dispositivo] = subprocess.Popen(
+                    [str(adb_bin), "-s", dispositivo] + comando_base,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                )
+            except Exception as e:
+                resultados[dispositivo]["motivo"] = f"Error iniciando ADB: {str(e)}"
+                continue
+            inicios[dispositivo] = time.perf_counter()
+            colas[dispositivo] = queue.Queue(maxsize=self.COLA_MAX_BLOQUES)
+            hilo = threading.Thread(target=escritor, args=(dispositivo,), daemon=True)
+            hilo.start()
+            hilos[dispositivo] = hilo
+            self._notificar(callback, dispositivo, "iniciando", 0, total)
+
+        # Una sola lectura del APK, repartida a todos los dispositivos del grupo
+        with open(apk_path, 'rb') as f:
+            while colas:
+                bloque = f.read(self.CHUNK_SIZE)
+                if not bloque:
+                    break
+                for dispositivo, cola in colas.items():
+                    resultado = resultados[dispositivo]
+                    if resultado.get("fallo_envio") or resultado.get("plazo_agotado"):
+                        continue
+                    try:
+                        cola.put(bloque, timeout=min(self.PLAZO_SIN_AVANCE_S, plazo_restante(dispositivo)))
+                    except queue.Full:
+                        agotar_plazo(dispositivo, f"Dispositivo bloqueado: no aceptó datos en {self.PLAZO_SIN_AVANCE_S}s"
+                                     if plazo_restante(dispositivo) else f"Tiempo de espera agotado ({timeout}s)")
+
+        for cola in colas.values():
+            cola.put(None)
+        for dispositivo, hilo in hilos.items():
+            hilo.join(plazo_restante(dispositivo))
+            if hilo.is_alive():
+                # Escritura bloqueada en el pipe: matar el proceso la libera
+                agotar_plazo(dispositivo, f"Tiempo de espera agotado ({timeout}s)")
+                hilo.join()
+
+        for dispositivo, proc in procesos.items():
+            resultado = resultados[dispositivo]
+            resultado["metodo"] = "stream"
+            if resultado.get("plazo_agotado"):
+                proc.communicate()
+                salida = resultado["plazo_agotado"]
+            else:
+                try:
+                    # communicate() cierra stdin y marca el fin del stream para pm
+                    salida, _ = proc.communicate(timeout=max(1.0, plazo_restante(dispositivo)))
+                    salida = salida.decode("utf-8", errors="ignore")
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.communicate()
+                    salida = resultado["plazo_agotado"] = f"Tiempo de espera agotado ({timeout}s)"
+            resultado["salida"] = salida
+            resultado["duracion_s"] = round(time.perf_counter() - inicios[dispositivo], 3)
+
+            if not resultado.get("plazo_agotado") and proc.returncode == 0 and "Success" in salida:
+                resultado["ok"] = True
+                self._notificar(callback, dispositivo, "completado", total, total)
+            else:
+                resultado["motivo"] = self.extraer_motivo_fallo(salida)
+                # cmd/exec-in no disponibles (Android < 7 o adb antiguo); un plazo agotado no se reintenta
+                resultado["reintentar"] = not resultado.get("plazo_agotado") and (
+                    InstallEngine._no_soportado(salida) or resultado.get("fallo_envio", False)
+                )
+                if not resultado["reintentar"]:
+                    self._notificar(callback, dispositivo, "error", resultado["bytes_enviados"], total)
+
+        return resultados
+
+    def _instalar_clasico(self, adb_bin: Path, apk_path: Path, dispositivo: str,
+                          reemplazar: bool, callback: Optional[Callable]) -> Dict:
+        resultado = self._resultado_base(dispositivo)
+        resultado["metodo"] = "install"
+        total = apk_path.stat().st_size
+        timeout = InstallEngine.calcular_timeout(total)
+        self._notificar(callback, dispositivo, "reintentando", 0, total)
+
+        args = ["-s", dispositivo, "install"]
+        if reemplazar:
+            args.append("-r")
+        args.append(str(apk_path))
+
+        inicio = time.perf_counter()
+        # ClienteADB.instalar por el servidor adb (o el ejecutable si no hay servidor)
+        rc, salida = ejecutar_adb(adb_bin, args, timeout)
+        resultado["ok"] = rc == 0 and "Success" in salida
+
+        resultado["salida"] = salida
+        resultado["duracion_s"] = round(time.perf_counter() - inicio, 3)
+        if resultado["ok"]:
+            resultado["bytes_enviados"] = total
+            self._notificar(callback, dispositivo, "completado", total, total)
+        else:
+            resultado["motivo"] = self.extraer_motivo_fallo(salida)
+            self._notificar(callback, dispositivo, "error", 0, total)
+        return resultado
+
+    # ========== DESINSTALACIÓN ==========
+
+    def desinstalar_en_dispositivos(self, package_name: str, platform_tools_path: str,
+                                    dispositivos: List[str] = None,
+                                    callback_progreso: Optional[Callable[[str, str, int, int], None]] = None) -> Tuple[bool, Dict]:
+        """Desinstalar un paquete de todos los dispositivos en paralelo"""
+        if not platform_tools_path:
+            return False, {"error": "Platform-tools no configurado"}
+        adb_bin = self._adb_bin(platform_tools_path)
+        if not adb_bin.exists():
+            return False, {"error": f"ADB no encontrado en: {platform_tools_path}"}
+
+        exito, dispositivos = self._resolver_dispositivos(platform_tools_path, dispositivos)
+        if not exito:
+            return False, {"error": dispositivos[0] if dispositivos else "Error obteniendo dispositivos"}
+        if not dispositivos:
+            return False, {"error": "No hay dispositivos Android conectados"}
+
+        inicio = time.perf_counter()
+        resultados = {}
+
+        def desinstalar(dispositivo: str) -> Dict:
+            resultado = self._resultado_base(dispositivo)
+            resultado["metodo"] = "uninstall"
+            self._notificar(callback_progreso, dispositivo, "desinstalando")
+            t0 = time.perf_counter()
+            rc, salida = ejecutar_adb(adb_bin, ["-s", dispositivo, "uninstall", package_name], 60)
+            resultado["ok"] = rc == 0 and "Success" in salida
+            resultado["salida"] = salida
+            resultado["duracion_s"] = round(time.perf_counter() - t0, 3)
+            if not resultado["ok"]:
+                resultado["motivo"] = self.extraer_motivo_fallo(salida)
+            self._notificar(callback_progreso, dispositivo, "completado" if resultado["ok"] else "error")
+            return resultado
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for futuro in as_completed([executor.submit(desinstalar, d) for d in dispositivos]):
+                resultado = futuro.result()
+                resultados[resultado["dispositivo"]] = resultado
+
+        reporte = self._construir_reporte("desinstalacion", dispositivos, resultados, inicio)
+        reporte["package"] = package_name
+        return reporte["fallidos"] == 0, reporte
+
+    # ========== REPORTE ==========
+
+    def _construir_reporte(self, operacion: str, dispositivos: List[str], resultados: Dict[str, Dict], inicio: float) -> Dict:
+        ordenados = [resultados[d] for d in dispositivos if d in resultados]
+        for resultado in ordenados:
+            resultado.pop("reintentar", None)
+            resultado.pop("fallo_envio", None)
+            resultado.pop("plazo_agotado", None)
+        reporte = {
+            "operacion": operacion,
+            "total": len(dispositivos),
+            "exitosos": sum(1 for r in ordenados if r["ok"]),
+            "fallidos": sum(1 for r in ordenados if not r["ok"]),
+            "duracion_s": round(time.perf_counter() - inicio, 3),
+            "dispositivos": ordenados,
+        }
+        self._log(f"📲 {operacion}: {reporte['exitosos']}/{reporte['total']} dispositivos OK en {reporte['duracion_s']}s",
+                  "info" if not reporte["fallidos"] else "warning")
+        return reporte
+
+    @staticmethod
+    def formatear_reporte(reporte: Dict) -> str:
+        """Resumen legible por dispositivo"""
+        if "error" in reporte:
+            return f"❌ {reporte['error']}"
+        lineas = [
+            f"Dispositivos: {reporte['exitosos']}/{reporte['total']} correctos "
+            f"({reporte['duracion_s']:.1f}s en total)",
+            "",
+        ]
+        for r in reporte["dispositivos"]:
+            estado = "✅" if r["ok"] else "❌"
+            detalle = f" - {r['motivo']}" if not r["ok"] else ""
+            lineas.append(f"{estado} {r['dispositivo']}: {r['duracion_s']:.1f}s [{r['metodo']}]{detalle}")
+        return "\n".join(lineas)
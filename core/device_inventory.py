@@ -0,0 +1,226 @@
+"""
+Inventario de dispositivos: un solo ``getprop`` por dispositivo, en caché
+
+En lugar de un ``adb shell getprop <clave>`` por dato, una única llamada de
+shell vuelca todas las propiedades (más ``/proc/meminfo`` y la línea GLES de
+SurfaceFlinger para la RAM y la GPU) y se parsea a un mapa completo. El
+resultado se guarda por serial y se invalida cuando ``host:track-devices``
+informa de que el dispositivo se desconectó, cambió de estado o volvió, así
+que las comprobaciones de instalación y compatibilidad lo consultan sin
+lanzar comandos. Sin seguimiento de dispositivos no se guarda nada: cada
+consulta hace su única llamada.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.adb_client import ejecutar_adb
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("herramientas")
+
+_MARCA = "@@apk_inspector:"
+# Todo en un viaje: propiedades, memoria y GPU (dumpsys SurfaceFlinger imprime "GLES: <fabricante>, <gpu>, <versión>")
+COMANDO_INVENTARIO = (
+    f"getprop; echo {_MARCA}meminfo; cat /proc/meminfo; "
+    f"echo {_MARCA}gles; dumpsys SurfaceFlinger | grep -m 1 GLES"
+)
+TIMEOUT_INVENTARIO = 20
+
+# Android 14 (API 34) rechaza instalar apps con targetSdk < 23
+SDK_BLOQUEO_TARGET_ANTIGUO = 34
+TARGET_MINIMO_ANDROID_14 = 23
+
+
+def parsear_getprop(salida: str) -> Dict[str, str]:
+    """{propiedad: valor} de la salida de ``getprop`` (``[clave]: [valor]``, valores multilínea incluidos)"""
+    propiedades = {}
+    clave, partes = None, []
+    for linea in salida.splitlines():
+        if clave is None:
+            if not linea.startswith("[") or "]: [" not in linea:
+                continue
+            clave, _, resto = linea[1:].partition("]: [")
+            partes = [resto]
+        else:
+            partes.append(linea)
+        if partes[-1].endswith("]"):
+            partes[-1] = partes[-1][:-1]
+            propiedades[clave] = "\n".join(partes)
+            clave, partes = None, []
+    return propiedades
+
+
+def _secciones(salida: str) -> Dict[str, str]:
+    """Separar la salida de ``COMANDO_INVENTARIO`` por sus marcas"""
+    secciones = {"getprop": []}
+    actual = "getprop"
+    for linea in salida.replace("\r\n", "\n").split("\n"):
+        if linea.startswith(_MARCA):
+            actual = linea[len(_MARCA):].strip()
+            secciones[actual] = []
+        else:
+            secciones[actual].append(linea)
+    return {nombre: "\n".join(lineas) for nombre, lineas in secciones.items()}
+
+
+def _entero(valor) -> Optional[int]:
+    valor = str(valor or "").strip()
+    return int(valor) if valor.isdigit() else None
+
+
+def construir_inventario(propiedades: Dict[str, str], meminfo: str = "", gles: str = "") -> Dict:
+    """Datos de inventario a partir del mapa de propiedades y las secciones de memoria/GPU"""
+    abis = [abi.strip() for abi in propiedades.get("ro.product.cpu.abilist", "").split(",") if abi.strip()]
+    if not abis:
+        # Android < 5 no tiene abilist
+        abis = [propiedades[clave] for clave in ("ro.product.cpu.abi", "ro.product.cpu.abi2")
+                if propiedades.get(clave)]
+
+    ram_mb = None
+    for linea in meminfo.splitlines():
+        if linea.startswith("MemTotal:"):
+            kb = _entero(linea.split(":", 1)[1].replace("kB", ""))
+            ram_mb = kb // 1024 if kb else None
+            break
+
+    gpu = gpu_fabricante = opengl_es = None
+    linea_gles = next((l for l in gles.splitlines() if l.strip().startswith("GLES:")), "")
+    if linea_gles:
+        partes = [p.strip() for p in linea_gles.split(":", 1)[1].split(",")]
+        gpu_fabricante = partes[0] or None
+        gpu = partes[1] if len(partes) > 1 else None
+        opengl_es = partes[2] if len(partes) > 2 else None
+
+    return {
+        "modelo": propiedades.get("ro.product.model"),
+        "fabricante": propiedades.get("ro.product.manufacturer"),
+        "nombre": propiedades.get("ro.product.name"),
+        "dispositivo": propiedades.get("ro.product.device"),
+        "android_version": propiedades.get("ro.build.version.release"),
+        "sdk": _entero(propiedades.get("ro.build.version.sdk")),
+        "parche_seguridad": propiedades.get("ro.build.version.security_patch") or None,
+        "abis": abis,
+        "abi_principal": abis[0] if abis else None,
+        "ram_mb": ram_mb,
+        "gpu": gpu or propiedades.get("ro.hardware.egl") or None,
+        "gpu_fabricante": gpu_fabricante,
+        "opengl_es": opengl_es,
+        "plataforma": propiedades.get("ro.board.platform") or None,
+        "huella": propiedades.get("ro.build.fingerprint") or None,
+    }
+
+
+def verificar_compatibilidad(inventario: Dict, parsed_info: Optional[Dict]) -> List[str]:
+    """Motivos por los que el APK no se instalaría en el dispositivo (lista vacía = compatible)"""
+    if not inventario or not parsed_info:
+        return []
+    problemas = []
+    sdk = inventario.get("sdk")
+
+    min_sdk = _entero(parsed_info.get("min_sdk"))
+    if sdk and min_sdk and min_sdk > sdk:
+        problemas.append(f"Requiere Android API {min_sdk} y el dispositivo tiene API {sdk} "
+                         f"(Android {inventario.get('android_version') or '?'})")
+
+    target_sdk = _entero(parsed_info.get("target_sdk"))
+    if sdk and sdk >= SDK_BLOQUEO_TARGET_ANTIGUO and target_sdk and target_sdk < TARGET_MINIMO_ANDROID_14:
+        problemas.append(f"targetSdk {target_sdk}: Android 14+ bloquea apps con targetSdk < {TARGET_MINIMO_ANDROID_14}")
+
+    arquitecturas = parsed_info.get("architectures") or []
+    abis = inventario.get("abis") or []
+    if parsed_info.get("native_libs") and arquitecturas and abis and not set(arquitecturas) & set(abis):
+        problemas.append(f"Librerías nativas solo para {', '.join(arquitecturas)}; "
+                         f"el dispositivo admite {', '.join(abis)}")
+    return problemas
+
+
+class InventarioDispositivos:
+    """Propiedades e inventario por serial, en caché hasta que el dispositivo se reconecte"""
+
+    def __init__(self, adb_bin):
+        self.adb_bin = adb_bin
+        self._cache: Dict[str, Dict] = {}
+        # Cambios vistos por serial: una respuesta que llega tras una reconexión no se guarda
+        self._generacion: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._cancelar_suscripcion = None
+
+    def _vigilar_reconexiones(self) -> bool:
+        """Suscribirse a track-devices; False si no hay seguimiento (entonces no se cachea)"""
+        if self._cancelar_suscripcion is not None:
+            return True
+        from core.device_tracker import obtener_seguidor
+        seguidor = obtener_seguidor(self.adb_bin)
+        if seguidor is None or not seguidor.esperar_sincronizado(2):
+            return False
+        with self._lock:
+            if self._cancelar_suscripcion is None:
+                self._cancelar_suscripcion = seguidor.suscribir(lambda evento: self.invalidar(evento["serial"]))
+        return True
+
+    def invalidar(self, serial: Optional[str] = None):
+        with self._lock:
+            seriales = [serial] if serial else set(self._cache) | set(self._generacion)
+            for s in seriales:
+                self._cache.pop(s, None)
+                self._generacion[s] = self._generacion.get(s, 0) + 1
+        if serial and _traza.activa:
+            _traza(f"📱 Propiedades de {serial} invalidadas")
+
+    def instantanea(self, serial: Optional[str], forzar: bool = False) -> Dict:
+        """{"propiedades", "meminfo", "gles"} del dispositivo (``error`` si no respondió)"""
+        cacheable = bool(serial) and self._vigilar_reconexiones()
+        with self._lock:
+            if cacheable and not forzar and serial in self._cache:
+                return self._cache[serial]
+            generacion = self._generacion.get(serial)
+
+        args = (["-s", serial] if serial else []) + ["shell", COMANDO_INVENTARIO]
+        _, salida = ejecutar_adb(self.adb_bin, args, TIMEOUT_INVENTARIO)
+        secciones = _secciones(salida)
+        propiedades = parsear_getprop(secciones.get("getprop", ""))
+        resultado = {
+            "propiedades": propiedades,
+            "meminfo": secciones.get("meminfo", ""),
+            "gles": secciones.get("gles", ""),
+        }
+        if not propiedades:
+            # Dispositivo no encontrado, no autorizado... no se guarda
+            resultado["error"] = salida.strip() or "Sin respuesta de getprop"
+            return resultado
+
+        if _traza.activa:
+            _traza(f"📱 getprop de {serial or 'dispositivo por defecto'}: {len(propiedades)} propiedades")
+        if cacheable:
+            with self._lock:
+                if self._generacion.get(serial) == generacion:
+                    self._cache[serial] = resultado
+        return resultado
+
+    def propiedades(self, serial: Optional[str], forzar: bool = False) -> Dict[str, str]:
+        return self.instantanea(serial, forzar)["propiedades"]
+
+    def inventario(self, serial: Optional[str], forzar: bool = False) -> Dict:
+        """Modelo, versión, SDK, parche de seguridad, ABIs, RAM y GPU (``error`` si no respondió)"""
+        datos = self.instantanea(serial, forzar)
+        if "error" in datos:
+            return {"serial": serial, "error": datos["error"]}
+        inventario = construir_inventario(datos["propiedades"], datos["meminfo"], datos["gles"])
+        inventario["serial"] = serial
+        return inventario
+
+
+_inventarios: Dict[str, InventarioDispositivos] = {}
+_lock_inventarios = threading.Lock()
+
+
+def obtener_inventario(adb_bin) -> InventarioDispositivos:
+    """Inventario compartido para un ejecutable de adb (la caché sobrevive entre diálogos)"""
+    clave = str(Path(adb_bin))
+    with _lock_inventarios:
+        inventario = _inventarios.get(clave)
+        if inventario is None:
+            inventario = _inventarios[clave] = InventarioDispositivos(adb_bin)
+        return inventario
@@ -0,0 +1,227 @@
+"""
+Seguimiento de dispositivos con ``host:track-devices`` (sin sondear ``adb devices``)
+
+Una conexión persistente con el servidor adb recibe el listado completo cada
+vez que un dispositivo se conecta, se desconecta o cambia de estado
+(``offline``, ``unauthorized``, ``device``...). ``SeguidorDispositivos``
+mantiene esa tabla viva, calcula las transiciones y avisa a los suscriptores,
+de modo que consultar qué hay conectado no lanza ningún comando y esperar a
+un dispositivo no necesita ``sleep``. Si el servidor se cae, los dispositivos
+pasan a desconectados y la suscripción se restablece sola (con un único
+``start-server`` por caída).
+"""
+
+import socket
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.adb_client import ClienteADB, ErrorADB, nativo_activo, obtener_cliente
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("herramientas")
+
+ESTADO_LISTO = "device"
+
+# Reintentos de la suscripción mientras el servidor no responde (segundos)
+ESPERA_REINTENTO_INICIAL = 0.25
+ESPERA_REINTENTO_MAXIMA = 5.0
+
+
+def parsear_listado(listado: str) -> Dict[str, str]:
+    """{serial: estado} desde el cuerpo de ``adb devices`` (en el orden del servidor)"""
+    tabla = {}
+    for linea in listado.splitlines():
+        serial, _, estado = linea.partition("\t")
+        if serial.strip():
+            tabla[serial.strip()] = estado.strip()
+    return tabla
+
+
+class SeguidorDispositivos:
+    """Tabla de dispositivos del servidor adb actualizada por ``host:track-devices``
+
+    Los suscriptores reciben un dict por transición::
+
+        {"serial": "emulator-5554", "anterior": "offline", "estado": "device"}
+
+    ``anterior``/``estado`` son None cuando el dispositivo no estaba o ya no
+    está. Las llamadas se hacen desde el hilo del seguidor: las interfaces
+    Tkinter deben pasarlas al hilo principal con ``root.after``.
+    """
+
+    def __init__(self, cliente: ClienteADB):
+        self.cliente = cliente
+        self.version = 0
+        self._tabla: Dict[str, str] = {}
+        self._sincronizado = False
+        # El último intento de suscripción falló: las consultas no esperan al seguidor
+        self._sin_servidor = False
+        self._suscriptores: List[Callable[[Dict], None]] = []
+        self._condicion = threading.Condition()
+        self._parada = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._sock: Optional[socket.socket] = None
+
+    # ========== CICLO DE VIDA ==========
+
+    def iniciar(self) -> "SeguidorDispositivos":
+        with self._condicion:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._parada.clear()
+                self._hilo = threading.Thread(target=self._bucle, name="adb-track-devices", daemon=True)
+                self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parada.set()
+        self._cerrar_conexion()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=2)
+        self._aplicar({}, sincronizado=False)
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive() and not self._parada.is_set()
+
+    def _cerrar_conexion(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                # shutdown desbloquea el recv del hilo del seguidor
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _bucle(self):
+        espera = ESPERA_REINTENTO_INICIAL
+        while not self._parada.is_set():
+            try:
+                sock = self.cliente.seguir_dispositivos()
+            except (ErrorADB, OSError) as e:
+                with self._condicion:
+                    self._sin_servidor = True
+                    self._condicion.notify_all()
+                if _traza.activa:
+                    _traza(f"track-devices no disponible ({e}), reintento en {espera:.2f}s")
+                self._parada.wait(espera)
+                espera = min(espera * 2, ESPERA_REINTENTO_MAXIMA)
+                continue
+
+            self._sock = sock
+            espera = ESPERA_REINTENTO_INICIAL
+            try:
+                while not self._parada.is_set():
+                    self._aplicar(parsear_listado(self.cliente.leer_listado(sock)), sincronizado=True)
+            except (OSError, ValueError) as e:
+                if not self._parada.is_set() and _traza.activa:
+                    _traza(f"Se perdió la conexión de track-devices: {e}")
+            finally:
+                self._cerrar_conexion()
+
+            # Sin servidor no se sabe qué hay conectado; al reconectar llega el listado completo
+            self._aplicar({}, sincronizado=False)
+            self.cliente.permitir_inicio_servidor()
+
+    # ========== TABLA Y TRANSICIONES ==========
+
+    def _aplicar(self, tabla: Dict[str, str], sincronizado: bool):
+        with self._condicion:
+            anterior = self._tabla
+            eventos = [
+                {"serial": serial, "anterior": anterior.get(serial), "estado": tabla.get(serial)}
+                for serial in list(anterior) + [s for s in tabla if s not in anterior]
+                if anterior.get(serial) != tabla.get(serial)
+            ]
+            self._tabla = tabla
+            self._sincronizado = sincronizado
+            if sincronizado:
+                self._sin_servidor = False
+            self.version += 1
+            self._condicion.notify_all()
+            suscriptores = list(self._suscriptores)
+
+        for evento in eventos:
+            if _traza.activa:
+                _traza(f"📱 {evento['serial']}: {evento['anterior'] or 'desconectado'} -> "
+                       f"{evento['estado'] or 'desconectado'}")
+            for callback in suscriptores:
+                try:
+                    callback(evento)
+                except Exception as e:
+                    _traza.error(f"Error en suscriptor de dispositivos: {e}")
+
+    def suscribir(self, callback: Callable[[Dict], None]) -> Callable[[], None]:
+        """Recibir cada transición; devuelve la función que cancela la suscripción"""
+        with self._condicion:
+            self._suscriptores.append(callback)
+
+        def cancelar():
+            with self._condicion:
+                if callback in self._suscriptores:
+                    self._suscriptores.remove(callback)
+        return cancelar
+
+    def esperar_sincronizado(self, timeout: Optional[float] = None) -> bool:
+        """True cuando la tabla refleja el servidor (primer listado recibido)
+
+        Vuelve en cuanto un intento de suscripción falla, para que quien
+        consulta recurra a ``adb devices`` sin esperar todo el timeout.
+        """
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._sincronizado or self._sin_servidor, timeout)
+            return self._sincronizado
+
+    @property
+    def sincronizado(self) -> bool:
+        return self._sincronizado
+
+    def dispositivos(self) -> Dict[str, str]:
+        """{serial: estado} de todos los dispositivos que ve el servidor"""
+        with self._condicion:
+            return dict(self._tabla)
+
+    def conectados(self) -> List[str]:
+        """Seriales listos para usar (estado ``device``)"""
+        with self._condicion:
+            return [serial for serial, estado in self._tabla.items() if estado == ESTADO_LISTO]
+
+    def estado(self, serial: str) -> Optional[str]:
+        with self._condicion:
+            return self._tabla.get(serial)
+
+    def _primero_listo(self, serial: Optional[str]) -> Optional[str]:
+        if serial:
+            return serial if self._tabla.get(serial) == ESTADO_LISTO else None
+        return next((s for s, estado in self._tabla.items() if estado == ESTADO_LISTO), None)
+
+    def esperar_dispositivo(self, serial: Optional[str] = None, timeout: Optional[float] = None) -> Optional[str]:
+        """Serial listo (``serial`` o el primero que aparezca); None si vence el timeout"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._primero_listo(serial) is not None, timeout)
+            return self._primero_listo(serial)
+
+
+_seguidores: Dict[Tuple[str, int], SeguidorDispositivos] = {}
+_lock_seguidores = threading.Lock()
+
+
+def obtener_seguidor(adb_bin=None) -> Optional[SeguidorDispositivos]:
+    """Seguidor (ya iniciado) del servidor adb; None si el cliente nativo está desactivado"""
+    if not nativo_activo():
+        return None
+    cliente = obtener_cliente(str(adb_bin) if adb_bin else None)
+    clave = (cliente.host, cliente.puerto)
+    with _lock_seguidores:
+        seguidor = _seguidores.get(clave)
+        if seguidor is None:
+            seguidor = _seguidores[clave] = SeguidorDispositivos(cliente)
+    return seguidor.iniciar()
+
+
+def dispositivos_listos(adb_bin=None, timeout: float = 2.0) -> Optional[List[str]]:
+    """Seriales en estado ``device`` según el seguidor; None si no hay seguimiento disponible"""
+    seguidor = obtener_seguidor(adb_bin)
+    if seguidor is None or not seguidor.esperar_sincronizado(timeout):
+        return None
+    return seguidor.conectados()
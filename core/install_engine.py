@@ -0,0 +1,295 @@
+import re
+import sys
+import time
+import socket
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Callable
+
+from core.adb_client import ErrorADB, ServidorNoDisponible, ejecutar_adb, nativo_activo, obtener_cliente
+
+
+class InstallEngine:
+    """Motor de instalación con progreso real de bytes enviados.
+
+    Modos soportados:
+      - ``incremental``: ``adb install --incremental`` (Android 11+ con firma v4 / .idsig)
+      - ``nativo``: ``cmd package install -S`` en streaming por el socket del servidor adb
+      - ``sesion``: ``pm install-create`` + ``pm install-write`` por stdin + ``pm install-commit``
+      - ``clasico``: ``adb install -r`` (sin progreso)
+    En modo ``auto`` se prueban en ese orden y se cae al siguiente si el
+    dispositivo no lo soporta. ``nativo`` se omite con el cliente adb nativo
+    desactivado y ``sesion`` solo se usa si no hay servidor al que conectarse.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+    TIMEOUT_BASE = 60  # mínimo previo: pm también verifica y optimiza el APK
+    TIMEOUT_MAXIMO = 1800
+    # Velocidad mínima asumida para calcular el timeout (USB 2.0 saturado / Wi-Fi lento)
+    VELOCIDAD_MINIMA_BPS = 1024 * 1024
+    MODOS = ("auto", "incremental", "nativo", "sesion", "clasico")
+
+    def __init__(self, logger=None):
+        self.logger = logger
+
+    def _log(self, message: str, level: str = "info"):
+        if self.logger:
+            if level == "info":
+                self.logger.log_info(message)
+            elif level == "error":
+                self.logger.log_error(message)
+            elif level == "warning":
+                self.logger.log_warning(message)
+
+    @staticmethod
+    def adb_bin(platform_tools_path: str) -> Path:
+        return Path(platform_tools_path) / ("adb.exe" if sys.platform.startswith("win") else "adb")
+
+    @classmethod
+    def calcular_timeout(cls, tamano_bytes: int) -> int:
+        """Timeout proporcional al tamaño: base + tiempo de transferencia a velocidad mínima, x2"""
+        transferencia = (tamano_bytes or 0) / cls.VELOCIDAD_MINIMA_BPS
+        return int(min(cls.TIMEOUT_MAXIMO, cls.TIMEOUT_BASE + transferencia * 2))
+
+    @staticmethod
+    def formatear_progreso(enviados: int, total: int, bytes_por_s: float, eta_s: Optional[float]) -> str:
+        """Texto '12.3/45.6 MB · 8.1 MB/s · ETA 4s' para la UI"""
+        mb = 1024 * 1024
+        texto = f"{enviados / mb:.1f}/{total / mb:.1f} MB"
+        if bytes_por_s > 0:
+            texto += f" · {bytes_por_s / mb:.1f} MB/s"
+        if eta_s is not None:
+            texto += f" · ETA {int(eta_s)}s"
+        return texto
+
+    def _comando_base(self, adb_bin: Path, dispositivo: Optional[str]) -> list:
+        comando = [str(adb_bin)]
+        if dispositivo and dispositivo != "unknown":
+            comando.extend(["-s", dispositivo])
+        return comando
+
+    def _ejecutar(self, comando: list, timeout: int) -> Tuple[int, str]:
+        # Por el protocolo del servidor adb cuando se puede traducir; si no, el ejecutable
+        return ejecutar_adb(comando[0], comando[1:], timeout)
+
+    # ========== API PRINCIPAL ==========
+
+    def instalar(self, apk_path: Path, platform_tools_path: str, dispositivo: str = None,
+                 modo: str = "auto", reemplazar: bool = True,
+                 callback_progreso: Optional[Callable[[int, int, float, Optional[float]], None]] = None) -> Tuple[bool, Dict]:
+        """Instalar un APK reportando progreso.
+
+        ``callback_progreso(enviados, total, bytes_por_s, eta_s)`` se invoca desde
+        el hilo que llama a ``instalar``. Retorna (exito, resultado) con las claves
+        modo, salida, motivo, duracion_s, timeout_s y bytes_por_s.
+        """
+        apk_path = Path(apk_path)
+        resultado = {"modo": None, "salida": "", "motivo": "", "duracion_s": 0.0,
+                     "timeout_s": 0, "bytes_por_s": 0.0}
+
+        if modo not in self.MODOS:
+            resultado["motivo"] = f"Modo de instalación no soportado: {modo}"
+            return False, resultado
+        if not platform_tools_path:
+            resultado["motivo"] = "Platform-tools no configurado"
+            return False, resultado
+        adb_bin = self.adb_bin(platform_tools_path)
+        if not adb_bin.exists():
+            resultado["motivo"] = f"ADB no encontrado en: {platform_tools_path}"
+            return False, resultado
+        if not apk_path.exists():
+            resultado["motivo"] = f"APK no encontrado: {apk_path}"
+            return False, resultado
+
+        total = apk_path.stat().st_size
+        timeout = self.calcular_timeout(total)
+        resultado["timeout_s"] = timeout
+
+        if modo == "auto":
+            # --incremental solo tiene sentido si existe la firma v4 junto al APK
+            tiene_idsig = Path(str(apk_path) + ".idsig").exists()
+            secuencia = (["incremental"] if tiene_idsig else []) + (["nativo"] if nativo_activo() else [])
+            secuencia += ["sesion", "clasico"]
+        else:
+            secuencia = [modo]
+
+        inicio = time.perf_counter()
+        exito = False
+        for modo_actual in secuencia:
+            resultado["modo"] = modo_actual
+            try:
+                if modo_actual == "incremental":
+                    exito, salida, soportado = self._instalar_incremental(adb_bin, apk_path, dispositivo, reemplazar, timeout)
+                elif modo_actual == "nativo":
+                    exito, salida, soportado = self._instalar_nativo(
+                        adb_bin, apk_path, dispositivo, reemplazar, total, timeout, callback_progreso
+                    )
+                elif modo_actual == "sesion":
+                    exito, salida, soportado = self._instalar_sesion(
+                        adb_bin, apk_path, dispositivo, reemplazar, total, timeout, callback_progreso
+                    )
+                else:
+                    rc, salida = self._ejecutar(
+                        self._comando_base(adb_bin, dispositivo) + ["install"] + (["-r"] if reemplazar else []) + [str(apk_path)],
+                        timeout
+                    )
+                    exito, soportado = rc == 0 and "Success" in salida, True
+            except subprocess.TimeoutExpired:
+                exito, salida, soportado = False, f"Tiempo de espera agotado ({timeout}s)", True
+
+            resultado["salida"] = salida
+            if exito or soportado:
+                break
+            self._log(f"ℹ️ Modo de instalación '{modo_actual}' no soportado, probando el siguiente", "warning")
+
+        resultado["duracion_s"] = round(time.perf_counter() - inicio, 3)
+        if resultado["duracion_s"] > 0:
+            resultado["bytes_por_s"] = round(total / resultado["duracion_s"], 1)
+        if exito:
+            if callback_progreso:
+                callback_progreso(total, total, resultado["bytes_por_s"], 0)
+        else:
+            resultado["motivo"] = self.extraer_motivo(resultado["salida"])
+
+        self._log(f"📲 Instalación [{resultado['modo']}] {apk_path.name}: "
+                  f"{'OK' if exito else resultado['motivo']} en {resultado['duracion_s']}s",
+                  "info" if exito else "error")
+        return exito, resultado
+
+    @staticmethod
+    def extraer_motivo(salida: str) -> str:
+        match = re.search(r'Failure \[([^\]]+)\]', salida or "")
+        if match:
+            return match.group(1)
+        return (salida or "").strip()[-200:] or "Error desconocido"
+
+    # Mensajes de "opción/comando no disponible" de adb, pm y el shell del dispositivo.
+    # Un "device 'X' not found" o "no devices/emulators found" es un error real:
+    # no debe hacer caer al siguiente modo.
+    MARCAS_NO_SOPORTADO = (
+        "unknown option", "unknown command", "unknown service", "not supported",
+        "can't find service", "unable to open", ".idsig",
+    )
+    _COMANDO_NO_ENCONTRADO = re.compile(r"\b(?:cmd|pm|exec-in|exec-out)\b[^\n]*: (?:inaccessible or |command )?not found")
+
+    @classmethod
+    def _no_soportado(cls, salida: str) -> bool:
+        salida = (salida or "").lower()
+        return (any(marca in salida for marca in cls.MARCAS_NO_SOPORTADO)
+                or cls._COMANDO_NO_ENCONTRADO.search(salida) is not None)
+
+    # ========== MODOS ==========
+
+    def _instalar_incremental(self, adb_bin: Path, apk_path: Path, dispositivo: Optional[str],
+                              reemplazar: bool, timeout: int) -> Tuple[bool, str, bool]:
+        comando = self._comando_base(adb_bin, dispositivo) + ["install", "--incremental"]
+        if reemplazar:
+            comando.append("-r")
+        comando.append(str(apk_path))
+        rc, salida = self._ejecutar(comando, timeout)
+        exito = rc == 0 and "Success" in salida
+        return exito, salida, exito or not self._no_soportado(salida)
+
+    def _instalar_nativo(self, adb_bin: Path, apk_path: Path, dispositivo: Optional[str], reemplazar: bool,
+                         total: int, timeout: int, callback: Optional[Callable]) -> Tuple[bool, str, bool]:
+        """``ClienteADB.instalar``: el APK va por el socket del servidor, sin lanzar adb"""
+        serial = dispositivo if dispositivo and dispositivo != "unknown" else None
+        inicio = time.perf_counter()
+
+        def progreso(enviados: int, tamano: int):
+            transcurrido = time.perf_counter() - inicio
+            if callback and transcurrido > 0:
+                velocidad = enviados / transcurrido
+                callback(enviados, tamano, velocidad, (tamano - enviados) / velocidad if velocidad else None)
+
+        try:
+            exito, salida = obtener_cliente(str(adb_bin)).instalar(
+                serial, apk_path, ["-r"] if reemplazar else [], timeout, callback_progreso=progreso
+            )
+        except ServidorNoDisponible as e:
+            # Sin servidor accesible: el modo sesión lo resuelve con el ejecutable
+            return False, str(e), False
+        except ErrorADB as e:
+            salida = f"adb: error: {e}"
+            return False, salida, not self._no_soportado(salida)
+        except socket.timeout:
+            return False, f"Tiempo de espera agotado ({timeout}s)", True
+        except OSError as e:
+            return False, f"Error enviando el APK al dispositivo: {e}", True
+        return exito, salida, True
+
+    def _instalar_sesion(self, adb_bin: Path, apk_path: Path, dispositivo: Optional[str], reemplazar: bool,
+                         total: int, timeout: int, callback: Optional[Callable]) -> Tuple[bool, str, bool]:
+        base = self._comando_base(adb_bin, dispositivo)
+
+        crear = base + ["shell", "pm", "install-create", "-S", str(total)]
+        if reemplazar:
+            crear.append("-r")
+        rc, salida = self._ejecutar(crear, 30)
+        match = re.search(r'\[(\d+)\]', salida)
+        if rc != 0 or not match:
+            return False, salida, not self._no_soportado(salida)
+        sesion_id = match.group(1)
+
+        escribir = base + ["exec-in", "pm", "install-write", "-S", str(total), sesion_id, "base.apk", "-"]
+        try:
+            salida_escritura = self._escribir_stream(escribir, apk_path, total, timeout, callback)
+        except subprocess.TimeoutExpired:
+            self._ejecutar(base + ["shell", "pm", "install-abandon", sesion_id], 30)
+            raise
+        if "Success" not in salida_escritura:
+            self._ejecutar(base + ["shell", "pm", "install-abandon", sesion_id], 30)
+            # exec-in no disponible (adb antiguo) cae al modo clásico; un rechazo de pm
+            # o un dispositivo desconectado son definitivos
+            return False, salida_escritura, not self._no_soportado(salida_escritura)
+
+        rc, salida = self._ejecutar(base + ["shell", "pm", "install-commit", sesion_id], timeout)
+        return rc == 0 and "Success" in salida, salida, True
+
+    def _escribir_stream(self, comando: list, apk_path: Path, total: int, timeout: int,
+                         callback: Optional[Callable]) -> str:
+        """Enviar el APK por stdin bloque a bloque reportando throughput y ETA
+
+        Un temporizador mata el proceso al vencer ``timeout``: un ``pm
+        install-write`` atascado deja ``stdin.write`` bloqueado, y solo así
+        se desbloquea a tiempo. Lanza ``subprocess.TimeoutExpired``.
+        """
+        proc = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        vencido = threading.Event()
+
+        def vencer():
+            vencido.set()
+            proc.kill()
+
+        vigilante = threading.Timer(timeout, vencer)
+        vigilante.daemon = True
+        vigilante.start()
+        inicio = time.perf_counter()
+        enviados = 0
+        try:
+            try:
+                with open(apk_path, 'rb') as f:
+                    for bloque in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                        proc.stdin.write(bloque)
+                        enviados += len(bloque)
+                        transcurrido = time.perf_counter() - inicio
+                        if callback and transcurrido > 0:
+                            velocidad = enviados / transcurrido
+                            eta = (total - enviados) / velocidad if velocidad else None
+                            callback(enviados, total, velocidad, eta)
+            except (BrokenPipeError, OSError):
+                # El proceso terminó (o el vigilante lo mató): su salida dice por qué
+                pass
+            try:
+                # Con plazo también aquí: un hijo del proceso muerto podría mantener abierta la salida
+                salida, _ = proc.communicate(timeout=max(0.1, timeout - (time.perf_counter() - inicio)))
+            except subprocess.TimeoutExpired:
+                vencer()
+        finally:
+            vigilante.cancel()
+        if vencido.is_set():
+            proc.wait()
+            proc.stdout.close()
+            raise subprocess.TimeoutExpired(comando, timeout)
+        return salida.decode("utf-8", errors="ignore")
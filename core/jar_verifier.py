@@ -0,0 +1,617 @@
+import base64
+import hashlib
+import hmac
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.zip_index import leer_bloques, obtener_indice
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("firma")
+
+# Verificación en proceso de firmas v1 (JAR signing): MANIFEST.MF, archivos .SF
+# y bloques PKCS#7 (.RSA/.EC/.DSA) con un lector DER mínimo, sin JDK ni jarsigner.
+
+OID_SIGNED_DATA = "1.2.840.113549.1.7.2"
+OID_MESSAGE_DIGEST = "1.2.840.113549.1.9.4"
+OID_RSA = "1.2.840.113549.1.1.1"
+OID_EC = "1.2.840.10045.2.1"
+OID_DSA = "1.2.840.10040.4.1"
+
+DIGESTS_OID = {
+    "1.3.14.3.2.26": "sha1",
+    "2.16.840.1.101.3.4.2.4": "sha224",
+    "2.16.840.1.101.3.4.2.1": "sha256",
+    "2.16.840.1.101.3.4.2.2": "sha384",
+    "2.16.840.1.101.3.4.2.3": "sha512",
+    "1.2.840.113549.2.5": "md5",
+}
+OID_DIGESTS = {nombre: oid for oid, nombre in DIGESTS_OID.items()}
+
+# Atributos "<ALG>-Digest" del manifest, del más fuerte al más débil
+DIGESTS_MANIFEST = (
+    ("SHA-512", "sha512"), ("SHA-384", "sha384"), ("SHA-256", "sha256"),
+    ("SHA1", "sha1"), ("SHA-1", "sha1"), ("MD5", "md5"),
+)
+
+ATRIBUTOS_DN = {
+    "2.5.4.3": "CN", "2.5.4.4": "SURNAME", "2.5.4.5": "SERIALNUMBER", "2.5.4.6": "C",
+    "2.5.4.7": "L", "2.5.4.8": "ST", "2.5.4.9": "STREET", "2.5.4.10": "O", "2.5.4.11": "OU",
+    "2.5.4.12": "T", "2.5.4.42": "GIVENNAME", "1.2.840.113549.1.9.1": "EMAILADDRESS",
+    "0.9.2342.19200300.100.1.25": "DC", "0.9.2342.19200300.100.1.1": "UID",
+}
+
+# Curvas NIST para ECDSA: (p, a, b, Gx, Gy, n)
+CURVAS = {
+    "1.2.840.10045.3.1.7": (  # P-256
+        0xffffffff00000001000000000000000000000000ffffffffffffffffffffffff,
+        0xffffffff00000001000000000000000000000000fffffffffffffffffffffffc,
+        0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+        0x6b17d1f2e12c4247f8bce6e563a440f277037d812deb33a0f4a13945d898c296,
+        0x4fe342e2fe1a7f9b8ee7eb4a7c0f9e162bce33576b315ececbb6406837bf51f5,
+        0xffffffff00000000ffffffffffffffffbce6faada7179e84f3b9cac2fc632551,
+    ),
+    "1.3.132.0.34": (  # P-384
+        int("fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffe"
+            "ffffffff0000000000000000ffffffff", 16),
+        int("fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffe"
+            "ffffffff0000000000000000fffffffc", 16),
+        int("b3312fa7e23ee7e4988e056be3f82d19181d9c6efe8141120314088f5013875a"
+            "c656398d8a2ed19d2a85c8edd3ec2aef", 16),
+        int("aa87ca22be8b05378eb1c71ef320ad746e1d3b628ba79b9859f741e082542a38"
+            "5502f25dbf55296c3a545e3872760ab7", 16),
+        int("3617de4a96262c6f5d9e98bf9292dc29f8f41dbd289a147ce9da3113b5f0b8c0"
+            "0a60b1ce1d7e819d7a431d7c90ea0e5f", 16),
+        int("ffffffffffffffffffffffffffffffffffffffffffffffffc7634d81f4372ddf"
+            "581a0db248b0a77aecec196accc52973", 16),
+    ),
+}
+
+
+# ========== LECTOR DER ==========
+
+class _Nodo:
+    """Elemento TLV de una estructura DER"""
+
+    __slots__ = ("etiqueta", "_datos", "_inicio", "_contenido", "_fin")
+
+    def __init__(self, datos: bytes, pos: int = 0, limite: Optional[int] = None):
+        limite = len(datos) if limite is None else limite
+        inicio = pos
+        etiqueta = datos[pos]
+        pos += 1
+        if etiqueta & 0x1F == 0x1F:
+            while datos[pos] & 0x80:
+                pos += 1
+            pos += 1
+        largo = datos[pos]
+        pos += 1
+        if largo & 0x80:
+            bytes_largo = largo & 0x7F
+            if bytes_largo == 0:
+                raise ValueError("Longitud indefinida (BER) no soportada")
+            largo = int.from_bytes(datos[pos:pos + bytes_largo], "big")
+            pos += bytes_largo
+        if pos + largo > limite:
+            raise ValueError("Estructura DER truncada")
+        self.etiqueta = etiqueta
+        self._datos = datos
+        self._inicio = inicio
+        self._contenido = pos
+        self._fin = pos + largo
+
+    @property
+    def contenido(self) -> bytes:
+        return self._datos[self._contenido:self._fin]
+
+    @property
+    def crudo(self) -> bytes:
+        return self._datos[self._inicio:self._fin]
+
+    def hijos(self) -> List["_Nodo"]:
+        hijos, pos = [], self._contenido
+        while pos < self._fin:
+            hijo = _Nodo(self._datos, pos, self._fin)
+            hijos.append(hijo)
+            pos = hijo._fin
+        return hijos
+
+    def entero(self) -> int:
+        return int.from_bytes(self.contenido, "big", signed=True)
+
+    def oid(self) -> str:
+        datos = self.contenido
+        primero = datos[0]
+        partes = [min(primero // 40, 2), primero - 40 * min(primero // 40, 2)]
+        valor = 0
+        for byte in datos[1:]:
+            valor = (valor << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                partes.append(valor)
+                valor = 0
+        return ".".join(str(p) for p in partes)
+
+    def texto(self) -> str:
+        datos = self.contenido
+        if self.etiqueta == 0x1E:
+            return datos.decode("utf-16-be", errors="replace")
+        if self.etiqueta == 0x1C:
+            return datos.decode("utf-32-be", errors="replace")
+        if self.etiqueta == 0x14:
+            return datos.decode("latin-1")
+        return datos.decode("utf-8", errors="replace")
+
+
+def _nombre_dn(nombre: _Nodo) -> str:
+    """Name X.500 en el formato de Java (del RDN más específico al más general)"""
+    rdns = []
+    for rdn in nombre.hijos():
+        atributos = []
+        for atributo in rdn.hijos():
+            tipo, valor = atributo.hijos()[:2]
+            oid = tipo.oid()
+            texto = valor.texto()
+            if any(c in texto for c in ',+=<>#;"') or texto != texto.strip():
+                texto = '"' + texto.replace('"', '\\"') + '"'
+            atributos.append(f"{ATRIBUTOS_DN.get(oid, 'OID.' + oid)}={texto}")
+        rdns.append(" + ".join(atributos))
+    return ", ".join(reversed(rdns))
+
+
+def _fecha(nodo: _Nodo) -> str:
+    texto = nodo.contenido.decode("ascii", errors="replace").rstrip("Z")
+    if nodo.etiqueta == 0x17:  # UTCTime: año de dos dígitos
+        texto = ("19" if int(texto[:2]) >= 50 else "20") + texto
+    return f"{texto[0:4]}-{texto[4:6]}-{texto[6:8]}T{texto[8:10]}:{texto[10:12]}:{texto[12:14] or '00'}Z"
+
+
+# ========== PKCS#7 Y CERTIFICADOS ==========
+
+def _parsear_certificado(nodo: _Nodo) -> Dict:
+    campos = nodo.hijos()[0].hijos()
+    i = 1 if campos[0].etiqueta == 0xA0 else 0
+    serial, issuer, validez, subject, spki = campos[i], campos[i + 2], campos[i + 3], campos[i + 4], campos[i + 5]
+    no_antes, no_despues = validez.hijos()[:2]
+    der = nodo.crudo
+    return {
+        "subject": _nombre_dn(subject),
+        "issuer": _nombre_dn(issuer),
+        "serial": format(serial.entero() & ((1 << (8 * len(serial.contenido))) - 1), "x"),
+        "no_antes": _fecha(no_antes),
+        "no_despues": _fecha(no_despues),
+        "sha256": hashlib.sha256(der).hexdigest(),
+        "sha1": hashlib.sha1(der).hexdigest(),
+        "_issuer_der": issuer.crudo,
+        "_serial": serial.entero(),
+        "_spki": spki,
+    }
+
+
+def _parsear_pkcs7(bloque: bytes) -> Tuple[List[Dict], List[_Nodo]]:
+    """(certificados, SignerInfos) de un ContentInfo SignedData"""
+    tipo, contenido = _Nodo(bloque).hijos()[:2]
+    if tipo.oid() != OID_SIGNED_DATA:
+        raise ValueError("El bloque de firma no es PKCS#7 SignedData")
+    campos = contenido.hijos()[0].hijos()
+    certificados, firmantes = [], []
+    for campo in campos[3:]:
+        if campo.etiqueta == 0xA0:
+            certificados = [_parsear_certificado(c) for c in campo.hijos() if c.etiqueta == 0x30]
+        elif campo.etiqueta == 0x31:
+            firmantes = campo.hijos()
+    return certificados, firmantes
+
+
+def _der(etiqueta: int, contenido: bytes) -> bytes:
+    largo = len(contenido)
+    if largo < 0x80:
+        return bytes([etiqueta, largo]) + contenido
+    bytes_largo = largo.to_bytes((largo.bit_length() + 7) // 8, "big")
+    return bytes([etiqueta, 0x80 | len(bytes_largo)]) + bytes_largo + contenido
+
+
+def _der_oid(oid: str) -> bytes:
+    partes = [int(p) for p in oid.split(".")]
+    codificado = bytearray([40 * partes[0] + partes[1]])
+    for parte in partes[2:]:
+        grupo = [parte & 0x7F]
+        parte >>= 7
+        while parte:
+            grupo.append(0x80 | (parte & 0x7F))
+            parte >>= 7
+        codificado += bytes(reversed(grupo))
+    return _der(0x06, bytes(codificado))
+
+
+def _digest_info(digest: str, valor: bytes, con_null: bool = True) -> bytes:
+    """DigestInfo DER: SEQUENCE { AlgorithmIdentifier { OID, NULL }, OCTET STRING }"""
+    algoritmo = _der_oid(OID_DIGESTS[digest]) + (b"\x05\x00" if con_null else b"")
+    return _der(0x30, _der(0x30, algoritmo) + _der(0x04, valor))
+
+
+def _verificar_rsa(spki: List[_Nodo], firma: bytes, digest: str, datos: bytes) -> bool:
+    """PKCS#1 v1.5: reconstruir el bloque esperado y compararlo entero
+
+    Parsear el DigestInfo del bloque descifrado aceptaría bytes sobrantes
+    tras él (falsificación de Bleichenbacher con e=3), así que se construye
+    ``00 01 FF.. 00 || DigestInfo(alg, H(m))`` y se exige igualdad exacta.
+    """
+    if digest not in OID_DIGESTS:
+        return False
+    n, e = (x.entero() for x in _Nodo(spki[1].contenido[1:]).hijos()[:2])
+    largo = (n.bit_length() + 7) // 8
+    if len(firma) != largo or int.from_bytes(firma, "big") >= n:
+        return False
+    bloque = pow(int.from_bytes(firma, "big"), e, n).to_bytes(largo, "big")
+    valor = hashlib.new(digest, datos).digest()
+    # Los parámetros NULL del AlgorithmIdentifier pueden omitirse (RFC 8017, nota 2 de 9.2)
+    for con_null in (True, False):
+        digest_info = _digest_info(digest, valor, con_null)
+        relleno = largo - len(digest_info) - 3
+        if relleno >= 8 and hmac.compare_digest(
+                bloque, b"\x00\x01" + b"\xff" * relleno + b"\x00" + digest_info):
+            return True
+    return False
+
+
+def _truncar_hash(digest: str, datos: bytes, orden: int) -> int:
+    valor = hashlib.new(digest, datos).digest()
+    entero = int.from_bytes(valor, "big")
+    exceso = len(valor) * 8 - orden.bit_length()
+    return entero >> exceso if exceso > 0 else entero
+
+
+def _sumar_puntos(p1, p2, curva):
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    primo = curva[0]
+    (x1, y1), (x2, y2) = p1, p2
+    if x1 == x2:
+        if (y1 + y2) % primo == 0:
+            return None
+        pendiente = (3 * x1 * x1 + curva[1]) * pow(2 * y1, -1, primo) % primo
+    else:
+        pendiente = (y2 - y1) * pow(x2 - x1, -1, primo) % primo
+    x3 = (pendiente * pendiente - x1 - x2) % primo
+    return x3, (pendiente * (x1 - x3) - y1) % primo
+
+
+def _multiplicar_punto(k: int, punto, curva):
+    resultado = None
+    while k:
+        if k & 1:
+            resultado = _sumar_puntos(resultado, punto, curva)
+        punto = _sumar_puntos(punto, punto, curva)
+        k >>= 1
+    return resultado
+
+
+def _verificar_ecdsa(spki: List[_Nodo], firma: bytes, digest: str, datos: bytes) -> bool:
+    curva = CURVAS.get(spki[0].hijos()[1].oid())
+    if curva is None:
+        raise ValueError("Curva EC no soportada")
+    primo, _, b, gx, gy, orden = curva
+    punto = spki[1].contenido[1:]
+    largo = (primo.bit_length() + 7) // 8
+    x = int.from_bytes(punto[1:1 + largo], "big")
+    if punto[0] == 4:
+        y = int.from_bytes(punto[1 + largo:], "big")
+    else:
+        # Punto comprimido: p ≡ 3 (mod 4) en P-256/P-384
+        y = pow((x ** 3 + curva[1] * x + b) % primo, (primo + 1) // 4, primo)
+        if y & 1 != punto[0] & 1:
+            y = primo - y
+
+    r, s = (v.entero() for v in _Nodo(firma).hijos()[:2])
+    if not (0 < r < orden and 0 < s < orden):
+        return False
+    w = pow(s, -1, orden)
+    e = _truncar_hash(digest, datos, orden)
+    resultado = _sumar_puntos(_multiplicar_punto(e * w % orden, (gx, gy), curva),
+                              _multiplicar_punto(r * w % orden, (x, y), curva), curva)
+    return resultado is not None and resultado[0] % orden == r
+
+
+def _verificar_dsa(spki: List[_Nodo], firma: bytes, digest: str, datos: bytes) -> bool:
+    p, q, g = (v.entero() for v in spki[0].hijos()[1].hijos()[:3])
+    y = _Nodo(spki[1].contenido[1:]).entero()
+    r, s = (v.entero() for v in _Nodo(firma).hijos()[:2])
+    if not (0 < r < q and 0 < s < q):
+        return False
+    w = pow(s, -1, q)
+    e = _truncar_hash(digest, datos, q)
+    return (pow(g, e * w % q, p) * pow(y, r * w % q, p)) % p % q == r
+
+
+VERIFICADORES = {OID_RSA: ("RSA", _verificar_rsa), OID_EC: ("EC", _verificar_ecdsa), OID_DSA: ("DSA", _verificar_dsa)}
+
+
+def _verificar_firmante(signer_info: _Nodo, certificados: List[Dict], sf: bytes) -> Dict:
+    """Certificado del firmante y validez de la firma PKCS#7 sobre el .SF"""
+    campos = signer_info.hijos()
+    certificado = certificados[0] if certificados else None
+    if campos[1].etiqueta == 0x30:
+        issuer, serial = campos[1].hijos()[:2]
+        certificado = next((c for c in certificados if c["_issuer_der"] == issuer.crudo
+                            and c["_serial"] == serial.entero()), certificado)
+    if certificado is None:
+        raise ValueError("El bloque de firma no incluye el certificado del firmante")
+
+    digest = DIGESTS_OID.get(campos[2].hijos()[0].oid())
+    i = 3
+    datos_firmados = sf
+    if campos[i].etiqueta == 0xA0:
+        # Atributos autenticados: se firma su DER (como SET) y messageDigest cubre el .SF
+        atributos = campos[i]
+        i += 1
+        esperado = next((a.hijos()[1].hijos()[0].contenido for a in atributos.hijos()
+                         if a.hijos()[0].oid() == OID_MESSAGE_DIGEST), None)
+        if digest is None or esperado != hashlib.new(digest, sf).digest():
+            return {"certificado": certificado, "algoritmo": digest, "firma_valida": False}
+        datos_firmados = b"\x31" + atributos.crudo[1:]
+    firma = campos[i + 1].contenido
+
+    spki = certificado["_spki"].hijos()
+    tipo, verificar = VERIFICADORES.get(spki[0].hijos()[0].oid(), (None, None))
+    algoritmo = f"{tipo or 'desconocido'}/{(digest or 'desconocido').upper()}"
+    if verificar is None or digest is None:
+        return {"certificado": certificado, "algoritmo": algoritmo, "firma_valida": None}
+    try:
+        valida = verificar(spki, firma, digest, datos_firmados)
+    except (ValueError, IndexError) as e:
+        if _traza.activa:
+            _traza(f"Firma {algoritmo} no verificable: {e}")
+        valida = None
+    return {"certificado": certificado, "algoritmo": algoritmo, "firma_valida": valida}
+
+
+# ========== MANIFEST Y .SF ==========
+
+def _secciones(datos: bytes) -> List[Tuple[Dict[str, str], bytes]]:
+    """Secciones de un manifest: (atributos, bytes crudos incluida la línea en blanco final)"""
+    secciones = []
+    atributos: Dict[str, bytes] = {}
+    ultima = None
+    inicio = pos = 0
+
+    def cerrar(fin: int):
+        if atributos:
+            secciones.append(({k: v.decode("utf-8", errors="replace") for k, v in atributos.items()},
+                              datos[inicio:fin]))
+
+    for linea in datos.splitlines(keepends=True):
+        fin = pos + len(linea)
+        texto = linea.rstrip(b"\r\n")
+        if not texto:
+            cerrar(fin)
+            atributos, ultima, inicio = {}, None, fin
+        elif texto.startswith(b" ") and ultima:
+            atributos[ultima] += texto[1:]
+        else:
+            clave, _, valor = texto.partition(b": ")
+            ultima = clave.decode("utf-8", errors="replace")
+            atributos[ultima] = valor
+        pos = fin
+    cerrar(len(datos))
+    return secciones
+
+
+def _digest_atributos(atributos: Dict[str, str], sufijo: str) -> Optional[Tuple[str, bytes]]:
+    """(algoritmo hashlib, valor) del digest más fuerte con atributo ``<ALG><sufijo>``"""
+    for nombre, algoritmo in DIGESTS_MANIFEST:
+        valor = atributos.get(nombre + sufijo)
+        if valor:
+            try:
+                return algoritmo, base64.b64decode(valor)
+            except ValueError:
+                return algoritmo, b""
+    return None
+
+
+def _es_archivo_firma(nombre: str) -> bool:
+    if not nombre.upper().startswith("META-INF/") or "/" in nombre[9:]:
+        return False
+    mayus = nombre.upper()
+    return (mayus == "META-INF/MANIFEST.MF" or mayus.endswith((".SF", ".RSA", ".DSA", ".EC"))
+            or mayus.startswith("META-INF/SIG-"))
+
+
+def _leer_completo(apk_path: Path, entrada: Dict) -> bytes:
+    with open(apk_path, "rb") as f:
+        return b"".join(leer_bloques(f, entrada))
+
+
+def _verificar_lote(apk_path: Path, indice, lote: List[Tuple[str, str, bytes]]) -> List[Tuple[str, str]]:
+    """[(nombre, estado)] con estado ok, digest_incorrecto, faltante o ilegible"""
+    resultados = []
+    with open(apk_path, "rb") as f:
+        for nombre, algoritmo, esperado in lote:
+            entrada = indice.obtener(nombre)
+            if entrada is None:
+                resultados.append((nombre, "faltante"))
+                continue
+            try:
+                h = hashlib.new(algoritmo)
+                for bloque in leer_bloques(f, entrada):
+                    h.update(bloque)
+                resultados.append((nombre, "ok" if h.digest() == esperado else "digest_incorrecto"))
+            except (ValueError, zlib.error, OSError):
+                resultados.append((nombre, "ilegible"))
+    return resultados
+
+
+def _verificar_entradas(apk_path: Path, indice, esperados: List[Tuple[str, str, bytes]],
+                        max_hilos: int) -> List[Tuple[str, str]]:
+    """Digests de las entradas repartidos en lotes entre un pool de hilos
+    (zlib y hashlib liberan el GIL en bloques grandes)"""
+    if not esperados:
+        return []
+    # Orden físico: cada hilo lee un tramo contiguo del archivo
+    esperados = sorted(esperados, key=lambda e: (indice.obtener(e[0]) or {}).get("offset_header", 0))
+    hilos = max(1, min(max_hilos, len(esperados) // 16 or 1))
+    tam_lote = max(1, -(-len(esperados) // (hilos * 4)))
+    lotes = [esperados[i:i + tam_lote] for i in range(0, len(esperados), tam_lote)]
+    if hilos == 1:
+        return [r for lote in lotes for r in _verificar_lote(apk_path, indice, lote)]
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="firma-v1") as pool:
+        return [r for parcial in pool.map(lambda l: _verificar_lote(apk_path, indice, l), lotes) for r in parcial]
+
+
+def _verificar_sf(sf: bytes, manifest: bytes, secciones_manifest: Dict[str, bytes],
+                  principal_manifest: bytes) -> Tuple[bool, set]:
+    """(manifest completo cubierto, nombres cubiertos por secciones) del .SF"""
+    secciones_sf = _secciones(sf)
+    if not secciones_sf:
+        return False, set()
+    principal = secciones_sf[0][0]
+
+    digest = _digest_atributos(principal, "-Digest-Manifest")
+    if digest and hashlib.new(digest[0], manifest).digest() == digest[1]:
+        return True, set(secciones_manifest)
+
+    cubiertos = set()
+    digest = _digest_atributos(principal, "-Digest-Manifest-Main-Attributes")
+    if digest and hashlib.new(digest[0], principal_manifest).digest() != digest[1]:
+        return False, cubiertos
+    for atributos, _ in secciones_sf[1:]:
+        nombre = atributos.get("Name")
+        digest = _digest_atributos(atributos, "-Digest")
+        seccion = secciones_manifest.get(nombre)
+        if nombre and digest and seccion is not None and hashlib.new(digest[0], seccion).digest() == digest[1]:
+            cubiertos.add(nombre)
+    return False, cubiertos
+
+
+# ========== API ==========
+
+def verificar_firma_v1(apk_path: Path, max_hilos: Optional[int] = None) -> Dict:
+    """Verificar la firma v1 (JAR) de un APK sin JDK.
+
+    Devuelve un dict con ``firmado``, ``valido``, ``firmantes`` (subject,
+    issuer, serial, validez, huellas SHA-256/SHA-1, algoritmo y
+    ``firma_valida``), ``entradas`` (verificadas, con digest incorrecto,
+    faltantes y sin firmar) y ``errores``.
+    """
+    apk_path = Path(apk_path)
+    indice = obtener_indice(apk_path)
+    resultado = {
+        "firmado": False, "valido": False, "firmantes": [], "errores": [],
+        "entradas": {"verificadas": 0, "digest_incorrecto": [], "faltantes": [], "sin_firmar": []},
+    }
+
+    entrada_manifest = indice.obtener("META-INF/MANIFEST.MF")
+    archivos_sf = [n for n in indice.nombres() if _es_archivo_firma(n) and n.upper().endswith(".SF")]
+    if entrada_manifest is None or not archivos_sf:
+        return resultado
+    resultado["firmado"] = True
+
+    manifest = _leer_completo(apk_path, entrada_manifest)
+    secciones = _secciones(manifest)
+    principal_manifest = secciones[0][1] if secciones else b""
+    por_nombre = {a["Name"]: (a, crudo) for a, crudo in secciones[1:] if "Name" in a}
+    secciones_crudas = {nombre: crudo for nombre, (_, crudo) in por_nombre.items()}
+
+    cubiertos_por_todos: Optional[set] = None
+    for nombre_sf in archivos_sf:
+        base = nombre_sf[:-3]
+        bloque = next((indice.obtener(base + ext) for ext in (".RSA", ".EC", ".DSA", ".rsa", ".ec", ".dsa")
+                       if indice.obtener(base + ext)), None)
+        if bloque is None:
+            resultado["errores"].append(f"{nombre_sf} sin bloque de firma")
+            continue
+        try:
+            sf = _leer_completo(apk_path, indice.obtener(nombre_sf))
+            certificados, signer_infos = _parsear_pkcs7(_leer_completo(apk_path, bloque))
+            if not signer_infos:
+                raise ValueError("SignedData sin SignerInfo")
+            firmante = _verificar_firmante(signer_infos[0], certificados, sf)
+        except (ValueError, IndexError, zlib.error) as e:
+            resultado["errores"].append(f"{bloque['nombre']}: {e}")
+            continue
+
+        completo, cubiertos = _verificar_sf(sf, manifest, secciones_crudas, principal_manifest)
+        cert = firmante["certificado"]
+        resultado["firmantes"].append({
+            "archivo_sf": nombre_sf,
+            "bloque": bloque["nombre"],
+            "subject": cert["subject"],
+            "issuer": cert["issuer"],
+            "serial": cert["serial"],
+            "no_antes": cert["no_antes"],
+            "no_despues": cert["no_despues"],
+            "sha256": cert["sha256"],
+            "sha1": cert["sha1"],
+            "algoritmo": firmante["algoritmo"],
+            "firma_valida": firmante["firma_valida"],
+            "manifest_completo": completo,
+            "secciones_cubiertas": len(cubiertos),
+        })
+        if firmante["firma_valida"] is not False:
+            cubiertos_por_todos = cubiertos if cubiertos_por_todos is None else cubiertos_por_todos | cubiertos
+
+    esperados = []
+    for nombre, (atributos, _) in por_nombre.items():
+        digest = _digest_atributos(atributos, "-Digest")
+        if digest:
+            esperados.append((nombre, digest[0], digest[1]))
+    estados = _verificar_entradas(apk_path, indice, esperados, max_hilos or min(8, os.cpu_count() or 1))
+
+    entradas = resultado["entradas"]
+    for nombre, estado in estados:
+        if estado == "ok":
+            entradas["verificadas"] += 1
+        elif estado == "faltante":
+            entradas["faltantes"].append(nombre)
+        else:
+            entradas["digest_incorrecto"].append(nombre)
+
+    cubiertos_por_todos = cubiertos_por_todos or set()
+    entradas["sin_firmar"] = sorted(
+        n for n in indice.nombres()
+        if not n.endswith("/") and not _es_archivo_firma(n) and n not in cubiertos_por_todos
+    )
+
+    resultado["valido"] = bool(
+        resultado["firmantes"]
+        and all(f["firma_valida"] for f in resultado["firmantes"])
+        and not entradas["digest_incorrecto"] and not entradas["faltantes"] and not entradas["sin_firmar"]
+    )
+    if _traza.activa:
+        _traza(f"Firma v1 de {apk_path.name}: válida={resultado['valido']}, "
+               f"{len(resultado['firmantes'])} firmante(s), {entradas['verificadas']} entradas verificadas")
+    return resultado
+
+
+def formatear_salida_v1(resultado: Dict) -> str:
+    """Texto equivalente a ``jarsigner -verify -verbose -certs`` para el log y los parsers existentes"""
+    if not resultado.get("firmado"):
+        return "Verificación v1 integrada: el APK no tiene firma v1 (JAR)\n"
+
+    entradas = resultado["entradas"]
+    lineas = ["Verificación v1 (JAR) integrada"]
+    for i, firmante in enumerate(resultado["firmantes"], 1):
+        estado = {True: "válida", False: "NO VÁLIDA", None: "no verificable"}[firmante["firma_valida"]]
+        lineas += [
+            f"Signer #{i} certificate DN: {firmante['subject']}",
+            f"Signer #{i} certificate issuer DN: {firmante['issuer']}",
+            f"Signer #{i} certificate SHA-256 digest: {firmante['sha256']}",
+            f"Signer #{i} certificate SHA-1 digest: {firmante['sha1']}",
+            f"Signer #{i} certificate serial: {firmante['serial']}",
+            f"Signer #{i} certificate valid: {firmante['no_antes']} - {firmante['no_despues']}",
+            f"Signer #{i} signature ({firmante['bloque']}, {firmante['algoritmo']}): {estado}",
+        ]
+    lineas.append(f"Entradas verificadas: {entradas['verificadas']}")
+    for clave, titulo in (("digest_incorrecto", "Entradas con digest incorrecto"),
+                          ("faltantes", "Entradas del manifest ausentes"),
+                          ("sin_firmar", "Entradas sin firmar")):
+        if entradas[clave]:
+            lineas.append(f"{titulo}: {len(entradas[clave])}")
+            lineas += [f"  {nombre}" for nombre in entradas[clave][:20]]
+    lineas += [f"Advertencia: {e}" for e in resultado["errores"]]
+    lineas.append("jar verified." if resultado["valido"] else "jar is not verified.")
+    return "\n".join(lineas) + "\n"
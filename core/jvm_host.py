@@ -0,0 +1,476 @@
+import atexit
+import hashlib
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.debug_trace import obtener_traza
+from utils.process_pool import PoolPrestamo
+
+_traza = obtener_traza("herramientas")
+
+CLASE_HOST = "ApkToolHost"
+DIRECTORIO_CACHE = Path.home() / ".apk_inspector" / "jvm"
+
+# Launcher Java: mantiene cargadas las clases de apksigner/jarsigner y atiende
+# peticiones por stdin, una por línea: id, herramienta y argumentos separados
+# por tabuladores (con \\, \t y \n escapados). Cada respuesta es una cabecera
+# "id<TAB>código<TAB>bytes_stdout<TAB>bytes_stderr" seguida de ambos bloques.
+# System.exit() de las herramientas se intercepta con un SecurityManager
+# cuando la JVM lo permite; si no, el host termina y se relanza. Si la clase
+# de la herramienta no se puede cargar, el código es CODIGO_SIN_CLASE.
+FUENTE_HOST = r'''
+import java.io.*;
+import java.lang.reflect.*;
+import java.nio.charset.StandardCharsets;
+import java.util.*;
+
+public class ApkToolHost {
+    static final class SalidaInterceptada extends SecurityException {
+        final int codigo;
+        SalidaInterceptada(int codigo) { super("exit " + codigo); this.codigo = codigo; }
+    }
+
+    static final Map<String, String> CLASES = new HashMap<>();
+    static {
+        CLASES.put("apksigner", "com.android.apksigner.ApkSignerTool");
+        CLASES.put("jarsigner", "sun.security.tools.jarsigner.Main");
+    }
+    static final Map<String, Method> METODOS = new HashMap<>();
+    static final int SIN_CLASE = Integer.MIN_VALUE;
+
+    static final class ClaseNoDisponible extends Exception {
+        ClaseNoDisponible(Throwable causa) { super(causa); }
+    }
+
+    public static void main(String[] a) throws Exception {
+        InputStream entrada = System.in;
+        OutputStream salida = new BufferedOutputStream(new FileOutputStream(FileDescriptor.out));
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        boolean atrapa = instalarGuardia();
+        salida.write(("READY\t" + (atrapa ? "exit=trap" : "exit=notrap") + "\n").getBytes(StandardCharsets.UTF_8));
+        salida.flush();
+
+        BufferedReader lector = new BufferedReader(new InputStreamReader(entrada, StandardCharsets.UTF_8));
+        String linea;
+        while ((linea = lector.readLine()) != null) {
+            if (linea.isEmpty()) continue;
+            List<String> partes = decodificar(linea);
+            if (partes.size() < 2 || "quit".equals(partes.get(1))) break;
+            String id = partes.get(0);
+            String[] args = partes.subList(2, partes.size()).toArray(new String[0]);
+
+            ByteArrayOutputStream bo = new ByteArrayOutputStream(), be = new ByteArrayOutputStream();
+            PrintStream po = new PrintStream(bo, true, "UTF-8"), pe = new PrintStream(be, true, "UTF-8");
+            PrintStream outAnterior = System.out, errAnterior = System.err;
+            System.setOut(po);
+            System.setErr(pe);
+            int codigo = 0;
+            try {
+                metodo(partes.get(1)).invoke(null, (Object) args);
+            } catch (ClaseNoDisponible t) {
+                codigo = SIN_CLASE;
+                pe.println(t.getCause());
+            } catch (Throwable t) {
+                codigo = codigoDe(t, pe);
+            } finally {
+                po.flush();
+                pe.flush();
+                System.setOut(outAnterior);
+                System.setErr(errAnterior);
+            }
+            byte[] o = bo.toByteArray(), e = be.toByteArray();
+            salida.write((id + "\t" + codigo + "\t" + o.length + "\t" + e.length + "\n").getBytes(StandardCharsets.UTF_8));
+            salida.write(o);
+            salida.write(e);
+            salida.flush();
+        }
+    }
+
+    static Method metodo(String herramienta) throws Exception {
+        Method m = METODOS.get(herramienta);
+        if (m == null) {
+            String clase = CLASES.get(herramienta);
+            if (clase == null) throw new IllegalArgumentException("Herramienta desconocida: " + herramienta);
+            try {
+                m = Class.forName(clase).getMethod("main", String[].class);
+            } catch (ReflectiveOperationException | LinkageError e) {
+                // p. ej. jarsigner de JDK 8 sin tools.jar: el llamador usa el proceso de un solo uso
+                throw new ClaseNoDisponible(e);
+            }
+            METODOS.put(herramienta, m);
+        }
+        return m;
+    }
+
+    static int codigoDe(Throwable t, PrintStream err) {
+        while ((t instanceof InvocationTargetException || t instanceof UndeclaredThrowableException)
+                && t.getCause() != null) {
+            t = t.getCause();
+        }
+        if (t instanceof SalidaInterceptada) return ((SalidaInterceptada) t).codigo;
+        t.printStackTrace(err);
+        return 1;
+    }
+
+    @SuppressWarnings("removal")
+    static boolean instalarGuardia() {
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override public void checkPermission(java.security.Permission p) {}
+                @Override public void checkPermission(java.security.Permission p, Object c) {}
+                @Override public void checkExit(int status) { throw new SalidaInterceptada(status); }
+            });
+            return true;
+        } catch (Throwable t) {
+            return false;
+        }
+    }
+
+    static List<String> decodificar(String linea) {
+        List<String> partes = new ArrayList<>();
+        StringBuilder actual = new StringBuilder();
+        for (int i = 0; i < linea.length(); i++) {
+            char c = linea.charAt(i);
+            if (c == '\\' && i + 1 < linea.length()) {
+                char s = linea.charAt(++i);
+                actual.append(s == 't' ? '\t' : s == 'n' ? '\n' : s);
+            } else if (c == '\t') {
+                partes.add(actual.toString());
+                actual.setLength(0);
+            } else {
+                actual.append(c);
+            }
+        }
+        partes.add(actual.toString());
+        return partes;
+    }
+}
+'''
+
+
+# Respuesta del host cuando la clase de la herramienta no carga (Integer.MIN_VALUE)
+CODIGO_SIN_CLASE = -(2 ** 31)
+
+
+def _codificar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def version_java(java_bin: Path) -> int:
+    """Versión mayor de la JVM (8, 11, 17...) o 0 si no se pudo determinar"""
+    try:
+        release = Path(java_bin).resolve().parent.parent / "release"
+        if release.is_file():
+            match = re.search(r'JAVA_VERSION="([^"]+)"', release.read_text(encoding="utf-8", errors="ignore"))
+            if match:
+                return _mayor(match.group(1))
+        proc = subprocess.run([str(java_bin), "-version"], capture_output=True, text=True, timeout=30)
+        match = re.search(r'version "([^"]+)"', proc.stderr + proc.stdout)
+        return _mayor(match.group(1)) if match else 0
+    except (OSError, subprocess.SubprocessError):
+        return 0
+
+
+def _mayor(version: str) -> int:
+    partes = version.split(".")
+    try:
+        return int(partes[1]) if partes[0] == "1" and len(partes) > 1 else int(partes[0])
+    except ValueError:
+        return 0
+
+
+def encontrar_java(cerca_de: Optional[Path] = None) -> Optional[Path]:
+    """java de la misma JDK que ``cerca_de`` (p. ej. jarsigner), de JAVA_HOME o del PATH"""
+    nombre = "java.exe" if sys.platform.startswith("win") else "java"
+    candidatos = []
+    if cerca_de:
+        candidatos.append(Path(cerca_de).parent / nombre)
+    java_home = os.environ.get("JAVA_HOME")
+    if java_home:
+        candidatos.append(Path(java_home) / "bin" / nombre)
+    for candidato in candidatos:
+        if candidato.exists():
+            return candidato
+    encontrado = shutil.which("java")
+    return Path(encontrado) if encontrado else None
+
+
+def jar_apksigner(apksigner_bin: Optional[Path]) -> Optional[Path]:
+    """lib/apksigner.jar junto al script apksigner de build-tools"""
+    if not apksigner_bin:
+        return None
+    apksigner_bin = Path(apksigner_bin)
+    if apksigner_bin.suffix == ".jar":
+        return apksigner_bin if apksigner_bin.exists() else None
+    jar = apksigner_bin.parent / "lib" / "apksigner.jar"
+    return jar if jar.exists() else None
+
+
+def jar_tools(java_bin: Path) -> Optional[Path]:
+    """lib/tools.jar de una JDK 8 (donde está sun.security.tools.jarsigner), desde bin/ o jre/bin/"""
+    raiz = Path(java_bin).resolve().parent.parent
+    for candidato in (raiz / "lib" / "tools.jar", raiz.parent / "lib" / "tools.jar"):
+        if candidato.is_file():
+            return candidato
+    return None
+
+
+class HostJVM:
+    """JVM persistente que ejecuta apksigner/jarsigner sin arranque en frío por llamada"""
+
+    def __init__(self, java_bin: Path, classpath: List[Path], timeout_inicio: float = 30):
+        self.java_bin = Path(java_bin)
+        self.timeout_inicio = timeout_inicio
+        self.classpath = [Path(p) for p in classpath]
+        self.version = version_java(self.java_bin)
+        self.atrapa_exit = False
+        self.proceso: Optional[subprocess.Popen] = None
+        self.peticiones = 0
+        self.reinicios = 0
+        self._respuestas: "queue.Queue[Optional[Tuple[str, int, bytes, bytes]]]" = queue.Queue()
+        self._siguiente_id = 0
+        self._lock = threading.Lock()
+
+    def vivo(self) -> bool:
+        return self.proceso is not None and self.proceso.poll() is None
+
+    def _preparar_clase(self) -> Tuple[List[str], str]:
+        """(classpath adicional, clase o fuente a lanzar); compila una vez por versión del launcher"""
+        huella = hashlib.sha1(FUENTE_HOST.encode("utf-8")).hexdigest()[:12]
+        directorio = DIRECTORIO_CACHE / f"{huella}_java{self.version}"
+        fuente = directorio / f"{CLASE_HOST}.java"
+        if not fuente.exists():
+            directorio.mkdir(parents=True, exist_ok=True)
+            fuente.write_text(FUENTE_HOST, encoding="utf-8")
+
+        if (directorio / f"{CLASE_HOST}.class").exists():
+            return [str(directorio)], CLASE_HOST
+
+        javac = self.java_bin.parent / ("javac.exe" if sys.platform.startswith("win") else "javac")
+        if javac.exists():
+            try:
+                proc = subprocess.run([str(javac), "-nowarn", "-d", str(directorio), str(fuente)],
+                                      capture_output=True, text=True, timeout=120)
+                if proc.returncode == 0:
+                    return [str(directorio)], CLASE_HOST
+                detalle = proc.stderr.strip()[:300]
+            except (OSError, subprocess.SubprocessError) as e:
+                detalle = str(e)
+            if _traza.activa:
+                _traza(f"javac no pudo compilar el host JVM: {detalle}")
+
+        if self.version >= 11:
+            # Sin javac (JRE): modo de archivo fuente de Java 11+
+            return [], str(fuente)
+        raise RuntimeError("No hay javac ni Java 11+ para el host JVM")
+
+    def iniciar(self):
+        cp_extra, objetivo = self._preparar_clase()
+        opciones = []
+        if self.version >= 9:
+            opciones.append("--add-exports=jdk.jartool/sun.security.tools.jarsigner=ALL-UNNAMED")
+        if self.version >= 12:
+            # Java 18+ solo permite instalar el SecurityManager con esta propiedad
+            opciones.append("-Djava.security.manager=allow")
+        classpath = [str(p) for p in self.classpath]
+        if self.version < 9:
+            # Hasta Java 8 jarsigner vive en tools.jar, fuera del classpath por defecto
+            tools = jar_tools(self.java_bin)
+            if tools:
+                classpath.append(str(tools))
+        classpath = os.pathsep.join(cp_extra + classpath)
+        comando = [str(self.java_bin)] + opciones + (["-cp", classpath] if classpath else []) + [objetivo]
+
+        self._respuestas = queue.Queue()
+        self.proceso = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+        threading.Thread(target=self._leer_respuestas, args=(self.proceso.stdout, self._respuestas),
+                         name="host-jvm", daemon=True).start()
+
+        # READY llega por la misma cola que las respuestas: una JVM colgada al arrancar no bloquea
+        try:
+            inicio = self._respuestas.get(timeout=self.timeout_inicio)
+        except queue.Empty:
+            self.cerrar()
+            raise RuntimeError(f"El host JVM no respondió READY en {self.timeout_inicio}s")
+        cabecera = inicio[1] if inicio and inicio[0] == "READY" else ""
+        if not cabecera.startswith("READY"):
+            self.cerrar()
+            raise RuntimeError(f"El host JVM no inició correctamente: {cabecera or 'sin respuesta'}")
+        self.atrapa_exit = "exit=trap" in cabecera
+
+    @staticmethod
+    def _leer_respuestas(stdout, respuestas: queue.Queue):
+        try:
+            linea = stdout.readline()
+            if not linea:
+                return
+            respuestas.put(("READY", linea.decode("utf-8", errors="ignore").strip()))
+            while True:
+                cabecera = stdout.readline()
+                if not cabecera:
+                    break
+                id_peticion, codigo, largo_out, largo_err = cabecera.decode("utf-8").rstrip("\n").split("\t")
+                salida = stdout.read(int(largo_out))
+                errores = stdout.read(int(largo_err))
+                respuestas.put((id_peticion, int(codigo), salida, errores))
+        except (OSError, ValueError):
+            pass
+        finally:
+            respuestas.put(None)
+
+    def ejecutar(self, herramienta: str, args: List[str], timeout: float = 60) -> Optional[Tuple[int, str, str]]:
+        """(código, stdout, stderr) o None si el host no pudo atender la petición"""
+        with self._lock:
+            if not self.vivo():
+                if self.proceso is not None:
+                    self.reinicios += 1
+                self.cerrar()
+                self.iniciar()
+
+            self._siguiente_id += 1
+            id_peticion = str(self._siguiente_id)
+            linea = "\t".join(_codificar(v) for v in [id_peticion, herramienta] + list(args)) + "\n"
+            try:
+                self.proceso.stdin.write(linea.encode("utf-8"))
+                self.proceso.stdin.flush()
+                respuesta = self._respuestas.get(timeout=timeout)
+            except (OSError, queue.Empty):
+                respuesta = None
+
+            if respuesta is None or respuesta[0] != id_peticion:
+                # Host caído (System.exit no interceptable) o sin respuesta: descartarlo
+                self.cerrar()
+                self.reinicios += 1
+                return None
+
+            self.peticiones += 1
+            _, codigo, salida, errores = respuesta
+            return codigo, salida.decode("utf-8", errors="ignore"), errores.decode("utf-8", errors="ignore")
+
+    def cerrar(self):
+        proceso, self.proceso = self.proceso, None
+        if proceso is None:
+            return
+        try:
+            if proceso.poll() is None:
+                proceso.stdin.write(b"0\tquit\n")
+                proceso.stdin.flush()
+                proceso.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proceso.kill()
+        finally:
+            for tuberia in (proceso.stdin, proceso.stdout):
+                try:
+                    tuberia.close()
+                except (OSError, ValueError):
+                    pass
+
+
+# ========== HOSTS COMPARTIDOS ==========
+
+# Hosts por JVM + classpath: las verificaciones concurrentes de los pools de
+# análisis no esperan en fila a un único proceso
+MAX_HOSTS_POR_JVM = 2
+
+_hosts: Dict[Tuple[str, str], PoolPrestamo[HostJVM]] = {}
+_no_disponibles: set = set()
+# (clave del pool, herramienta) cuya clase no cargó en el host: siempre de un solo uso
+_herramientas_no_disponibles: set = set()
+_lock = threading.Lock()
+_activo = True
+
+
+def configurar_host_jvm(activo: bool):
+    """Activar o desactivar el host JVM persistente (clave ``jvm_persistente``)"""
+    global _activo
+    _activo = bool(activo)
+    if not _activo:
+        cerrar_hosts()
+
+
+def ejecutar_en_jvm(herramienta: str, args: List[str], apksigner_bin: Optional[Path] = None,
+                    java_bin: Optional[Path] = None, timeout: float = 60) -> Optional[Tuple[int, str, str]]:
+    """Ejecutar ``apksigner`` o ``jarsigner`` en el host JVM persistente.
+
+    Devuelve (código, stdout, stderr), o None si el host no está disponible;
+    en ese caso el llamador usa la ejecución de un solo uso de siempre.
+    """
+    if not _activo:
+        return None
+
+    jar = jar_apksigner(apksigner_bin) if herramienta == "apksigner" else None
+    if herramienta == "apksigner" and jar is None:
+        return None
+    java_bin = java_bin or encontrar_java()
+    if java_bin is None:
+        return None
+
+    clave = (str(java_bin), str(jar or ""))
+    with _lock:
+        if clave in _no_disponibles:
+            return None
+        pool = _hosts.get(clave)
+        if pool is None and jar is None:
+            # jarsigner no necesita apksigner.jar: reutilizar los hosts de la misma JVM
+            clave, pool = next(((c, p) for c, p in _hosts.items() if c[0] == clave[0]), (clave, None))
+        if pool is None:
+            classpath = [jar] if jar else []
+            pool = _hosts[clave] = PoolPrestamo(lambda: HostJVM(java_bin, classpath), MAX_HOSTS_POR_JVM)
+        if (clave, herramienta) in _herramientas_no_disponibles:
+            return None
+
+    try:
+        with pool.prestar() as host:
+            resultado = host.ejecutar(herramienta, args, timeout)
+        if resultado is not None and resultado[0] == CODIGO_SIN_CLASE:
+            if _traza.activa:
+                _traza(f"{herramienta} no se puede cargar en el host JVM: {resultado[2].strip()}")
+            with _lock:
+                _herramientas_no_disponibles.add((clave, herramienta))
+            return None
+        return resultado
+    except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+        if _traza.activa:
+            _traza(f"Host JVM no disponible para {herramienta}: {e}")
+        with _lock:
+            _no_disponibles.add(clave)
+            _hosts.pop(clave, None)
+        for host in pool.todos():
+            host.cerrar()
+        return None
+
+
+def _todos_los_hosts() -> List[HostJVM]:
+    with _lock:
+        pools = list(_hosts.values())
+    return [host for pool in pools for host in pool.todos()]
+
+
+def estado_hosts() -> List[Dict]:
+    return [
+        {"java": str(h.java_bin), "version": h.version, "classpath": [str(p) for p in h.classpath],
+         "vivo": h.vivo(), "peticiones": h.peticiones, "reinicios": h.reinicios,
+         "atrapa_exit": h.atrapa_exit}
+        for h in _todos_los_hosts()
+    ]
+
+
+def cerrar_hosts():
+    with _lock:
+        pools = list(_hosts.values())
+        _hosts.clear()
+        _herramientas_no_disponibles.clear()
+    for pool in pools:
+        for host in pool.todos():
+            host.cerrar()
+
+
+atexit.register(cerrar_hosts)
@@ -16,6 +16,10 @@ except ImportError:
     CustomCombobox = None
 
 class LogcatManager:
+    # Espera máxima a que vuelva un dispositivo al reconectar (segundos)
+    TIEMPO_ESPERA_RECONEXION = 60
+    PATRON_MARCA_LOGCAT = re.compile(r'\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}')
+
     def __init__(self, root, adb_manager, styles, logger, apk_analyzer=None, config_manager=None):
         self.root = root
         self.adb_manager = adb_manager
@@ -35,6 +39,11 @@ class LogcatManager:
         self.current_screen = 0
         self.monitoring_stats = False
         self.stats_process = None
+        # Reanudación automática con host:track-devices
+        self.serial_logcat = None
+        self.esperando_reconexion = False
+        self._ultima_marca_logcat = None
+        self._cancelar_suscripcion = None
         # ✅ ELIMINADO: No preguntar estadísticas automáticamente
 
     def _get_adb_path(self):
@@ -72,65 +81,60 @@ class LogcatManager:
         
   
     def _ejecutar_adb(self, comando, timeout=15):
-        """Ejecutar comando ADB de forma segura sin mostrar ventana CMD"""
-        try:
-            startupinfo = None
-            if hasattr(subprocess, 'STARTUPINFO'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = 0  # Oculta la ventana
-                
-                # Para Python 3.7+ usar CREATE_NO_WINDOW
-                if hasattr(subprocess, 'CREATE_NO_WINDOW'):
-                    creationflags = subprocess.CREATE_NO_WINDOW
-                else:
-                    creationflags = 0
-            else:
-                creationflags = 0
+        """Ejecutar comando ADB por el servidor adb (sin ventana CMD ni shell del host)"""
+        from core.adb_client import ejecutar_adb
 
-            if isinstance(comando, str):
-                if self.adb_path != "adb":
-                    full_cmd = f'"{self.adb_path}" {comando}'
-                else:
-                    full_cmd = f"adb {comando}"
-                
-                result = subprocess.run(
-                    full_cmd,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
-                    encoding='utf-8',
-                    errors='ignore',
-                    startupinfo=startupinfo,
-                    creationflags=creationflags
-                )
-            else:
-                if self.adb_path != "adb":
-                    full_cmd = [self.adb_path] + comando
-                else:
-                    full_cmd = comando
-                
-                result = subprocess.run(
-                    full_cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
-                    encoding='utf-8',
-                    errors='ignore',
-                    startupinfo=startupinfo,
-                    creationflags=creationflags
-                )
-            
-            return result
-            
-        except subprocess.TimeoutExpired:
+        if isinstance(comando, str):
+            # "shell <comando>" se envía entero: tuberías y redirecciones se ejecutan en el dispositivo
+            cabeza, _, resto = comando.strip().partition(" ")
+            args = [cabeza, resto.strip()] if cabeza == "shell" and resto.strip() else comando.split()
+        else:
+            args = list(comando)
+
+        try:
+            codigo, salida = ejecutar_adb(self.adb_path, args, timeout)
+        except Exception as e:
+            self.logger.log_error(f"Error ejecutando ADB: {comando}", e)
+            return None
+        if codigo != 0 and salida.startswith("Tiempo de espera agotado"):
             self.logger.log_warning(f"Timeout ejecutando ADB: {comando}")
             return None
+        return subprocess.CompletedProcess(args, codigo, stdout=salida, stderr="")
+
+    def _seguidor_dispositivos(self):
+        """Seguidor de host:track-devices del servidor adb (None si no está disponible)"""
+        from core.device_tracker import obtener_seguidor
+        try:
+            seguidor = obtener_seguidor(self.adb_path)
         except Exception as e:
-            self.logger.log_error(f"Error ejecutando ADB: {comando}", e)
+            self.logger.log_warning(f"Seguimiento de dispositivos no disponible: {e}")
             return None
-        
+        if seguidor is None or not seguidor.esperar_sincronizado(2):
+            return None
+        return seguidor
+
+    def _dispositivos_listos(self):
+        """Seriales en estado 'device': de la tabla viva o, sin ella, de 'adb devices'"""
+        seguidor = self._seguidor_dispositivos()
+        if seguidor is not None:
+            return seguidor.conectados()
+
+        result = self._ejecutar_adb("devices")
+        if result and result.returncode == 0:
+            return [line.split('\t')[0] for line in result.stdout.strip().split('\n')[1:]
+                    if line.strip() and '\tdevice' in line]
+        return None
+
+    @staticmethod
+    def _parsear_packages(salida):
+        """Lista ordenada y sin duplicados de la salida de 'pm list packages'"""
+        packages = set()
+        for line in salida.splitlines():
+            if line.startswith('package:'):
+                package_name = line[len('package:'):].strip()
+                if package_name:
+                    packages.add(package_name)
+        return sorted(packages)
 
     def _recargar_packages(self):
         """Recargar manualmente la lista de packages"""
@@ -143,14 +147,7 @@ class LogcatManager:
             result = self._ejecutar_adb("shell pm list packages")
             
             if result and result.returncode == 0:
-                packages = []
-                for line in result.stdout.split('\n'):
-                    if line.startswith('package:'):
-                        package_name = line.replace('package:', '').strip()
-                        if package_name:
-                            packages.append(package_name)
-                
-                packages.sort()
+                packages = self._parsear_packages(result.stdout)
                 self.all_packages = packages
                 
                 self.root.after(0, self._actualizar_packages_ui_recarga, packages)
@@ -627,14 +624,9 @@ class LogcatManager:
         """Verificar dispositivo y cargar packages automáticamente"""
         def proceso_automatico():
             # Primero verificar dispositivo
-            result = self._ejecutar_adb("devices")
-            if result and result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                devices = []
-                for line in lines[1:]:
-                    if line.strip() and '\tdevice' in line:
-                        device_id = line.split('\t')[0]
-                        devices.append({'device': device_id, 'model': 'Dispositivo Android'})
+            seriales = self._dispositivos_listos()
+            if seriales is not None:
+                devices = [{'device': device_id, 'model': 'Dispositivo Android'} for device_id in seriales]
                 
                 if devices:
                     # Actualizar estado del dispositivo
@@ -665,14 +657,7 @@ class LogcatManager:
             result = self._ejecutar_adb("shell pm list packages")
             
             if result and result.returncode == 0:
-                packages = []
-                for line in result.stdout.split('\n'):
-                    if line.startswith('package:'):
-                        package_name = line.replace('package:', '').strip()
-                        if package_name:
-                            packages.append(package_name)
-                
-                packages.sort()
+                packages = self._parsear_packages(result.stdout)
                 self.all_packages = packages
                 
                 self.root.after(0, self._actualizar_packages_ui, packages)
@@ -859,21 +844,25 @@ class LogcatManager:
             fg="#17a2b8"
         )
 
-    def _iniciar_logcat(self):
-        """Iniciar monitoreo de logcat MEJORADO - SIN ABRIR APP AUTOMÁTICAMENTE"""
+    def _iniciar_logcat(self, reanudar=False):
+        """Iniciar monitoreo de logcat MEJORADO - SIN ABRIR APP AUTOMÁTICAMENTE
+
+        Con ``reanudar`` continúa tras una reconexión: mismo dispositivo, sin
+        limpiar la vista y desde la marca de tiempo de la última línea.
+        """
         if self.is_monitoring:
             return
 
-        # Verificar conexión antes de iniciar
-        def verificar_conexion():
-            result = self._ejecutar_adb("devices")
-            if result and result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                devices = [line for line in lines[1:] if line.strip() and '\tdevice' in line]
-                return len(devices) > 0
-            return False
+        # Verificar conexión antes de iniciar (tabla de track-devices, sin 'adb devices')
+        seriales = self._dispositivos_listos() or []
+        if reanudar and self.serial_logcat in seriales:
+            serial = self.serial_logcat
+        else:
+            serial = seriales[0] if seriales else None
 
-        if not verificar_conexion():
+        if not serial:
+            if reanudar:
+                return
             respuesta = messagebox.askyesno(
                 "Dispositivo no detectado", 
                 "No se detecta un dispositivo Android conectado.\n\n"
@@ -884,15 +873,23 @@ class LogcatManager:
             return
 
         self.is_monitoring = True
+        self.esperando_reconexion = False
+        self.serial_logcat = serial
+        self._suscribir_cambios_dispositivo()
         self.btn_iniciar.config(state="disabled")
         self.btn_detener.config(state="normal")
         self.monitoring_status.config(text="🟢 Monitoreo: ACTIVO", fg="#4caf50")
         
-        # Limpiar logs anteriores
-        self._limpiar_logcat()
-        
-        # Construir comando logcat mejorado
-        cmd = ["logcat", "-v", "time", "-T", "100"]  # Mostrar últimos 100 logs
+        if reanudar and self._ultima_marca_logcat:
+            # Continuar donde se cortó en lugar de repetir los últimos 100 logs
+            cmd = ["logcat", "-v", "time", "-T", self._ultima_marca_logcat]
+        else:
+            # Limpiar logs anteriores
+            self._limpiar_logcat()
+            self._ultima_marca_logcat = None
+            
+            # Construir comando logcat mejorado
+            cmd = ["logcat", "-v", "time", "-T", "100"]  # Mostrar últimos 100 logs
         
         if self.current_filter:
             if self.current_pid:
@@ -902,70 +899,91 @@ class LogcatManager:
                 cmd.extend(["-s", self.current_filter])
 
         def monitorear_logcat():
+            desconectado = False
+            proceso = None
             try:
-                full_cmd = [self.adb_path] + cmd if self.adb_path != "adb" else cmd
-                
-                self.logcat_process = subprocess.Popen(
-                    full_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore',
-                    bufsize=1,
-                    universal_newlines=True
-                )
+                from core.adb_client import abrir_shell_adb
+
+                # Por el servidor adb (sin proceso adb por sesión); el ejecutable solo si no hay servidor
+                proceso = self.logcat_process = abrir_shell_adb(self.adb_path, serial, cmd)
                 
-                # Leer líneas continuamente
+                # Leer líneas continuamente (readline bloquea hasta la siguiente línea)
                 while self.is_monitoring:
-                    linea = self.logcat_process.stdout.readline()
-                    if not linea and self.is_monitoring:
-                        # Si no hay línea pero seguimos monitoreando, esperar un poco
-                        import time
-                        time.sleep(0.1)
-                        continue
+                    linea = proceso.stdout.readline()
+                    if not linea:
+                        # Fin de la salida: logcat terminó (dispositivo desconectado o detenido)
+                        proceso.wait()
+                        if self.is_monitoring and proceso is self.logcat_process:
+                            desconectado = True
+                            self.root.after(0, self._manejar_desconexion_logcat)
+                        break
                     
                     if linea.strip() and self.is_monitoring:
                         self.root.after(0, self._procesar_linea_logcat, linea)
-                    
-                    # Verificar si el proceso terminó inesperadamente
-                    if self.logcat_process.poll() is not None and self.is_monitoring:
-                        self.root.after(0, self._manejar_desconexion_logcat)
-                        break
                         
             except Exception as e:
                 self.root.after(0, self._manejar_error_logcat, str(e))
             finally:
-                if self.is_monitoring:
+                # Si ya se reanudó con otro proceso, esa sesión no es de este hilo
+                if self.is_monitoring and not desconectado and self.logcat_process in (None, proceso):
                     self.root.after(0, self._detener_logcat)
 
         threading.Thread(target=monitorear_logcat, daemon=True).start()
         
         filter_info = f" - Filtro: {self.current_filter}" if self.current_filter else " - Todos los logs"
+        estado = "🔄 Logcat reanudado" if reanudar else "🔴 Monitoreando Logcat"
         self.status_label.config(
-            text=f"🔴 Monitoreando Logcat{filter_info}",
+            text=f"{estado} ({serial}){filter_info}",
             fg="#ff9800"
         )
 
-    def _reconectar_dispositivo(self):
-        """Intentar reconectar el dispositivo"""
-        self.status_label.config(text="🔄 Reconectando dispositivo...", fg="#ff9800")
+    def _suscribir_cambios_dispositivo(self):
+        """Recibir conexiones/desconexiones de track-devices mientras Logcat esté en uso"""
+        if self._cancelar_suscripcion is not None:
+            return
+        seguidor = self._seguidor_dispositivos()
+        if seguidor is not None:
+            self._cancelar_suscripcion = seguidor.suscribir(
+                lambda evento: self.root.after(0, self._on_cambio_dispositivo, evento)
+            )
+
+    def _cancelar_cambios_dispositivo(self):
+        if self._cancelar_suscripcion is not None:
+            self._cancelar_suscripcion()
+            self._cancelar_suscripcion = None
+
+    def _on_cambio_dispositivo(self, evento):
+        """Transición de track-devices (en el hilo de Tkinter): reanudar Logcat al volver el dispositivo"""
+        if evento["estado"] != "device" or not self.esperando_reconexion:
+            return
+        if self.serial_logcat and evento["serial"] != self.serial_logcat:
+            return
+        self._iniciar_logcat(reanudar=True)
+
+    def _reconectar_dispositivo(self, al_reconectar=None):
+        """Esperar a que el dispositivo vuelva (evento de track-devices, sin reiniciar el servidor)"""
+        self.status_label.config(
+            text="🔄 Esperando dispositivo... Conecta el cable USB o acepta la depuración",
+            fg="#ff9800"
+        )
         
         def reconectar():
-            # Reiniciar servidor ADB
-            self._ejecutar_adb("kill-server")
-            import time
-            time.sleep(2)
-            self._ejecutar_adb("start-server")
-            time.sleep(3)
-            
-            # Verificar si se reconectó
-            result = self._ejecutar_adb("devices")
-            if result and any('\tdevice' in line for line in result.stdout.split('\n')):
+            seguidor = self._seguidor_dispositivos()
+            if seguidor is not None:
+                serial = seguidor.esperar_dispositivo(timeout=self.TIEMPO_ESPERA_RECONEXION)
+            else:
+                # Sin seguimiento: arrancar el servidor si no estaba (no se mata ni se espera a ciegas)
+                self._ejecutar_adb("start-server")
+                seriales = self._dispositivos_listos()
+                serial = seriales[0] if seriales else None
+
+            if serial:
                 self.root.after(0, lambda: self.status_label.config(
-                    text="✅ Dispositivo reconectado - Puedes iniciar Logcat",
+                    text=f"✅ Dispositivo reconectado ({serial}) - Puedes iniciar Logcat",
                     fg="#4caf50"
                 ))
+                if al_reconectar:
+                    self.root.after(0, al_reconectar)
             else:
                 self.root.after(0, lambda: self.status_label.config(
                     text="❌ No se pudo reconectar - Verifica conexión USB",
@@ -984,6 +1002,19 @@ class LogcatManager:
             self.btn_detener.config(state="disabled")
             self.monitoring_status.config(text="🔴 Monitoreo: DESCONECTADO", fg="#ff8a80")
             
+            if self._cancelar_suscripcion is not None:
+                # track-devices avisará al volver el dispositivo: reanudar sin preguntar
+                self.esperando_reconexion = True
+                self.status_label.config(
+                    text=f"⏸️ Dispositivo {self.serial_logcat} desconectado - Logcat se reanudará al reconectar",
+                    fg="#ff9800"
+                )
+                seguidor = self._seguidor_dispositivos()
+                if seguidor is not None and seguidor.estado(self.serial_logcat) == "device":
+                    # Volvió antes de procesar el corte
+                    self._iniciar_logcat(reanudar=True)
+                return
+            
             self.status_label.config(
                 text="❌ Logcat se desconectó inesperadamente - Verifica conexión del dispositivo",
                 fg="#f44336"
@@ -1005,23 +1036,14 @@ class LogcatManager:
 
     def _reconectar_y_reiniciar(self):
         """Reconectar y reiniciar logcat"""
+        self._reconectar_dispositivo(al_reconectar=self._iniciar_logcat)
         self.status_label.config(text="🔄 Reconectando y reiniciando Logcat...", fg="#ff9800")
-        
-        def proceso_reconexion():
-            self._reconectar_dispositivo()
-            import time
-            time.sleep(3)
-            
-            # Verificar si se reconectó
-            result = self._ejecutar_adb("devices")
-            if result and any('\tdevice' in line for line in result.stdout.split('\n')):
-                self.root.after(0, self._iniciar_logcat)
-        
-        threading.Thread(target=proceso_reconexion, daemon=True).start()
 
     def _detener_logcat(self):
         """Detener monitoreo de logcat"""
         self.is_monitoring = False
+        self.esperando_reconexion = False
+        self._cancelar_cambios_dispositivo()
         
         if self.logcat_process:
             try:
@@ -1053,6 +1075,10 @@ class LogcatManager:
         if not self.is_monitoring or not linea.strip():
             return
 
+        # Marca de tiempo ("MM-DD HH:MM:SS.mmm") desde la que reanudar tras una reconexión
+        if self.PATRON_MARCA_LOGCAT.match(linea):
+            self._ultima_marca_logcat = linea[:18]
+
         tag = self._determinar_nivel_log(linea)
         
         # Actualizar contadores
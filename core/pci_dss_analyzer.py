@@ -206,12 +206,16 @@ class PCIDSSAnalyzer:
         
         # Verificar si exporta componentes
         if self._tiene_componentes_exportados(parsed_info):
+            expuestos = self._componentes_exportados_sin_permiso(parsed_info)
+            nombres = ", ".join(c['nombre'].rsplit('.', 1)[-1] for c in expuestos[:5])
+            if len(expuestos) > 5:
+                nombres += f" y {len(expuestos) - 5} más"
             hallazgos.append({
                 'requisito': '6.5',
                 'titulo': 'Componentes exportados sin protección',
                 'tipo': 'COMPONENTES_EXPORTADOS',
                 'nivel': 'ALTO',
-                'descripcion': 'Activity/Service/Receiver exportados sin restricciones',
+                'descripcion': f'{len(expuestos)} Activity/Service/Receiver/Provider exportados sin permiso: {nombres}',
                 'recomendacion': 'Revisar y proteger componentes exportados con permisos',
                 'impacto': 'Acceso no autorizado a funcionalidades de la app'
             })
@@ -329,9 +333,15 @@ class PCIDSSAnalyzer:
     
     def _tiene_componentes_exportados(self, parsed_info: Dict) -> bool:
         """Verificar si tiene componentes exportados sin protección"""
-        # Esta es una verificación básica, en una implementación real
-        # se analizaría el AndroidManifest.xml en detalle
-        return False  # Simplificado para este ejemplo
+        return bool(self._componentes_exportados_sin_permiso(parsed_info))
+
+    def _componentes_exportados_sin_permiso(self, parsed_info: Dict) -> List[Dict]:
+        """Componentes del manifest (xmltree) exportados sin permiso; la
+        actividad launcher se excluye porque tiene que estar exportada"""
+        return [
+            c for c in parsed_info.get('componentes', [])
+            if c.get('exportado') and not c.get('permiso') and not c.get('launcher')
+        ]
     
     def _calcular_cumplimiento_general(self, resultados: Dict):
         """Calcular cumplimiento general PCI DSS"""
@@ -340,6 +350,9 @@ class PCIDSSAnalyzer:
         
         puntuacion = (cumplidos / total_requisitos) * 100
         
+        # Regresiones respecto a la versión anterior restan puntos
+        puntuacion = max(0, puntuacion - resultados.get('penalizacion_regresiones', 0))
+        
         resultados['puntuacion_total'] = round(puntuacion, 1)
         
         # Determinar nivel de cumplimiento
@@ -356,6 +369,75 @@ class PCIDSSAnalyzer:
         # Generar recomendaciones generales
         self._generar_recomendaciones_generales(resultados)
     
+    # Regresiones del diff entre versiones -> requisito PCI DSS afectado
+    REQUISITOS_REGRESION = {
+        'CAMBIO_CERTIFICADO': '6.5.1',
+        'DEGRADACION_FIRMA': '6.5.1',
+        'DEBUG_HABILITADO': '6.5.6',
+        'BACKUP_HABILITADO': '3.2.1',
+        'MIN_SDK_REDUCIDO': '6.3.3',
+        'TARGET_SDK_REDUCIDO': '6.3.3',
+        'NUEVOS_PERMISOS': '7.2.1',
+        'NUEVOS_COMPONENTES_EXPORTADOS': '7.2.1',
+    }
+
+    def aplicar_regresiones_diff(self, resultados: Dict, diff: Dict) -> Dict:
+        """Incorporar las regresiones entre versiones al resultado PCI DSS y recalcular
+        
+        Se puede llamar varias veces sobre el mismo resultado (comparar con otra
+        versión): los hallazgos REGRESION_* y la penalización anteriores se
+        reemplazan en lugar de acumularse.
+        """
+        regresiones = diff.get('regresiones', []) if diff else []
+        resultados['regresiones'] = regresiones
+        
+        # Deshacer una comparación previa
+        resultados['hallazgos_criticos'] = [
+            h for h in resultados.get('hallazgos_criticos', [])
+            if not str(h.get('tipo', '')).startswith('REGRESION_')
+        ]
+        requisito_6_cumplido = resultados.setdefault(
+            'requisito_6_sin_regresiones', 'Requisito 6' in resultados['requisitos_cumplidos']
+        )
+        if requisito_6_cumplido and 'Requisito 6' not in resultados['requisitos_cumplidos']:
+            resultados['requisitos_no_cumplidos'] = [
+                r for r in resultados['requisitos_no_cumplidos'] if r != 'Requisito 6'
+            ]
+            resultados['requisitos_cumplidos'].append('Requisito 6')
+        
+        penalizacion = 0
+        for regresion in regresiones:
+            nivel = regresion.get('nivel', 'MEDIO')
+            if regresion.get('tipo') == 'NUEVOS_PERMISOS':
+                nuevos = set(regresion.get('permisos', []))
+                if nuevos & set(self.permisos_sensibles_pci['alto_riesgo']):
+                    nivel = 'ALTO'
+            penalizacion += 10 if nivel == 'ALTO' else 5
+            
+            resultados['hallazgos_criticos'].append({
+                'requisito': self.REQUISITOS_REGRESION.get(regresion.get('tipo'), '6.5.1'),
+                'titulo': f"Regresión entre versiones: {regresion.get('tipo', 'CAMBIO')}",
+                'tipo': f"REGRESION_{regresion.get('tipo', 'CAMBIO')}",
+                'nivel': nivel,
+                'descripcion': regresion.get('descripcion', ''),
+                'recomendacion': 'Revisar el cambio respecto a la versión anterior antes de publicar',
+                'impacto': 'La nueva versión empeora la postura de seguridad de la anterior'
+            })
+        
+        resultados['penalizacion_regresiones'] = penalizacion
+        
+        # Control de cambios: una regresión incumple el requisito 6
+        if regresiones:
+            if 'Requisito 6' in resultados['requisitos_cumplidos']:
+                resultados['requisitos_cumplidos'].remove('Requisito 6')
+            if 'Requisito 6' not in resultados['requisitos_no_cumplidos']:
+                resultados['requisitos_no_cumplidos'].append('Requisito 6')
+        
+        # Los hallazgos ALTO van antes del cálculo: las recomendaciones los cuentan
+        self._filtrar_hallazgos_altos(resultados)
+        self._calcular_cumplimiento_general(resultados)
+        return resultados
+    
     def _filtrar_hallazgos_altos(self, resultados: Dict):
         """Filtrar solo los hallazgos de nivel ALTO"""
         hallazgos_altos = []
@@ -390,85 +472,85 @@ class PCIDSSAnalyzer:
     
     def generar_reporte_pci(self, resultados: Dict) -> str:
         """Generar reporte legible de PCI DSS"""
-        reporte = "=== ANÁLISIS PCI DSS ===\n\n"
+        reporte = ["=== ANÁLISIS PCI DSS ===\n\n"]
         
         # Resumen ejecutivo
-        reporte += f"Estado de Cumplimiento: {resultados['cumplimiento_general']}\n"
-        reporte += f"Puntuación: {resultados['puntuacion_total']}%\n"
-        reporte += f"Nivel de Riesgo: {resultados['nivel_riesgo']}\n\n"
+        reporte.append(f"Estado de Cumplimiento: {resultados['cumplimiento_general']}\n")
+        reporte.append(f"Puntuación: {resultados['puntuacion_total']}%\n")
+        reporte.append(f"Nivel de Riesgo: {resultados['nivel_riesgo']}\n\n")
         
         # Requisitos cumplidos
-        reporte += "✅ REQUISITOS CUMPLIDOS:\n"
+        reporte.append("✅ REQUISITOS CUMPLIDOS:\n")
         if resultados['requisitos_cumplidos']:
             for req in resultados['requisitos_cumplidos']:
-                reporte += f"  • {req}\n"
+                reporte.append(f"  • {req}\n")
         else:
-            reporte += "  No se encontraron requisitos cumplidos\n"
+            reporte.append("  No se encontraron requisitos cumplidos\n")
         
-        reporte += "\n"
+        reporte.append("\n")
         
         # Requisitos no cumplidos
-        reporte += "❌ REQUISITOS NO CUMPLIDOS:\n"
+        reporte.append("❌ REQUISITOS NO CUMPLIDOS:\n")
         if resultados['requisitos_no_cumplidos']:
             for req in resultados['requisitos_no_cumplidos']:
-                reporte += f"  • {req}\n"
+                reporte.append(f"  • {req}\n")
         else:
-            reporte += "  Todos los requisitos analizados están cumplidos\n"
+            reporte.append("  Todos los requisitos analizados están cumplidos\n")
         
-        reporte += "\n"
+        reporte.append("\n")
         
         # Hallazgos críticos
-        reporte += "🔍 HALLAZGOS CRÍTICOS:\n"
+        reporte.append("🔍 HALLAZGOS CRÍTICOS:\n")
         if resultados['hallazgos_criticos']:
             for hallazgo in resultados['hallazgos_criticos']:
                 nivel_emoji = "🔴" if hallazgo['nivel'] == 'ALTO' else "🟡" if hallazgo['nivel'] == 'MEDIO' else "🔵"
-                reporte += f"  {nivel_emoji} [{hallazgo['nivel']}] {hallazgo['titulo']}\n"
-                reporte += f"     Descripción: {hallazgo['descripcion']}\n"
-                reporte += f"     Requisito: {hallazgo['requisito']}\n"
-                reporte += f"     Recomendación: {hallazgo['recomendacion']}\n\n"
+                reporte.append(f"  {nivel_emoji} [{hallazgo['nivel']}] {hallazgo['titulo']}\n")
+                reporte.append(f"     Descripción: {hallazgo['descripcion']}\n")
+                reporte.append(f"     Requisito: {hallazgo['requisito']}\n")
+                reporte.append(f"     Recomendación: {hallazgo['recomendacion']}\n\n")
         else:
-            reporte += "  No se encontraron hallazgos críticos\n"
+            reporte.append("  No se encontraron hallazgos críticos\n")
         
-        reporte += "\n"
+        reporte.append("\n")
         
         # Recomendaciones
-        reporte += "💡 RECOMENDACIONES:\n"
+        reporte.append("💡 RECOMENDACIONES:\n")
         for rec in resultados['recomendaciones']:
-            reporte += f"  • {rec}\n"
+            reporte.append(f"  • {rec}\n")
         
-        reporte += "\n"
-        reporte += "⚠️  NOTA: Este es un análisis automatizado. Para certificación PCI DSS completa,\n"
-        reporte += "     se requiere auditoría por un QSA (Qualified Security Assessor) certificado.\n"
+        reporte.append("\n")
+        reporte.append("⚠️  NOTA: Este es un análisis automatizado. Para certificación PCI DSS completa,\n")
+        reporte.append("     se requiere auditoría por un QSA (Qualified Security Assessor) certificado.\n")
         
-        return reporte
+        return "".join(reporte)
 
     def generar_resumen_compacto(self, resultados: Dict) -> str:
         """Generar resumen compacto mostrando solo hallazgos ALTOS"""
         if not resultados or resultados.get('cumplimiento_general') == 'NO_EVALUADO':
             return "=== RESUMEN PCI DSS (HALLAZGOS ALTOS) ===\n\nNo hay análisis PCI DSS disponible."
         
-        resumen = "=== RESUMEN PCI DSS (HALLAZGOS ALTOS) ===\n\n"
+        resumen = ["=== RESUMEN PCI DSS (HALLAZGOS ALTOS) ===\n\n"]
         
         # Información general compacta
-        resumen += f"📊 Cumplimiento General: {resultados.get('cumplimiento_general', 'N/A')}\n"
-        resumen += f"⭐ Puntuación: {resultados.get('puntuacion_total', 0)}/100\n"
-        resumen += f"🚨 Nivel de Riesgo: {resultados.get('nivel_riesgo', 'N/A')}\n\n"
+        resumen.append(f"📊 Cumplimiento General: {resultados.get('cumplimiento_general', 'N/A')}\n")
+        resumen.append(f"⭐ Puntuación: {resultados.get('puntuacion_total', 0)}/100\n")
+        resumen.append(f"🚨 Nivel de Riesgo: {resultados.get('nivel_riesgo', 'N/A')}\n\n")
         
         # Mostrar solo hallazgos ALTOS
         hallazgos_altos = resultados.get('hallazgos_altos', [])
         
         if hallazgos_altos:
-            resumen += "🔴 HALLAZGOS DE ALTO RIESGO:\n"
-            resumen += "=" * 50 + "\n"
+            resumen.append("🔴 HALLAZGOS DE ALTO RIESGO:\n")
+            resumen.append("=" * 50 + "\n")
             
             for i, hallazgo in enumerate(hallazgos_altos, 1):
-                resumen += f"\n{i}. {hallazgo.get('titulo', 'Hallazgo')}\n"
-                resumen += f"   • Descripción: {hallazgo.get('descripcion', 'N/A')}\n"
-                resumen += f"   • Requisito: {hallazgo.get('requisito', 'N/A')}\n"
-                resumen += f"   • Impacto: {hallazgo.get('impacto', 'N/A')}\n"
-                resumen += f"   • Recomendación: {hallazgo.get('recomendacion', 'N/A')}\n"
+                resumen.append(f"\n{i}. {hallazgo.get('titulo', 'Hallazgo')}\n")
+                resumen.append(f"   • Descripción: {hallazgo.get('descripcion', 'N/A')}\n")
+                resumen.append(f"   • Requisito: {hallazgo.get('requisito', 'N/A')}\n")
+                resumen.append(f"   • Impacto: {hallazgo.get('impacto', 'N/A')}\n")
+                resumen.append(f"   • Recomendación: {hallazgo.get('recomendacion', 'N/A')}\n")
         else:
-            resumen += "✅ No se encontraron hallazgos de ALTO riesgo\n\n"
+            resumen.append("✅ No se encontraron hallazgos de ALTO riesgo\n\n")
         
         # Resumen estadístico rápido
         requisitos_cumplidos = len(resultados.get('requisitos_cumplidos', []))
@@ -477,11 +559,11 @@ class PCIDSSAnalyzer:
         
         if total_requisitos > 0:
             porcentaje_cumplimiento = (requisitos_cumplidos / total_requisitos) * 100
-            resumen += f"\n📈 Resumen Estadístico:\n"
-            resumen += f"   • Requisitos cumplidos: {requisitos_cumplidos}/{total_requisitos}\n"
-            resumen += f"   • Porcentaje de cumplimiento: {porcentaje_cumplimiento:.1f}%\n"
-            resumen += f"   • Hallazgos ALTOS encontrados: {len(hallazgos_altos)}\n"
+            resumen.append(f"\n📈 Resumen Estadístico:\n")
+            resumen.append(f"   • Requisitos cumplidos: {requisitos_cumplidos}/{total_requisitos}\n")
+            resumen.append(f"   • Porcentaje de cumplimiento: {porcentaje_cumplimiento:.1f}%\n")
+            resumen.append(f"   • Hallazgos ALTOS encontrados: {len(hallazgos_altos)}\n")
         
-        resumen += "\n💡 Para el análisis completo, ve a 'Comandos' → Filtro 'PCI DSS'"
+        resumen.append("\n💡 Para el análisis completo, ve a 'Comandos' → Filtro 'PCI DSS'")
         
-        return resumen
\ No newline at end of file
+        return "".join(resumen)
\ No newline at end of file
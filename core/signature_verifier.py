@@ -2,12 +2,16 @@
 import re
 from typing import Dict
 
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("firma")
+
 class SignatureVerifier:
     def __init__(self):
         pass
         
-    def parsear_info_firma(self, apksigner_output: str, jarsigner_output: str) -> Dict:
-        """Parsear información de firma de ambas herramientas"""
+    def parsear_info_firma(self, apksigner_output: str, jarsigner_output: str, firma_v1: Dict = None) -> Dict:
+        """Parsear información de firma de ambas herramientas y, si existe, de la verificación v1 integrada"""
         signature_versions = []
         company_name = "Desconocida"
         is_valid = False
@@ -15,7 +19,8 @@ class SignatureVerifier:
         cert_hash = "No disponible"
         certificate_info = ""
         
-        print(f"🔍 DEBUG: Parseando firma - apksigner_len: {len(apksigner_output)}, jarsigner_len: {len(jarsigner_output)}")
+        if _traza.activa:
+            _traza(f"Parseando firma - apksigner_len: {len(apksigner_output)}, jarsigner_len: {len(jarsigner_output)}")
         
         # Parsear output de apksigner
         apksigner_info = self._parse_apksigner_output(apksigner_output)
@@ -30,9 +35,24 @@ class SignatureVerifier:
             company_name = company_info["company"]
             certificate_info = company_info["certificate_info"]
             
-        print(f"🔍 DEBUG: Resultados - empresa: {company_name}, versiones: {signature_versions}, hash: {cert_hash}")
+        # Completar con los datos estructurados de la verificación v1 integrada
+        firmantes_v1 = (firma_v1 or {}).get("firmantes") or []
+        if firmantes_v1:
+            firmante = firmantes_v1[0]
+            if company_name == "Desconocida":
+                certificate_info = firmante["subject"]
+                company_name = self._extraer_empresa_desde_dn(certificate_info)
+            if cert_hash == "No disponible":
+                cert_hash = firmante["sha256"]
+            # Sin salida de apksigner, la verificación v1 es la única evidencia de firma
+            if firma_v1.get("valido") and "Verif" not in (apksigner_output or ""):
+                signature_versions = ["v1"]
+                is_valid = integrity_ok = True
+
+        if _traza.activa:
+            _traza(f"Resultados - empresa: {company_name}, versiones: {signature_versions}, hash: {cert_hash}")
             
-        return {
+        info = {
             "company": company_name,
             "is_valid": is_valid,
             "signature_versions": signature_versions,
@@ -41,6 +61,13 @@ class SignatureVerifier:
             "certificate_info": certificate_info,
             "signature_type": "v" + "/v".join(signature_versions) if signature_versions else "No firmado"
         }
+        if firma_v1 is not None:
+            info["firma_v1"] = {
+                "valido": firma_v1.get("valido", False),
+                "firmantes": firmantes_v1,
+                "entradas": firma_v1.get("entradas", {}),
+            }
+        return info
 
     def _parse_apksigner_output(self, output: str) -> Dict:
         """Parsear output específico de apksigner"""
@@ -91,7 +118,8 @@ class SignatureVerifier:
         company_name = "Desconocida"
         certificate_info = ""
         
-        print(f"🔍 DEBUG: Buscando empresa en jarsigner output ({len(lines)} líneas)")
+        if _traza.activa:
+            _traza(f"Buscando empresa en jarsigner output ({len(lines)} líneas)")
         
         for i, line in enumerate(lines):
             line = line.strip()
@@ -100,21 +128,24 @@ class SignatureVerifier:
             if "Signer #1 certificate DN:" in line:
                 certificate_info = line.split("DN:")[1].strip()
                 company_name = self._extraer_empresa_desde_dn(certificate_info)
-                print(f"✅ DEBUG: DN encontrado en línea {i}: {certificate_info}")
+                if _traza.detalle:
+                    _traza(f"DN encontrado en línea {i}: {certificate_info}")
                 break
             
             # ✅ BUSCAR Owner en formato de lista
             elif "Owner:" in line:
                 certificate_info = line.split("Owner:")[1].strip()
                 company_name = self._extraer_empresa_desde_dn(certificate_info)
-                print(f"✅ DEBUG: Owner encontrado en línea {i}: {certificate_info}")
+                if _traza.detalle:
+                    _traza(f"Owner encontrado en línea {i}: {certificate_info}")
                 break
             
             # ✅ BUSCAR Issuer
             elif "Issuer:" in line:
                 certificate_info = line.split("Issuer:")[1].strip()
                 company_name = self._extraer_empresa_desde_dn(certificate_info)
-                print(f"✅ DEBUG: Issuer encontrado en línea {i}: {certificate_info}")
+                if _traza.detalle:
+                    _traza(f"Issuer encontrado en línea {i}: {certificate_info}")
                 break
             
             # ✅ BUSCAR en formato de certificado
@@ -125,16 +156,19 @@ class SignatureVerifier:
                     if "Owner:" in next_line:
                         certificate_info = next_line.split("Owner:")[1].strip()
                         company_name = self._extraer_empresa_desde_dn(certificate_info)
-                        print(f"✅ DEBUG: Owner en Certificate[] encontrado: {certificate_info}")
+                        if _traza.activa:
+                            _traza(f"Owner en Certificate[] encontrado: {certificate_info}")
                         break
                 if company_name != "Desconocida":
                     break
         
         if company_name == "Desconocida":
-            print("❌ DEBUG: No se pudo extraer empresa del jarsigner output")
+            if _traza.activa:
+                _traza("No se pudo extraer empresa del jarsigner output")
             # Mostrar primeras líneas para diagnóstico
-            for i, line in enumerate(lines[:10]):
-                print(f"  Línea {i}: {line}")
+            if _traza.detalle:
+                for i, line in enumerate(lines[:10]):
+                    _traza(f"  Línea {i}: {line}")
         
         return {
             "company": company_name,
@@ -146,28 +180,33 @@ class SignatureVerifier:
         if not dn_string:
             return "Desconocida"
         
-        print(f"🔍 DEBUG: Extrayendo empresa de DN: {dn_string}")
+        if _traza.activa:
+            _traza(f"Extrayendo empresa de DN: {dn_string}")
         
         # ✅ PRIORIDAD 1: Buscar Organization (O=) - Más específico para empresas
-        o_match = re.search(r'O=([^,]+)', dn_string)
+        o_match = re.search(r'O=("[^"]*"|[^,]+)', dn_string)
         if o_match:
-            empresa = o_match.group(1).strip()
-            print(f"✅ DEBUG: Empresa encontrada (O=): {empresa}")
+            empresa = o_match.group(1).strip().strip('"')
+            if _traza.activa:
+                _traza(f"Empresa encontrada (O=): {empresa}")
             return empresa
         
         # ✅ PRIORIDAD 2: Buscar Organizational Unit (OU=) - Unidad organizacional
-        ou_match = re.search(r'OU=([^,]+)', dn_string)
+        ou_match = re.search(r'OU=("[^"]*"|[^,]+)', dn_string)
         if ou_match:
-            empresa = ou_match.group(1).strip()
-            print(f"✅ DEBUG: Empresa encontrada (OU=): {empresa}")
+            empresa = ou_match.group(1).strip().strip('"')
+            if _traza.activa:
+                _traza(f"Empresa encontrada (OU=): {empresa}")
             return empresa
         
         # ✅ PRIORIDAD 3: Buscar Common Name (CN=) - Nombre común
-        cn_match = re.search(r'CN=([^,]+)', dn_string)
+        cn_match = re.search(r'CN=("[^"]*"|[^,]+)', dn_string)
         if cn_match:
-            empresa = cn_match.group(1).strip()
-            print(f"✅ DEBUG: Empresa encontrada (CN=): {empresa}")
+            empresa = cn_match.group(1).strip().strip('"')
+            if _traza.activa:
+                _traza(f"Empresa encontrada (CN=): {empresa}")
             return empresa
         
-        print("❌ DEBUG: No se pudo extraer empresa del DN")
+        if _traza.activa:
+            _traza("No se pudo extraer empresa del DN")
         return "Desconocida"
\ No newline at end of file
@@ -1,11 +1,31 @@
 import os
 import sys
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("herramientas")
+
 class ToolDetector:
-    def __init__(self):
+    # Entrada en la configuración con la última detección y las firmas de directorios
+    CLAVE_CONFIG = "deteccion_herramientas"
+    VERSION_PERSISTENCIA = 1
+    VARIABLES_ENTORNO = ("ANDROID_SDK_ROOT", "ANDROID_HOME", "JAVA_HOME", "LOCALAPPDATA",
+                         "ProgramFiles", "ProgramFiles(x86)")
+    CLAVES_RESULTADO = ("sdk_root", "platform_tools", "build_tools", "jdk_bin")
+
+    def __init__(self, config_manager=None):
         self.cache = {}
+        self.config_manager = config_manager
+        self._lock = threading.RLock()
+        # Aumenta al limpiar la cache: un escaneo que empezó antes no publica su resultado
+        self._generacion = 0
+        # Escaneo en marcha (el del precalentamiento u otro): quien llega durante él lo espera
+        self._escaneo_en_curso: Optional[Future] = None
+        self._hilo_precalentamiento = None
         
     def env_paths(self) -> Dict[str, List[Path]]:
         """Obtener paths del entorno - CACHEADO"""
@@ -91,7 +111,7 @@ class ToolDetector:
             return resultado
             
         except Exception as e:
-            print(f"Error buscando build-tools: {e}")
+            _traza.error(f"Error buscando build-tools: {e}")
             return None
 
     def encontrar_platform_tools(self, sdk_path: Path) -> Optional[Path]:
@@ -131,11 +151,60 @@ class ToolDetector:
         self.cache[cache_key] = None
         return None
 
-    def detectar_herramientas(self) -> Dict:
-        """Detección principal de todas las herramientas"""
-        if 'herramientas' in self.cache:
-            return self.cache['herramientas']
-            
+    def detectar_herramientas(self, forzar: bool = False) -> Dict:
+        """Detección principal de todas las herramientas.
+
+        Orden: cache en memoria, resultado persistido en la configuración (si las
+        firmas de los directorios siguen iguales) y por último el escaneo completo.
+        ``forzar=True`` ignora ambas caches. El escaneo se hace fuera del lock
+        (el lock no bloquea otras consultas de la cache) y solo hay uno a la vez
+        por generación: quien llega mientras el precalentamiento escanea espera
+        ese mismo resultado en lugar de repetir el recorrido.
+        """
+        en_curso = None
+        with self._lock:
+            if forzar:
+                self.cache.clear()
+                self._generacion += 1
+            elif 'herramientas' in self.cache:
+                return self.cache['herramientas']
+            else:
+                en_curso = self._escaneo_en_curso
+                if en_curso is None:
+                    persistido = self._cargar_persistido()
+                    if persistido is not None:
+                        self.cache['herramientas'] = persistido
+                        return persistido
+            if en_curso is None:
+                generacion = self._generacion
+                escaneo = self._escaneo_en_curso = Future()
+
+        if en_curso is not None:
+            return en_curso.result()
+
+        try:
+            resultado = self._escanear_herramientas()
+        except BaseException as e:
+            with self._lock:
+                if self._escaneo_en_curso is escaneo:
+                    self._escaneo_en_curso = None
+            escaneo.set_exception(e)
+            raise
+
+        with self._lock:
+            if self._escaneo_en_curso is escaneo:
+                self._escaneo_en_curso = None
+            # Si la cache se limpió durante el escaneo el resultado puede estar desfasado: no se publica
+            publicar = generacion == self._generacion
+            if publicar:
+                self.cache['herramientas'] = resultado
+        escaneo.set_result(resultado)
+        if publicar:
+            self._guardar_persistido(resultado)
+        return resultado
+
+    def _escanear_herramientas(self) -> Dict:
+        """Recorrer los directorios candidatos de SDK y JDK"""
         paths = self.env_paths()
         resultado = {
             "sdk_root": None,
@@ -194,9 +263,89 @@ class ToolDetector:
                 if jdk_bin:
                     resultado["jdk_bin"] = jdk_bin
 
-        self.cache['herramientas'] = resultado
         return resultado
 
+    # ========== PERSISTENCIA Y PRECALENTAMIENTO ==========
+
+    @staticmethod
+    def _firma_directorio(path: Path) -> Optional[int]:
+        """mtime del directorio: cambia al instalar/eliminar versiones dentro de él"""
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _directorios_vigilados(self, resultado: Dict) -> List[Path]:
+        """Directorios cuyo cambio invalida la detección persistida"""
+        paths = self.env_paths()
+        directorios = list(paths["sdk"]) + list(paths["jdk"])
+        for sdk_path in paths["sdk"]:
+            directorios.append(sdk_path / "build-tools")
+        for clave in self.CLAVES_RESULTADO:
+            if resultado.get(clave):
+                directorios.append(Path(resultado[clave]))
+        # Sin duplicados, manteniendo el orden
+        return list(dict.fromkeys(directorios))
+
+    def _entorno_actual(self) -> Dict[str, Optional[str]]:
+        return {var: os.environ.get(var) for var in self.VARIABLES_ENTORNO}
+
+    def _cargar_persistido(self) -> Optional[Dict]:
+        """Resultado guardado si el entorno y los mtimes de los directorios no cambiaron"""
+        if not self.config_manager:
+            return None
+        try:
+            datos = self.config_manager.obtener_valor(self.CLAVE_CONFIG)
+            if not isinstance(datos, dict) or datos.get("version") != self.VERSION_PERSISTENCIA:
+                return None
+            if datos.get("entorno") != self._entorno_actual():
+                return None
+
+            for directorio, mtime in (datos.get("mtimes") or {}).items():
+                if self._firma_directorio(Path(directorio)) != mtime:
+                    return None
+
+            resultado = {}
+            for clave in self.CLAVES_RESULTADO:
+                valor = (datos.get("resultado") or {}).get(clave)
+                resultado[clave] = Path(valor) if valor else None
+            return resultado
+        except Exception as e:
+            _traza.error(f"Detección persistida inválida, se volverá a escanear: {e}")
+            return None
+
+    def _guardar_persistido(self, resultado: Dict):
+        if not self.config_manager:
+            return
+        try:
+            mtimes = {}
+            for directorio in self._directorios_vigilados(resultado):
+                mtimes[str(directorio)] = self._firma_directorio(directorio)
+            self.config_manager.establecer_valor(self.CLAVE_CONFIG, {
+                "version": self.VERSION_PERSISTENCIA,
+                "entorno": self._entorno_actual(),
+                "resultado": {k: str(v) if v else None for k, v in resultado.items()},
+                "mtimes": mtimes,
+            })
+        except Exception as e:
+            _traza.error(f"No se pudo persistir la detección de herramientas: {e}")
+
+    def precalentar(self) -> threading.Thread:
+        """Lanzar la detección en segundo plano (p. ej. durante la pantalla de carga)"""
+        with self._lock:
+            if self._hilo_precalentamiento is None:
+                self._hilo_precalentamiento = threading.Thread(
+                    target=self._precalentar_seguro, name="ToolDetectorWarmup", daemon=True
+                )
+                self._hilo_precalentamiento.start()
+            return self._hilo_precalentamiento
+
+    def _precalentar_seguro(self):
+        try:
+            self.detectar_herramientas()
+        except Exception as e:
+            _traza.error(f"Error en detección de herramientas en segundo plano: {e}")
+
     def verificar_herramientas_instaladas(self) -> Dict:
         """Verificar estado de instalación de herramientas"""
         detectado = self.detectar_herramientas()
@@ -234,4 +383,9 @@ class ToolDetector:
 
     def limpiar_cache(self):
         """Limpiar cache para forzar nueva detección"""
-        self.cache.clear()
\ No newline at end of file
+        with self._lock:
+            self.cache.clear()
+            self._generacion += 1
+            self._escaneo_en_curso = None
+            if self.config_manager:
+                self.config_manager.establecer_valor(self.CLAVE_CONFIG, None)
\ No newline at end of file
@@ -0,0 +1,196 @@
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+
+
+# Firmas y formatos de las estructuras ZIP (APPNOTE.TXT)
+FIRMA_EOCD = 0x06054b50
+FIRMA_CENTRAL = 0x02014b50
+FIRMA_LOCAL = 0x04034b50
+FIRMA_DESCRIPTOR = 0x08074b50
+
+FORMATO_EOCD = "<IHHHHIIH"          # 22 bytes
+FORMATO_CENTRAL = "<IHHHHHHIIIHHHHHII"  # 46 bytes
+FORMATO_LOCAL = "<IHHHHHIIIHH"      # 30 bytes
+
+TAM_EOCD = struct.calcsize(FORMATO_EOCD)
+TAM_CENTRAL = struct.calcsize(FORMATO_CENTRAL)
+TAM_LOCAL = struct.calcsize(FORMATO_LOCAL)
+
+METODO_STORED = 0
+METODO_DEFLATE = 8
+FLAG_DESCRIPTOR = 0x08
+
+TAM_BLOQUE_LECTURA = 1 << 20
+
+
+def leer_bloques(f, entrada: Dict, tam_bloque: int = TAM_BLOQUE_LECTURA):
+    """Generador con los bytes descomprimidos de una entrada, por bloques (``f`` abierto en binario)
+
+    ``tam_bloque`` es lo que se lee del archivo en cada paso: uno pequeño
+    basta para quien solo necesita el principio de la entrada.
+    """
+    f.seek(entrada["offset_datos"])
+    restante = entrada["tam_comprimido"]
+    inflador = zlib.decompressobj(-15) if entrada["metodo"] == METODO_DEFLATE else None
+    if inflador is None and entrada["metodo"] != METODO_STORED:
+        raise ValueError(f"Método de compresión no soportado: {entrada['metodo']}")
+    while restante > 0:
+        bloque = f.read(min(tam_bloque, restante))
+        if not bloque:
+            raise ValueError(f"Entrada truncada: {entrada['nombre']}")
+        restante -= len(bloque)
+        yield inflador.decompress(bloque) if inflador else bloque
+    if inflador:
+        yield inflador.flush()
+
+
+class ZipIndex:
+    """Índice del directorio central de un APK, construido una sola vez y compartido.
+
+    Cada entrada es un dict con nombre, método, CRC, tamaños y offsets del header
+    local y de los datos, de modo que zipalign, diff y análisis de archivos no
+    necesiten volver a recorrer el ZIP.
+
+    ``offset``/``tamano`` indexan un ZIP guardado sin comprimir dentro de otro
+    (splits de un .apks o .xapk): los offsets de las entradas quedan absolutos
+    respecto de ``apk_path``, así que se leen directamente del contenedor.
+    """
+
+    def __init__(self, apk_path: Path, offset: int = 0, tamano: Optional[int] = None):
+        self.apk_path = Path(apk_path)
+        self.offset = offset
+        self.tamano = tamano
+        self.entradas: List[Dict] = []
+        self.por_nombre: Dict[str, Dict] = {}
+        self.offset_directorio = 0
+        self.tam_directorio = 0
+        self.comentario = b""
+        self.zip64 = False
+        self._construir()
+
+    def _construir(self):
+        """Leer EOCD, directorio central y headers locales en una sola pasada"""
+        base = self.offset
+        tam_archivo = self.tamano if self.tamano is not None else self.apk_path.stat().st_size - base
+
+        with open(self.apk_path, 'rb') as f:
+            # El EOCD está al final, seguido de un comentario de hasta 64 KB
+            leer = min(tam_archivo, TAM_EOCD + 0xFFFF)
+            f.seek(base + tam_archivo - leer)
+            cola = f.read(leer)
+            pos = cola.rfind(struct.pack("<I", FIRMA_EOCD))
+            if pos < 0:
+                raise ValueError(f"No es un archivo ZIP válido: {self.apk_path.name}")
+
+            (_, _, _, _, total_entradas, tam_dir, offset_dir, tam_comentario) = struct.unpack(
+                FORMATO_EOCD, cola[pos:pos + TAM_EOCD]
+            )
+            self.comentario = cola[pos + TAM_EOCD:pos + TAM_EOCD + tam_comentario]
+            self.zip64 = total_entradas == 0xFFFF or offset_dir == 0xFFFFFFFF or tam_dir == 0xFFFFFFFF
+            if self.zip64:
+                raise ValueError("Archivos ZIP64 no soportados")
+
+            self.offset_directorio = offset_dir
+            self.tam_directorio = tam_dir
+
+            f.seek(base + offset_dir)
+            directorio = f.read(tam_dir)
+
+            pos = 0
+            for _ in range(total_entradas):
+                campos = struct.unpack(FORMATO_CENTRAL, directorio[pos:pos + TAM_CENTRAL])
+                if campos[0] != FIRMA_CENTRAL:
+                    raise ValueError("Directorio central corrupto")
+
+                flags, metodo = campos[3], campos[4]
+                crc, tam_comp, tam_orig = campos[7], campos[8], campos[9]
+                len_nombre, len_extra, len_coment = campos[10], campos[11], campos[12]
+                offset_header = base + campos[16]
+
+                inicio_nombre = pos + TAM_CENTRAL
+                nombre_bytes = directorio[inicio_nombre:inicio_nombre + len_nombre]
+                fin_registro = inicio_nombre + len_nombre + len_extra + len_coment
+
+                entrada = {
+                    "nombre": nombre_bytes.decode('utf-8' if flags & 0x800 else 'cp437', errors='replace'),
+                    "flags": flags,
+                    "metodo": metodo,
+                    "crc": crc,
+                    "tam_comprimido": tam_comp,
+                    "tam_original": tam_orig,
+                    "offset_header": offset_header,
+                    "registro_central": directorio[pos:fin_registro],
+                }
+                self.entradas.append(entrada)
+                pos = fin_registro
+
+            # Headers locales: longitud real de nombre+extra para obtener el offset de datos
+            for entrada in self.entradas:
+                f.seek(entrada["offset_header"])
+                header = f.read(TAM_LOCAL)
+                campos = struct.unpack(FORMATO_LOCAL, header)
+                if campos[0] != FIRMA_LOCAL:
+                    raise ValueError(f"Header local corrupto: {entrada['nombre']}")
+                entrada["len_nombre_local"] = campos[9]
+                entrada["len_extra_local"] = campos[10]
+                entrada["offset_datos"] = entrada["offset_header"] + TAM_LOCAL + campos[9] + campos[10]
+
+        for entrada in self.entradas:
+            self.por_nombre[entrada["nombre"]] = entrada
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def obtener(self, nombre: str) -> Optional[Dict]:
+        return self.por_nombre.get(nombre)
+
+    def nombres(self) -> List[str]:
+        return [e["nombre"] for e in self.entradas]
+
+    def entradas_por_offset(self) -> List[Dict]:
+        """Entradas en el orden físico en que aparecen en el archivo"""
+        return sorted(self.entradas, key=lambda e: e["offset_header"])
+
+    def tamano_total(self) -> Tuple[int, int]:
+        """(bytes comprimidos, bytes originales) de todas las entradas"""
+        return (sum(e["tam_comprimido"] for e in self.entradas),
+                sum(e["tam_original"] for e in self.entradas))
+
+
+# ========== CACHÉ COMPARTIDA DE ÍNDICES ==========
+
+_MAX_INDICES = 8
+_indices: "OrderedDict[Tuple, ZipIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def obtener_indice(apk_path: Path, offset: int = 0, tamano: Optional[int] = None) -> ZipIndex:
+    """Obtener el índice de un APK, reutilizándolo mientras el archivo no cambie"""
+    apk_path = Path(apk_path)
+    stat = apk_path.stat()
+    clave = (os.path.abspath(apk_path), stat.st_size, stat.st_mtime_ns, offset, tamano)
+
+    with _lock:
+        indice = _indices.get(clave)
+        if indice is not None:
+            _indices.move_to_end(clave)
+            return indice
+
+    indice = ZipIndex(apk_path, offset, tamano)
+
+    with _lock:
+        _indices[clave] = indice
+        while len(_indices) > _MAX_INDICES:
+            _indices.popitem(last=False)
+
+    return indice
+
+
+def limpiar_cache_indices():
+    with _lock:
+        _indices.clear()
@@ -0,0 +1,219 @@
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+
+from core.zip_index import (
+    obtener_indice, FORMATO_LOCAL, FORMATO_EOCD, TAM_LOCAL, TAM_CENTRAL,
+    FIRMA_EOCD, FIRMA_DESCRIPTOR, METODO_STORED, FLAG_DESCRIPTOR,
+)
+
+
+# Bloque de extra field que usa zipalign/apksigner para el relleno de alineación
+EXTRA_ALINEACION_ID = 0xD935
+EXTRA_ALINEACION_MIN = 6  # id(2) + tamaño(2) + alineación(2)
+
+ALINEACION_DEFECTO = 4
+ALINEACION_PAGINA = 16384  # páginas de 16 KB (Android 15+)
+
+CHUNK_COPIA = 1024 * 1024
+
+
+class ZipAligner:
+    """Verificación y alineación zipalign en Python puro sobre el índice ZIP compartido"""
+
+    def __init__(self, logger=None, alineacion: int = ALINEACION_DEFECTO,
+                 alineacion_so: int = ALINEACION_PAGINA):
+        self.logger = logger
+        self.alineacion = alineacion
+        self.alineacion_so = alineacion_so
+
+    def _log(self, message: str, level: str = "info"):
+        if self.logger:
+            if level == "info":
+                self.logger.log_info(message)
+            elif level == "error":
+                self.logger.log_error(message)
+            elif level == "warning":
+                self.logger.log_warning(message)
+
+    def alineacion_requerida(self, entrada: Dict) -> int:
+        """Alineación exigida para una entrada (0 si está comprimida)"""
+        if entrada["metodo"] != METODO_STORED:
+            return 0
+        if entrada["nombre"].endswith(".so"):
+            return self.alineacion_so
+        return self.alineacion
+
+    def verificar(self, apk_path: Path) -> Tuple[bool, Dict]:
+        """Revisar la alineación de las entradas sin comprimir.
+
+        Retorna (alineado, reporte) donde el reporte lista las entradas desalineadas.
+        """
+        try:
+            indice = obtener_indice(apk_path)
+        except Exception as e:
+            return False, {"error": f"No se pudo indexar el APK: {str(e)}"}
+
+        desalineadas = []
+        sin_comprimir = 0
+        for entrada in indice.entradas:
+            requerida = self.alineacion_requerida(entrada)
+            if not requerida:
+                continue
+            sin_comprimir += 1
+            if entrada["offset_datos"] % requerida:
+                desalineadas.append({
+                    "nombre": entrada["nombre"],
+                    "offset_datos": entrada["offset_datos"],
+                    "alineacion": requerida,
+                })
+
+        reporte = {
+            "apk_path": str(apk_path),
+            "alineado": not desalineadas,
+            "total_entradas": len(indice),
+            "entradas_sin_comprimir": sin_comprimir,
+            "desalineadas": desalineadas,
+        }
+
+        if desalineadas:
+            self._log(f"⚠️ {len(desalineadas)} entradas desalineadas en {Path(apk_path).name}", "warning")
+        else:
+            self._log(f"✅ APK alineado: {Path(apk_path).name}")
+
+        return not desalineadas, reporte
+
+    def _relleno_extra(self, offset_datos_sin_relleno: int, requerida: int) -> bytes:
+        """Bloque extra 0xD935 que deja los datos en un múltiplo de la alineación"""
+        if not requerida:
+            return b""
+        faltante = (-offset_datos_sin_relleno) % requerida
+        if faltante == 0:
+            return b""
+        while faltante < EXTRA_ALINEACION_MIN:
+            faltante += requerida
+        return struct.pack("<HHH", EXTRA_ALINEACION_ID, faltante - 4, requerida) + b"\x00" * (faltante - EXTRA_ALINEACION_MIN)
+
+    @staticmethod
+    def _quitar_relleno_previo(extra: bytes) -> bytes:
+        """Eliminar bloques de alineación anteriores del extra field local"""
+        resultado = bytearray()
+        pos = 0
+        while pos + 4 <= len(extra):
+            header_id, tam = struct.unpack("<HH", extra[pos:pos + 4])
+            fin = pos + 4 + tam
+            if fin > len(extra):
+                break
+            if header_id != EXTRA_ALINEACION_ID:
+                resultado += extra[pos:fin]
+            pos = fin
+        # Bytes sueltos al final (relleno de zipalign antiguo): se descartan
+        return bytes(resultado)
+
+    def alinear(self, apk_path: Path, destino: Path) -> Tuple[bool, str]:
+        """Reescribir el APK alineado mediante copia en streaming.
+
+        Los datos de cada entrada se copian tal cual (sin recomprimir); solo cambian
+        el extra field local y los offsets del directorio central. Cualquier firma
+        v2+ previa se descarta, por eso debe ejecutarse antes de firmar.
+        """
+        apk_path = Path(apk_path)
+        destino = Path(destino)
+
+        if apk_path.resolve() == destino.resolve():
+            return False, "El destino debe ser distinto del APK original"
+
+        try:
+            indice = obtener_indice(apk_path)
+        except Exception as e:
+            return False, f"No se pudo indexar el APK: {str(e)}"
+
+        nuevos_offsets = {}
+        tmp_destino = destino.with_name(destino.name + ".tmp")
+
+        try:
+            with open(apk_path, 'rb') as origen, open(tmp_destino, 'wb') as salida:
+                for entrada in indice.entradas_por_offset():
+                    origen.seek(entrada["offset_header"])
+                    header = origen.read(TAM_LOCAL)
+                    campos = list(struct.unpack(FORMATO_LOCAL, header))
+                    nombre = origen.read(entrada["len_nombre_local"])
+                    extra = origen.read(entrada["len_extra_local"])
+
+                    offset_nuevo = salida.tell()
+                    nuevos_offsets[entrada["offset_header"]] = offset_nuevo
+
+                    requerida = self.alineacion_requerida(entrada)
+                    if requerida:
+                        extra = self._quitar_relleno_previo(extra)
+                        inicio_datos = offset_nuevo + TAM_LOCAL + len(nombre) + len(extra)
+                        extra += self._relleno_extra(inicio_datos, requerida)
+
+                    campos[10] = len(extra)
+                    salida.write(struct.pack(FORMATO_LOCAL, *campos))
+                    salida.write(nombre)
+                    salida.write(extra)
+
+                    origen.seek(entrada["offset_datos"])
+                    restante = entrada["tam_comprimido"]
+                    while restante > 0:
+                        bloque = origen.read(min(CHUNK_COPIA, restante))
+                        if not bloque:
+                            raise ValueError(f"Datos truncados: {entrada['nombre']}")
+                        salida.write(bloque)
+                        restante -= len(bloque)
+
+                    if entrada["flags"] & FLAG_DESCRIPTOR:
+                        firma = origen.read(4)
+                        tam_descriptor = 16 if struct.unpack("<I", firma)[0] == FIRMA_DESCRIPTOR else 12
+                        salida.write(firma + origen.read(tam_descriptor - 4))
+
+                # Directorio central con los offsets actualizados
+                offset_directorio = salida.tell()
+                for entrada in indice.entradas:
+                    registro = bytearray(entrada["registro_central"])
+                    struct.pack_into("<I", registro, TAM_CENTRAL - 4, nuevos_offsets[entrada["offset_header"]])
+                    salida.write(registro)
+                tam_directorio = salida.tell() - offset_directorio
+
+                total = len(indice.entradas)
+                salida.write(struct.pack(
+                    FORMATO_EOCD, FIRMA_EOCD, 0, 0, total, total,
+                    tam_directorio, offset_directorio, len(indice.comentario)
+                ))
+                salida.write(indice.comentario)
+
+            tmp_destino.replace(destino)
+            self._log(f"📐 APK alineado: {apk_path.name} -> {destino.name}")
+            return True, f"APK alineado en: {destino}"
+
+        except Exception as e:
+            if tmp_destino.exists():
+                tmp_destino.unlink()
+            error_msg = f"Error alineando APK: {str(e)}"
+            self._log(error_msg, "error")
+            return False, error_msg
+
+    def preparar_para_firma(self, apk_path: Path, carpeta_trabajo: Path) -> Tuple[bool, Path, str]:
+        """Verificar y, si hace falta, alinear el APK antes de firmarlo.
+
+        Retorna (ok, apk_a_firmar, mensaje). Si ya está alineado devuelve el original.
+        """
+        alineado, reporte = self.verificar(apk_path)
+        if "error" in reporte:
+            return False, apk_path, reporte["error"]
+        if alineado:
+            return True, apk_path, "APK ya alineado"
+
+        # Nombre único: en un lote dos APKs de carpetas distintas pueden llamarse igual
+        descriptor, nombre = tempfile.mkstemp(prefix=f"{Path(apk_path).stem}-",
+                                              suffix=f"-aligned{Path(apk_path).suffix}", dir=carpeta_trabajo)
+        os.close(descriptor)
+        destino = Path(nombre)
+        ok, mensaje = self.alinear(apk_path, destino)
+        if not ok:
+            destino.unlink(missing_ok=True)
+            return False, apk_path, mensaje
+        return True, destino, f"{len(reporte['desalineadas'])} entradas realineadas"
@@ -0,0 +1,66 @@
+"""
+Pruebas del índice difuso de components.fuzzy_index
+
+Las coincidencias deben ser las mismas que recorriendo todos los items con el
+patrón difuso, pero revisando solo los candidatos del índice por carácter y
+de trigramas (no todo el universo en cada pulsación).
+"""
+
+import random
+import re
+import sys
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from components.fuzzy_index import IndiceDifuso
+
+SEGMENTOS = ["com", "org", "net", "google", "android", "samsung", "facebook", "whatsapp",
+             "camera", "gallery", "music", "player", "service", "provider", "sync", "launcher"]
+
+
+def _paquetes(n: int):
+    rnd = random.Random(1234)
+    return [".".join(rnd.choice(SEGMENTOS) for _ in range(rnd.randint(2, 4))) + f"{i}" for i in range(n)]
+
+
+def _recorrido_completo(items, consulta):
+    patron = re.compile(".*?".join(re.escape(c) for c in consulta.lower()))
+    return {i for i, item in enumerate(items) if patron.search(item.lower())}
+
+
+class IndiceDifusoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.items = _paquetes(5000)
+        self.indice = IndiceDifuso(self.items)
+
+    def test_mismas_coincidencias_que_el_recorrido_completo(self):
+        for consulta in ("goo", "cmgl", "whatsapp", "zzz", "sync.", "g", "samsung.camera"):
+            self.indice.buscar_indices("")
+            self.assertEqual(set(self.indice.buscar_indices(consulta)),
+                             _recorrido_completo(self.items, consulta), consulta)
+
+    def test_orden_por_relevancia(self):
+        indice = IndiceDifuso(["com.example.mapas", "mapas", "org.mapas.app", "com.m.a.p.a.s"])
+        self.assertEqual(indice.buscar("mapas"), ["mapas", "org.mapas.app", "com.example.mapas", "com.m.a.p.a.s"])
+
+    def test_consulta_sin_candidatos_no_revisa_nada(self):
+        self.indice.buscar_indices("qxj")
+        self.assertEqual(self.indice.ultimas_revisiones, {"subcadena": 0, "difusa": 0})
+
+    def test_solo_se_revisan_candidatos(self):
+        self.indice.buscar_indices("whatsapp.sync")
+        revisados = max(self.indice.ultimas_revisiones.values())
+        self.assertLess(revisados, len(self.items) // 2)
+
+    def test_estrechamiento_al_seguir_escribiendo(self):
+        previas = self.indice.buscar_indices("camera")
+        self.indice.buscar_indices("camera.m")
+        self.assertLessEqual(max(self.indice.ultimas_revisiones.values()), len(previas))
+
+
+if __name__ == "__main__":
+    unittest.main()
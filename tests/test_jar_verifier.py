@@ -0,0 +1,110 @@
+"""
+Pruebas de la verificación RSA PKCS#1 v1.5 de core.jar_verifier
+
+Se genera una clave con e=3 (la que permite la falsificación de
+Bleichenbacher'06) y se comprueba que una firma correcta se acepta y que un
+bloque con bytes sobrantes tras el DigestInfo se rechaza.
+"""
+
+import hashlib
+import random
+import sys
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.jar_verifier import OID_RSA, _der, _der_oid, _digest_info, _Nodo, _verificar_rsa
+
+DATOS = b"Signature-Version: 1.0\r\nCreated-By: pruebas\r\n\r\n"
+
+
+def _es_primo(n: int, rnd: random.Random) -> bool:
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29):
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d, r = d // 2, r + 1
+    for _ in range(32):
+        x = pow(rnd.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _primo(bits: int, e: int, rnd: random.Random) -> int:
+    while True:
+        candidato = rnd.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if (candidato - 1) % e and _es_primo(candidato, rnd):
+            return candidato
+
+
+def _entero_der(valor: int) -> bytes:
+    return _der(0x02, valor.to_bytes(valor.bit_length() // 8 + 1, "big"))
+
+
+class VerificacionRSATest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(20240601)
+        cls.e = 3
+        p, q = _primo(512, cls.e, rnd), _primo(512, cls.e, rnd)
+        cls.n = p * q
+        cls.d = pow(cls.e, -1, (p - 1) * (q - 1))
+        cls.largo = (cls.n.bit_length() + 7) // 8
+        clave_publica = _der(0x30, _entero_der(cls.n) + _entero_der(cls.e))
+        spki = _der(0x30, _der(0x30, _der_oid(OID_RSA) + b"\x05\x00") + _der(0x03, b"\x00" + clave_publica))
+        cls.spki = _Nodo(spki).hijos()
+
+    def _firmar_bloque(self, bloque: bytes) -> bytes:
+        return pow(int.from_bytes(bloque, "big"), self.d, self.n).to_bytes(self.largo, "big")
+
+    def _bloque(self, digest_info: bytes, sobrante: bytes = b"") -> bytes:
+        relleno = self.largo - len(digest_info) - len(sobrante) - 3
+        return b"\x00\x01" + b"\xff" * relleno + b"\x00" + digest_info + sobrante
+
+    def test_firma_correcta(self):
+        digest_info = _digest_info("sha256", hashlib.sha256(DATOS).digest())
+        firma = self._firmar_bloque(self._bloque(digest_info))
+        self.assertTrue(_verificar_rsa(self.spki, firma, "sha256", DATOS))
+
+    def test_firma_sin_parametros_null(self):
+        digest_info = _digest_info("sha256", hashlib.sha256(DATOS).digest(), con_null=False)
+        firma = self._firmar_bloque(self._bloque(digest_info))
+        self.assertTrue(_verificar_rsa(self.spki, firma, "sha256", DATOS))
+
+    def test_datos_modificados(self):
+        digest_info = _digest_info("sha256", hashlib.sha256(DATOS).digest())
+        firma = self._firmar_bloque(self._bloque(digest_info))
+        self.assertFalse(_verificar_rsa(self.spki, firma, "sha256", DATOS + b"x"))
+
+    def test_bytes_sobrantes_tras_digest_info(self):
+        digest_info = _digest_info("sha256", hashlib.sha256(DATOS).digest())
+        firma = self._firmar_bloque(self._bloque(digest_info, sobrante=bytes(range(24))))
+        self.assertFalse(_verificar_rsa(self.spki, firma, "sha256", DATOS))
+
+    def test_parametros_de_algoritmo_alterados(self):
+        valor = hashlib.sha256(DATOS).digest()
+        algoritmo = _der(0x30, _der_oid("2.16.840.1.101.3.4.2.1") + _der(0x04, b"basura"))
+        digest_info = _der(0x30, algoritmo + _der(0x04, valor))
+        firma = self._firmar_bloque(self._bloque(digest_info))
+        self.assertFalse(_verificar_rsa(self.spki, firma, "sha256", DATOS))
+
+    def test_algoritmo_distinto_al_declarado(self):
+        digest_info = _digest_info("sha1", hashlib.sha1(DATOS).digest())
+        firma = self._firmar_bloque(self._bloque(digest_info))
+        self.assertFalse(_verificar_rsa(self.spki, firma, "sha256", DATOS))
+
+
+if __name__ == "__main__":
+    unittest.main()
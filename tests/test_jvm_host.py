@@ -0,0 +1,89 @@
+"""
+Pruebas del respaldo del host JVM cuando la herramienta no se puede cargar
+
+Un ``java`` simulado habla el protocolo del host y responde
+``CODIGO_SIN_CLASE`` a jarsigner (como una JDK 8 sin tools.jar). La
+petición debe caer en la ejecución de un solo uso, no devolverse como error
+de firma, y las siguientes no deben volver a pasar por el host.
+"""
+
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import jvm_host
+from core.apk_analyzer import APKAnalyzer
+
+JAVA_SIMULADO = r'''#!{python}
+import sys
+if "-version" in sys.argv:
+    sys.stderr.write('openjdk version "17.0.2"\n')
+    sys.exit(0)
+out = sys.stdout.buffer
+out.write(b"READY\texit=trap\n")
+out.flush()
+for linea in sys.stdin.buffer:
+    partes = linea.decode().rstrip("\n").split("\t")
+    if len(partes) < 2 or partes[1] == "quit":
+        break
+    if partes[1] == "jarsigner":
+        codigo, o, e = {sin_clase}, b"", b"java.lang.ClassNotFoundException: sun.security.tools.jarsigner.Main"
+    else:
+        codigo, o, e = 0, ("hosted " + " ".join(partes[2:])).encode(), b""
+    out.write(("%s\t%d\t%d\t%d\n" % (partes[0], codigo, len(o), len(e))).encode() + o + e)
+    out.flush()
+'''
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "el java simulado es un script con shebang")
+class RespaldoHostJVMTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temporal = tempfile.TemporaryDirectory()
+        raiz = Path(self.temporal.name)
+        (raiz / "bin").mkdir()
+        self.java = raiz / "bin" / "java"
+        self.java.write_text(JAVA_SIMULADO.format(python=sys.executable, sin_clase=jvm_host.CODIGO_SIN_CLASE))
+        self.java.chmod(self.java.stat().st_mode | stat.S_IXUSR)
+        (raiz / "lib").mkdir()
+        self.apksigner = raiz / "apksigner"
+        (raiz / "lib" / "apksigner.jar").write_bytes(b"")
+
+        self._cache_original = jvm_host.DIRECTORIO_CACHE
+        jvm_host.DIRECTORIO_CACHE = raiz / "cache"
+        jvm_host.cerrar_hosts()
+        jvm_host._no_disponibles.clear()
+
+    def tearDown(self):
+        jvm_host.cerrar_hosts()
+        jvm_host._no_disponibles.clear()
+        jvm_host.DIRECTORIO_CACHE = self._cache_original
+        self.temporal.cleanup()
+
+    def test_clase_no_cargada_devuelve_none(self):
+        self.assertIsNone(jvm_host.ejecutar_en_jvm("jarsigner", ["-verify", "a.apk"], java_bin=self.java))
+        peticiones = sum(h["peticiones"] for h in jvm_host.estado_hosts())
+        # La segunda vez ni siquiera llega al host
+        self.assertIsNone(jvm_host.ejecutar_en_jvm("jarsigner", ["-verify", "a.apk"], java_bin=self.java))
+        self.assertEqual(sum(h["peticiones"] for h in jvm_host.estado_hosts()), peticiones)
+
+    def test_otras_herramientas_siguen_en_el_host(self):
+        jvm_host.ejecutar_en_jvm("jarsigner", ["-verify", "a.apk"], java_bin=self.java)
+        resultado = jvm_host.ejecutar_en_jvm("apksigner", ["verify", "a.apk"],
+                                            apksigner_bin=self.apksigner, java_bin=self.java)
+        self.assertEqual(resultado, (0, "hosted verify a.apk", ""))
+
+    def test_analizador_usa_el_proceso_de_un_solo_uso(self):
+        analizador = APKAnalyzer(tool_detector=None)
+        rc, salida = analizador._ejecutar_java("jarsigner", ["-verify", "a.apk"],
+                                               lambda: (0, "jar verified."), java_bin=self.java)
+        self.assertEqual((rc, salida), (0, "jar verified."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Pruebas del percentil por rango más cercano de utils.timing
+
+El rango es ``ceil(p/100 · n)``: la mediana de [1, 2] es 1 y el p95 de
+1..100 es 95 (no el valor siguiente).
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.timing import percentil
+
+
+class PercentilTest(unittest.TestCase):
+
+    def test_mediana_de_dos_valores(self):
+        self.assertEqual(percentil([1, 2], 50), 1)
+
+    def test_mediana_de_diez_valores(self):
+        self.assertEqual(percentil(list(range(1, 11)), 50), 5)
+
+    def test_p95_de_cien_valores(self):
+        self.assertEqual(percentil(list(range(1, 101)), 95), 95)
+
+    def test_mediana_de_cuatro_valores(self):
+        self.assertEqual(percentil([4, 1, 3, 2], 50), 2)
+
+    def test_extremos(self):
+        valores = [3.0, 1.0, 2.0]
+        self.assertEqual(percentil(valores, 0), 1.0)
+        self.assertEqual(percentil(valores, 100), 3.0)
+        self.assertEqual(percentil([7.5], 95), 7.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
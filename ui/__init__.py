@@ -2,15 +2,29 @@
 Componentes de UI para APK Inspector & Verifier
 """
 
-from .components import BotonRedondeado, PanelDeslizante, AppStyles
-from .dialogs import ToolsDialog, LogDialog
-from .signing_dialog import SigningDialog
+import importlib
 
-__all__ = [
-    'BotonRedondeado',
-    'PanelDeslizante', 
-    'ToolsDialog',
-    'LogDialog',
-    'SigningDialog',  
-    'AppStyles'
-]
\ No newline at end of file
+# Importación diferida (PEP 562): los diálogos se cargan al abrirse por primera vez
+_EXPORTS = {
+    'BotonRedondeado': '.components',
+    'PanelDeslizante': '.components',
+    'AppStyles': '.components',
+    'ToolsDialog': '.dialogs',
+    'LogDialog': '.dialogs',
+    'SigningDialog': '.signing_dialog',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    modulo = _EXPORTS.get(name)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
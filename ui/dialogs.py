@@ -2,7 +2,6 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from pathlib import Path
 from typing import Optional, Callable
-import subprocess
 import threading
 
 try:
@@ -11,11 +10,28 @@ except ImportError:
     from components import BotonRedondeado, AppStyles
 
 class LogDialog:
-    def __init__(self, parent, log_content: str, current_analysis: dict = None, apk_name: str = ""):
+    # Filtro -> claves de sección del reporte estructurado
+    SECCIONES_FILTRO = {
+        "todos": ["aapt", "apksigner", "jarsigner", "pci_dss"],
+        "aapt": ["aapt"],
+        "apksigner": ["apksigner"],
+        "jarsigner": ["jarsigner"],
+        "tiempos": ["tiempos"],
+    }
+
+    FORMATOS_EXPORTACION = {
+        ".html": "html",
+        ".md": "markdown",
+        ".json": "json",
+    }
+
+    def __init__(self, parent, log_content: str, current_analysis: dict = None, apk_name: str = "", reporte=None):
         self.parent = parent
         self.log_content = log_content
         self.current_analysis = current_analysis or {}
         self.apk_name = apk_name
+        self.reporte = reporte
+        self._cache_filtros = {}
         self.styles = AppStyles()
         self.filter_var = tk.StringVar(value="todos")
         
@@ -58,7 +74,8 @@ class LogDialog:
             ("AAPT", "aapt"),
             ("APKSigner", "apksigner"),
             ("JarSigner", "jarsigner"),
-            ("PCI DSS", "pci_dss")  
+            ("PCI DSS", "pci_dss"),
+            ("Tiempos", "tiempos")
         ]
         
         for text, value in filters:
@@ -120,21 +137,54 @@ class LogDialog:
         self.log_text.config(state='normal')
         self.log_text.delete(1.0, tk.END)
         
+        contenido = self._contenido_desde_reporte(filtro) if self.reporte else None
+        if contenido is None:
+            contenido = self._contenido_desde_log(filtro)
+        
+        self.log_text.insert(1.0, contenido)
+        self.log_text.config(state='disabled')
+    
+    def _contenido_desde_log(self, filtro):
+        """Fallback: localizar secciones en el texto del log"""
         if filtro == "todos":
-            contenido = self._obtener_contenido_completo()
+            return self._obtener_contenido_completo()
         elif filtro == "aapt":
-            contenido = self._filtrar_seccion("=== AAPT DUMP BADGING ===")
+            return self._filtrar_seccion("=== AAPT DUMP BADGING ===")
         elif filtro == "apksigner":
-            contenido = self._filtrar_seccion("=== APKSIGNER VERIFY ===")
+            return self._filtrar_seccion("=== APKSIGNER VERIFY ===")
         elif filtro == "jarsigner":
-            contenido = self._filtrar_seccion("=== JARSIGNER VERIFY ===")
+            return self._filtrar_seccion("=== JARSIGNER VERIFY ===")
         elif filtro == "pci_dss":
-            contenido = self._obtener_analisis_pci_dss()
+            return self._obtener_analisis_pci_dss()
+        elif filtro == "tiempos":
+            return self._obtener_tiempos()
+        else:
+            return self.log_content
+    
+    def _contenido_desde_reporte(self, filtro):
+        """Contenido del filtro por búsqueda directa de secciones en el reporte"""
+        if filtro in self._cache_filtros:
+            return self._cache_filtros[filtro]
+        
+        if filtro == "pci_dss":
+            seccion = self.reporte.obtener("pci_dss")
+            if not seccion or not seccion.lineas:
+                return None
+            contenido = seccion.texto("simple")
+        elif filtro in self.SECCIONES_FILTRO:
+            partes = []
+            for clave in self.SECCIONES_FILTRO[filtro]:
+                seccion = self.reporte.obtener(clave)
+                if seccion and seccion.lineas:
+                    partes.append(seccion.texto("detalle" if clave == "pci_dss" else None))
+            if not partes:
+                return None
+            contenido = "".join(partes)
         else:
-            contenido = self.log_content
+            return None
         
-        self.log_text.insert(1.0, contenido)
-        self.log_text.config(state='disabled')
+        self._cache_filtros[filtro] = contenido
+        return contenido
     
     def _filtrar_seccion(self, seccion_buscada):
         # ✅ CORREGIDO: Buscar la sección exacta
@@ -220,65 +270,75 @@ class LogDialog:
         return contenido_completo
 
     def _generar_reporte_pci_detallado(self, pci_analysis: dict) -> str:
-        reporte = ""
-        reporte += f"Estado de Cumplimiento: {pci_analysis.get('cumplimiento_general', 'N/A')}\n"
-        reporte += f"Puntuación: {pci_analysis.get('puntuacion_total', 'N/A')}%\n"
-        reporte += f"Nivel de Riesgo: {pci_analysis.get('nivel_riesgo', 'N/A')}\n\n"
-        reporte += "✅ REQUISITOS CUMPLIDOS:\n"
+        reporte = []
+        reporte.append(f"Estado de Cumplimiento: {pci_analysis.get('cumplimiento_general', 'N/A')}\n")
+        reporte.append(f"Puntuación: {pci_analysis.get('puntuacion_total', 'N/A')}%\n")
+        reporte.append(f"Nivel de Riesgo: {pci_analysis.get('nivel_riesgo', 'N/A')}\n\n")
+        reporte.append("✅ REQUISITOS CUMPLIDOS:\n")
         requisitos_cumplidos = pci_analysis.get('requisitos_cumplidos', [])
         if requisitos_cumplidos:
             for req in requisitos_cumplidos:
-                reporte += f"  • {req}\n"
+                reporte.append(f"  • {req}\n")
         else:
-            reporte += "  No se encontraron requisitos cumplidos\n"
+            reporte.append("  No se encontraron requisitos cumplidos\n")
         
-        reporte += "\n"
-        reporte += "❌ REQUISITOS NO CUMPLIDOS:\n"
+        reporte.append("\n")
+        reporte.append("❌ REQUISITOS NO CUMPLIDOS:\n")
         requisitos_no_cumplidos = pci_analysis.get('requisitos_no_cumplidos', [])
         if requisitos_no_cumplidos:
             for req in requisitos_no_cumplidos:
-                reporte += f"  • {req}\n"
+                reporte.append(f"  • {req}\n")
         else:
-            reporte += "  Todos los requisitos analizados están cumplidos\n"
+            reporte.append("  Todos los requisitos analizados están cumplidos\n")
         
-        reporte += "\n"
-        reporte += "🔍 HALLAZGOS CRÍTICOS:\n"
+        reporte.append("\n")
+        reporte.append("🔍 HALLAZGOS CRÍTICOS:\n")
         hallazgos_criticos = pci_analysis.get('hallazgos_criticos', [])
         if hallazgos_criticos:
             for hallazgo in hallazgos_criticos:
                 nivel_emoji = "🔴" if hallazgo.get('nivel') == 'ALTO' else "🟡" if hallazgo.get('nivel') == 'MEDIO' else "🔵"
-                reporte += f"  {nivel_emoji} [{hallazgo.get('nivel', 'N/A')}] {hallazgo.get('titulo', 'Hallazgo')}\n"
-                reporte += f"     Descripción: {hallazgo.get('descripcion', 'N/A')}\n"
-                reporte += f"     Requisito: {hallazgo.get('requisito', 'N/A')}\n"
-                reporte += f"     Impacto: {hallazgo.get('impacto', 'N/A')}\n"
-                reporte += f"     Recomendación: {hallazgo.get('recomendacion', 'N/A')}\n\n"
+                reporte.append(f"  {nivel_emoji} [{hallazgo.get('nivel', 'N/A')}] {hallazgo.get('titulo', 'Hallazgo')}\n")
+                reporte.append(f"     Descripción: {hallazgo.get('descripcion', 'N/A')}\n")
+                reporte.append(f"     Requisito: {hallazgo.get('requisito', 'N/A')}\n")
+                reporte.append(f"     Impacto: {hallazgo.get('impacto', 'N/A')}\n")
+                reporte.append(f"     Recomendación: {hallazgo.get('recomendacion', 'N/A')}\n\n")
         else:
-            reporte += "  No se encontraron hallazgos críticos\n"
+            reporte.append("  No se encontraron hallazgos críticos\n")
         
-        reporte += "\n"
+        reporte.append("\n")
         
-        reporte += "🚨 HALLAZGOS DE ALTO RIESGO:\n"
+        reporte.append("🚨 HALLAZGOS DE ALTO RIESGO:\n")
         hallazgos_altos = pci_analysis.get('hallazgos_altos', [])
         if hallazgos_altos:
-            reporte += f"  Total: {len(hallazgos_altos)} hallazgos de ALTO riesgo encontrados\n"
+            reporte.append(f"  Total: {len(hallazgos_altos)} hallazgos de ALTO riesgo encontrados\n")
         else:
-            reporte += "  No se encontraron hallazgos de ALTO riesgo\n"
+            reporte.append("  No se encontraron hallazgos de ALTO riesgo\n")
         
-        reporte += "\n"
+        reporte.append("\n")
         
-        reporte += "💡 RECOMENDACIONES:\n"
+        reporte.append("💡 RECOMENDACIONES:\n")
         recomendaciones = pci_analysis.get('recomendaciones', [])
         if recomendaciones:
             for rec in recomendaciones:
-                reporte += f"  • {rec}\n"
+                reporte.append(f"  • {rec}\n")
         else:
-            reporte += "  No hay recomendaciones específicas\n"
+            reporte.append("  No hay recomendaciones específicas\n")
         
-        reporte += "\n"
-        reporte += "⚠️  NOTA: Este es un análisis automatizado. Para certificación PCI DSS completa,\n"
-        reporte += "     se requiere auditoría por un QSA (Qualified Security Assessor) certificado.\n"
+        reporte.append("\n")
+        reporte.append("⚠️  NOTA: Este es un análisis automatizado. Para certificación PCI DSS completa,\n")
+        reporte.append("     se requiere auditoría por un QSA (Qualified Security Assessor) certificado.\n")
         
-        return reporte
+        return "".join(reporte)
+
+    def _obtener_tiempos(self):
+        tiempos = (self.current_analysis or {}).get('tiempos')
+        if not tiempos:
+            return "=== TIEMPOS POR ETAPA ===\n\nNo hay tiempos registrados"
+        lineas = ["=== TIEMPOS POR ETAPA ===", ""]
+        for etapa in tiempos.get('etapas', []):
+            lineas.append(f"{etapa['etapa']:<22}{etapa['ms']:>10.1f} ms")
+        lineas.append(f"{'TOTAL':<22}{tiempos.get('total_ms', 0):>10.1f} ms")
+        return "\n".join(lineas)
 
     def _obtener_analisis_pci_dss(self):
         if not self.current_analysis:
@@ -321,17 +381,34 @@ class LogDialog:
         
         nombre_por_defecto = self._generar_nombre_archivo()
         
+        filetypes = [("Archivos de texto", "*.txt")]
+        if self.current_analysis:
+            filetypes.append(("JSON", "*.json"))
+        if self.reporte:
+            filetypes += [("HTML", "*.html"), ("Markdown", "*.md")]
+        
         archivo = filedialog.asksaveasfilename(
             title="Exportar log",
             defaultextension=".txt",
-            filetypes=[("Archivos de texto", "*.txt")],
+            filetypes=filetypes,
             initialfile=nombre_por_defecto
         )
         
         if archivo:
             try:
+                formato = self.FORMATOS_EXPORTACION.get(Path(archivo).suffix.lower())
+                if formato == "json" and self.current_analysis:
+                    from utils.json_export import AnalysisExporter
+                    exito, mensaje = AnalysisExporter.exportar_json(self.current_analysis, Path(archivo))
+                    if not exito:
+                        raise Exception(mensaje)
+                    tk.messagebox.showinfo("Éxito", f"Análisis exportado a:\n{archivo}")
+                    return
                 with open(archivo, "w", encoding="utf-8") as f:
-                    f.write(self.log_text.get(1.0, tk.END))
+                    if self.reporte and formato:
+                        self.reporte.escribir(f, formato)
+                    else:
+                        f.write(self.log_text.get(1.0, tk.END))
                 tk.messagebox.showinfo("Éxito", f"Log exportado a:\n{archivo}")
             except Exception as e:
                 tk.messagebox.showerror("Error", f"No se pudo exportar: {str(e)}")
@@ -565,6 +642,8 @@ class InstallDialog:
     
     def _verificar_adb(self):
         try:
+            from core.adb_client import ejecutar_adb
+
             adb_path = Path(self.platform_tools_path) / "adb"
             if not adb_path.exists():
                 adb_path = Path(self.platform_tools_path) / "adb.exe"
@@ -572,14 +651,9 @@ class InstallDialog:
             if not adb_path.exists():
                 return False, ["ADB no encontrado"]
             
-            result = subprocess.run(
-                [str(adb_path), "devices"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            _, salida = ejecutar_adb(adb_path, ["devices"], timeout=10)
             
-            lines = result.stdout.strip().split('\n')[1:]
+            lines = salida.strip().split('\n')[1:]
             devices = [line for line in lines if line.strip() and '\tdevice' in line]
             
             return len(devices) > 0, devices
@@ -629,23 +703,23 @@ class InstallDialog:
         
         def instalar():
             try:
+                from core.adb_client import ejecutar_adb
+                from core.install_engine import InstallEngine
+
                 adb_path = Path(self.platform_tools_path) / "adb"
                 if not adb_path.exists():
                     adb_path = Path(self.platform_tools_path) / "adb.exe"
                 
-                result = subprocess.run(
-                    [str(adb_path), "install", "-r", str(self.apk_path)],
-                    capture_output=True,
-                    text=True,
-                    timeout=60
-                )
+                # Timeout según el tamaño: un APK grande no cabe en 60s
+                timeout = InstallEngine.calcular_timeout(Path(self.apk_path).stat().st_size)
+                _, salida = ejecutar_adb(adb_path, ["install", "-r", str(self.apk_path)], timeout=timeout)
                 
                 progress.destroy()
                 
-                if "Success" in result.stdout:
+                if "Success" in salida:
                     messagebox.showinfo("Éxito", "APK instalada correctamente")
                 else:
-                    messagebox.showerror("Error", f"Error en instalación:\n{result.stderr or result.stdout}")
+                    messagebox.showerror("Error", f"Error en instalación:\n{salida}")
                     
             except Exception as e:
                 progress.destroy()
@@ -705,23 +779,20 @@ class InstallDialog:
         
         def desinstalar():
             try:
+                from core.adb_client import ejecutar_adb
+
                 adb_path = Path(self.platform_tools_path) / "adb"
                 if not adb_path.exists():
                     adb_path = Path(self.platform_tools_path) / "adb.exe"
                 
-                result = subprocess.run(
-                    [str(adb_path), "uninstall", package_name],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
+                _, salida = ejecutar_adb(adb_path, ["uninstall", package_name], timeout=30)
                 
                 progress.destroy()
                 
-                if "Success" in result.stdout:
+                if "Success" in salida:
                     messagebox.showinfo("Éxito", f"Paquete {package_name} desinstalado correctamente")
                 else:
-                    messagebox.showerror("Error", f"Error en desinstalación:\n{result.stderr or result.stdout}")
+                    messagebox.showerror("Error", f"Error en desinstalación:\n{salida}")
                     
             except Exception as e:
                 progress.destroy()
@@ -866,7 +937,7 @@ class ToolsDialog:
         self.jdk_entry.insert(0, config.get("jdk_bin") or str(detectado.get("jdk_bin", "")))
     
     def _detectar_automaticamente(self):
-        detectado = self.tool_detector.detectar_herramientas()
+        detectado = self.tool_detector.detectar_herramientas(forzar=True)
         
         if not self.sdk_entry.get() and detectado.get("sdk_root"):
             self.sdk_entry.delete(0, tk.END)
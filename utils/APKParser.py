@@ -3,19 +3,24 @@ APK Parser - Análisis robusto de archivos APK
 Maneja parsing de output de aapt dump badging con detección mejorada de Debug
 """
 
-import re
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, List
 
+from utils.badging import parsear_badging
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("parser")
+
 class APKParser:
     """Parser robusto para análisis de APKs que maneja errores y casos edge"""
     
     @staticmethod
     def parsear_aapt_badging(aapt_output: str) -> Dict[str, Any]:
         """Parser mejorado para output de aapt dump badging"""
-        print("🔍 DEBUG APK_PARSER - Iniciando parseo de aapt output...")
-        print(f"🔍 DEBUG APK_PARSER - Output length: {len(aapt_output)}")
+        if _traza.activa:
+            _traza("Iniciando parseo de aapt output...")
+            _traza(f"Output length: {len(aapt_output)}")
         
         parsed_info = {
             'package': 'No detectado',
@@ -35,129 +40,43 @@ class APKParser:
         
         try:
             if not aapt_output or not isinstance(aapt_output, str):
-                print("❌ DEBUG APK_PARSER - Output vacío o no es string")
+                if _traza.activa:
+                    _traza("Output vacío o no es string")
                 return parsed_info
             
-            # ✅ DETECCIÓN ROBUSTA DE DEBUG
-            output_lower = aapt_output.lower()
-            if "application-debuggable" in output_lower:
-                parsed_info['debug_mode'] = True
-                parsed_info['is_debuggable'] = True
-                print("🔍 DEBUG APK_PARSER - APK en modo DEBUG detectado")
-            else:
-                print("🔍 DEBUG APK_PARSER - APK en modo RELEASE")
-            
-            # ✅ PROCESAR LÍNEA POR LÍNEA
-            lines = aapt_output.split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Package info - línea más importante
-                if line.startswith('package:'):
-                    package_data = APKParser._parse_package_line_completa(line)
-                    parsed_info.update(package_data)
-                    print(f"🔍 DEBUG APK_PARSER - Package data: {package_data}")
-                
-                # SDK info
-                elif line.startswith('sdkVersion:'):
-                    sdk = APKParser._extraer_valor_comillas(line)
-                    if sdk:
-                        parsed_info['sdk_version'] = sdk
-                        parsed_info['min_sdk'] = sdk
-                        print(f"🔍 DEBUG APK_PARSER - SDK: {sdk}")
-                
-                elif line.startswith('targetSdkVersion:'):
-                    target_sdk = APKParser._extraer_valor_comillas(line)
-                    if target_sdk:
-                        parsed_info['target_sdk'] = target_sdk
-                        print(f"🔍 DEBUG APK_PARSER - Target SDK: {target_sdk}")
-                
-                # Application label
-                elif line.startswith('application-label:'):
-                    label = APKParser._extraer_valor_comillas(line)
-                    if label:
-                        parsed_info['app_label'] = label
-                        print(f"🔍 DEBUG APK_PARSER - App label: {label}")
-                
-                elif line.startswith("application:") and "label=" in line:
-                    # Buscar en formato: application: label='AppName' icon='res/...'
-                    label_match = re.search(r"label='([^']*)'", line)
-                    if label_match:
-                        parsed_info['app_label'] = label_match.group(1)
-                        print(f"🔍 DEBUG APK_PARSER - App label (from application): {parsed_info['app_label']}")
-                
-                # Permissions
-                elif line.startswith('uses-permission:'):
-                    permission = APKParser._extraer_valor_comillas(line)
-                    if permission and permission not in parsed_info['permissions']:
-                        parsed_info['permissions'].append(permission)
-                
-                # Información de compilación
-                elif 'platformBuildVersionName' in line:
-                    valor = APKParser._extraer_valor_comillas(line)
-                    if valor:
-                        parsed_info['platform_build_version'] = valor
-                elif 'compileSdkVersion' in line:
-                    valor = APKParser._extraer_valor_comillas(line)
-                    if valor:
-                        parsed_info['compile_sdk'] = valor
+            # ✅ PARSER ÚNICO DE BADGING (un solo recorrido)
+            datos = parsear_badging(aapt_output)
+            parsed_info['debug_mode'] = parsed_info['is_debuggable'] = datos['debuggable']
+            if _traza.activa:
+                _traza("APK en modo DEBUG detectado" if datos['debuggable'] else "APK en modo RELEASE")
+
+            for campo in ('package', 'version_code', 'version_name', 'app_label', 'target_sdk',
+                          'min_sdk', 'compile_sdk', 'platform_build_version'):
+                if datos[campo]:
+                    parsed_info[campo] = datos[campo]
+            if datos['min_sdk']:
+                parsed_info['sdk_version'] = datos['min_sdk']
+            parsed_info['permissions'] = datos['permissions']
+            parsed_info['badging'] = datos
+            if _traza.detalle:
+                _traza(f"Badging: {len(datos['permissions'])} permisos, native-code {datos['native_code']}")
             
             # ✅ POST-PROCESAMIENTO: Validar que tenemos datos
             parsed_info = APKParser._validar_y_limpiar_datos(parsed_info)
             
-            print(f"🔍 DEBUG APK_PARSER - Parseo completado:")
-            print(f"  - Package: {parsed_info['package']}")
-            print(f"  - App Label: {parsed_info['app_label']}") 
-            print(f"  - Version: {parsed_info['version_name']} ({parsed_info['version_code']})")
-            print(f"  - Target SDK: {parsed_info['target_sdk']}")
-            print(f"  - Debug: {parsed_info['debug_mode']}")
+            if _traza.activa:
+                _traza(f"Parseo completado:")
+                _traza(f"  - Package: {parsed_info['package']}")
+                _traza(f"  - App Label: {parsed_info['app_label']}")
+                _traza(f"  - Version: {parsed_info['version_name']} ({parsed_info['version_code']})")
+                _traza(f"  - Target SDK: {parsed_info['target_sdk']}")
+                _traza(f"  - Debug: {parsed_info['debug_mode']}")
             
         except Exception as e:
-            print(f"❌ ERROR en parsear_aapt_badging: {e}")
+            _traza.error(f"❌ ERROR en parsear_aapt_badging: {e}")
         
         return parsed_info
     
-    @staticmethod
-    def _parse_package_line_completa(line: str) -> Dict[str, str]:
-        """Parsear línea de package con todas las informaciones"""
-        result = {}
-        
-        try:
-            # Buscar todos los campos posibles en la línea package
-            patterns = {
-                'package': r"name='([^']*)'",
-                'version_code': r"versionCode='([^']*)'",
-                'version_name': r"versionName='([^']*)'",
-                'platform_build_version': r"platformBuildVersionName='([^']*)'",
-                'compile_sdk': r"compileSdkVersion='([^']*)'"
-            }
-            
-            for campo, pattern in patterns.items():
-                match = re.search(pattern, line)
-                if match:
-                    result[campo] = match.group(1)
-                    
-            print(f"🔍 DEBUG PACKAGE_PARSER - Extraído: {result}")
-                
-        except Exception as e:
-            print(f"❌ ERROR en _parse_package_line_completa: {e}")
-        
-        return result
-    
-    @staticmethod
-    def _extraer_valor_comillas(line: str) -> str:
-        """Extraer valor entre comillas simples de manera robusta"""
-        try:
-            matches = re.findall(r"'([^']*)'", line)
-            if matches:
-                return matches[0]
-        except Exception as e:
-            print(f"❌ ERROR en _extraer_valor_comillas: {e}")
-        return None
-    
     @staticmethod
     def _validar_y_limpiar_datos(parsed_info: Dict) -> Dict:
         """Validar y limpiar los datos parseados"""
@@ -183,19 +102,23 @@ class APKParser:
     def analizar_apk_completo(apk_path: Path, config: Dict) -> Dict[str, Any]:
         """Analizar APK completo integrando todas las herramientas"""
         try:
-            print(f"🔍 ANALIZANDO APK: {apk_path.name}")
+            if _traza.activa:
+                _traza(f"🔍 ANALIZANDO APK: {apk_path.name}")
             
             # Ejecutar aapt
             aapt_output = APKParser._ejecutar_aapt(apk_path, config.get("build_tools"))
-            print(f"🔍 AAPT OUTPUT OBTENIDO: {len(aapt_output)} caracteres")
+            if _traza.activa:
+                _traza(f"🔍 AAPT OUTPUT OBTENIDO: {len(aapt_output)} caracteres")
             
             # Ejecutar apksigner
             apksigner_output = APKParser._ejecutar_apksigner(apk_path, config.get("build_tools"))
-            print(f"🔍 APKSIGNER OUTPUT OBTENIDO: {len(apksigner_output)} caracteres")
+            if _traza.activa:
+                _traza(f"🔍 APKSIGNER OUTPUT OBTENIDO: {len(apksigner_output)} caracteres")
             
             # Ejecutar jarsigner  
             jarsigner_output = APKParser._ejecutar_jarsigner(apk_path, config.get("jdk_bin"))
-            print(f"🔍 JARSIGNER OUTPUT OBTENIDO: {len(jarsigner_output)} caracteres")
+            if _traza.activa:
+                _traza(f"🔍 JARSIGNER OUTPUT OBTENIDO: {len(jarsigner_output)} caracteres")
             
             return {
                 "aapt": aapt_output,
@@ -204,7 +127,7 @@ class APKParser:
             }
             
         except Exception as e:
-            print(f"❌ ERROR en analizar_apk_completo: {e}")
+            _traza.error(f"❌ ERROR en analizar_apk_completo: {e}")
             return {
                 "aapt": f"Error: {str(e)}",
                 "apksigner": "",
@@ -220,7 +143,8 @@ class APKParser:
                 return f"Error: aapt no encontrado en {aapt_path}"
             
             comando = [str(aapt_path), 'dump', 'badging', str(apk_path)]
-            print(f"🔍 EJECUTANDO AAPT: {' '.join(comando)}")
+            if _traza.activa:
+                _traza(f"🔍 EJECUTANDO AAPT: {' '.join(comando)}")
             
             resultado = subprocess.run(
                 comando,
@@ -232,10 +156,11 @@ class APKParser:
             )
             
             output = resultado.stdout
-            print(f"🔍 AAPT RETURN CODE: {resultado.returncode}")
+            if _traza.activa:
+                _traza(f"🔍 AAPT RETURN CODE: {resultado.returncode}")
             
             if resultado.returncode != 0:
-                print(f"⚠️ AAPT ERROR: {resultado.stderr[:500]}...")
+                _traza.error(f"⚠️ AAPT ERROR: {resultado.stderr[:500]}...")
                 return f"Error aapt: {resultado.stderr[:500]}"
             
             return output
@@ -243,7 +168,7 @@ class APKParser:
         except subprocess.TimeoutExpired:
             return "Error: Timeout ejecutando aapt"
         except Exception as e:
-            print(f"❌ ERROR en _ejecutar_aapt: {e}")
+            _traza.error(f"❌ ERROR en _ejecutar_aapt: {e}")
             return f"Error ejecutando aapt: {str(e)}"
 
     @staticmethod
@@ -255,7 +180,8 @@ class APKParser:
                 return "apksigner no disponible"
             
             comando = [str(apksigner_path), 'verify', '--verbose', str(apk_path)]
-            print(f"🔍 EJECUTANDO APKSIGNER: {' '.join(comando)}")
+            if _traza.activa:
+                _traza(f"🔍 EJECUTANDO APKSIGNER: {' '.join(comando)}")
             
             resultado = subprocess.run(
                 comando,
@@ -269,7 +195,7 @@ class APKParser:
             return resultado.stdout + resultado.stderr
             
         except Exception as e:
-            print(f"❌ ERROR en _ejecutar_apksigner: {e}")
+            _traza.error(f"❌ ERROR en _ejecutar_apksigner: {e}")
             return f"Error ejecutando apksigner: {str(e)}"
 
     @staticmethod
@@ -281,7 +207,8 @@ class APKParser:
                 return "jarsigner no disponible"
             
             comando = [str(jarsigner_path), '-verify', '-verbose', str(apk_path)]
-            print(f"🔍 EJECUTANDO JARSIGNER: {' '.join(comando)}")
+            if _traza.activa:
+                _traza(f"🔍 EJECUTANDO JARSIGNER: {' '.join(comando)}")
             
             resultado = subprocess.run(
                 comando,
@@ -295,7 +222,7 @@ class APKParser:
             return resultado.stdout + resultado.stderr
             
         except Exception as e:
-            print(f"❌ ERROR en _ejecutar_jarsigner: {e}")
+            _traza.error(f"❌ ERROR en _ejecutar_jarsigner: {e}")
             return f"Error ejecutando jarsigner: {str(e)}"
 
     @staticmethod
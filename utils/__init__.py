@@ -2,14 +2,37 @@
 Utilidades para APK Inspector & Verifier
 """
 
-from .config_manager import ConfigManager
-from .file_utils import FileUtils
-from .logger import APKLogger
-from .format_utils import FormatUtils
-
-__all__ = [
-    'ConfigManager',
-    'FileUtils', 
-    'APKLogger',
-    'FormatUtils'
-]
\ No newline at end of file
+import importlib
+
+# Importación diferida (PEP 562), igual que en ``core``
+_EXPORTS = {
+    'ConfigManager': '.config_manager',
+    'FileUtils': '.file_utils',
+    'APKLogger': '.logger',
+    'FormatUtils': '.format_utils',
+    'ReporteAnalisis': '.report_model',
+    'SeccionReporte': '.report_model',
+    'AnalysisExporter': '.json_export',
+    'NDJSONWriter': '.json_export',
+    'MedicionTiempos': '.timing',
+    'EstadisticasEtapas': '.timing',
+    'parsear_badging': '.badging',
+    'parsear_xmltree': '.xmltree',
+    'extraer_manifest': '.xmltree',
+    'datos_manifest': '.xmltree',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    modulo = _EXPORTS.get(name)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(modulo, __name__), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,218 @@
+"""
+Parser único de ``aapt dump badging`` / ``aapt2 dump badging``
+
+aapt agrupa las líneas del mismo tipo (todos los ``uses-permission``, todas
+las ``application-label-xx``...), así que el tokenizador recorre la salida una
+sola vez con una regex precompilada que consume cada tramo de líneas con la
+misma clave. Cada tramo se despacha una vez por tablas y sus valores se extraen
+en bloque, sin bucles de Python por línea ni una búsqueda por campo.
+"""
+
+import re
+from typing import Dict, List
+
+# Tramo de líneas consecutivas con la misma clave; las etiquetas e iconos por
+# configuración (application-label-es, application-icon-160...) forman un tramo
+_TRAMO = re.compile(
+    r"^[ \t]*((application-(?:label|icon)-)[^\n]*(?:\n[ \t]*\2[^\n]*)*"
+    r"|([A-Za-z][\w-]*)(?![\w-])[^\n]*(?:\n[ \t]*\3(?![\w-])[^\n]*)*)",
+    re.M,
+)
+# aapt escapa las comillas dentro de los valores como \'
+_ATRIBUTO = re.compile(r"(\w+)='((?:[^'\\]|\\.)*)'")
+_VALOR = re.compile(r"'((?:[^'\\]|\\.)*)'")
+
+# Atributos de la línea ``package:`` y su clave en el resultado
+CAMPOS_PACKAGE = {
+    "name": "package",
+    "versionCode": "version_code",
+    "versionName": "version_name",
+    "platformBuildVersionName": "platform_build_version",
+    "platformBuildVersionCode": "platform_build_version_code",
+    "compileSdkVersion": "compile_sdk",
+    "compileSdkVersionCodename": "compile_sdk_codename",
+}
+
+# Líneas de un solo valor que se guardan tal cual
+CAMPOS_SIMPLES = {
+    "sdkVersion": "min_sdk",
+    "minSdkVersion": "min_sdk",
+    "targetSdkVersion": "target_sdk",
+    "maxSdkVersion": "max_sdk",
+    "install-location": "install_location",
+    "uses-gl-es": "uses_gl_es",
+    "supports-any-density": "supports_any_density",
+    "requires-smallest-width": "requires_smallest_width",
+    "compatible-width-limit": "compatible_width_limit",
+    "largest-width-limit": "largest_width_limit",
+}
+
+# Líneas repetibles cuyo valor se acumula en una lista
+CAMPOS_LISTA = {
+    "uses-permission": "permissions",
+    "uses-permission-sdk-23": "permissions_sdk23",
+    "uses-implied-permission": "implied_permissions",
+    "permission": "declared_permissions",
+    "uses-feature": "uses_features",
+    "uses-feature-not-required": "uses_features_not_required",
+    "uses-implied-feature": "implied_features",
+    "uses-library": "uses_libraries",
+    "uses-library-not-required": "uses_libraries_not_required",
+    "uses-native-library": "uses_native_libraries",
+    "uses-static-library": "uses_static_libraries",
+    "provides-component": "provides_components",
+}
+
+# Líneas con varios valores entre comillas
+CAMPOS_MULTIVALOR = {
+    "locales": "locales",
+    "densities": "densities",
+    "native-code": "native_code",
+    "alt-native-code": "alt_native_code",
+    "supports-screens": "supports_screens",
+}
+
+# Líneas sin valor que marcan una característica
+CAMPOS_MARCA = {
+    "main": "main",
+    "other-activities": "other_activities",
+    "other-receivers": "other_receivers",
+    "other-services": "other_services",
+}
+
+
+def resultado_vacio() -> Dict:
+    """Diccionario con todos los campos que puede producir ``parsear_badging``"""
+    resultado = {
+        "package": None, "version_code": None, "version_name": None,
+        "platform_build_version": None, "platform_build_version_code": None,
+        "compile_sdk": None, "compile_sdk_codename": None,
+        "app_label": None, "app_icon": None, "application_labels": {}, "application_icons": {},
+        "launchable_activity": None, "leanback_launchable_activity": None,
+        "debuggable": False,
+    }
+    resultado.update({clave: None for clave in CAMPOS_SIMPLES.values()})
+    resultado.update({clave: [] for clave in CAMPOS_LISTA.values()})
+    resultado.update({clave: [] for clave in CAMPOS_MULTIVALOR.values()})
+    resultado.update({clave: False for clave in CAMPOS_MARCA.values()})
+    return resultado
+
+
+def _texto(valor: str) -> str:
+    return valor.replace("\\'", "'") if "\\" in valor else valor
+
+
+def _primer_valor(resto: str) -> str:
+    """Primer valor entre comillas del resto de la línea (o el texto sin comillas)"""
+    inicio = resto.find("'")
+    if inicio < 0:
+        return resto.strip()
+    if "\\" in resto:
+        encontrado = _VALOR.search(resto)
+        return _texto(encontrado.group(1)) if encontrado else ""
+    fin = resto.find("'", inicio + 1)
+    return resto[inicio + 1:fin] if fin > 0 else resto[inicio + 1:]
+
+
+def _atributos(resto: str) -> Dict[str, str]:
+    return {k: _texto(v) for k, v in _ATRIBUTO.findall(resto)}
+
+
+def _valores_por_linea(tramo: str) -> List[str]:
+    """Primer valor de cada línea del tramo"""
+    if "\\" not in tramo:
+        lineas = tramo.count("\n") + 1
+        comillas = tramo.count("'")
+        if comillas == 2 * lineas:
+            # Caso habitual (``uses-permission: name='...'``): un valor por línea
+            return tramo.split("'")[1::2]
+        if comillas % 2 == 0 and comillas > 2 * lineas:
+            # Varios valores por línea: el primero de cada línea es el que sigue
+            # a un separador con salto de línea
+            partes = tramo.split("'")
+            valores = [partes[1]]
+            valores += [partes[i + 1] for i in range(2, len(partes) - 1, 2) if "\n" in partes[i]]
+            if len(valores) == lineas:
+                return valores
+    # Comillas escapadas o líneas sin comillas (``permission: com.x.C2D_MESSAGE``)
+    return [_primer_valor(linea.partition(":")[2]) for linea in tramo.split("\n")]
+
+
+def _por_configuracion(tramo: str, familia: str) -> Dict[str, str]:
+    """{configuración: valor} de un tramo application-label-xx / application-icon-xx"""
+    if "\\" not in tramo and tramo.count("'") == 2 * (tramo.count("\n") + 1):
+        partes = tramo.split("'")
+        inicio = len(familia)
+        return {clave.strip()[inicio:-1]: valor for clave, valor in zip(partes[0::2], partes[1::2])}
+    resultado = {}
+    for linea in tramo.split("\n"):
+        config, _, resto = linea.strip()[len(familia):].partition(":")
+        resultado[config] = _primer_valor(resto)
+    return resultado
+
+
+def parsear_badging(salida: str) -> Dict:
+    """Parsear la salida completa de ``dump badging`` en un solo recorrido.
+
+    Los permisos y demás listas conservan el orden de aparición sin
+    duplicados; las etiquetas e iconos por configuración quedan en
+    ``application_labels`` / ``application_icons``.
+    """
+    resultado = resultado_vacio()
+    if not salida:
+        return resultado
+
+    for texto, familia, clave in _TRAMO.findall(salida):
+
+        if familia:
+            destino = resultado["application_labels" if familia == "application-label-" else "application_icons"]
+            destino.update(_por_configuracion(texto, familia))
+            continue
+
+        campo = CAMPOS_LISTA.get(clave)
+        if campo is not None:
+            resultado[campo].extend(filter(None, _valores_por_linea(texto)))
+            continue
+
+        # Resto de claves: una línea por tramo (se usa la última, como aapt)
+        linea = texto.rpartition("\n")[2] if "\n" in texto else texto
+        resto = linea.partition(":")[2]
+        campo = CAMPOS_SIMPLES.get(clave)
+        if campo is not None:
+            resultado[campo] = _primer_valor(resto)
+        elif clave == "application-label":
+            resultado["app_label"] = _primer_valor(resto)
+        elif clave == "package":
+            for nombre, dato in _atributos(resto).items():
+                destino = CAMPOS_PACKAGE.get(nombre)
+                if destino:
+                    resultado[destino] = dato
+        elif clave == "application":
+            atributos = _atributos(resto)
+            if atributos.get("label") and not resultado["app_label"]:
+                resultado["app_label"] = atributos["label"]
+            if atributos.get("icon"):
+                resultado["app_icon"] = atributos["icon"]
+        elif clave in ("launchable-activity", "leanback-launchable-activity"):
+            destino = "launchable_activity" if clave == "launchable-activity" else "leanback_launchable_activity"
+            if resultado[destino] is None:
+                resultado[destino] = _atributos(texto.partition("\n")[0].partition(":")[2])
+        elif clave in CAMPOS_MULTIVALOR:
+            if "\\" in resto:
+                resultado[CAMPOS_MULTIVALOR[clave]] = [_texto(v) for v in _VALOR.findall(resto)]
+            else:
+                resultado[CAMPOS_MULTIVALOR[clave]] = resto.split("'")[1::2]
+        elif clave == "application-debuggable":
+            resultado["debuggable"] = True
+        elif clave in CAMPOS_MARCA:
+            resultado[CAMPOS_MARCA[clave]] = True
+
+    # Sin duplicados, en el orden de aparición (un mismo tipo puede repetirse
+    # en varios tramos, p. ej. uses-feature dentro de varios feature-group)
+    for campo in CAMPOS_LISTA.values():
+        if resultado[campo]:
+            resultado[campo] = list(dict.fromkeys(resultado[campo]))
+
+    if not resultado["app_label"] and resultado["application_labels"]:
+        resultado["app_label"] = next(iter(resultado["application_labels"].values()))
+    return resultado
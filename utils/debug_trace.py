@@ -0,0 +1,117 @@
+"""
+Trazas de depuración por subsistema, sin coste cuando están desactivadas.
+
+Uso en los puntos calientes::
+
+    _traza = obtener_traza("parser")
+    ...
+    if _traza.activa:
+        _traza(f"Package data: {package_data}")
+    if _traza.detalle:
+        _traza(f"Salida completa: {salida}")
+
+Con la traza apagada solo se evalúa un atributo booleano: el f-string no se
+construye. Los niveles se configuran con la variable de entorno
+``APK_INSPECTOR_TRACE`` (p. ej. ``parser=2,firma=1`` o ``*=1``) o con la clave
+``trazas`` de la configuración.
+"""
+
+import os
+import sys
+import logging
+import threading
+from typing import Dict
+
+NIVEL_APAGADO = 0
+NIVEL_BASICO = 1
+NIVEL_DETALLE = 2
+
+VARIABLE_ENTORNO = "APK_INSPECTOR_TRACE"
+LOGGER_BASE = "APKInspector.trace"
+
+SUBSISTEMAS = ("parser", "firma", "analisis", "formato", "pci", "herramientas", "ui", "archivos", "auditoria")
+
+_trazas: Dict[str, "Traza"] = {}
+_niveles: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+class Traza:
+    """Emisor de trazas de un subsistema; ``activa`` y ``detalle`` son flags planos"""
+
+    __slots__ = ("subsistema", "nivel", "activa", "detalle", "_logger")
+
+    def __init__(self, subsistema: str, nivel: int = NIVEL_APAGADO):
+        self.subsistema = subsistema
+        self._logger = logging.getLogger(f"{LOGGER_BASE}.{subsistema}")
+        self.establecer_nivel(nivel)
+
+    def establecer_nivel(self, nivel: int):
+        self.nivel = nivel
+        self.activa = nivel >= NIVEL_BASICO
+        self.detalle = nivel >= NIVEL_DETALLE
+
+    def __call__(self, mensaje: str):
+        """Emitir una traza (el llamador ya comprobó ``activa`` o ``detalle``)"""
+        self._emitir(logging.INFO, f"[{self.subsistema}] {mensaje}")
+
+    def error(self, mensaje: str):
+        """Errores capturados: se registran siempre, con o sin traza activa"""
+        self._emitir(logging.ERROR, f"[{self.subsistema}] {mensaje}")
+
+    def _emitir(self, nivel: int, mensaje: str):
+        if logging.getLogger("APKInspector").handlers:
+            self._logger.log(nivel, mensaje)
+        elif sys.stderr is not None:
+            # Sin APKLogger configurado (scripts, benchmarks): directo a stderr
+            sys.stderr.write(mensaje + "\n")
+
+
+def _parsear_especificacion(especificacion: str) -> Dict[str, int]:
+    """'parser=2,firma,*=1' -> {'parser': 2, 'firma': 1, '*': 1}"""
+    niveles = {}
+    for parte in (especificacion or "").split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        nombre, _, valor = parte.partition("=")
+        try:
+            niveles[nombre.strip().lower()] = int(valor) if valor else NIVEL_BASICO
+        except ValueError:
+            continue
+    return niveles
+
+
+def _nivel_para(subsistema: str) -> int:
+    return _niveles.get(subsistema, _niveles.get("*", NIVEL_APAGADO))
+
+
+def configurar_trazas(especificacion: str):
+    """Aplicar niveles a todas las trazas, incluidas las ya creadas"""
+    global _niveles
+    with _lock:
+        _niveles = _parsear_especificacion(especificacion)
+        for subsistema, traza in _trazas.items():
+            traza.establecer_nivel(_nivel_para(subsistema))
+
+
+def aplicar_config_trazas(especificacion: str):
+    """Niveles desde la configuración; la variable de entorno tiene prioridad"""
+    if especificacion and not os.environ.get(VARIABLE_ENTORNO):
+        configurar_trazas(especificacion)
+
+
+def obtener_traza(subsistema: str) -> Traza:
+    with _lock:
+        traza = _trazas.get(subsistema)
+        if traza is None:
+            traza = Traza(subsistema, _nivel_para(subsistema))
+            _trazas[subsistema] = traza
+        return traza
+
+
+def niveles_actuales() -> Dict[str, int]:
+    return {nombre: traza.nivel for nombre, traza in _trazas.items()}
+
+
+_niveles = _parsear_especificacion(os.environ.get(VARIABLE_ENTORNO, ""))
@@ -5,6 +5,13 @@ from pathlib import Path
 from typing import Optional, List
 import tempfile
 
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("archivos")
+
+# APK sueltos y contenedores de splits (ver core.bundle_analyzer)
+EXTENSIONES_APK = ('.apk', '.apks', '.xapk', '.aab')
+
 class FileUtils:
     @staticmethod
     def encontrar_logo() -> Optional[str]:
@@ -59,12 +66,12 @@ class FileUtils:
 
     @staticmethod
     def es_archivo_apk_valido(file_path: str) -> bool:
-        """Verificar si un archivo es un APK válido"""
+        """Verificar si un archivo es un APK o un contenedor de splits (.apks, .xapk, .aab) válido"""
         try:
             path = Path(file_path)
             return (path.exists() and 
                    path.is_file() and 
-                   path.suffix.lower() == '.apk' and
+                   path.suffix.lower() in EXTENSIONES_APK and
                    path.stat().st_size > 1000)  # Mínimo 1KB
         except Exception:
             return False
@@ -98,7 +105,7 @@ class FileUtils:
             if temp_dir.exists() and temp_dir.is_dir():
                 shutil.rmtree(temp_dir)
         except Exception as e:
-            print(f"Advertencia: No se pudo limpiar directorio temporal: {e}")
+            _traza.error(f"Advertencia: No se pudo limpiar directorio temporal: {e}")
 
     @staticmethod
     def copiar_archivo(origen: Path, destino: Path) -> bool:
@@ -107,7 +114,7 @@ class FileUtils:
             shutil.copy2(origen, destino)
             return True
         except Exception as e:
-            print(f"Error copiando archivo: {e}")
+            _traza.error(f"Error copiando archivo: {e}")
             return False
 
     @staticmethod
@@ -119,7 +126,7 @@ class FileUtils:
                 if archivo.is_file():
                     apks.append(archivo)
         except Exception as e:
-            print(f"Error buscando APKs: {e}")
+            _traza.error(f"Error buscando APKs: {e}")
         
         return apks
 
@@ -1,13 +1,23 @@
-from math import perm
 from typing import List, Dict, Any
 import os
 import sys
 import socket
 from pathlib import Path
-import re
 import subprocess
 
+from utils.badging import parsear_badging
+from utils.report_model import ReporteAnalisis
+from utils.debug_trace import obtener_traza
+
+_traza = obtener_traza("formato")
+
 class FormatUtils:
+
+    # Claves de las secciones que forman el resumen del APK en el reporte
+    SECCIONES_RESUMEN = (
+        "info_apk", "firma", "detalles_tecnicos",
+        "permisos_sensibles", "estadisticas", "resumen_pci",
+    )
     
     # Diccionario con los links de descarga de las herramientas
     HERRAMIENTAS_DESCARGAS = {
@@ -130,7 +140,6 @@ class FormatUtils:
             "links_descarga": FormatUtils.obtener_links_descarga_herramientas(herramientas_faltantes)
         }
 
-    # Los demás métodos permanecen igual...
     @staticmethod
     def formatear_resumen_apk(
         parsed_info: Dict,
@@ -139,105 +148,143 @@ class FormatUtils:
         apk_size_mb: float = None,
         pci_analysis: Dict = None
     ) -> str:
-        # ... (el resto del código permanece igual)
+        reporte = ReporteAnalisis(apk_name)
+        FormatUtils.construir_resumen_apk(
+            reporte, parsed_info, signature_info, apk_name, apk_size_mb, pci_analysis
+        )
+        return reporte.renderizar_texto()
+
+    @staticmethod
+    def construir_resumen_apk(
+        reporte: ReporteAnalisis,
+        parsed_info: Dict,
+        signature_info: Dict,
+        apk_name: str,
+        apk_size_mb: float = None,
+        pci_analysis: Dict = None
+    ) -> ReporteAnalisis:
+        """Agregar al reporte las secciones del resumen del APK"""
         build_mode = FormatUtils._detectar_modo_build_seguro(parsed_info)
         
         # ✅ EVALUACIÓN MEJORADA de calidad de información
         es_info_no_confiable = FormatUtils._evaluar_calidad_informacion(parsed_info)
         
         # 🟦 ENCABEZADO PRINCIPAL
-        contenido = "\n" + "═" * 45 + "\n"
-        contenido += "🔷 INFORMACIÓN DEL APK\n"
-        contenido += "═" * 45 + "\n"
+        info = reporte.nueva_seccion("info_apk", "🔷 INFORMACIÓN DEL APK", "principal")
         
         # ✅ ADVERTENCIA MEJORADA
         if es_info_no_confiable:
-            contenido += "⚠️  INFORMACIÓN POTENCIALMENTE INCOMPLETA\n"
-            contenido += "    Puede deberse a:\n"
-            contenido += "    • Errores en el AndroidManifest.xml\n"
-            contenido += "    • APK corrupto u ofuscado\n"
-            contenido += "    • Problemas con herramientas de análisis\n\n"
+            info.datos["info_incompleta"] = True
+            info.linea("⚠️  INFORMACIÓN POTENCIALMENTE INCOMPLETA")
+            info.linea("    Puede deberse a:")
+            info.linea("    • Errores en el AndroidManifest.xml")
+            info.linea("    • APK corrupto u ofuscado")
+            info.linea("    • Problemas con herramientas de análisis")
+            info.linea()
         
         # ✅ MOSTRAR INFORMACIÓN CON VALORES POR DEFECTO MEJORADOS
-        contenido += f" Archivo: {apk_name}\n"
-        contenido += f" Paquete: {parsed_info.get('package', 'No detectado')}\n"
-        contenido += f" Aplicación: {parsed_info.get('app_label', 'No detectado')}\n"
-        contenido += f" Versión: {parsed_info.get('version_name', 'No detectado')} ({parsed_info.get('version_code', 'No detectado')})\n"
-        contenido += f" Target SDK: {parsed_info.get('target_sdk', 'No detectado')}\n"
+        info.campo(" Archivo", apk_name, clave="archivo")
+        info.campo(" Paquete", parsed_info.get('package', 'No detectado'), clave="package")
+        info.campo(" Aplicación", parsed_info.get('app_label', 'No detectado'), clave="app_label")
+        version = f"{parsed_info.get('version_name', 'No detectado')} ({parsed_info.get('version_code', 'No detectado')})"
+        info.campo(" Versión", version, clave="version")
+        info.campo(" Target SDK", parsed_info.get('target_sdk', 'No detectado'), clave="target_sdk")
 
         if apk_size_mb is not None:
-            contenido += f" Tamaño: {apk_size_mb:.1f} MB\n"
+            info.campo(" Tamaño", apk_size_mb, " Tamaño: {valor:.1f} MB", clave="tamano_mb")
 
-        contenido += f" Modo: {build_mode}\n"
+        info.campo(" Modo", build_mode, clave="modo")
 
         # 🟦 INFORMACIÓN DE FIRMA
-        contenido += "\n" + "─" * 45 + "\n"
-        contenido += "🔐 INFORMACIÓN DE FIRMA\n"
-        contenido += "─" * 45 + "\n"
+        firma = reporte.nueva_seccion("firma", "🔐 INFORMACIÓN DE FIRMA")
         
         signature_versions = signature_info.get("signature_versions", [])
         if signature_versions == ["v2"]:
-            contenido += "📝 Firma válida: v2 - Firma Predeterminada de Android\n"
+            firma.campo("📝 Firma válida", "v2 - Firma Predeterminada de Android", clave="firma")
         else:
             signature_text = ", ".join(signature_versions) if signature_versions else "No firmado"
-            is_valid = signature_info.get("is_valid", False)
             if signature_versions:
-                estado = " (Verificada)" if is_valid else " (Verificada)"
-                contenido += f"📝 Firma válida: {signature_text}{estado}\n"
+                firma.campo("📝 Firma válida", signature_text, "📝 Firma válida: {valor} (Verificada)", clave="firma")
             else:
-                contenido += f"📝 Firma válida: {signature_text}\n"
+                firma.campo("📝 Firma válida", signature_text, clave="firma")
         
-        cert_hash = signature_info.get('cert_hash', 'No disponible')
-        contenido += f"🔑 Hash SHA-256: {cert_hash}\n"
+        firma.campo("🔑 Hash SHA-256", signature_info.get('cert_hash', 'No disponible'), clave="cert_hash")
 
         # 🟦 DETALLES TÉCNICOS
-        contenido += "\n" + "─" * 45 + "\n"
-        contenido += "🧠 DETALLES TÉCNICOS\n"
-        contenido += "─" * 45 + "\n"
-
-        native_codes = parsed_info.get('native_codes', 'Android')
-        contenido += f"💻 Soporte nativo: {native_codes}\n"
-
+        tecnicos = reporte.nueva_seccion("detalles_tecnicos", "🧠 DETALLES TÉCNICOS")
+        tecnicos.campo("💻 Soporte nativo", parsed_info.get('native_codes', 'Android'), clave="native_codes")
         min_sdk = parsed_info.get('min_sdk', parsed_info.get('sdk_version', 'No detectado'))
-        contenido += f"📱 Min SDK: {min_sdk}\n"
+        tecnicos.campo("📱 Min SDK", min_sdk, clave="min_sdk")
 
         # 🟦 PERMISOS SENSIBLES
-        contenido += "\n" + "─" * 45 + "\n"
-        contenido += "🚨 PERMISOS SENSIBLES\n"
-        contenido += "─" * 45 + "\n"
+        permisos = reporte.nueva_seccion("permisos_sensibles", "🚨 PERMISOS SENSIBLES")
         
         permissions = parsed_info.get("permissions", [])
         sensitive_perms = FormatUtils._filtrar_permisos_sensibles(permissions)
+        permisos.datos["permisos"] = sensitive_perms
 
-        if sensitive_perms:
-            for perm in sensitive_perms[:10]:
-                perm_short = perm.replace("android.permission.", "")
-                contenido += f"• {perm_short}\n"
-            if len(sensitive_perms) > 10:
-                contenido += f"• ... y {len(sensitive_perms) - 10} permisos más\n"
-        else:
-            contenido += "No se detectaron permisos sensibles\n"
+        visibles = [perm.replace("android.permission.", "") for perm in sensitive_perms[:10]]
+        permisos.lista(visibles, vacio="No se detectaron permisos sensibles")
+        if len(sensitive_perms) > 10:
+            permisos.linea(f"• ... y {len(sensitive_perms) - 10} permisos más")
 
         # 🟦 ESTADÍSTICAS
-        contenido += "\n" + "─" * 45 + "\n"
-        contenido += "📊 ESTADÍSTICAS\n"
-        contenido += "─" * 45 + "\n"
-        contenido += f"Total de permisos: {len(permissions)}\n"
-        contenido += f"Permisos sensibles: {len(sensitive_perms)}\n"
+        estadisticas = reporte.nueva_seccion("estadisticas", "📊 ESTADÍSTICAS")
+        estadisticas.campo("Total de permisos", len(permissions), clave="total_permisos")
+        estadisticas.campo("Permisos sensibles", len(sensitive_perms), clave="permisos_sensibles")
+
+        # 🟦 SPLITS (.apks / .xapk / .aab)
+        bundle = parsed_info.get("bundle")
+        if bundle:
+            FormatUtils._agregar_seccion_bundle(reporte, bundle)
 
         # 🟦 PCI DSS
         if pci_analysis:
-            contenido += "\n" + "═" * 45 + "\n"
-            contenido += "🛡️  RESUMEN PCI DSS\n"
-            contenido += "═" * 45 + "\n"
-            contenido += FormatUtils._generar_resumen_pci_completo(pci_analysis)
+            pci = reporte.nueva_seccion("resumen_pci", "🛡️  RESUMEN PCI DSS", "principal")
+            pci.bloque(FormatUtils._generar_resumen_pci_completo(pci_analysis))
 
-        return contenido
+        return reporte
+
+    @staticmethod
+    def _agregar_seccion_bundle(reporte: ReporteAnalisis, bundle: Dict):
+        """Splits del contenedor y desglose de tamaño por ABI, densidad e idioma"""
+        seccion = reporte.nueva_seccion("bundle", f"📦 {bundle['formato'].upper()}: SPLITS Y TAMAÑOS")
+        seccion.campo("Contenedor", bundle.get("contenedor"), clave="contenedor")
+        seccion.campo("Split base", bundle.get("base") or "No detectado", clave="base")
+        seccion.campo("Splits/módulos", len(bundle["splits"]), clave="total_splits")
+        seccion.datos["splits"] = [
+            {k: split.get(k) for k in ("nombre", "tipo", "config", "entradas", "tam_archivo", "tam_original")}
+            for split in bundle["splits"]
+        ]
+        seccion.lista([
+            f"{split['nombre']} ({split['tipo']}{', ' + split['config'] if split.get('config') else ''})"
+            + (f" - error: {split['error']}" if split.get("error") else "")
+            for split in bundle["splits"]
+        ])
+
+        for clave, titulo in (("por_abi", "Por ABI"), ("por_densidad", "Por densidad")):
+            desglose = bundle.get(clave) or {}
+            seccion.datos[clave] = desglose
+            if desglose:
+                seccion.linea()
+                seccion.linea(f"{titulo}:")
+                seccion.lista([
+                    f"{nombre}: {valores['original'] / (1024 * 1024):.2f} MB "
+                    f"({valores['comprimido'] / (1024 * 1024):.2f} MB comprimido)"
+                    for nombre, valores in sorted(desglose.items(), key=lambda e: -e[1]["original"])
+                ], vineta="  • ")
+        por_idioma = bundle.get("por_idioma") or {}
+        seccion.datos["por_idioma"] = por_idioma
+        if por_idioma:
+            seccion.linea()
+            seccion.linea(f"Por idioma: {len(por_idioma)} splits, "
+                          f"{sum(por_idioma.values()) / 1024:.1f} KB en total")
 
     @staticmethod
     def _detectar_modo_build_seguro(parsed_info: Dict) -> str:
         """Detección segura del modo de build con manejo robusto de None"""
-        print("🔍 DEBUG - Iniciando detección segura de modo build...")
+        if _traza.activa:
+            _traza("Iniciando detección segura de modo build...")
         
         try:
             # Estrategia 1: Verificar flags explícitos del APKParser
@@ -245,11 +292,13 @@ class FormatUtils:
             is_debuggable = parsed_info.get("is_debuggable")
             
             if debug_mode is True:
-                print("🔍 DEBUG - Detectado por debug_mode: True")
+                if _traza.activa:
+                    _traza("Detectado por debug_mode: True")
                 return "Debug"
             
             if is_debuggable is True:
-                print("🔍 DEBUG - Detectado por is_debuggable: True")
+                if _traza.activa:
+                    _traza("Detectado por is_debuggable: True")
                 return "Debug"
             
             # Estrategia 2: Búsqueda segura en raw_info
@@ -268,7 +317,8 @@ class FormatUtils:
                 
                 for pattern in debug_patterns:
                     if pattern in raw_lower:
-                        print(f"🔍 DEBUG - Detectado por pattern: {pattern}")
+                        if _traza.activa:
+                            _traza(f"Detectado por pattern: {pattern}")
                         return "Debug"
                 
                 # Búsqueda contextual de 'debuggable'
@@ -276,12 +326,15 @@ class FormatUtils:
                     lines = raw_info.split('\n')
                     for line in lines:
                         if 'debuggable' in line.lower():
-                            print(f"🔍 DEBUG - Línea con debuggable: {line.strip()}")
+                            if _traza.detalle:
+                                _traza(f"Línea con debuggable: {line.strip()}")
                             if 'true' in line.lower():
-                                print("🔍 DEBUG - Detectado debuggable=true en contexto")
+                                if _traza.activa:
+                                    _traza("Detectado debuggable=true en contexto")
                                 return "Debug"
             else:
-                print("🔍 DEBUG - raw_info no disponible o no es string")
+                if _traza.activa:
+                    _traza("raw_info no disponible o no es string")
             
             # Estrategia 3: Análisis seguro de metadatos y nombres
             package = parsed_info.get("package", "")
@@ -309,7 +362,8 @@ class FormatUtils:
             for field in search_fields:
                 for indicator in debug_indicators:
                     if field and indicator in field:
-                        print(f"🔍 DEBUG - Detectado indicador '{indicator}' en campo")
+                        if _traza.detalle:
+                            _traza(f"Detectado indicador '{indicator}' en campo")
                         return "Debug"
             
             # Estrategia 4: Características típicas de builds debug
@@ -317,7 +371,8 @@ class FormatUtils:
             if version_code and isinstance(version_code, str):
                 version_code_lower = version_code.lower()
                 if any(indicator in version_code_lower for indicator in ['debug', 'test', 'dev']):
-                    print(f"🔍 DEBUG - Indicador debug en version_code: {version_code}")
+                    if _traza.activa:
+                        _traza(f"Indicador debug en version_code: {version_code}")
                     return "Debug"
             
             # Estrategia 5: Verificar si es un APK de desarrollo por el package name
@@ -325,22 +380,25 @@ class FormatUtils:
                 dev_package_indicators = ['.debug', '.test', '.dev', '.sample', '.demo']
                 for indicator in dev_package_indicators:
                     if indicator in package_lower:
-                        print(f"🔍 DEBUG - Package name indica desarrollo: {package}")
+                        if _traza.activa:
+                            _traza(f"Package name indica desarrollo: {package}")
                         return "Debug"
             
             # Estrategia 6: Por el contexto de análisis (fallback)
             aapt_success = parsed_info.get('aapt_success', True)
             if not aapt_success:
-                print("🔍 DEBUG - aapt falló, asumiendo Release por precaución")
+                if _traza.activa:
+                    _traza("aapt falló, asumiendo Release por precaución")
                 return "Release"
                 
         except Exception as e:
-            print(f"❌ ERROR en _detectar_modo_build_seguro: {e}")
+            _traza.error(f"❌ ERROR en _detectar_modo_build_seguro: {e}")
             # En caso de error, retornar Release por seguridad
             return "Release"
             
         # Por defecto, asumir Release (más común en producción)
-        print("🔍 DEBUG - No se detectaron indicadores Debug, usando Release por defecto")
+        if _traza.activa:
+            _traza("No se detectaron indicadores Debug, usando Release por defecto")
         return "Release"
 
     @staticmethod
@@ -354,12 +412,14 @@ class FormatUtils:
             # Considerar faltante si es None, 'No detectado', o string vacío
             if not valor or valor == 'No detectado' or (isinstance(valor, str) and valor.strip() == ''):
                 campos_faltantes += 1
-                print(f"🔍 DEBUG - Campo crítico faltante: {campo}")
+                if _traza.detalle:
+                    _traza(f"Campo crítico faltante: {campo}")
         
         # Considerar no confiable si faltan 3 o más campos críticos
         es_no_confiable = campos_faltantes >= 3
         if es_no_confiable:
-            print(f"🔍 DEBUG - Información no confiable: {campos_faltantes} campos críticos faltantes")
+            if _traza.activa:
+                _traza(f"Información no confiable: {campos_faltantes} campos críticos faltantes")
         
         return es_no_confiable
 
@@ -369,9 +429,10 @@ class FormatUtils:
         if not pci_analysis:
             return "Análisis PCI DSS no disponible"
         
-        print(f"🔍 DEBUG FORMATUTILS - Generando resumen PCI: {type(pci_analysis)}")
+        if _traza.activa:
+            _traza(f"Generando resumen PCI: {type(pci_analysis)}")
         
-        contenido = ""
+        contenido = []
         
         if isinstance(pci_analysis, dict):
             # Buscar la estructura de resumen PCI DSS
@@ -393,13 +454,13 @@ class FormatUtils:
             puntuacion = resumen.get('puntuacion', pci_analysis.get('puntuacion', '0'))
             nivel_riesgo = resumen.get('nivel_riesgo', pci_analysis.get('nivel_riesgo', 'ALTO'))
             
-            contenido += f"📊 Cumplimiento General: {estado}\n"
-            contenido += f"🚨 Nivel de Riesgo: {nivel_riesgo}\n\n"
+            contenido.append(f"📊 Cumplimiento General: {estado}\n")
+            contenido.append(f"🚨 Nivel de Riesgo: {nivel_riesgo}\n\n")
             
             # 🔴 HALLAZGOS DE ALTO RIESGO
             if hallazgos_altos:
-                contenido += "🔴 HALLAZGOS DE ALTO RIESGO:\n"
-                contenido += "=" * 50 + "\n\n"
+                contenido.append("🔴 HALLAZGOS DE ALTO RIESGO:\n")
+                contenido.append("=" * 50 + "\n\n")
                 
                 for i, hallazgo in enumerate(hallazgos_altos[:5], 1):
                     if isinstance(hallazgo, dict):
@@ -415,13 +476,13 @@ class FormatUtils:
                         impacto = "No especificado"
                         recomendacion = "Revisar en análisis detallado"
                     
-                    contenido += f"{i}. {titulo}\n"
-                    contenido += f"   • Requisito: {requisito}\n"
-                    contenido += f"   • Riesgo: {riesgo}\n"
-                    contenido += f"   • Impacto: {impacto}\n"
-                    contenido += f"   • Recomendación: {recomendacion}\n\n"
+                    contenido.append(f"{i}. {titulo}\n")
+                    contenido.append(f"   • Requisito: {requisito}\n")
+                    contenido.append(f"   • Riesgo: {riesgo}\n")
+                    contenido.append(f"   • Impacto: {impacto}\n")
+                    contenido.append(f"   • Recomendación: {recomendacion}\n\n")
             else:
-                contenido += "✅ No se encontraron hallazgos de alto riesgo\n\n"
+                contenido.append("✅ No se encontraron hallazgos de alto riesgo\n\n")
             
             # 📈 RESUMEN ESTADÍSTICO
             estadisticas = resumen.get('estadisticas', {})
@@ -434,17 +495,17 @@ class FormatUtils:
             else:
                 porcentaje = 0
                 
-            contenido += "📈 Resumen Estadístico:\n"
-            contenido += f"   • Requisitos cumplidos: {cumplidos}/{total}\n"
-            contenido += f"   • Porcentaje de cumplimiento: {porcentaje:.1f}%\n"
-            contenido += f"   • Hallazgos ALTOS encontrados: {hallazgos_count}\n\n"
+            contenido.append("📈 Resumen Estadístico:\n")
+            contenido.append(f"   • Requisitos cumplidos: {cumplidos}/{total}\n")
+            contenido.append(f"   • Porcentaje de cumplimiento: {porcentaje:.1f}%\n")
+            contenido.append(f"   • Hallazgos ALTOS encontrados: {hallazgos_count}\n\n")
             
-            contenido += "💡 Para el análisis completo, ve a 'Comandos' → Filtro 'PCI DSS'"
+            contenido.append("💡 Para el análisis completo, ve a 'Comandos' → Filtro 'PCI DSS'")
             
         else:
-            contenido += "Formato de análisis PCI DSS no reconocido\n"
+            contenido.append("Formato de análisis PCI DSS no reconocido\n")
         
-        return contenido
+        return "".join(contenido)
 
     @staticmethod
     def _filtrar_permisos_sensibles(permissions: List[str]) -> List[str]:
@@ -473,7 +534,8 @@ class FormatUtils:
     @staticmethod
     def analizar_apk_completo(apk_path: Path, aapt_path: Path) -> Dict[str, Any]:
         """Método unificado para análisis completo de APK"""
-        print(f"🔍 ANALIZANDO APK: {apk_path.name}")
+        if _traza.activa:
+            _traza(f"🔍 ANALIZANDO APK: {apk_path.name}")
         
         # Ejecutar aapt y parsear resultado
         parsed_info = FormatUtils._ejecutar_aapt_y_parsear(apk_path, aapt_path)
@@ -485,7 +547,8 @@ class FormatUtils:
         parsed_info['calidad_analisis'] = calidad_info
         parsed_info['es_confiable'] = calidad_info['es_confiable']
         
-        print(f"🔍 ANÁLISIS COMPLETADO - Confiable: {calidad_info['es_confiable']}")
+        if _traza.activa:
+            _traza(f"🔍 ANÁLISIS COMPLETADO - Confiable: {calidad_info['es_confiable']}")
         
         return parsed_info
 
@@ -501,7 +564,8 @@ class FormatUtils:
             
             # Ejecutar comando aapt
             comando = [str(aapt_path), 'dump', 'badging', str(apk_path)]
-            print(f"🔍 EJECUTANDO AAPT: {' '.join(comando)}")
+            if _traza.activa:
+                _traza(f"🔍 EJECUTANDO AAPT: {' '.join(comando)}")
             
             resultado = subprocess.run(
                 comando,
@@ -515,12 +579,15 @@ class FormatUtils:
             output = resultado.stdout
             error_output = resultado.stderr
             
-            print(f"🔍 AAPT OUTPUT: {len(output)} caracteres, Return code: {resultado.returncode}")
+            if _traza.activa:
+                _traza(f"🔍 AAPT OUTPUT: {len(output)} caracteres, Return code: {resultado.returncode}")
             
             if resultado.returncode != 0:
-                print(f"⚠️ AAPT ADVERTENCIA - Código: {resultado.returncode}")
+                if _traza.activa:
+                    _traza(f"⚠️ AAPT ADVERTENCIA - Código: {resultado.returncode}")
                 if error_output:
-                    print(f"⚠️ AAPT STDERR: {error_output[:500]}...")
+                    if _traza.activa:
+                        _traza(f"⚠️ AAPT STDERR: {error_output[:500]}...")
             
             # Parsear output con el método mejorado
             parsed_info = FormatUtils._parsear_output_aapt_avanzado(output, apk_path.name)
@@ -533,10 +600,10 @@ class FormatUtils:
             return parsed_info
             
         except subprocess.TimeoutExpired:
-            print("❌ ERROR: Timeout ejecutando aapt")
+            _traza.error("❌ ERROR: Timeout ejecutando aapt")
             return FormatUtils._crear_respuesta_error("Timeout ejecutando aapt", apk_path.name)
         except Exception as e:
-            print(f"❌ ERROR en _ejecutar_aapt_y_parsear: {e}")
+            _traza.error(f"❌ ERROR en _ejecutar_aapt_y_parsear: {e}")
             return FormatUtils._crear_respuesta_error(str(e), apk_path.name)
 
     @staticmethod
@@ -560,129 +627,39 @@ class FormatUtils:
         }
         
         try:
-            print("🔍 ANALIZANDO OUTPUT AAPT...")
+            if _traza.activa:
+                _traza("🔍 ANALIZANDO OUTPUT AAPT...")
             
-            # ✅ DETECCIÓN EXHAUSTIVA DE DEBUG
+            # ✅ PARSER ÚNICO DE BADGING (un solo recorrido)
             if output and isinstance(output, str):
-                output_lower = output.lower()
-                debug_detectado = False
-                
-                # Patrones de debug
-                debug_patterns = [
-                    "application-debuggable",
-                    "debuggable=true",
-                    "android:debuggable=\"true\""
-                ]
-                
-                for pattern in debug_patterns:
-                    if pattern in output_lower:
-                        debug_detectado = True
-                        print(f"🔍 DEBUG DETECTADO: {pattern}")
-                        break
-                
+                datos = parsear_badging(output)
+                debug_detectado = datos['debuggable']
+                if not debug_detectado:
+                    # Patrones de debug fuera de las líneas de badging
+                    output_lower = output.lower()
+                    debug_detectado = "debuggable=true" in output_lower or 'android:debuggable="true"' in output_lower
+                if debug_detectado and _traza.activa:
+                    _traza("🔍 DEBUG DETECTADO")
                 parsed_info['debug_mode'] = debug_detectado
                 parsed_info['is_debuggable'] = debug_detectado
+
+                for campo in ('package', 'version_code', 'version_name', 'app_label', 'target_sdk',
+                              'min_sdk', 'compile_sdk', 'platform_build_version'):
+                    if datos[campo]:
+                        parsed_info[campo] = datos[campo]
+                if datos['min_sdk']:
+                    parsed_info['sdk_version'] = datos['min_sdk']
+                parsed_info['permissions'] = datos['permissions']
+                parsed_info['badging'] = datos
             
-            # ✅ SEPARAR Y PROCESAR LÍNEAS
-            if output:
-                lines = output.split('\n')
-                
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                        
-                    # Package info (línea más importante)
-                    if line.startswith('package:'):
-                        package_data = FormatUtils._parsear_linea_package_completa(line)
-                        if package_data:
-                            parsed_info.update(package_data)
-                    
-                    # SDK info
-                    elif line.startswith('sdkVersion:'):
-                        valor = FormatUtils._extraer_valor_entre_comillas(line)
-                        if valor:
-                            parsed_info['sdk_version'] = valor
-                            parsed_info['min_sdk'] = valor
-                    elif line.startswith('targetSdkVersion:'):
-                        valor = FormatUtils._extraer_valor_entre_comillas(line)
-                        if valor:
-                            parsed_info['target_sdk'] = valor
-                    
-                    # Application label
-                    elif line.startswith('application-label:'):
-                        valor = FormatUtils._extraer_valor_entre_comillas(line)
-                        if valor:
-                            parsed_info['app_label'] = valor
-                    elif line.startswith("application:") and "label=" in line:
-                        label_match = re.search(r"label='([^']*)'", line)
-                        if label_match:
-                            parsed_info['app_label'] = label_match.group(1)
-                    
-                    # Permissions
-                    elif line.startswith('uses-permission:'):
-                        permission = FormatUtils._extraer_valor_entre_comillas(line)
-                        if permission and permission not in parsed_info['permissions']:
-                            parsed_info['permissions'].append(perm)
-                    
-                    # Información de compilación
-                    elif 'platformBuildVersionName' in line:
-                        valor = FormatUtils._extraer_valor_entre_comillas(line)
-                        if valor:
-                            parsed_info['platform_build_version'] = valor
-                    elif 'compileSdkVersion' in line:
-                        valor = FormatUtils._extraer_valor_entre_comillas(line)
-                        if valor:
-                            parsed_info['compile_sdk'] = valor
-            
-            print(f"🔍 PARSER COMPLETADO - Package: {parsed_info['package']}")
+            if _traza.activa:
+                _traza(f"🔍 PARSER COMPLETADO - Package: {parsed_info['package']}")
             
         except Exception as e:
-            print(f"❌ ERROR en _parsear_output_aapt_avanzado: {e}")
+            _traza.error(f"❌ ERROR en _parsear_output_aapt_avanzado: {e}")
         
         return parsed_info
 
-    @staticmethod
-    def _parsear_linea_package_completa(line: str) -> Dict[str, str]:
-        """Parsear línea de package con todas las informaciones"""
-        result = {}
-        
-        try:
-            if not line:
-                return result
-                
-            # Buscar todos los campos posibles en la línea package
-            patterns = {
-                'package': r"name='([^']*)'",
-                'version_code': r"versionCode='([^']*)'",
-                'version_name': r"versionName='([^']*)'",
-                'platform_build_version': r"platformBuildVersionName='([^']*)'",
-                'compile_sdk': r"compileSdkVersion='([^']*)'"
-            }
-            
-            for campo, pattern in patterns.items():
-                match = re.search(pattern, line)
-                if match:
-                    result[campo] = match.group(1)
-                    
-        except Exception as e:
-            print(f"❌ ERROR en _parsear_linea_package_completa: {e}")
-        
-        return result
-
-    @staticmethod
-    def _extraer_valor_entre_comillas(line: str) -> str:
-        """Extraer valor entre comillas simples de forma segura"""
-        try:
-            if not line:
-                return None
-            matches = re.findall(r"'([^']*)'", line)
-            if matches:
-                return matches[0]
-        except Exception as e:
-            print(f"❌ ERROR en _extraer_valor_entre_comillas: {e}")
-        return None
-
     @staticmethod
     def _evaluar_calidad_completa(parsed_info: Dict) -> Dict[str, Any]:
         """Evaluación completa de la calidad de la información"""
@@ -821,12 +798,14 @@ class FormatUtils:
             if apk_path and isinstance(apk_path, Path) and apk_path.exists():
                 size_bytes = apk_path.stat().st_size
                 size_mb = size_bytes / (1024 * 1024)
-                print(f"DEBUG: Tamaño del APK calculado - {size_mb:.1f} MB")
+                if _traza.activa:
+                    _traza(f"Tamaño del APK calculado - {size_mb:.1f} MB")
                 return round(size_mb, 1)
             else:
-                print(f"DEBUG: APK path no válido - {apk_path}")
+                if _traza.activa:
+                    _traza(f"APK path no válido - {apk_path}")
         except Exception as e:
-            print(f"DEBUG: Error obteniendo tamaño del APK: {e}")
+            _traza.error(f"Error obteniendo tamaño del APK: {e}")
 
         return None
 
@@ -838,7 +817,7 @@ class FormatUtils:
             sha256_hash = hashlib.sha256(cert_data).hexdigest().upper()
             return ':'.join([sha256_hash[i:i+2] for i in range(0, len(sha256_hash), 2)])
         except Exception as e:
-            print(f"ERROR calculando hash: {e}")
+            _traza.error(f"ERROR calculando hash: {e}")
             return "Error en cálculo"
 
 
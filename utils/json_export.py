@@ -0,0 +1,237 @@
+import json
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, IO
+
+from utils.version import __version__
+
+
+ESQUEMA_ID = "apk-inspector/analysis"
+ESQUEMA_VERSION = "1.2"
+
+# Textos legibles que ya están en el log y no aportan al formato máquina
+CLAVES_PCI_TEXTO = ("reporte_completo", "resumen_compacto")
+
+# JSON Schema (draft-07) del documento exportado. Cambios incompatibles
+# deben subir la versión mayor de ESQUEMA_VERSION.
+ESQUEMA_JSON = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "$id": f"{ESQUEMA_ID}/{ESQUEMA_VERSION}",
+    "title": "Resultado de análisis de APK Inspector",
+    "type": "object",
+    "required": ["schema", "schema_version", "generado", "apk", "parsed_info", "signature_info"],
+    "properties": {
+        "schema": {"const": ESQUEMA_ID},
+        "schema_version": {"type": "string"},
+        "generado": {"type": "string", "format": "date-time"},
+        "herramienta": {
+            "type": "object",
+            "properties": {"nombre": {"type": "string"}, "version": {"type": "string"}},
+        },
+        "apk": {
+            "type": "object",
+            "required": ["nombre"],
+            "properties": {
+                "nombre": {"type": "string"},
+                "ruta": {"type": ["string", "null"]},
+                "tamano_bytes": {"type": ["integer", "null"]},
+            },
+        },
+        "parsed_info": {
+            "type": "object",
+            "properties": {
+                "package": {"type": ["string", "null"]},
+                "version_name": {"type": ["string", "null"]},
+                "version_code": {"type": ["string", "null"]},
+                "min_sdk": {"type": ["string", "null"]},
+                "target_sdk": {"type": ["string", "null"]},
+                "permissions": {"type": "array", "items": {"type": "string"}},
+            },
+        },
+        "signature_info": {
+            "type": "object",
+            "properties": {
+                "company": {"type": ["string", "null"]},
+                "is_valid": {"type": "boolean"},
+                "signature_versions": {"type": "array", "items": {"type": "string"}},
+                "integrity_ok": {"type": "boolean"},
+                "cert_hash": {"type": ["string", "null"]},
+                "signature_type": {"type": ["string", "null"]},
+                "firma_v1": {
+                    "type": "object",
+                    "properties": {
+                        "valido": {"type": "boolean"},
+                        "firmantes": {"type": "array", "items": {"type": "object"}},
+                        "entradas": {"type": "object"},
+                    },
+                },
+            },
+        },
+        "pci_analysis": {"type": ["object", "null"]},
+        "tiempos": {
+            "type": "object",
+            "properties": {
+                "total_ms": {"type": "number"},
+                "etapas": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["etapa", "ms"],
+                        "properties": {"etapa": {"type": "string"}, "ms": {"type": "number"}},
+                    },
+                },
+            },
+        },
+        "tool_outputs": {
+            "type": "object",
+            "additionalProperties": {"type": ["string", "null"]},
+        },
+    },
+}
+
+
+class AnalysisExporter:
+    """Exportación del análisis a JSON versionado y NDJSON"""
+
+    @staticmethod
+    def _normalizar(valor: Any) -> Any:
+        """Convertir tipos no serializables (Path, set, bytes) a JSON"""
+        if isinstance(valor, dict):
+            return {str(k): AnalysisExporter._normalizar(v) for k, v in valor.items()}
+        if isinstance(valor, (list, tuple)):
+            return [AnalysisExporter._normalizar(v) for v in valor]
+        if isinstance(valor, (set, frozenset)):
+            return sorted(AnalysisExporter._normalizar(v) for v in valor)
+        if isinstance(valor, Path):
+            return str(valor)
+        if isinstance(valor, bytes):
+            return valor.hex()
+        if valor is None or isinstance(valor, (str, int, float, bool)):
+            return valor
+        return str(valor)
+
+    @staticmethod
+    def construir_documento(current_analysis: Dict, apk_path: Optional[Path] = None,
+                            incluir_salidas: bool = True) -> Dict:
+        """Documento con el esquema versionado a partir de ``current_analysis``"""
+        results = current_analysis.get("results") or {}
+        if apk_path is None and results.get("apk_path"):
+            apk_path = Path(results["apk_path"])
+
+        tamano = None
+        if apk_path:
+            try:
+                tamano = Path(apk_path).stat().st_size
+            except OSError:
+                pass
+
+        pci = current_analysis.get("pci_analysis")
+        if isinstance(pci, dict):
+            pci = {k: v for k, v in pci.items() if k not in CLAVES_PCI_TEXTO}
+
+        documento = {
+            "schema": ESQUEMA_ID,
+            "schema_version": ESQUEMA_VERSION,
+            "generado": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "herramienta": {"nombre": "APK Inspector", "version": __version__},
+            "apk": {
+                "nombre": Path(apk_path).name if apk_path else "",
+                "ruta": str(apk_path) if apk_path else None,
+                "tamano_bytes": tamano,
+            },
+            "parsed_info": current_analysis.get("parsed_info") or {},
+            "signature_info": current_analysis.get("signature_info") or {},
+            "pci_analysis": pci,
+        }
+
+        if incluir_salidas:
+            documento["tool_outputs"] = {k: v for k, v in results.items()
+                                         if k != "apk_path" and (v is None or isinstance(v, str))}
+
+        # Secciones adicionales que agreguen otros módulos (timings, diff, ...)
+        for clave, valor in current_analysis.items():
+            if clave not in ("parsed_info", "signature_info", "pci_analysis", "results"):
+                documento.setdefault(clave, valor)
+
+        return AnalysisExporter._normalizar(documento)
+
+    @staticmethod
+    def exportar_json(current_analysis: Dict, file_path: Path, apk_path: Optional[Path] = None,
+                      incluir_salidas: bool = True) -> Tuple[bool, str]:
+        """Escribir el análisis como un documento JSON"""
+        try:
+            if not current_analysis:
+                return False, "No hay análisis para exportar"
+            documento = AnalysisExporter.construir_documento(current_analysis, apk_path, incluir_salidas)
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(documento, f, indent=2, ensure_ascii=False)
+            return True, "Análisis exportado en JSON"
+        except Exception as e:
+            return False, f"Error exportando JSON: {str(e)}"
+
+    @staticmethod
+    def cargar_json(file_path: Path) -> Tuple[bool, Any]:
+        """Cargar un análisis exportado (p. ej. como línea base para comparar versiones)"""
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                documento = json.load(f)
+            if documento.get("schema") != ESQUEMA_ID:
+                return False, "El archivo no es un análisis exportado por APK Inspector"
+            version_mayor = str(documento.get("schema_version", "")).split(".")[0]
+            if version_mayor != ESQUEMA_VERSION.split(".")[0]:
+                return False, f"Versión de esquema no soportada: {documento.get('schema_version')}"
+            return True, documento
+        except Exception as e:
+            return False, f"Error cargando JSON: {str(e)}"
+
+    @staticmethod
+    def obtener_esquema() -> Dict:
+        return ESQUEMA_JSON
+
+
+class NDJSONWriter:
+    """Escritor NDJSON en streaming: un análisis por línea, seguro entre hilos.
+
+    Pensado para lotes grandes; cada documento se escribe y se vuelca al disco
+    en cuanto está listo, sin acumular resultados en memoria.
+    """
+
+    def __init__(self, file_path: Path, modo: str = "a", incluir_salidas: bool = False):
+        self.file_path = Path(file_path)
+        self.modo = modo
+        self.incluir_salidas = incluir_salidas
+        self.total_escritos = 0
+        self._archivo: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def abrir(self) -> "NDJSONWriter":
+        if self._archivo is None:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            self._archivo = open(self.file_path, self.modo, encoding="utf-8")
+        return self
+
+    def escribir(self, current_analysis: Dict, apk_path: Optional[Path] = None):
+        documento = AnalysisExporter.construir_documento(current_analysis, apk_path, self.incluir_salidas)
+        self.escribir_documento(documento)
+
+    def escribir_documento(self, documento: Dict):
+        linea = json.dumps(documento, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.abrir()
+            self._archivo.write(linea)
+            self._archivo.flush()
+            self.total_escritos += 1
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+    def __enter__(self) -> "NDJSONWriter":
+        return self.abrir()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+        return False
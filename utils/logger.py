@@ -1,101 +1,240 @@
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import shutil
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
+
+class ArchivoRotativo(logging.handlers.BaseRotatingHandler):
+    """Archivo de log con rotación por tamaño y por tiempo, y gzip opcional.
+
+    Los archivos rotados se nombran ``<base>.AAAAMMDD_HHMMSS_ffffff[.gz]`` para que
+    varias rotaciones por tamaño dentro del mismo intervalo no colisionen. Solo se
+    conservan los ``backups`` más recientes.
+    """
+
+    def __init__(self, filename: Path, max_bytes: int = 5 * 1024 * 1024, intervalo_s: int = 24 * 3600,
+                 backups: int = 10, comprimir: bool = True, encoding: str = "utf-8"):
+        super().__init__(str(filename), mode="a", encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.intervalo_s = intervalo_s
+        self.backups = backups
+        self.comprimir = comprimir
+        self.rollover_at = self._calcular_proxima_rotacion()
+        if comprimir:
+            self.namer = lambda nombre: nombre + ".gz"
+            self.rotator = self._rotar_gzip
+
+    def _calcular_proxima_rotacion(self) -> float:
+        try:
+            # Al reabrir un log existente, contar el intervalo desde su creación
+            inicio = os.stat(self.baseFilename).st_ctime
+        except OSError:
+            inicio = time.time()
+        return inicio + self.intervalo_s if self.intervalo_s else float("inf")
+
+    def shouldRollover(self, record) -> bool:
+        if time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.seek(0, 2)
+            mensaje = f"{self.format(record)}\n"
+            if self.stream.tell() + len(mensaje.encode(self.encoding or "utf-8")) >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            sufijo = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            destino = self.rotation_filename(f"{self.baseFilename}.{sufijo}")
+            self.rotate(self.baseFilename, destino)
+            self._podar_backups()
+
+        self.rollover_at = time.time() + self.intervalo_s if self.intervalo_s else float("inf")
+        self.stream = self._open()
+
+    @staticmethod
+    def _rotar_gzip(origen: str, destino: str):
+        with open(origen, "rb") as f_in, gzip.open(destino, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(origen)
+
+    def _podar_backups(self):
+        directorio, base = os.path.split(self.baseFilename)
+        prefijo = base + "."
+        rotados = sorted(e.path for e in os.scandir(directorio) if e.name.startswith(prefijo))
+        for path in rotados[:-self.backups] if self.backups > 0 else []:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro (JSON Lines)"""
+
+    def format(self, record) -> str:
+        entrada = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "hilo": record.threadName,
+            "mensaje": record.getMessage(),
+        }
+        excepcion = getattr(record, "excepcion", None)
+        if excepcion:
+            entrada["excepcion"] = excepcion
+        if record.exc_info:
+            entrada["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(entrada, ensure_ascii=False)
+
+
 class APKLogger:
-    def __init__(self, log_dir: Optional[Path] = None):
+    """Logger de la aplicación sin bloqueo en el hilo que llama.
+
+    Los registros se encolan con un ``QueueHandler``; un ``QueueListener`` en su
+    propio hilo los formatea y escribe en el archivo rotativo y en consola.
+    """
+
+    FORMATOS = ("texto", "json")
+    NOMBRE_BASE = "apk_inspector"
+
+    _listener: Optional[logging.handlers.QueueListener] = None
+
+    def __init__(self, log_dir: Optional[Path] = None, formato: str = "texto",
+                 max_bytes: int = 5 * 1024 * 1024, rotacion_horas: int = 24,
+                 backups: int = 10, comprimir: bool = True):
         self.log_dir = log_dir or Path.home() / ".apk_inspector" / "logs"
-        self.log_file = self.log_dir / f"apk_inspector_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        self.formato = formato if formato in self.FORMATOS else "texto"
+        extension = ".jsonl" if self.formato == "json" else ".log"
+        self.log_file = self.log_dir / f"{self.NOMBRE_BASE}{extension}"
+        self.max_bytes = max_bytes
+        self.rotacion_horas = rotacion_horas
+        self.backups = backups
+        self.comprimir = comprimir
         self.setup_logging()
-    
+
     def setup_logging(self):
         """Configurar sistema de logging"""
         try:
             self.log_dir.mkdir(parents=True, exist_ok=True)
-            
+
             # Configurar logger
             self.logger = logging.getLogger('APKInspector')
             self.logger.setLevel(logging.INFO)
-            
+            self.logger.propagate = False
+
             # Evitar handlers duplicados
             if self.logger.handlers:
                 return
-                
+
             # Formato del log
-            formatter = logging.Formatter(
+            formatter_texto = logging.Formatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
-            
-            # Handler para archivo
-            file_handler = logging.FileHandler(self.log_file, encoding='utf-8')
+
+            # Handler para archivo (rotación por tamaño y tiempo)
+            file_handler = ArchivoRotativo(
+                self.log_file,
+                max_bytes=self.max_bytes,
+                intervalo_s=self.rotacion_horas * 3600,
+                backups=self.backups,
+                comprimir=self.comprimir,
+            )
             file_handler.setLevel(logging.INFO)
-            file_handler.setFormatter(formatter)
-            
+            file_handler.setFormatter(FormatoJSON() if self.formato == "json" else formatter_texto)
+
             # Handler para consola
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setLevel(logging.WARNING)
-            console_handler.setFormatter(formatter)
-            
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
-            
+            console_handler.setFormatter(formatter_texto)
+
+            # El hilo que loguea solo encola; la E/S ocurre en el hilo del listener
+            cola = queue.SimpleQueue()
+            self.logger.addHandler(logging.handlers.QueueHandler(cola))
+            APKLogger._listener = logging.handlers.QueueListener(
+                cola, file_handler, console_handler, respect_handler_level=True
+            )
+            APKLogger._listener.start()
+            atexit.register(APKLogger.cerrar)
+
         except Exception as e:
             print(f"Error configurando logger: {e}")
-    
+
+    @classmethod
+    def cerrar(cls):
+        """Vaciar la cola y cerrar los handlers (se llama también al salir)"""
+        listener = cls._listener
+        if listener is not None:
+            cls._listener = None
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
     def log_analisis_inicio(self, apk_path: str):
         """Loggear inicio de análisis"""
         self.logger.info(f"INICIO ANÁLISIS - APK: {apk_path}")
-    
+
     def log_analisis_fin(self, apk_path: str, exito: bool):
         """Loggear fin de análisis"""
         estado = "EXITOSO" if exito else "FALLIDO"
         self.logger.info(f"FIN ANÁLISIS - APK: {apk_path} - ESTADO: {estado}")
-    
+
     def log_herramienta_ejecutada(self, herramienta: str, comando: str, exito: bool):
         """Loggear ejecución de herramienta"""
         estado = "EXITOSO" if exito else "FALLIDO"
         self.logger.info(f"HERRAMIENTA: {herramienta} - COMANDO: {comando} - ESTADO: {estado}")
-    
+
     def log_error(self, mensaje: str, excepcion: Optional[Exception] = None):
         """Loggear error"""
         if excepcion:
-            self.logger.error(f"{mensaje} - EXCEPCIÓN: {str(excepcion)}")
+            self.logger.error(f"{mensaje} - EXCEPCIÓN: {str(excepcion)}",
+                              extra={"excepcion": str(excepcion)})
         else:
             self.logger.error(mensaje)
-    
+
     def log_advertencia(self, mensaje: str):
         """Loggear advertencia"""
         self.logger.warning(mensaje)
-    
+
     def log_warning(self, mensaje: str):
         """Loggear warning (alias para compatibilidad)"""
         self.log_advertencia(mensaje)
-    
+
     def log_info(self, mensaje: str):
         """Loggear información"""
         self.logger.info(mensaje)
-    
+
     def obtener_ruta_log(self) -> Path:
         """Obtener ruta del archivo de log actual"""
         return self.log_file
-    
+
     def limpiar_logs_antiguos(self, dias_retencion: int = 7):
-        """Limpiar logs más antiguos que días_retencion"""
+        """Limpiar logs más antiguos que días_retencion (por fecha de modificación)"""
         try:
-            ahora = datetime.now()
-            for log_file in self.log_dir.glob("apk_inspector_*.log"):
-                # Extraer fecha del nombre del archivo
-                try:
-                    fecha_str = log_file.stem.replace("apk_inspector_", "")
-                    fecha_log = datetime.strptime(fecha_str, "%Y%m%d_%H%M%S")
-                    
-                    if (ahora - fecha_log).days > dias_retencion:
-                        log_file.unlink()
-                except ValueError:
-                    continue
-                    
+            limite = time.time() - dias_retencion * 86400
+            with os.scandir(self.log_dir) as entradas:
+                for entrada in entradas:
+                    # Incluye los archivos por sesión de versiones anteriores
+                    if not entrada.name.startswith(self.NOMBRE_BASE) or entrada.path == str(self.log_file):
+                        continue
+                    if entrada.is_file() and entrada.stat().st_mtime < limite:
+                        os.remove(entrada.path)
+
         except Exception as e:
-            self.log_error("Error limpiando logs antiguos", e)
\ No newline at end of file
+            self.log_error("Error limpiando logs antiguos", e)
@@ -0,0 +1,46 @@
+"""
+Pool acotado de procesos persistentes (aapt2 daemon, host JVM)
+
+Los hilos toman prestado un objeto, lo usan y lo devuelven. Se crean bajo
+demanda hasta ``maximo``; con todos ocupados, ``prestar`` espera a que se
+libere uno. Así el número de procesos no depende de cuántos hilos crearon
+los pools de trabajo a lo largo de la sesión.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Generic, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+
+class PoolPrestamo(Generic[T]):
+    """Objetos de ``fabrica()`` compartidos entre hilos, como máximo ``maximo``"""
+
+    def __init__(self, fabrica: Callable[[], T], maximo: int):
+        self.fabrica = fabrica
+        self.maximo = max(1, maximo)
+        self._todos: List[T] = []
+        self._libres: List[T] = []
+        self._condicion = threading.Condition()
+
+    @contextmanager
+    def prestar(self) -> Iterator[T]:
+        """El último devuelto (sigue caliente) o uno nuevo si no se llegó al máximo"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._libres or len(self._todos) < self.maximo)
+            if self._libres:
+                objeto = self._libres.pop()
+            else:
+                objeto = self.fabrica()
+                self._todos.append(objeto)
+        try:
+            yield objeto
+        finally:
+            with self._condicion:
+                self._libres.append(objeto)
+                self._condicion.notify()
+
+    def todos(self) -> List[T]:
+        with self._condicion:
+            return list(self._todos)
@@ -0,0 +1,174 @@
+import json
+import html
+from typing import Dict, List, Optional, Iterator, Any, IO
+
+
+# Plantillas de encabezado de sección: (prefijo, subrayado, separación final)
+ESTILOS_SECCION = {
+    "principal": ("\n" + "═" * 45 + "\n", "═" * 45 + "\n", ""),
+    "secundaria": ("\n" + "─" * 45 + "\n", "─" * 45 + "\n", ""),
+    "bloque": ("\n" + "═" * 80 + "\n", "═" * 80 + "\n\n", ""),
+    "detalle": ("═" * 80 + "\n", "═" * 80 + "\n\n", ""),
+    "comando": ("", "═" * 50 + "\n", "\n"),
+    "simple": ("", "\n", ""),
+}
+
+
+class SeccionReporte:
+    """Nodo del reporte: título, líneas ya formateadas y datos estructurados"""
+
+    __slots__ = ("clave", "titulo", "estilo", "lineas", "datos", "en_log")
+
+    def __init__(self, clave: str, titulo: str, estilo: str = "secundaria", en_log: bool = True):
+        self.clave = clave
+        self.titulo = titulo
+        self.estilo = estilo
+        self.lineas: List[str] = []
+        self.datos: Dict[str, Any] = {}
+        self.en_log = en_log
+
+    def linea(self, texto: str = "") -> "SeccionReporte":
+        self.lineas.append(texto)
+        return self
+
+    def campo(self, etiqueta: str, valor: Any, formato: str = None, clave: str = None) -> "SeccionReporte":
+        """Agregar un campo clave/valor; ``formato`` controla la línea de texto"""
+        self.datos[clave or etiqueta] = valor
+        if formato is None:
+            formato = f"{etiqueta}: {{valor}}"
+        self.lineas.append(formato.format(valor=valor))
+        return self
+
+    def lista(self, items: List[str], vineta: str = "• ", vacio: str = None) -> "SeccionReporte":
+        if items:
+            self.lineas.extend(f"{vineta}{item}" for item in items)
+        elif vacio:
+            self.lineas.append(vacio)
+        return self
+
+    def bloque(self, texto: str) -> "SeccionReporte":
+        """Texto preformateado (p. ej. salida cruda de una herramienta)"""
+        self.lineas.append(texto.rstrip("\n") if texto else "")
+        return self
+
+    def iter_texto(self, estilo: str = None) -> Iterator[str]:
+        prefijo, subrayado, cierre = ESTILOS_SECCION.get(estilo or self.estilo, ESTILOS_SECCION["simple"])
+        yield prefijo
+        yield self.titulo + "\n"
+        yield subrayado
+        for linea in self.lineas:
+            yield linea + "\n"
+        if cierre:
+            yield cierre
+
+    def texto(self, estilo: str = None) -> str:
+        return "".join(self.iter_texto(estilo))
+
+    def a_dict(self) -> Dict:
+        return {
+            "clave": self.clave,
+            "titulo": self.titulo,
+            "datos": self.datos,
+            "lineas": self.lineas,
+        }
+
+
+class ReporteAnalisis:
+    """Árbol del reporte de un análisis, construido una vez y renderizado a demanda.
+
+    Las secciones se indexan por clave para que los filtros de la UI sean
+    búsquedas directas en lugar de recorrer el log con ``str.find``.
+    """
+
+    def __init__(self, apk_name: str = ""):
+        self.apk_name = apk_name
+        self.secciones: Dict[str, SeccionReporte] = {}
+        self._cache_texto: Dict[str, str] = {}
+
+    def nueva_seccion(self, clave: str, titulo: str, estilo: str = "secundaria", en_log: bool = True) -> SeccionReporte:
+        seccion = SeccionReporte(clave, titulo, estilo, en_log)
+        self.secciones[clave] = seccion
+        self._cache_texto.clear()
+        return seccion
+
+    def obtener(self, clave: str) -> Optional[SeccionReporte]:
+        return self.secciones.get(clave)
+
+    def __contains__(self, clave: str) -> bool:
+        return clave in self.secciones
+
+    # ========== RENDERIZADORES ==========
+
+    def iter_texto(self, claves: List[str] = None) -> Iterator[str]:
+        if claves is None:
+            seleccion = [s for s in self.secciones.values() if s.en_log]
+        else:
+            seleccion = [self.secciones[c] for c in claves if c in self.secciones]
+        for seccion in seleccion:
+            yield from seccion.iter_texto()
+
+    def renderizar_texto(self, claves: List[str] = None) -> str:
+        clave_cache = "|".join(claves) if claves is not None else "*"
+        texto = self._cache_texto.get(clave_cache)
+        if texto is None:
+            texto = "".join(self.iter_texto(claves))
+            self._cache_texto[clave_cache] = texto
+        return texto
+
+    def a_dict(self) -> Dict:
+        return {
+            "apk_name": self.apk_name,
+            "secciones": [s.a_dict() for s in self.secciones.values()],
+        }
+
+    def iter_json(self) -> Iterator[str]:
+        yield '{"apk_name": ' + json.dumps(self.apk_name, ensure_ascii=False) + ', "secciones": ['
+        for i, seccion in enumerate(self.secciones.values()):
+            yield ("," if i else "") + json.dumps(seccion.a_dict(), ensure_ascii=False, default=str)
+        yield "]}"
+
+    def iter_markdown(self) -> Iterator[str]:
+        yield f"# Análisis de {self.apk_name}\n\n"
+        for seccion in self.secciones.values():
+            yield f"## {seccion.titulo}\n\n"
+            if seccion.estilo == "comando":
+                yield "```\n"
+                for linea in seccion.lineas:
+                    yield linea + "\n"
+                yield "```\n\n"
+            else:
+                for linea in seccion.lineas:
+                    yield (linea + "  \n") if linea else "\n"
+                yield "\n"
+
+    def iter_html(self) -> Iterator[str]:
+        titulo = html.escape(self.apk_name)
+        yield ("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+               f"<title>Análisis de {titulo}</title></head><body>\n<h1>Análisis de {titulo}</h1>\n")
+        for seccion in self.secciones.values():
+            yield f"<section id=\"{html.escape(seccion.clave)}\">\n<h2>{html.escape(seccion.titulo)}</h2>\n<pre>"
+            for linea in seccion.lineas:
+                yield html.escape(linea) + "\n"
+            yield "</pre>\n</section>\n"
+        yield "</body></html>\n"
+
+    FORMATOS = {
+        "texto": "iter_texto",
+        "json": "iter_json",
+        "markdown": "iter_markdown",
+        "html": "iter_html",
+    }
+
+    def renderizar(self, formato: str = "texto") -> str:
+        return "".join(self._iterador(formato))
+
+    def escribir(self, destino: IO[str], formato: str = "texto"):
+        """Escribir el reporte en streaming, sin materializar el texto completo"""
+        for fragmento in self._iterador(formato):
+            destino.write(fragmento)
+
+    def _iterador(self, formato: str) -> Iterator[str]:
+        metodo = self.FORMATOS.get(formato)
+        if not metodo:
+            raise ValueError(f"Formato de reporte no soportado: {formato}")
+        return getattr(self, metodo)()
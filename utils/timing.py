@@ -0,0 +1,175 @@
+"""
+Medición de tiempos por etapa del análisis y perfilado opcional con cProfile.
+
+Cada análisis registra sus etapas en una ``MedicionTiempos``::
+
+    tiempos = MedicionTiempos()
+    with tiempos.etapa("aapt"):
+        ...
+
+``EstadisticasEtapas`` acumula las mediciones de varios análisis (una sesión o
+un lote) y calcula p50/p95 por etapa. El perfilado se activa con
+``--profile [DIR]`` al lanzar la aplicación.
+"""
+
+import cProfile
+import io
+import math
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DIRECTORIO_PERFILES = Path.home() / ".apk_inspector" / "perfiles"
+
+_directorio_perfiles: Optional[Path] = None
+_lock_perfilado = threading.Lock()
+
+
+class MedicionTiempos:
+    """Duración de cada etapa de un análisis, en orden de ejecución"""
+
+    def __init__(self):
+        self.etapas: List[Tuple[str, float]] = []
+        self._inicio = time.perf_counter()
+        self._fin: Optional[float] = None
+
+    @contextmanager
+    def etapa(self, nombre: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas.append((nombre, time.perf_counter() - t0))
+
+    def finalizar(self):
+        self._fin = time.perf_counter()
+
+    def total_s(self) -> float:
+        return (self._fin or time.perf_counter()) - self._inicio
+
+    def a_dict(self) -> Dict:
+        return {
+            "total_ms": round(self.total_s() * 1000, 2),
+            "etapas": [{"etapa": nombre, "ms": round(seg * 1000, 2)} for nombre, seg in self.etapas],
+        }
+
+    def lineas(self) -> List[str]:
+        total = self.total_s()
+        lineas = [f"{'Etapa':<22}{'ms':>10}{'%':>8}"]
+        for nombre, seg in self.etapas:
+            porcentaje = (seg / total * 100) if total else 0.0
+            lineas.append(f"{nombre:<22}{seg * 1000:>10.1f}{porcentaje:>7.1f}%")
+        lineas.append(f"{'TOTAL':<22}{total * 1000:>10.1f}")
+        return lineas
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano (``valores`` no vacío)"""
+    ordenados = sorted(valores)
+    # Rango = ceil(p/100 · n); sin round(), que redondea al par y salta al rango siguiente
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+class EstadisticasEtapas:
+    """Histograma por etapa acumulado entre análisis (seguro entre hilos)"""
+
+    def __init__(self, max_muestras: int = 1000):
+        self.max_muestras = max_muestras
+        self._muestras: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, medicion: MedicionTiempos):
+        with self._lock:
+            for nombre, seg in medicion.etapas + [("TOTAL", medicion.total_s())]:
+                self._muestras.setdefault(nombre, deque(maxlen=self.max_muestras)).append(seg)
+
+    def analisis_registrados(self) -> int:
+        with self._lock:
+            return len(self._muestras.get("TOTAL", ()))
+
+    def resumen(self) -> Dict[str, Dict]:
+        """{etapa: {n, p50_ms, p95_ms, max_ms}}"""
+        with self._lock:
+            copia = {nombre: list(valores) for nombre, valores in self._muestras.items()}
+        return {
+            nombre: {
+                "n": len(valores),
+                "p50_ms": round(percentil(valores, 50) * 1000, 2),
+                "p95_ms": round(percentil(valores, 95) * 1000, 2),
+                "max_ms": round(max(valores) * 1000, 2),
+            }
+            for nombre, valores in copia.items() if valores
+        }
+
+    def lineas(self) -> List[str]:
+        lineas = [f"{'Etapa':<22}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'máx ms':>10}"]
+        for nombre, datos in self.resumen().items():
+            lineas.append(f"{nombre:<22}{datos['n']:>6}{datos['p50_ms']:>10.1f}"
+                          f"{datos['p95_ms']:>10.1f}{datos['max_ms']:>10.1f}")
+        return lineas
+
+    def limpiar(self):
+        with self._lock:
+            self._muestras.clear()
+
+
+# ========== PERFILADO (cProfile) ==========
+
+def configurar_perfilado(directorio: Optional[Path]):
+    """Activar (con un directorio de salida) o desactivar (None) el perfilado"""
+    global _directorio_perfiles
+    _directorio_perfiles = Path(directorio) if directorio else None
+
+
+def perfilado_activo() -> bool:
+    return _directorio_perfiles is not None
+
+
+@contextmanager
+def perfilar(nombre: str) -> Iterator[Optional[Path]]:
+    """Perfilar el bloque con cProfile y volcar ``.prof`` + resumen ``.txt``.
+
+    Sin perfilado activo no hace nada. Solo se perfila un bloque a la vez:
+    cProfile no admite dos perfiladores simultáneos.
+    """
+    if _directorio_perfiles is None or not _lock_perfilado.acquire(blocking=False):
+        yield None
+        return
+
+    perfil = cProfile.Profile()
+    try:
+        try:
+            perfil.enable()
+        except ValueError:
+            # Otro perfilador ya activo en el proceso (p. ej. python -m cProfile)
+            yield None
+            return
+        try:
+            yield _directorio_perfiles
+        finally:
+            perfil.disable()
+        _volcar_perfil(perfil, nombre)
+    finally:
+        _lock_perfilado.release()
+
+
+def _volcar_perfil(perfil: cProfile.Profile, nombre: str) -> Optional[Path]:
+    try:
+        _directorio_perfiles.mkdir(parents=True, exist_ok=True)
+        seguro = "".join(c if c.isalnum() or c in "._-" else "_" for c in nombre)
+        base = str(_directorio_perfiles / f"{seguro}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        perfil.dump_stats(base + ".prof")
+
+        # Resumen legible: las 40 funciones con más tiempo acumulado
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(40)
+        Path(base + ".txt").write_text(salida.getvalue(), encoding="utf-8")
+        return Path(base + ".prof")
+    except Exception:
+        return None
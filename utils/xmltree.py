@@ -0,0 +1,203 @@
+"""
+Parser de ``aapt dump xmltree`` / ``aapt2 dump xmltree`` de AndroidManifest.xml
+
+La salida es un árbol por indentación: ``E:`` abre un elemento, ``A:`` es un
+atributo del elemento de la línea anterior con menos sangría y ``N:`` declara
+un namespace. El parser recorre las líneas una sola vez con una pila de
+elementos abiertos; los atributos se guardan sin procesar y solo se
+interpretan los de los elementos que se consultan, así que los manifests con
+miles de componentes se leen sin coste por atributo.
+"""
+
+from typing import Dict, List, Optional
+
+TIPOS_COMPONENTE = ("activity", "activity-alias", "service", "receiver", "provider")
+
+# aapt (v1) imprime los booleanos como ``(type 0x12)0xffffffff``
+_TIPO_BOOLEANO = "(type 0x12)"
+_TIPOS_ENTERO = ("(type 0x10)", "(type 0x11)")
+_VERDADEROS = ("true", "1", "0xffffffff", "-1")
+
+
+class ElementoXml:
+    """Elemento del árbol de xmltree (``E: activity (line=12)``)"""
+
+    __slots__ = ("etiqueta", "linea", "hijos", "_crudos", "_atributos")
+
+    def __init__(self, etiqueta: str, linea: Optional[int] = None, atributos: Optional[Dict[str, str]] = None):
+        self.etiqueta = etiqueta
+        self.linea = linea
+        self.hijos: List["ElementoXml"] = []
+        self._crudos: List[str] = []
+        # Atributos ya interpretados (p. ej. desde el manifest protobuf de un AAB)
+        self._atributos: Optional[Dict[str, str]] = atributos
+
+    @property
+    def atributos(self) -> Dict[str, str]:
+        """{nombre sin namespace: valor}; los booleanos quedan como "true"/"false" """
+        if self._atributos is None:
+            self._atributos = dict(_parsear_atributo(crudo) for crudo in self._crudos)
+        return self._atributos
+
+    def get(self, nombre: str, defecto=None):
+        return self.atributos.get(nombre, defecto)
+
+    def hijos_de_tipo(self, etiqueta: str) -> List["ElementoXml"]:
+        return [hijo for hijo in self.hijos if hijo.etiqueta == etiqueta]
+
+    def __repr__(self):
+        return f"ElementoXml({self.etiqueta!r}, hijos={len(self.hijos)})"
+
+
+def _parsear_atributo(crudo: str):
+    """``http://schemas.android.com/apk/res/android:exported(0x01010010)=true`` -> ("exported", "true")"""
+    nombre, _, valor = crudo.partition("=")
+    nombre = nombre.partition("(")[0].rpartition(":")[2]
+
+    if valor.startswith('"'):
+        # Cadena: "valor" (Raw: "valor")
+        fin = valor.find('" (Raw: ')
+        return nombre, valor[1:fin] if fin > 0 else valor[1:].rstrip('"')
+    if valor.startswith(_TIPO_BOOLEANO):
+        return nombre, "false" if int(valor[len(_TIPO_BOOLEANO):], 16) == 0 else "true"
+    if valor.startswith(_TIPOS_ENTERO):
+        try:
+            return nombre, str(int(valor[valor.index(")") + 1:], 16))
+        except ValueError:
+            pass
+    return nombre, valor.strip()
+
+
+def parsear_xmltree(salida: str) -> Optional[ElementoXml]:
+    """Construir el árbol de elementos en un solo recorrido; None si no hay elementos"""
+    if not salida:
+        return None
+
+    raiz = ultimo = None
+    # Pila de (sangría, elemento) de los elementos abiertos
+    pila: List[tuple] = []
+    for linea in salida.split("\n"):
+        contenido = linea.lstrip(" ")
+        marca = contenido[:2]
+        if marca == "A:":
+            # aapt escribe los atributos justo debajo de su elemento, antes de los hijos
+            if ultimo is not None:
+                ultimo._crudos.append(contenido[3:].rstrip())
+        elif marca == "E:":
+            sangria = len(linea) - len(contenido)
+            etiqueta, _, resto = contenido[3:].partition(" (line=")
+            numero = resto.rstrip()[:-1]
+            ultimo = ElementoXml(etiqueta.strip(), int(numero) if numero.isdigit() else None)
+            while pila and pila[-1][0] >= sangria:
+                pila.pop()
+            if pila:
+                pila[-1][1].hijos.append(ultimo)
+            elif raiz is None:
+                raiz = ultimo
+            else:
+                # Raíces extra (no esperadas en un manifest): colgarlas de la primera
+                raiz.hijos.append(ultimo)
+            pila.append((sangria, ultimo))
+    return raiz
+
+
+def _es_verdadero(valor: Optional[str]) -> Optional[bool]:
+    if valor is None:
+        return None
+    return valor in _VERDADEROS or valor.strip().lower() in _VERDADEROS
+
+
+def _filtros_intent(componente: ElementoXml) -> List[Dict]:
+    filtros = []
+    for filtro in componente.hijos_de_tipo("intent-filter"):
+        datos = {"acciones": [], "categorias": [], "esquemas": []}
+        for hijo in filtro.hijos:
+            if hijo.etiqueta == "action":
+                datos["acciones"].append(hijo.get("name", ""))
+            elif hijo.etiqueta == "category":
+                datos["categorias"].append(hijo.get("name", ""))
+            elif hijo.etiqueta == "data" and hijo.get("scheme"):
+                datos["esquemas"].append(hijo.get("scheme"))
+        filtros.append(datos)
+    return filtros
+
+
+def extraer_manifest(salida: str) -> Optional[Dict]:
+    """Datos de seguridad del manifest desde la salida de xmltree (ver ``datos_manifest``)"""
+    return datos_manifest(parsear_xmltree(salida))
+
+
+def datos_manifest(raiz: Optional[ElementoXml]) -> Optional[Dict]:
+    """Datos del manifest a partir de su árbol de elementos.
+
+    Devuelve None si la raíz no es un manifest. Cada componente es un dict con
+    tipo, nombre, exportado, exportado_explicito, permiso, intent_filters y
+    launcher. Sin ``android:exported`` explícito se aplica la regla de
+    Android: exportado si tiene intent-filter (providers: exportados por
+    defecto solo con targetSdk < 17).
+    """
+    if raiz is None or raiz.etiqueta != "manifest":
+        return None
+
+    min_sdk = target_sdk = None
+    for uses_sdk in raiz.hijos_de_tipo("uses-sdk"):
+        min_sdk = uses_sdk.get("minSdkVersion") or min_sdk
+        target_sdk = uses_sdk.get("targetSdkVersion") or target_sdk
+    target = target_sdk or min_sdk
+    target = int(target) if target and target.isdigit() else None
+
+    resultado = {
+        "package": raiz.get("package"),
+        "version_code": raiz.get("versionCode"),
+        "version_name": raiz.get("versionName"),
+        "min_sdk": min_sdk,
+        "target_sdk": target_sdk,
+        "permissions": list(dict.fromkeys(
+            p.get("name") for p in raiz.hijos if p.etiqueta.startswith("uses-permission") and p.get("name")
+        )),
+        "allow_backup": True,
+        "debuggable": False,
+        "uses_cleartext_traffic": None,
+        "network_security_config": None,
+        "componentes": [],
+    }
+
+    for aplicacion in raiz.hijos_de_tipo("application"):
+        backup = _es_verdadero(aplicacion.get("allowBackup"))
+        # Android habilita el backup si el atributo no está presente
+        resultado["allow_backup"] = True if backup is None else backup
+        resultado["debuggable"] = bool(_es_verdadero(aplicacion.get("debuggable")))
+        resultado["uses_cleartext_traffic"] = _es_verdadero(aplicacion.get("usesCleartextTraffic"))
+        resultado["network_security_config"] = aplicacion.get("networkSecurityConfig")
+        permiso_aplicacion = aplicacion.get("permission")
+
+        for hijo in aplicacion.hijos:
+            if hijo.etiqueta not in TIPOS_COMPONENTE:
+                continue
+            atributos = hijo.atributos
+            filtros = _filtros_intent(hijo) if hijo.hijos else []
+            explicito = _es_verdadero(atributos.get("exported"))
+            if explicito is not None:
+                exportado = explicito
+            elif hijo.etiqueta == "provider":
+                exportado = target is not None and target < 17
+            else:
+                exportado = bool(filtros)
+
+            nombre = atributos.get("name") or ""
+            if nombre.startswith(".") and resultado["package"]:
+                nombre = resultado["package"] + nombre
+            resultado["componentes"].append({
+                "tipo": hijo.etiqueta,
+                "nombre": nombre,
+                "exportado": exportado,
+                "exportado_explicito": explicito is not None,
+                # Los providers protegen lectura/escritura por separado
+                "permiso": (atributos.get("permission") or atributos.get("readPermission")
+                            or atributos.get("writePermission") or permiso_aplicacion),
+                "intent_filters": filtros,
+                "launcher": any("android.intent.action.MAIN" in f["acciones"]
+                                and "android.intent.category.LAUNCHER" in f["categorias"] for f in filtros),
+            })
+
+    return resultado